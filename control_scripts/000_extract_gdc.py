@@ -1,15 +1,13 @@
 #!/usr/bin/env python3
 
-from cda_etl.extract.gdc.gdc_extractor import GDC_extractor
+from cda_etl.extract.gdc.gdc_extractor import extract_endpoints_in_parallel
 
 endpoint_list = [ 'files', 'cases', 'projects', 'annotations' ]
 
-for endpoint in endpoint_list:
-    
-    extractor = GDC_extractor( endpoint )
-
-    extractor.extract()
-
-print( "\nDon't forget to ensure that a harmonization_maps/ directory is in place before running the next script." )
+# Endpoints are extracted concurrently (one process each); merged output is assembled once all of them are done.
 
+if __name__ == '__main__':
+    
+    extract_endpoints_in_parallel( endpoint_list )
 
+    print( "\nDon't forget to ensure that a harmonization_maps/ directory is in place before running the next script." )
@@ -28,7 +28,6 @@ target_tables = {
 loader = CDA_loader()
 
 # Compute X_nulls tables for all target tables.
-for target_table in target_tables:
-    loader.make_null_TSV( tsv_dir, target_table )
+loader.make_null_TSVs( tsv_dir, sorted( target_tables ) )
 
 
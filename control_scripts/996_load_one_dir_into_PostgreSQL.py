@@ -0,0 +1,52 @@
+#!/usr/bin/env python3 -u
+
+import os
+import sys
+
+from os import path
+
+from cda_etl.load.cda_loader import CDA_loader, DEFAULT_LOAD_JOBS
+
+# Alternative to 997_sqlify_one_dir.py + 998_upload_to_Cloud_SQL_instance.bash: stream
+# CDA TSVs directly into a PostgreSQL database (e.g. via the Cloud SQL Auth Proxy, or a
+# local instance) without writing or uploading intermediate SQL files. The database
+# password is read from the PGPASSWORD environment variable.
+
+# ARGUMENTS
+
+usage = f"\n   Usage: {sys.argv[0]} <input CDA-formatted TSV directory> <database host> <database port> <database name> <database username> [--jobs <number of tables to load at once>]\n"
+
+if len( sys.argv ) not in { 6, 8 } or len( sys.argv ) == 8 and ( sys.argv[6] != '--jobs' or not sys.argv[7].isdigit() or int( sys.argv[7] ) < 1 ):
+    
+    sys.exit( usage )
+
+tsv_dir = sys.argv[1]
+
+if not path.isdir( tsv_dir ) or not sys.argv[3].isdigit():
+    
+    sys.exit( usage )
+
+connection_parameters = {
+    
+    'host': sys.argv[2],
+    'port': int( sys.argv[3] ),
+    'database': sys.argv[4],
+    'user': sys.argv[5],
+    'password': os.environ.get( 'PGPASSWORD', None )
+}
+
+jobs = int( sys.argv[7] ) if len( sys.argv ) == 8 else DEFAULT_LOAD_JOBS
+
+# EXECUTION
+
+loader = CDA_loader()
+
+# Make column_metadata.tsv.
+
+loader.make_column_metadata_TSV( tsv_dir )
+
+# Drop indexes and constraints, replace all table data with the contents of the input TSVs, and rebuild indexes and constraints.
+
+loader.load_dir_to_postgres( tsv_dir, connection_parameters, jobs=jobs )
+
+
@@ -4,72 +4,43 @@ import sys
 
 from os import makedirs, path
 
-from cda_etl.lib import get_column_metadata
 from cda_etl.load.cda_loader import CDA_loader
 
-# ARGUMENT
+# ARGUMENTS
 
-if len( sys.argv ) != 2:
-    
-    sys.exit( f"\n   Usage: {sys.argv[0]} <input CDA-formatted TSV directory>\n" )
-
-tsv_dir = sys.argv[1]
-
-if not path.isdir( tsv_dir ):
-    
-    sys.exit( f"\n   Usage: {sys.argv[0]} <input CDA-formatted TSV directory>\n" )
+# With --delta-from, only generate SQL for the differences between `tsv_dir` and the
+# (snapshotted) directory of TSVs that was last loaded into the database.
 
-output_file = path.join( tsv_dir, 'column_metadata.tsv' )
+usage = f"\n   Usage: {sys.argv[0]} <input CDA-formatted TSV directory> [--delta-from <previously loaded CDA-formatted TSV directory>]\n"
 
-column_metadata_fields = [
+if len( sys.argv ) not in { 2, 4 } or len( sys.argv ) == 4 and sys.argv[2] != '--delta-from':
     
-    'cda_table',
-    'cda_column',
-    'column_type',
-    'summary_returns',
-    'data_returns',
-    'process_before_display',
-    'virtual_table'
-]
+    sys.exit( usage )
 
-# EXECUTION
-
-# Make column_metadata.tsv.
+tsv_dir = sys.argv[1]
 
-column_metadata = get_column_metadata()
+previous_tsv_dir = sys.argv[3] if len( sys.argv ) == 4 else None
 
-with open( output_file, 'w' ) as OUT:
+if not path.isdir( tsv_dir ) or previous_tsv_dir is not None and not path.isdir( previous_tsv_dir ):
     
-    print( *column_metadata_fields, sep='\t', file=OUT )
+    sys.exit( usage )
 
-    for table_name in sorted( column_metadata ):
-        
-        # Python 3 preserves insert order for dicts. That means column data will be displayed
-        # in the order in which columns are listed in the definition (in lib.py) of
-        # get_column_metadata(). Handy. Also worth noting because it's not obvious.
-
-        for column_name in column_metadata[table_name]:
-            
-            current_record = column_metadata[table_name][column_name]
-
-            process_before_display = ''
-
-            if 'process_before_display' in current_record:
-                
-                process_before_display = current_record['process_before_display']
+# EXECUTION
 
-            virtual_table = ''
+loader = CDA_loader()
 
-            if 'virtual_table' in current_record:
-                
-                virtual_table = current_record['virtual_table']
+# Make column_metadata.tsv.
 
-            print( *[ table_name, column_name, current_record['column_type'], current_record['summary_returns'], current_record['data_returns'], process_before_display, virtual_table ], sep='\t', file=OUT )
+loader.make_column_metadata_TSV( tsv_dir )
 
 # Transform all input TSVs to SQL and make the pre- and postprocessing scripts to manage index destruction/reconstruction.
 
-loader = CDA_loader()
+if previous_tsv_dir is None:
+    
+    loader.transform_dir_to_SQL( tsv_dir )
 
-loader.transform_dir_to_SQL( tsv_dir )
+else:
+    
+    loader.transform_dir_to_delta_SQL( tsv_dir, previous_tsv_dir )
 
 
@@ -0,0 +1,652 @@
+import re
+import sys
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from operator import itemgetter
+from os import cpu_count, listdir, makedirs, path
+from shutil import copy
+
+from cda_etl.external_sort import sort_lines
+from cda_etl.lib import deduplicate_and_sort_unsorted_file_with_header, get_universal_value_deletion_patterns
+from cda_etl.tsv_reader import DEFAULT_BUFFER_SIZE, TSV_reader
+
+# Default number of worker processes used to rewrite aliases in non-merged tables, one table per worker at a time.
+
+DEFAULT_UPDATE_JOBS = min( 4, cpu_count() or 1 )
+
+# Approximate size (in bytes) of the chunks of rows those workers read, rewrite and write at once.
+
+UPDATE_CHUNK_SIZE = 4 * 1024 * 1024
+
+def _record_id( line ):
+    
+    """
+    Sort key: a TSV line's first field (its record ID).
+    """
+
+    return line.split( '\t', 1 )[0].rstrip( '\n' )
+
+def _merge_group_key( line ):
+    
+    """
+    Sort key for tagged to-merge lines ( target record ID, to-merge alias, original line ): ( target record ID, to-merge alias ).
+    """
+
+    fields = line.split( '\t', 2 )
+
+    return ( fields[0], fields[1].rstrip( '\n' ) )
+
+def _last_line_per_id( sorted_lines, key=_record_id ):
+    
+    """
+    Given lines stably sorted by `key`, yield the last line of each run of lines sharing a key -- i.e.
+    the line that would have survived loading the (unsorted) lines into a dict keyed the same way.
+    """
+
+    for record_key, lines in groupby( sorted_lines, key=key ):
+        
+        yield deque( lines, maxlen=1 )[0]
+
+# Alias-replacement map ( replace_with[table][old alias] = new alias ) for alias-rewriting worker processes; set once per worker by _init_update_worker().
+
+_worker_replace_with = None
+
+def _init_update_worker( replace_with ):
+    
+    global _worker_replace_with
+
+    _worker_replace_with = replace_with
+
+def _update_table( input_files, output_file, alias_column_pattern, replace_with=None ):
+    
+    """
+    Concatenate the data rows of `input_files` into `output_file` (under the first file's header), replacing merged-away
+    values in every column that holds aliases for a table in `replace_with` (by default, the map this worker process
+    was started with). Rows are streamed through in chunks of about UPDATE_CHUNK_SIZE bytes. Returns True if any column
+    needed updating, False if rows were copied verbatim.
+    """
+
+    if replace_with is None:
+        
+        replace_with = _worker_replace_with
+
+    updates = None
+
+    with open( output_file, 'w' ) as OUT:
+        
+        for input_file in input_files:
+            
+            with open( input_file, buffering=DEFAULT_BUFFER_SIZE ) as IN:
+                
+                header = next( IN )
+
+                # The first input's header determines output columns (and which of them need updating) for all inputs.
+
+                if updates is None:
+                    
+                    column_names = header.rstrip( '\n' ).split( '\t' )
+
+                    print( *column_names, sep='\t', file=OUT )
+
+                    updates = list()
+
+                    for index, column_name in enumerate( column_names ):
+                        
+                        match_list = re.findall( alias_column_pattern, column_name )
+
+                        if len( match_list ) > 0 and match_list[0] in replace_with:
+                            
+                            updates.append( ( index, replace_with[match_list[0]] ) )
+
+                chunk = IN.readlines( UPDATE_CHUNK_SIZE )
+
+                while len( chunk ) > 0:
+                    
+                    if len( updates ) == 0:
+                        
+                        # Just copy data rows on over without modification.
+
+                        OUT.write( ''.join( [ line if line.endswith( '\n' ) else line + '\n' for line in chunk ] ) )
+
+                    else:
+                        
+                        # Copy rows, substituting all target alias values as needed.
+
+                        output_lines = list()
+
+                        for line in chunk:
+                            
+                            values = line.rstrip( '\n' ).split( '\t' )
+
+                            for ( index, replacements ) in updates:
+                                
+                                if values[index] in replacements:
+                                    
+                                    values[index] = replacements[values[index]]
+
+                            output_lines.append( '\t'.join( values ) + '\n' )
+
+                        OUT.write( ''.join( output_lines ) )
+
+                    chunk = IN.readlines( UPDATE_CHUNK_SIZE )
+
+    return len( updates ) > 0
+
+class CDA_merger:
+    
+    """
+    Merges one dataset's CDA TSVs (the "to-merge" dataset) into the CDA TSVs built by all previous
+    merges (the "last-merged" dataset), as configured by cda_etl.aggregate.`phase`.config.
+
+    `project` and `subject` records named in the phase's merge maps are combined (provenance flags
+    OR-ed together; first non-null value wins, with clashes logged); all other tables are copied,
+    with aliases of merged records updated to their surviving values.
+
+    Both sides of each merged table are streamed in ID order (external sorts keep memory bounded)
+    and joined with a sort-merge join, so at most one group of to-be-merged records is held in
+    memory at any one time. Non-merged tables are updated concurrently, `jobs` at a time.
+    """
+
+    def __init__( self, phase, jobs=DEFAULT_UPDATE_JOBS ):
+        
+        phase_config = __import__( f"cda_etl.aggregate.{phase}.config", fromlist=[None] )
+
+        # Short name of the dataset (or merged set of datasets) we're merging into, as used
+        # in merge-map and log file names and in merge-map column names.
+
+        self.last_merged_dataset_name = phase_config.last_merged_dataset_name
+
+        self.last_merged_cda_tsv_dir = phase_config.last_merged_cda_tsv_dir
+
+        self.to_merge_dataset_name = phase_config.to_merge_dataset_name
+
+        self.to_merge_cda_tsv_dir = phase_config.to_merge_cda_tsv_dir
+
+        self.tsv_output_dir = phase_config.tsv_output_dir
+
+        # Which columns hold aliases for records in which tables: the pattern's first group captures the table name.
+
+        self.alias_column_pattern = phase_config.alias_column_pattern
+
+        # Tables we don't copy (from the last-merged dataset, or from the to-merge dataset when it's the only one that has them).
+
+        self.tables_to_skip_from_last_merged = phase_config.tables_to_skip_from_last_merged
+
+        self.tables_to_skip_from_to_merge_only = phase_config.tables_to_skip_from_to_merge_only
+
+        # How many tables to update (rewrite aliases in) at once.
+
+        self.jobs = jobs
+
+        self.last_merged_upstream_identifiers_tsv = path.join( self.last_merged_cda_tsv_dir, 'upstream_identifiers.tsv' )
+
+        self.to_merge_upstream_identifiers_tsv = path.join( self.to_merge_cda_tsv_dir, 'upstream_identifiers.tsv' )
+
+        self.upstream_identifiers_output_tsv = path.join( self.tsv_output_dir, 'upstream_identifiers.tsv' )
+
+        map_root = path.join( 'auxiliary_metadata', '__aggregation_logs' )
+
+        self.merge_map = {
+            
+            'project' : path.join( map_root, 'projects', f"{self.to_merge_dataset_name}_CDA_projects_merged_into_{self.last_merged_dataset_name}_CDA_projects.tsv" ),
+            'subject' : path.join( map_root, 'subjects', f"{self.to_merge_dataset_name}_CDA_subjects_merged_into_{self.last_merged_dataset_name}_CDA_subjects.tsv" )
+        }
+
+        self.duplicates_possible = {
+            
+            'project_in_project.tsv',
+            'subject_in_project.tsv',
+            'upstream_identifiers.tsv'
+        }
+
+        # These may have groups of rows that are duplicates of one another except for CDA-assigned IDs. Collapse each such group of rows into a single row.
+
+        self.duplicates_possible_modulo_ids = {
+            
+            'observation.tsv',
+            'treatment.tsv'
+        }
+
+        # ETL metadata.
+
+        self.aux_value_output_dir = path.join( map_root, 'values' )
+
+        self.data_clash_log = {
+            
+            'project': path.join( self.aux_value_output_dir, f"{self.to_merge_dataset_name}_into_{self.last_merged_dataset_name}_project_merge_clashes.all_fields.tsv" ),
+            'subject': path.join( self.aux_value_output_dir, f"{self.to_merge_dataset_name}_into_{self.last_merged_dataset_name}_subject_merge_clashes.all_fields.tsv" )
+        }
+
+        # Enumerate (case-insensitive, space-collapsed) values that should be deleted
+        # wherever they are found in search metadata, to guide value replacement
+        # decisions in the event of clashes.
+
+        self.delete_everywhere = get_universal_value_deletion_patterns()
+
+        # Alias substitutions, by table: replace_with[table][to-merge alias] = last-merged alias, and
+        # map_targets[table][last-merged alias] = { all to-merge aliases merging into it }.
+
+        self.replace_with = dict()
+
+        self.map_targets = dict()
+
+        for output_dir in [ self.tsv_output_dir, self.aux_value_output_dir ]:
+            
+            if not path.exists( output_dir ):
+                
+                makedirs( output_dir )
+
+    def merge( self ):
+        
+        self.load_merge_maps()
+
+        for table in sorted( self.merge_map ):
+            
+            self.merge_table( table )
+
+        tables_to_update = list()
+
+        completed_files = set()
+
+        for file_basename in sorted( listdir( self.last_merged_cda_tsv_dir ) ):
+            
+            if re.search( r'\.tsv$', file_basename ) is not None:
+                
+                table = re.sub( r'^(.*)\.tsv$', r'\1', file_basename )
+
+                if table not in self.merge_map and table not in self.tables_to_skip_from_last_merged:
+                    
+                    tables_to_update.append( ( file_basename, False ) )
+
+                    completed_files.add( file_basename )
+
+        for file_basename in sorted( listdir( self.to_merge_cda_tsv_dir ) ):
+            
+            if file_basename not in completed_files and re.search( r'\.tsv$', file_basename ) is not None:
+                
+                table = re.sub( r'^(.*)\.tsv$', r'\1', file_basename )
+
+                if table not in self.merge_map and table not in self.tables_to_skip_from_to_merge_only:
+                    
+                    tables_to_update.append( ( file_basename, True ) )
+
+        self.update_tables( tables_to_update )
+
+        self.merge_upstream_identifiers()
+
+        self.deduplicate_output()
+
+    def load_merge_maps( self ):
+        
+        for table in sorted( self.merge_map ):
+            
+            self.replace_with[table] = dict()
+
+            self.map_targets[table] = dict()
+
+            map_file = self.merge_map[table]
+
+            from_column = f"{self.to_merge_dataset_name}_{table}_alias"
+
+            with_column = f"{self.last_merged_dataset_name}_{table}_alias"
+
+            to_column = f"new_{table}_alias"
+
+            with TSV_reader( map_file ) as IN:
+                
+                if not IN.has_columns( from_column, with_column, to_column ):
+                    
+                    sys.exit( f"FATAL: One or more of expected columns [ '{from_column}', '{with_column}', '{to_column}' ] not present in {map_file}; cannot continue, aborting." )
+
+                for ( from_alias, with_alias, to_alias ) in IN.rows( [ from_column, with_column, to_column ] ):
+                    
+                    if with_alias != to_alias:
+                        
+                        sys.exit( f"FATAL: Map file {map_file} has different values between columns '{with_column}' and '{to_column}'; this is unexpected, please write code to handle this situation. Aborting." )
+
+                    self.replace_with[table][from_alias] = with_alias
+
+                    if with_alias not in self.map_targets[table]:
+                        
+                        self.map_targets[table][with_alias] = set()
+
+                    self.map_targets[table][with_alias].add( from_alias )
+
+    def is_slated_for_deletion( self, value ):
+        
+        return re.sub( r'\s', r'', value.strip().lower() ) in self.delete_everywhere
+
+    def merge_table( self, table ):
+        
+        """
+        Merge `table` records from the to-merge dataset into their last-merged counterparts, as directed by
+        the merge map. Output: every last-merged record (merged or not) in ID order, then every unmerged
+        to-merge record in ID order. Value clashes are logged to self.data_clash_log[table] as we go.
+
+        ASSUMPTION (safe at time of writing): Tables in this pass will not contain
+        foreign keys (aliases) whose values might need updating due to their
+        own (referenced entities') merges: i.e., only `id` and `id_alias` columns
+        will be used to establish whether and how to merge each record, with all
+        other fields subject to value-based data merging rules (generally, first
+        non-null value wins, although please do explicitly check the current
+        rules if it matters).
+        """
+
+        print( f"Merging data for {table}...", end='', file=sys.stderr )
+
+        last_merged_input_file = path.join( self.last_merged_cda_tsv_dir, table + '.tsv' )
+
+        to_merge_input_file = path.join( self.to_merge_cda_tsv_dir, table + '.tsv' )
+
+        output_file = path.join( self.tsv_output_dir, table + '.tsv' )
+
+        map_targets = self.map_targets[table]
+
+        # Classify columns once, up front. Output columns (for records from both datasets) are those of the last-merged table.
+
+        with TSV_reader( last_merged_input_file ) as IN:
+            
+            column_names = IN.column_names
+
+            last_merged_values = itemgetter( *[ IN.column_index( column_name ) for column_name in column_names ] )
+
+            id_index = IN.column_index( 'id' )
+
+            alias_index = IN.column_index( 'id_alias' )
+
+            # Which last-merged record does each group of to-merge records merge into? (We join on
+            # record IDs, because that's the order in which we'll be walking the last-merged table.)
+
+            target_id = dict()
+
+            for values in IN.rows( [ 'id', 'id_alias' ] ):
+                
+                if values[1] in map_targets:
+                    
+                    target_id[values[1]] = values[0]
+
+        with TSV_reader( to_merge_input_file ) as IN:
+            
+            to_merge_values = itemgetter( *[ IN.column_index( column_name ) for column_name in column_names ] )
+
+            to_merge_alias_index = IN.column_index( 'id_alias' )
+
+        provenance_indices = [ index for index, column_name in enumerate( column_names ) if re.search( r'^data_at_', column_name ) is not None ]
+
+        data_source_count_indices = [ index for index, column_name in enumerate( column_names ) if column_name == 'data_source_count' ]
+
+        value_indices = [ index for index, column_name in enumerate( column_names ) if re.search( r'^data_at_', column_name ) is None and column_name not in [ 'id', 'id_alias', 'data_source_count' ] ]
+
+        # Tag each to-merge record that's slated for merging with the ID of its target, then sort by ( target ID, to-merge alias ).
+
+        def tagged_to_merge_lines( ):
+            
+            with TSV_reader( to_merge_input_file ) as IN:
+                
+                for line in IN.lines():
+                    
+                    to_merge_alias = line.rstrip( '\n' ).split( '\t' )[to_merge_alias_index]
+
+                    if to_merge_alias in self.replace_with[table] and self.replace_with[table][to_merge_alias] in target_id:
+                        
+                        yield f"{target_id[self.replace_with[table][to_merge_alias]]}\t{to_merge_alias}\t{line}"
+
+        processed_records_to_merge = set()
+
+        with TSV_reader( last_merged_input_file ) as LAST_MERGED, open( output_file, 'w' ) as OUT, open( self.data_clash_log[table], 'w' ) as CLASH_LOG:
+            
+            print( *column_names, sep='\t', file=OUT )
+
+            print( *[ f"CDA_{table}_id", 'CDA_field_name', f"original_value_from_{self.last_merged_dataset_name}", f"observed_clashing_value_from_{self.to_merge_dataset_name}", f"CDA_kept_value" ], sep='\t', file=CLASH_LOG )
+
+            merge_groups = groupby( _last_line_per_id( sort_lines( tagged_to_merge_lines(), key=_merge_group_key ), key=_merge_group_key ), key=lambda line: line.split( '\t', 1 )[0] )
+
+            next_merge_group = next( merge_groups, None )
+
+            # Process the rows from the last-merged dataset first, updating as we go with new data from incoming merges.
+
+            for line in _last_line_per_id( sort_lines( LAST_MERGED.lines(), key=_record_id ) ):
+                
+                last_merged_row = last_merged_values( line.rstrip( '\n' ).split( '\t' ) )
+
+                last_merged_alias = last_merged_row[alias_index]
+
+                if last_merged_alias not in map_targets:
+                    
+                    # This record will not be merged. Forward unmodified to output.
+
+                    print( *last_merged_row, sep='\t', file=OUT )
+
+                    continue
+
+                record_id = last_merged_row[id_index]
+
+                # Collect this record's group of to-merge records (tagged with its ID), in to-merge alias order.
+
+                to_merge_rows = dict()
+
+                while next_merge_group is not None and next_merge_group[0] < record_id:
+                    
+                    # Skip groups targeting IDs we've passed without a match (only possible if the last-merged table repeats aliases).
+
+                    next_merge_group = next( merge_groups, None )
+
+                while next_merge_group is not None and next_merge_group[0] == record_id:
+                    
+                    for tagged_line in next_merge_group[1]:
+                        
+                        ( tag, to_merge_alias, to_merge_line ) = tagged_line.split( '\t', 2 )
+
+                        to_merge_rows[to_merge_alias] = to_merge_values( to_merge_line.rstrip( '\n' ).split( '\t' ) )
+
+                    next_merge_group = next( merge_groups, None )
+
+                if len( to_merge_rows ) != len( map_targets[last_merged_alias] ):
+                    
+                    sys.exit( f"FATAL: Couldn't find all {self.to_merge_dataset_name} {table} records ( aliases {sorted( map_targets[last_merged_alias] - set( to_merge_rows ) )} ) to be merged into {self.last_merged_dataset_name} {table} record {record_id}; aborting." )
+
+                output_row = list( last_merged_row )
+
+                data_clashes = dict()
+
+                for to_merge_alias in sorted( to_merge_rows ):
+                    
+                    to_merge_row = to_merge_rows[to_merge_alias]
+
+                    # Update provenance booleans by joining existing records via logical OR. Everything's a string here.
+
+                    for index in provenance_indices:
+                        
+                        output_row[index] = 'True' if output_row[index] == 'True' or to_merge_row[index] == 'True' else 'False'
+
+                    for index in value_indices:
+                        
+                        column_name = column_names[index]
+
+                        original_last_merged_value = last_merged_row[index]
+
+                        last_updated_value = output_row[index]
+
+                        to_merge_value = to_merge_row[index]
+
+                        if last_updated_value == '' and to_merge_value != '':
+                            
+                            # Replace existing nulls with the first-encountered non-null alternative.
+
+                            output_row[index] = to_merge_value
+
+                            data_clashes.setdefault( column_name, dict() ).setdefault( original_last_merged_value, dict() ).setdefault( to_merge_value, to_merge_value )
+
+                        elif last_updated_value != '' and to_merge_value != last_updated_value:
+                            
+                            # Does the existing value match a pattern we know will be deleted later? If so, and
+                            # the new value is any better, replace the old value with the new one. Otherwise,
+                            # keep the existing value. Log the clash either way.
+
+                            if self.is_slated_for_deletion( last_updated_value ) and to_merge_value != '' and not self.is_slated_for_deletion( to_merge_value ):
+                                
+                                output_row[index] = to_merge_value
+
+                            data_clashes.setdefault( column_name, dict() ).setdefault( original_last_merged_value, dict() )[to_merge_value] = output_row[index]
+
+                    processed_records_to_merge.add( to_merge_alias )
+
+                # Compute data_source_count directly from merged results.
+
+                new_data_source_count = sum( 1 for index in provenance_indices if output_row[index] == 'True' )
+
+                for index in data_source_count_indices:
+                    
+                    output_row[index] = new_data_source_count
+
+                print( *output_row, sep='\t', file=OUT )
+
+                # Clashes are logged in ( record ID, column, last-merged value, to-merge value ) order; we
+                # see record IDs in order, so each record's clashes can be written out as soon as it's done.
+
+                for column_name in sorted( data_clashes ):
+                    
+                    for last_merged_value in sorted( data_clashes[column_name] ):
+                        
+                        for to_merge_value in sorted( data_clashes[column_name][last_merged_value] ):
+                            
+                            print( *[ record_id, column_name, last_merged_value, to_merge_value, data_clashes[column_name][last_merged_value][to_merge_value] ], sep='\t', file=CLASH_LOG )
+
+            # Next, process the rows from the to-merge dataset, skipping any already merged into existing records.
+
+            with TSV_reader( to_merge_input_file ) as TO_MERGE:
+                
+                for line in _last_line_per_id( sort_lines( TO_MERGE.lines(), key=_record_id ) ):
+                    
+                    to_merge_row = to_merge_values( line.rstrip( '\n' ).split( '\t' ) )
+
+                    if line.rstrip( '\n' ).split( '\t' )[to_merge_alias_index] not in processed_records_to_merge:
+                        
+                        # This record was not merged with an existing CDA record. Forward unmodified to output.
+
+                        print( *to_merge_row, sep='\t', file=OUT )
+
+        print( 'done.', file=sys.stderr )
+
+    def get_update_inputs( self, file_basename, to_merge_only=False ):
+        
+        """
+        Input files for a table that isn't being merged: the last-merged dataset's version (followed by the to-merge
+        dataset's version, if there is one) or, if `to_merge_only` is True, just the to-merge dataset's version.
+        """
+
+        if to_merge_only:
+            
+            return [ path.join( self.to_merge_cda_tsv_dir, file_basename ) ]
+
+        input_files = [ path.join( self.last_merged_cda_tsv_dir, file_basename ) ]
+
+        if file_basename in listdir( self.to_merge_cda_tsv_dir ):
+            
+            # This file also exists in the to_merge dataset. Bring that data on over too.
+
+            input_files.append( path.join( self.to_merge_cda_tsv_dir, file_basename ) )
+
+        return input_files
+
+    def update_tables( self, tables_to_update ):
+        
+        """
+        Copy each table in `tables_to_update` (a list of ( file basename, to_merge_only ) pairs) to the output
+        directory, updating aliases of merged records as needed. Tables are independent of one another, so with
+        more than one job they're rewritten concurrently by a pool of worker processes; progress is reported
+        in the same order either way.
+        """
+
+        updates = list()
+
+        for ( file_basename, to_merge_only ) in tables_to_update:
+            
+            message = f"Updating {file_basename}..." if not to_merge_only else f"Updating {file_basename} (exists only in '{self.to_merge_cda_tsv_dir}')..."
+
+            updates.append( ( message, self.get_update_inputs( file_basename, to_merge_only ), path.join( self.tsv_output_dir, file_basename ) ) )
+
+        if self.jobs == 1 or len( updates ) < 2:
+            
+            for ( message, input_files, output_file ) in updates:
+                
+                print( message, end='', file=sys.stderr )
+
+                update_performed = _update_table( input_files, output_file, self.alias_column_pattern, self.replace_with )
+
+                negative_modifier = 'not ' if not update_performed else ''
+
+                print( f"done. (Data update {negative_modifier}performed.)", file=sys.stderr )
+
+            return
+
+        # Each worker gets its own read-only copy of the alias-replacement map once, when it starts
+        # (shared copy-on-write with this process where processes are forked), instead of once per table.
+
+        with ProcessPoolExecutor( max_workers=min( self.jobs, len( updates ) ), initializer=_init_update_worker, initargs=( self.replace_with, ) ) as executor:
+            
+            futures = [ executor.submit( _update_table, input_files, output_file, self.alias_column_pattern ) for ( message, input_files, output_file ) in updates ]
+
+            for ( ( message, input_files, output_file ), future ) in zip( updates, futures ):
+                
+                print( message, end='', file=sys.stderr )
+
+                negative_modifier = 'not ' if not future.result() else ''
+
+                print( f"done. (Data update {negative_modifier}performed.)", file=sys.stderr )
+
+    def merge_upstream_identifiers( self ):
+        
+        print( 'Updating upstream_identifiers.tsv...', end='', file=sys.stderr )
+
+        # upstream_identifiers.tsv from the last-merged dataset will require no modification.
+
+        copy( self.last_merged_upstream_identifiers_tsv, self.upstream_identifiers_output_tsv )
+
+        # upstream_identifiers.tsv from the to-merge dataset will need aliases updated.
+
+        with open( self.to_merge_upstream_identifiers_tsv ) as IN, open( self.upstream_identifiers_output_tsv, 'a' ) as OUT:
+            
+            column_names = next( IN ).rstrip( '\n' ).split( '\t' )
+
+            for record in [ dict( zip( column_names, next_line.rstrip( '\n' ).split( '\t' ) ) ) for next_line in IN ]:
+                
+                table = record['cda_table']
+
+                if table in self.replace_with:
+                    
+                    # Aliases are subject to change. Make sure they're up to date.
+
+                    current_alias = record['id_alias']
+
+                    if current_alias in self.replace_with[table]:
+                        
+                        record['id_alias'] = self.replace_with[table][current_alias]
+
+                print( *[ record[column_name] for column_name in column_names ], sep='\t', file=OUT )
+
+        print( 'done.', file=sys.stderr )
+
+    def deduplicate_output( self ):
+        
+        """
+        Eliminate duplicate rows wherever they might have been created by our alias updates.
+        """
+
+        for ( file_basenames, ignore_primary_id_field ) in [ ( self.duplicates_possible, False ), ( self.duplicates_possible_modulo_ids, True ) ]:
+            
+            for file_basename in sorted( file_basenames ):
+                
+                if file_basename in listdir( self.tsv_output_dir ):
+                    
+                    print( f"Deduplicating {file_basename}...", end='', file=sys.stderr )
+
+                    target_file_path = path.join( self.tsv_output_dir, file_basename )
+
+                    gzipped = re.search( r'\.gz$', file_basename ) is not None
+
+                    deduplicate_and_sort_unsorted_file_with_header( target_file_path, gzipped, ignore_primary_id_field=ignore_primary_id_field )
+
+                    print( 'done.', file=sys.stderr )
@@ -0,0 +1,31 @@
+from os import path
+
+cda_root = path.join( 'cda_tsvs' )
+
+# Name of the dataset (or merged set of datasets) we're merging into, as used
+# in merge-map and log file names and in merge-map column names.
+
+last_merged_dataset_name = 'GDC_PDC_CDS_ICDC'
+
+last_merged_cda_tsv_dir = path.join( cda_root, 'merged_gdc_pdc_cds_and_icdc_002_decorated_harmonized' )
+
+to_merge_dataset_name = 'IDC'
+
+to_merge_cda_tsv_dir = path.join( cda_root, f"{to_merge_dataset_name.lower()}_002_decorated_harmonized" )
+
+tsv_output_dir = path.join( cda_root, f"merged_{last_merged_dataset_name.lower()}_and_{to_merge_dataset_name.lower()}_002_decorated_harmonized" )
+
+# Columns matching this pattern hold aliases of records in the table named by
+# the pattern's first group; these will be updated to reflect merged records.
+
+alias_column_pattern = r'^(?:child_|parent_)?(.+)_alias$'
+
+# Tables (beyond the ones we merge record-by-record) that we don't copy from the last-merged
+# dataset: upstream_identifiers is handled separately, and column_metadata and release_metadata
+# are regenerated after the merge build completes.
+
+tables_to_skip_from_last_merged = { 'column_metadata', 'release_metadata', 'upstream_identifiers' }
+
+# Tables we don't copy when they exist only in the to-merge dataset.
+
+tables_to_skip_from_to_merge_only = { 'column_metadata', 'release_metadata', 'upstream_identifiers' }
@@ -5,7 +5,7 @@ import sys
 
 from os import path, makedirs
 
-from cda_etl.lib import map_columns_one_to_one, map_columns_one_to_many
+from cda_etl.lib import map_columns_multiple, map_columns_one_to_many, map_columns_one_to_one
 
 # PARAMETERS
 
@@ -61,17 +61,23 @@ diagnosis_id_to_submitter_id = map_columns_one_to_one( diagnosis_input_tsv, 'dia
 
 case_id_to_submitter_id = map_columns_one_to_one( case_input_tsv, 'case_id', 'case_submitter_id' )
 
-study_id_to_submitter_id = map_columns_one_to_one( study_input_tsv, 'study_id', 'study_submitter_id' )
-
-study_id_to_pdc_id = map_columns_one_to_one( study_input_tsv, 'study_id', 'pdc_study_id' )
-
-project_id_to_submitter_id = map_columns_one_to_one( project_input_tsv, 'project_id', 'project_submitter_id' )
-
-project_id_to_name = map_columns_one_to_one( project_input_tsv, 'project_id', 'name' )
+study_id_to_submitter_id, study_id_to_pdc_id = map_columns_multiple( study_input_tsv, [
+    
+    { 'from_field': 'study_id', 'to_field': 'study_submitter_id' },
+    { 'from_field': 'study_id', 'to_field': 'pdc_study_id' }
+] )
 
-program_id_to_submitter_id = map_columns_one_to_one( program_input_tsv, 'program_id', 'program_submitter_id' )
+project_id_to_submitter_id, project_id_to_name = map_columns_multiple( project_input_tsv, [
+    
+    { 'from_field': 'project_id', 'to_field': 'project_submitter_id' },
+    { 'from_field': 'project_id', 'to_field': 'name' }
+] )
 
-program_id_to_name = map_columns_one_to_one( program_input_tsv, 'program_id', 'name' )
+program_id_to_submitter_id, program_id_to_name = map_columns_multiple( program_input_tsv, [
+    
+    { 'from_field': 'program_id', 'to_field': 'program_submitter_id' },
+    { 'from_field': 'program_id', 'to_field': 'name' }
+] )
 
 project_id_to_program_id = map_columns_one_to_one( program_project_input_tsv, 'project_id', 'program_id' )
 
@@ -49,9 +49,9 @@ output_file = path.join( agg_subject_dir, 'PDC_CDA_subjects_merged_into_GDC_CDA_
 # cda_table	id_alias	upstream_source	upstream_field	upstream_id
 # subject	10	GDC	case.case_id	d70772f7-b776-44ef-8dc4-b379b2b9154a
 
-gdc_case_id_to_cda_subject_alias = map_columns_one_to_one( gdc_upstream_identifiers_tsv, 'upstream_id', 'id_alias', where_field='upstream_field', where_value='case.case_id' )
+gdc_case_id_to_cda_subject_alias = map_columns_one_to_one( gdc_upstream_identifiers_tsv, 'upstream_id', 'id_alias', where_field='upstream_field', where_value='case.case_id', use_cache=True )
 
-gdc_subject_alias_to_subject_id = map_columns_one_to_one( gdc_subject_tsv, 'id_alias', 'id' )
+gdc_subject_alias_to_subject_id = map_columns_one_to_one( gdc_subject_tsv, 'id_alias', 'id', use_cache=True )
 
 gdc_project_id_and_case_submitter_id_to_cda_subject_alias = dict()
 
@@ -92,9 +92,9 @@ with open( gdc_entity_project_map ) as IN:
 # cda_table	id_alias	upstream_source	upstream_field	upstream_id
 # subject	44585	PDC	Case.case_id	4a6a400f-651d-4ec8-ad7c-b3e8d6dd1944
 
-pdc_case_id_to_cda_subject_alias = map_columns_one_to_one( pdc_upstream_identifiers_tsv, 'upstream_id', 'id_alias', where_field='upstream_field', where_value='Case.case_id' )
+pdc_case_id_to_cda_subject_alias = map_columns_one_to_one( pdc_upstream_identifiers_tsv, 'upstream_id', 'id_alias', where_field='upstream_field', where_value='Case.case_id', use_cache=True )
 
-pdc_subject_alias_to_subject_id = map_columns_one_to_one( pdc_subject_tsv, 'id_alias', 'id' )
+pdc_subject_alias_to_subject_id = map_columns_one_to_one( pdc_subject_tsv, 'id_alias', 'id', use_cache=True )
 
 # Load hand-verified links between GDC projects and PDC studies.
 
@@ -4,7 +4,7 @@ import sys
 
 from os import path
 
-from cda_etl.lib import map_columns_one_to_one
+from cda_etl.lib import map_columns_multiple, map_columns_one_to_one
 
 # PARAMETERS
 
@@ -34,21 +34,22 @@ output_file = path.join( aux_dir, 'CDS_CDA_subjects_merged_into_GDC_PDC_CDA_subj
 
 # EXECUTION
 
-pdc_to_merged = map_columns_one_to_one( gdc_pdc_merge_map, 'PDC_subject_alias', 'new_subject_alias' )
-
-gdc_to_merged = map_columns_one_to_one( gdc_pdc_merge_map, 'GDC_subject_alias', 'new_subject_alias' )
-
-merged_id = map_columns_one_to_one( gdc_pdc_merge_map, 'new_subject_alias', 'new_subject_id' )
+pdc_to_merged, gdc_to_merged, merged_id = map_columns_multiple( gdc_pdc_merge_map, [
+    
+    { 'from_field': 'PDC_subject_alias', 'to_field': 'new_subject_alias' },
+    { 'from_field': 'GDC_subject_alias', 'to_field': 'new_subject_alias' },
+    { 'from_field': 'new_subject_alias', 'to_field': 'new_subject_id' }
+] )
 
 cds_to_gdc = map_columns_one_to_one( cds_gdc_merge_map, 'CDS_subject_alias', 'GDC_subject_alias' )
 
 cds_to_pdc = map_columns_one_to_one( cds_pdc_merge_map, 'CDS_subject_alias', 'PDC_subject_alias' )
 
-gdc_subject_id = map_columns_one_to_one( gdc_subject_tsv, 'id_alias', 'id' )
+gdc_subject_id = map_columns_one_to_one( gdc_subject_tsv, 'id_alias', 'id', use_cache=True )
 
-pdc_subject_id = map_columns_one_to_one( pdc_subject_tsv, 'id_alias', 'id' )
+pdc_subject_id = map_columns_one_to_one( pdc_subject_tsv, 'id_alias', 'id', use_cache=True )
 
-cds_subject_id = map_columns_one_to_one( cds_subject_tsv, 'id_alias', 'id' )
+cds_subject_id = map_columns_one_to_one( cds_subject_tsv, 'id_alias', 'id', use_cache=True )
 
 with open( output_file, 'w' ) as OUT:
     
@@ -4,7 +4,7 @@ import sys
 
 from os import path
 
-from cda_etl.lib import map_columns_one_to_one
+from cda_etl.lib import map_columns_multiple, map_columns_one_to_one
 
 # PARAMETERS
 
@@ -34,11 +34,12 @@ output_file = path.join( aux_dir, 'CDS_CDA_projects_merged_into_GDC_PDC_CDA_proj
 
 # EXECUTION
 
-pdc_to_merged = map_columns_one_to_one( gdc_pdc_merge_map, 'PDC_project_alias', 'new_project_alias' )
-
-gdc_to_merged = map_columns_one_to_one( gdc_pdc_merge_map, 'GDC_project_alias', 'new_project_alias' )
-
-merged_id = map_columns_one_to_one( gdc_pdc_merge_map, 'new_project_alias', 'new_project_id' )
+pdc_to_merged, gdc_to_merged, merged_id = map_columns_multiple( gdc_pdc_merge_map, [
+    
+    { 'from_field': 'PDC_project_alias', 'to_field': 'new_project_alias' },
+    { 'from_field': 'GDC_project_alias', 'to_field': 'new_project_alias' },
+    { 'from_field': 'new_project_alias', 'to_field': 'new_project_id' }
+] )
 
 cds_to_gdc = map_columns_one_to_one( cds_gdc_merge_map, 'CDS_project_alias', 'GDC_project_alias' )
 
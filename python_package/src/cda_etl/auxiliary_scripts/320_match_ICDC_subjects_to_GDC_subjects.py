@@ -49,9 +49,9 @@ output_file = path.join( agg_subject_dir, 'ICDC_CDA_subjects_linked_to_GDC_CDA_s
 # cda_table	id_alias	upstream_source	upstream_field	upstream_id
 # subject	10	GDC	case.case_id	d70772f7-b776-44ef-8dc4-b379b2b9154a
 
-gdc_case_id_to_cda_subject_alias = map_columns_one_to_one( gdc_upstream_identifiers_tsv, 'upstream_id', 'id_alias', where_field='upstream_field', where_value='case.case_id' )
+gdc_case_id_to_cda_subject_alias = map_columns_one_to_one( gdc_upstream_identifiers_tsv, 'upstream_id', 'id_alias', where_field='upstream_field', where_value='case.case_id', use_cache=True )
 
-gdc_subject_alias_to_subject_id = map_columns_one_to_one( gdc_subject_tsv, 'id_alias', 'id' )
+gdc_subject_alias_to_subject_id = map_columns_one_to_one( gdc_subject_tsv, 'id_alias', 'id', use_cache=True )
 
 gdc_project_id_and_case_submitter_id_to_cda_subject_alias = dict()
 
@@ -92,9 +92,9 @@ with open( gdc_entity_project_map ) as IN:
 # cda_table	id_alias	upstream_source	upstream_field	upstream_id
 # subject	94256	ICDC	case.case_id	GLIOMA01-i_03A6
 
-icdc_case_id_to_cda_subject_alias = map_columns_one_to_one( icdc_upstream_identifiers_tsv, 'upstream_id', 'id_alias', where_field='upstream_field', where_value='case.case_id' )
+icdc_case_id_to_cda_subject_alias = map_columns_one_to_one( icdc_upstream_identifiers_tsv, 'upstream_id', 'id_alias', where_field='upstream_field', where_value='case.case_id', use_cache=True )
 
-icdc_subject_alias_to_subject_id = map_columns_one_to_one( icdc_subject_tsv, 'id_alias', 'id' )
+icdc_subject_alias_to_subject_id = map_columns_one_to_one( icdc_subject_tsv, 'id_alias', 'id', use_cache=True )
 
 # Load hand-verified links between GDC projects and ICDC studies.
 
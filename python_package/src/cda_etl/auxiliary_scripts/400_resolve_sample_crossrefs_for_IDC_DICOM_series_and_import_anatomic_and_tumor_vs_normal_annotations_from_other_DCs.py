@@ -2,7 +2,8 @@
 
 from os import path, makedirs
 
-from cda_etl.lib import load_tsv_as_dict, map_columns_one_to_many, map_columns_one_to_one
+from cda_etl.columnar_table import Columnar_table
+from cda_etl.lib import map_columns_multiple, map_columns_one_to_many
 
 # PARAMETERS
 
@@ -92,13 +93,14 @@ gdc_slide_to_portion = map_columns_one_to_many( gdc_slide_portion_tsv, 'slide_id
 
 gdc_sample_submitter_id_to_id = map_columns_one_to_many( gdc_sample_tsv, 'submitter_id', 'sample_id' )
 
-gdc_sample = load_tsv_as_dict( gdc_sample_tsv )
+gdc_sample = Columnar_table( gdc_sample_tsv )
 
-gdc_sample_to_project = map_columns_one_to_one( gdc_entity_metadata_tsv, 'entity_id', 'project.project_id', where_field='entity_type', where_value='sample' )
-
-gdc_project_to_program = map_columns_one_to_one( gdc_entity_metadata_tsv, 'project.project_id', 'program.name' )
-
-gdc_project_name = map_columns_one_to_one( gdc_entity_metadata_tsv, 'project.project_id', 'project.name' )
+gdc_sample_to_project, gdc_project_to_program, gdc_project_name = map_columns_multiple( gdc_entity_metadata_tsv, [
+    
+    { 'from_field': 'entity_id', 'to_field': 'project.project_id', 'where_field': 'entity_type', 'where_value': 'sample' },
+    { 'from_field': 'project.project_id', 'to_field': 'program.name' },
+    { 'from_field': 'project.project_id', 'to_field': 'project.name' }
+] )
 
 pdc_aliquot_submitter_id_to_id = map_columns_one_to_many( pdc_aliquot_tsv, 'aliquot_submitter_id', 'aliquot_id' )
 
@@ -106,23 +108,25 @@ pdc_aliquot_to_sample = map_columns_one_to_many( pdc_sample_aliquot_tsv, 'aliquo
 
 pdc_sample_submitter_id_to_id = map_columns_one_to_many( pdc_sample_tsv, 'sample_submitter_id', 'sample_id' )
 
-pdc_sample = load_tsv_as_dict( pdc_sample_tsv )
-
-pdc_sample_to_project = map_columns_one_to_one( pdc_entity_metadata_tsv, 'entity_id', 'project.project_submitter_id', where_field='entity_type', where_value='sample' )
-
-pdc_project_to_program = map_columns_one_to_one( pdc_entity_metadata_tsv, 'project.project_submitter_id', 'program.name' )
+pdc_sample = Columnar_table( pdc_sample_tsv )
 
-pdc_project_name = map_columns_one_to_one( pdc_entity_metadata_tsv, 'project.project_submitter_id', 'project.name' )
-
-icdc_sample = load_tsv_as_dict( icdc_sample_tsv )
-
-icdc_sample_to_study = map_columns_one_to_one( icdc_entity_metadata_tsv, 'entity_id', 'study.clinical_study_designation', where_field='entity_type', where_value='sample' )
+pdc_sample_to_project, pdc_project_to_program, pdc_project_name = map_columns_multiple( pdc_entity_metadata_tsv, [
+    
+    { 'from_field': 'entity_id', 'to_field': 'project.project_submitter_id', 'where_field': 'entity_type', 'where_value': 'sample' },
+    { 'from_field': 'project.project_submitter_id', 'to_field': 'program.name' },
+    { 'from_field': 'project.project_submitter_id', 'to_field': 'project.name' }
+] )
 
-icdc_study_name = map_columns_one_to_one( icdc_entity_metadata_tsv, 'study.clinical_study_designation', 'study.clinical_study_name' )
+icdc_sample = Columnar_table( icdc_sample_tsv )
 
-icdc_study_to_program = map_columns_one_to_one( icdc_entity_metadata_tsv, 'study.clinical_study_designation', 'program.program_name' )
+icdc_sample_to_study, icdc_study_name, icdc_study_to_program = map_columns_multiple( icdc_entity_metadata_tsv, [
+    
+    { 'from_field': 'entity_id', 'to_field': 'study.clinical_study_designation', 'where_field': 'entity_type', 'where_value': 'sample' },
+    { 'from_field': 'study.clinical_study_designation', 'to_field': 'study.clinical_study_name' },
+    { 'from_field': 'study.clinical_study_designation', 'to_field': 'program.program_name' }
+] )
 
-idc_tcga_biospecimen = load_tsv_as_dict( idc_tcga_biospecimen_tsv )
+idc_tcga_biospecimen = Columnar_table( idc_tcga_biospecimen_tsv )
 
 idc_series_to_sample_submitter_id = map_columns_one_to_many( idc_series_specimen_xref_tsv, 'crdc_series_uuid', 'dicom_all.SpecimenDescriptionSequence.SpecimenIdentifier' )
 
@@ -1,6 +1,6 @@
 #!/usr/bin/env python -u
 
-from cda_etl.lib import load_tsv_as_dict, map_columns_one_to_one, map_columns_one_to_many, sort_file_with_header
+from cda_etl.lib import load_tsv_as_dict, map_columns_multiple, map_columns_one_to_one, sort_file_with_header
 
 from os import path, makedirs
 
@@ -24,19 +24,22 @@ if not path.exists( aux_dir ):
     
     makedirs( aux_dir )
 
-collection_in_program = map_columns_one_to_one( program_collection_input_tsv, 'collection_id', 'Program' )
-
-collection_id_to_name = map_columns_one_to_one( program_collection_input_tsv, 'collection_id', 'collection_name' )
-
-collection_name_to_id = map_columns_one_to_one( program_collection_input_tsv, 'collection_name', 'collection_id' )
+collection_in_program, collection_id_to_name, collection_name_to_id = map_columns_multiple( program_collection_input_tsv, [
+    
+    { 'from_field': 'collection_id', 'to_field': 'Program' },
+    { 'from_field': 'collection_id', 'to_field': 'collection_name' },
+    { 'from_field': 'collection_name', 'to_field': 'collection_id' }
+] )
 
 # `project_short_name` from this table will match `dicom_all.collection_name` for corresponding projects.
 
 sample_in_collection = map_columns_one_to_one( tcga_biospecimen_input_tsv, 'sample_barcode', 'project_short_name' )
 
-case_id_to_submitter_id = map_columns_one_to_one( idc_case_input_tsv, 'idc_case_id', 'submitter_case_id' )
-
-case_in_collection = map_columns_one_to_one( idc_case_input_tsv, 'idc_case_id', 'collection_id' )
+case_id_to_submitter_id, case_in_collection = map_columns_multiple( idc_case_input_tsv, [
+    
+    { 'from_field': 'idc_case_id', 'to_field': 'submitter_case_id' },
+    { 'from_field': 'idc_case_id', 'to_field': 'collection_id' }
+] )
 
 with open( output_file, 'w' ) as OUT:
     
@@ -2,7 +2,7 @@
 
 import re, sys
 
-from cda_etl.lib import load_tsv_as_dict, map_columns_one_to_one, map_columns_one_to_many, sort_file_with_header
+from cda_etl.lib import load_tsv_as_dict, map_columns_multiple, sort_file_with_header
 
 from os import path, makedirs
 
@@ -32,15 +32,18 @@ if not path.exists( output_dir ):
     
     makedirs( output_dir )
 
-idc_collection_in_program = map_columns_one_to_one( idc_entity_list, 'original_collections_metadata.collection_id', 'original_collections_metadata.Program' )
-
-idc_case_submitter_id_to_collection = map_columns_one_to_many( idc_entity_list, 'entity_submitter_id', 'original_collections_metadata.collection_id', where_field='entity_type', where_value='case' )
-
-idc_sample_submitter_id_to_collection = map_columns_one_to_many( idc_entity_list, 'entity_submitter_id', 'original_collections_metadata.collection_id', where_field='entity_type', where_value='sample' )
-
-gdc_project_in_program = map_columns_one_to_one( gdc_entity_list, 'project.project_id', 'program.name' )
+idc_collection_in_program, idc_case_submitter_id_to_collection, idc_sample_submitter_id_to_collection = map_columns_multiple( idc_entity_list, [
+    
+    { 'from_field': 'original_collections_metadata.collection_id', 'to_field': 'original_collections_metadata.Program' },
+    { 'from_field': 'entity_submitter_id', 'to_field': 'original_collections_metadata.collection_id', 'where_field': 'entity_type', 'where_value': 'case', 'cardinality': 'one_to_many' },
+    { 'from_field': 'entity_submitter_id', 'to_field': 'original_collections_metadata.collection_id', 'where_field': 'entity_type', 'where_value': 'sample', 'cardinality': 'one_to_many' }
+] )
 
-gdc_case_submitter_id_to_project = map_columns_one_to_one( gdc_entity_list, 'entity_submitter_id', 'project.project_id', where_field='entity_type', where_value='case' )
+gdc_project_in_program, gdc_case_submitter_id_to_project = map_columns_multiple( gdc_entity_list, [
+    
+    { 'from_field': 'project.project_id', 'to_field': 'program.name' },
+    { 'from_field': 'entity_submitter_id', 'to_field': 'project.project_id', 'where_field': 'entity_type', 'where_value': 'case' }
+] )
 
 gdc_sample_submitter_id_to_project = dict()
 
@@ -2,7 +2,7 @@
 
 import re, sys
 
-from cda_etl.lib import load_tsv_as_dict, map_columns_one_to_one, map_columns_one_to_many, sort_file_with_header
+from cda_etl.lib import load_tsv_as_dict, map_columns_multiple, sort_file_with_header
 
 from os import path, makedirs
 
@@ -32,19 +32,20 @@ if not path.exists( output_dir ):
     
     makedirs( output_dir )
 
-idc_collection_in_program = map_columns_one_to_one( idc_entity_list, 'original_collections_metadata.collection_id', 'original_collections_metadata.Program' )
-
-idc_case_submitter_id_to_collection = map_columns_one_to_many( idc_entity_list, 'entity_submitter_id', 'original_collections_metadata.collection_id', where_field='entity_type', where_value='case' )
-
-idc_sample_submitter_id_to_collection = map_columns_one_to_many( idc_entity_list, 'entity_submitter_id', 'original_collections_metadata.collection_id', where_field='entity_type', where_value='sample' )
-
-pdc_study_submitter_id_to_pdc_study_id = map_columns_one_to_one( pdc_entity_list, 'study.study_submitter_id', 'study.pdc_study_id' )
-
-pdc_study_in_project = map_columns_one_to_one( pdc_entity_list, 'study.study_submitter_id', 'project.project_submitter_id' )
-
-pdc_project_in_program = map_columns_one_to_one( pdc_entity_list, 'project.project_submitter_id', 'program.name' )
+idc_collection_in_program, idc_case_submitter_id_to_collection, idc_sample_submitter_id_to_collection = map_columns_multiple( idc_entity_list, [
+    
+    { 'from_field': 'original_collections_metadata.collection_id', 'to_field': 'original_collections_metadata.Program' },
+    { 'from_field': 'entity_submitter_id', 'to_field': 'original_collections_metadata.collection_id', 'where_field': 'entity_type', 'where_value': 'case', 'cardinality': 'one_to_many' },
+    { 'from_field': 'entity_submitter_id', 'to_field': 'original_collections_metadata.collection_id', 'where_field': 'entity_type', 'where_value': 'sample', 'cardinality': 'one_to_many' }
+] )
 
-pdc_case_submitter_id_to_study = map_columns_one_to_many( pdc_entity_list, 'entity_submitter_id', 'study.study_submitter_id', where_field='entity_type', where_value='case' )
+pdc_study_submitter_id_to_pdc_study_id, pdc_study_in_project, pdc_project_in_program, pdc_case_submitter_id_to_study = map_columns_multiple( pdc_entity_list, [
+    
+    { 'from_field': 'study.study_submitter_id', 'to_field': 'study.pdc_study_id' },
+    { 'from_field': 'study.study_submitter_id', 'to_field': 'project.project_submitter_id' },
+    { 'from_field': 'project.project_submitter_id', 'to_field': 'program.name' },
+    { 'from_field': 'entity_submitter_id', 'to_field': 'study.study_submitter_id', 'where_field': 'entity_type', 'where_value': 'case', 'cardinality': 'one_to_many' }
+] )
 
 pdc_sample_submitter_id_to_study = dict()
 
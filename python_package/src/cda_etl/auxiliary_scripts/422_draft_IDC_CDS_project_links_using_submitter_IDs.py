@@ -2,7 +2,7 @@
 
 import re, sys
 
-from cda_etl.lib import load_tsv_as_dict, map_columns_one_to_one, map_columns_one_to_many, sort_file_with_header
+from cda_etl.lib import load_tsv_as_dict, map_columns_multiple, sort_file_with_header
 
 from os import path, makedirs
 
@@ -32,21 +32,21 @@ if not path.exists( output_dir ):
     
     makedirs( output_dir )
 
-idc_collection_in_program = map_columns_one_to_one( idc_entity_list, 'original_collections_metadata.collection_id', 'original_collections_metadata.Program' )
-
-idc_case_submitter_id_to_collection = map_columns_one_to_many( idc_entity_list, 'entity_submitter_id', 'original_collections_metadata.collection_id', where_field='entity_type', where_value='case' )
-
-idc_sample_submitter_id_to_collection = map_columns_one_to_many( idc_entity_list, 'entity_submitter_id', 'original_collections_metadata.collection_id', where_field='entity_type', where_value='sample' )
-
-cds_study_in_program = map_columns_one_to_one( cds_entity_list, 'study.uuid', 'program.program_acronym' )
-
-cds_participant_submitter_id_to_study = map_columns_one_to_many( cds_entity_list, 'entity_submitter_id', 'study.uuid', where_field='entity_type', where_value='participant' )
-
-cds_sample_submitter_id_to_study = map_columns_one_to_many( cds_entity_list, 'entity_submitter_id', 'study.uuid', where_field='entity_type', where_value='sample' )
-
-cds_study_phs_accession = map_columns_one_to_one( cds_entity_list, 'study.uuid', 'study.phs_accession' )
+idc_collection_in_program, idc_case_submitter_id_to_collection, idc_sample_submitter_id_to_collection = map_columns_multiple( idc_entity_list, [
+    
+    { 'from_field': 'original_collections_metadata.collection_id', 'to_field': 'original_collections_metadata.Program' },
+    { 'from_field': 'entity_submitter_id', 'to_field': 'original_collections_metadata.collection_id', 'where_field': 'entity_type', 'where_value': 'case', 'cardinality': 'one_to_many' },
+    { 'from_field': 'entity_submitter_id', 'to_field': 'original_collections_metadata.collection_id', 'where_field': 'entity_type', 'where_value': 'sample', 'cardinality': 'one_to_many' }
+] )
 
-cds_study_name = map_columns_one_to_one( cds_entity_list, 'study.uuid', 'study.study_name' )
+cds_study_in_program, cds_participant_submitter_id_to_study, cds_sample_submitter_id_to_study, cds_study_phs_accession, cds_study_name = map_columns_multiple( cds_entity_list, [
+    
+    { 'from_field': 'study.uuid', 'to_field': 'program.program_acronym' },
+    { 'from_field': 'entity_submitter_id', 'to_field': 'study.uuid', 'where_field': 'entity_type', 'where_value': 'participant', 'cardinality': 'one_to_many' },
+    { 'from_field': 'entity_submitter_id', 'to_field': 'study.uuid', 'where_field': 'entity_type', 'where_value': 'sample', 'cardinality': 'one_to_many' },
+    { 'from_field': 'study.uuid', 'to_field': 'study.phs_accession' },
+    { 'from_field': 'study.uuid', 'to_field': 'study.study_name' }
+] )
 
 cds_study_match_count = dict()
 
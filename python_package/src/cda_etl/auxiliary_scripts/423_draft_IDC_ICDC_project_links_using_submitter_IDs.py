@@ -2,7 +2,7 @@
 
 import re, sys
 
-from cda_etl.lib import load_tsv_as_dict, map_columns_one_to_one, map_columns_one_to_many, sort_file_with_header
+from cda_etl.lib import load_tsv_as_dict, map_columns_multiple, sort_file_with_header
 
 from os import path, makedirs
 
@@ -32,21 +32,21 @@ if not path.exists( output_dir ):
     
     makedirs( output_dir )
 
-idc_collection_in_program = map_columns_one_to_one( idc_entity_list, 'original_collections_metadata.collection_id', 'original_collections_metadata.Program' )
-
-idc_case_submitter_id_to_collection = map_columns_one_to_many( idc_entity_list, 'entity_submitter_id', 'original_collections_metadata.collection_id', where_field='entity_type', where_value='case' )
-
-idc_sample_submitter_id_to_collection = map_columns_one_to_many( idc_entity_list, 'entity_submitter_id', 'original_collections_metadata.collection_id', where_field='entity_type', where_value='sample' )
-
-icdc_study_in_program = map_columns_one_to_one( icdc_entity_list, 'study.clinical_study_designation', 'program.program_acronym' )
-
-icdc_study_name = map_columns_one_to_one( icdc_entity_list, 'study.clinical_study_designation', 'study.clinical_study_name' )
-
-icdc_program_name = map_columns_one_to_one( icdc_entity_list, 'program.program_acronym', 'program.program_name' )
-
-icdc_case_submitter_id_to_study = map_columns_one_to_many( icdc_entity_list, 'entity_id', 'study.clinical_study_designation', where_field='entity_type', where_value='case' )
+idc_collection_in_program, idc_case_submitter_id_to_collection, idc_sample_submitter_id_to_collection = map_columns_multiple( idc_entity_list, [
+    
+    { 'from_field': 'original_collections_metadata.collection_id', 'to_field': 'original_collections_metadata.Program' },
+    { 'from_field': 'entity_submitter_id', 'to_field': 'original_collections_metadata.collection_id', 'where_field': 'entity_type', 'where_value': 'case', 'cardinality': 'one_to_many' },
+    { 'from_field': 'entity_submitter_id', 'to_field': 'original_collections_metadata.collection_id', 'where_field': 'entity_type', 'where_value': 'sample', 'cardinality': 'one_to_many' }
+] )
 
-icdc_sample_submitter_id_to_study = map_columns_one_to_many( icdc_entity_list, 'entity_id', 'study.clinical_study_designation', where_field='entity_type', where_value='sample' )
+icdc_study_in_program, icdc_study_name, icdc_program_name, icdc_case_submitter_id_to_study, icdc_sample_submitter_id_to_study = map_columns_multiple( icdc_entity_list, [
+    
+    { 'from_field': 'study.clinical_study_designation', 'to_field': 'program.program_acronym' },
+    { 'from_field': 'study.clinical_study_designation', 'to_field': 'study.clinical_study_name' },
+    { 'from_field': 'program.program_acronym', 'to_field': 'program.program_name' },
+    { 'from_field': 'entity_id', 'to_field': 'study.clinical_study_designation', 'where_field': 'entity_type', 'where_value': 'case', 'cardinality': 'one_to_many' },
+    { 'from_field': 'entity_id', 'to_field': 'study.clinical_study_designation', 'where_field': 'entity_type', 'where_value': 'sample', 'cardinality': 'one_to_many' }
+] )
 
 icdc_study_match_count = dict()
 
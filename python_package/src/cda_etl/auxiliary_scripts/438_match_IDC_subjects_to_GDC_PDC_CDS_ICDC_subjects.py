@@ -4,7 +4,7 @@ import sys
 
 from os import path
 
-from cda_etl.lib import map_columns_one_to_one
+from cda_etl.lib import map_columns_multiple, map_columns_one_to_one
 
 # PARAMETERS
 
@@ -50,24 +50,29 @@ output_file = path.join( aux_dir, 'IDC_CDA_subjects_merged_into_GDC_PDC_CDS_ICDC
 
 # EXECUTION
 
-# If we ever alter GDC IDs when merging in new data, this will need to be forwarded to, and resolved by, another transitive hop from GDC_PDC_alias (the rvalue in this assignment) -> GDC_PDC_CDS_alias (in gdc_pdc_cds_merge_map).
+# If we ever alter GDC or PDC IDs when merging in new data, gdc_to_merged and pdc_to_merged will need to be forwarded to, and resolved by, another transitive hop from GDC_PDC_alias (their rvalues) -> GDC_PDC_CDS_alias (in gdc_pdc_cds_merge_map).
 
-gdc_to_merged = map_columns_one_to_one( gdc_pdc_merge_map, 'GDC_subject_alias', 'new_subject_alias' )
-
-# If we ever alter PDC IDs when merging in new data, this will need to be forwarded to, and resolved by, another transitive hop from GDC_PDC_alias (the rvalue in this assignment) -> GDC_PDC_CDS_alias (in gdc_pdc_cds_merge_map).
-
-pdc_to_merged = map_columns_one_to_one( gdc_pdc_merge_map, 'PDC_subject_alias', 'new_subject_alias' )
-
-cds_to_merged = map_columns_one_to_one( gdc_pdc_cds_merge_map, 'CDS_subject_alias', 'new_subject_alias' )
-
-icdc_to_merged = map_columns_one_to_one( gdc_pdc_cds_icdc_merge_map, 'ICDC_subject_alias', 'new_subject_alias' )
+gdc_to_merged, pdc_to_merged, gdc_pdc_merged_id = map_columns_multiple( gdc_pdc_merge_map, [
+    
+    { 'from_field': 'GDC_subject_alias', 'to_field': 'new_subject_alias' },
+    { 'from_field': 'PDC_subject_alias', 'to_field': 'new_subject_alias' },
+    { 'from_field': 'new_subject_alias', 'to_field': 'new_subject_id' }
+] )
 
-merged_id = map_columns_one_to_one( gdc_pdc_cds_icdc_merge_map, 'new_subject_alias', 'new_subject_id' )
+cds_to_merged, gdc_pdc_cds_merged_id = map_columns_multiple( gdc_pdc_cds_merge_map, [
+    
+    { 'from_field': 'CDS_subject_alias', 'to_field': 'new_subject_alias' },
+    { 'from_field': 'new_subject_alias', 'to_field': 'new_subject_id' }
+] )
 
-for merge_file in [ gdc_pdc_cds_merge_map, gdc_pdc_merge_map ]:
+icdc_to_merged, merged_id = map_columns_multiple( gdc_pdc_cds_icdc_merge_map, [
     
-    new_merged_id = map_columns_one_to_one( merge_file, 'new_subject_alias', 'new_subject_id' )
+    { 'from_field': 'ICDC_subject_alias', 'to_field': 'new_subject_alias' },
+    { 'from_field': 'new_subject_alias', 'to_field': 'new_subject_id' }
+] )
 
+for new_merged_id in [ gdc_pdc_cds_merged_id, gdc_pdc_merged_id ]:
+    
     for id_alias in new_merged_id:
         
         if id_alias not in merged_id:
@@ -82,15 +87,15 @@ idc_to_cds = map_columns_one_to_one( idc_cds_merge_map, 'IDC_subject_alias', 'CD
 
 idc_to_icdc = map_columns_one_to_one( idc_icdc_merge_map, 'IDC_subject_alias', 'ICDC_subject_alias' )
 
-gdc_subject_id = map_columns_one_to_one( gdc_subject_tsv, 'id_alias', 'id' )
+gdc_subject_id = map_columns_one_to_one( gdc_subject_tsv, 'id_alias', 'id', use_cache=True )
 
-pdc_subject_id = map_columns_one_to_one( pdc_subject_tsv, 'id_alias', 'id' )
+pdc_subject_id = map_columns_one_to_one( pdc_subject_tsv, 'id_alias', 'id', use_cache=True )
 
-cds_subject_id = map_columns_one_to_one( cds_subject_tsv, 'id_alias', 'id' )
+cds_subject_id = map_columns_one_to_one( cds_subject_tsv, 'id_alias', 'id', use_cache=True )
 
-icdc_subject_id = map_columns_one_to_one( icdc_subject_tsv, 'id_alias', 'id' )
+icdc_subject_id = map_columns_one_to_one( icdc_subject_tsv, 'id_alias', 'id', use_cache=True )
 
-idc_subject_id = map_columns_one_to_one( idc_subject_tsv, 'id_alias', 'id' )
+idc_subject_id = map_columns_one_to_one( idc_subject_tsv, 'id_alias', 'id', use_cache=True )
 
 with open( output_file, 'w' ) as OUT:
     
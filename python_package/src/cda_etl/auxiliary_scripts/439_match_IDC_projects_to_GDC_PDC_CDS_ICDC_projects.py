@@ -4,7 +4,7 @@ import sys
 
 from os import path
 
-from cda_etl.lib import map_columns_one_to_one
+from cda_etl.lib import map_columns_multiple, map_columns_one_to_one
 
 # PARAMETERS
 
@@ -50,24 +50,29 @@ output_file = path.join( aux_dir, 'IDC_CDA_projects_merged_into_GDC_PDC_CDS_ICDC
 
 # EXECUTION
 
-# If we ever alter GDC IDs when merging in new data, this will need to be forwarded to, and resolved by, another transitive hop from GDC_PDC_alias (the rvalue in this assignment) -> GDC_PDC_CDS_alias (in gdc_pdc_cds_merge_map).
+# If we ever alter GDC or PDC IDs when merging in new data, gdc_to_merged and pdc_to_merged will need to be forwarded to, and resolved by, another transitive hop from GDC_PDC_alias (their rvalues) -> GDC_PDC_CDS_alias (in gdc_pdc_cds_merge_map).
 
-gdc_to_merged = map_columns_one_to_one( gdc_pdc_merge_map, 'GDC_project_alias', 'new_project_alias' )
-
-# If we ever alter PDC IDs when merging in new data, this will need to be forwarded to, and resolved by, another transitive hop from GDC_PDC_alias (the rvalue in this assignment) -> GDC_PDC_CDS_alias (in gdc_pdc_cds_merge_map).
-
-pdc_to_merged = map_columns_one_to_one( gdc_pdc_merge_map, 'PDC_project_alias', 'new_project_alias' )
-
-cds_to_merged = map_columns_one_to_one( gdc_pdc_cds_merge_map, 'CDS_project_alias', 'new_project_alias' )
-
-icdc_to_merged = map_columns_one_to_one( gdc_pdc_cds_icdc_merge_map, 'ICDC_project_alias', 'new_project_alias' )
+gdc_to_merged, pdc_to_merged, gdc_pdc_merged_id = map_columns_multiple( gdc_pdc_merge_map, [
+    
+    { 'from_field': 'GDC_project_alias', 'to_field': 'new_project_alias' },
+    { 'from_field': 'PDC_project_alias', 'to_field': 'new_project_alias' },
+    { 'from_field': 'new_project_alias', 'to_field': 'new_project_id' }
+] )
 
-merged_id = map_columns_one_to_one( gdc_pdc_cds_icdc_merge_map, 'new_project_alias', 'new_project_id' )
+cds_to_merged, gdc_pdc_cds_merged_id = map_columns_multiple( gdc_pdc_cds_merge_map, [
+    
+    { 'from_field': 'CDS_project_alias', 'to_field': 'new_project_alias' },
+    { 'from_field': 'new_project_alias', 'to_field': 'new_project_id' }
+] )
 
-for merge_file in [ gdc_pdc_cds_merge_map, gdc_pdc_merge_map ]:
+icdc_to_merged, merged_id = map_columns_multiple( gdc_pdc_cds_icdc_merge_map, [
     
-    new_merged_id = map_columns_one_to_one( merge_file, 'new_project_alias', 'new_project_id' )
+    { 'from_field': 'ICDC_project_alias', 'to_field': 'new_project_alias' },
+    { 'from_field': 'new_project_alias', 'to_field': 'new_project_id' }
+] )
 
+for new_merged_id in [ gdc_pdc_cds_merged_id, gdc_pdc_merged_id ]:
+    
     for id_alias in new_merged_id:
         
         if id_alias not in merged_id:
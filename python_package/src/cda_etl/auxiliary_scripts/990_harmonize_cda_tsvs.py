@@ -1,30 +1,37 @@
 #!/usr/bin/env python3 -u
 
 import gzip
+import math
 import re
+import shutil
 import sys
+import tempfile
 
+from concurrent.futures import ProcessPoolExecutor
 from os import listdir, makedirs, path, remove
 
+from cda_etl.harmonizer import Column_harmonizer, Table_harmonizer, concatenate_tsv_shards, harmonize_tsv, load_harmonization_maps, merge_substitutions
 from cda_etl.lib import get_current_timestamp, get_universal_value_deletion_patterns, deduplicate_and_sort_unsorted_file_with_header
+from cda_etl.tsv_reader import TSV_reader, get_byte_range_shards
 
 # ARGUMENT
 
-if len( sys.argv ) != 4:
-    sys.exit( f"\n   Usage: {sys.argv[0]} <unharmonized CDA TSV dir> <target output directory for harmonized CDA TSVs> <substitution log directory specific to this pass>\n" )
+if len( sys.argv ) not in { 4, 6 } or len( sys.argv ) == 6 and ( sys.argv[4] != '--jobs' or not sys.argv[5].isdigit() or int( sys.argv[5] ) < 1 ):
+    sys.exit( f"\n   Usage: {sys.argv[0]} <unharmonized CDA TSV dir> <target output directory for harmonized CDA TSVs> <substitution log directory specific to this pass> [--jobs <number of worker processes>]\n" )
 
 cda_tsv_dir = sys.argv[1]
 harmonized_cda_tsv_dir = sys.argv[2]
 substitution_log_dir = sys.argv[3]
 
+# Harmonize up to this many tables (or pieces of tables) at once, each in its own worker process.
+jobs = int( sys.argv[5] ) if len( sys.argv ) == 6 else 1
+
 # PARAMETERS
 
 debug=False
 
 harmonization_map_dir = 'harmonization_maps'
 
-harmonization_field_map_file = path.join( harmonization_map_dir, '000_cda_column_targets.tsv' )
-
 # Enumerate (case-insensitive, space-collapsed) values (as regular expressions) that
 # should be deleted wherever they are found, except for tables listed
 # in `exclude_tables` (some CDS submitter IDs, for example, are "Not Applicable",
@@ -123,6 +130,15 @@ fields_to_ignore_for_unharmonized_tsvs = {
     }
 }
 
+# When running with more than one job, cut these (very large) tables into byte-range shards
+# of about `shard_size_bytes` (uncompressed) each and harmonize the shards in parallel.
+shard_tables = {
+    'file',
+    'mutation'
+}
+
+shard_size_bytes = 256 * 1024 * 1024
+
 # EXECUTION
 
 for output_dir in [ harmonized_cda_tsv_dir, substitution_log_dir ]:
@@ -132,50 +148,7 @@ for output_dir in [ harmonized_cda_tsv_dir, substitution_log_dir ]:
 # Load harmonization maps for all concept-harmonized CDA fields.
 print( f"[{get_current_timestamp()}] Loading harmonization maps...", end='', file=sys.stderr )
 
-harmonized_value = dict()
-
-with open( harmonization_field_map_file ) as IN:
-    
-    colnames = next( IN ).rstrip( '\n' ).split( '\t' )
-
-    for line in [ next_line.rstrip( '\n' ) for next_line in IN ]:
-        
-        row_dict = dict( zip( colnames, line.split( '\t' ) ) )
-
-        table = row_dict['cda_table']
-        column = row_dict['cda_column']
-        concept_map_name = row_dict['concept_map_name']
-        map_file = path.join( harmonization_map_dir, f"{concept_map_name}.tsv" )
-
-        if table not in harmonized_value:
-            harmonized_value[table] = dict()
-
-        if column not in harmonized_value[table]:
-            harmonized_value[table][column] = dict()
-
-        with open( map_file ) as MAP:
-            
-            header_line = next( MAP ).rstrip( '\n' )
-
-            if concept_map_name == 'anatomic_site':
-                for ( old_value, uberon_id, uberon_name ) in [ next_term_tuple.rstrip( '\n' ).split( '\t' ) for next_term_tuple in MAP ]:
-                    if uberon_name != '__CDA_UNASSIGNED__':
-                        harmonized_value[table][column][old_value] = uberon_name
-
-            elif concept_map_name == 'disease':
-                for ( old_value, icd_code, icd_name, do_id, do_name, ncit_codes ) in [ next_term_tuple.rstrip( '\n' ).split( '\t' ) for next_term_tuple in MAP ]:
-                    if icd_name != '__CDA_UNASSIGNED__':
-                        harmonized_value[table][column][old_value] = icd_name
-
-            elif concept_map_name == 'species':
-                for ( old_value, ncbi_tax_id, ncbi_tax_sci_name, cda_common_name ) in [ next_term_tuple.rstrip( '\n' ).split( '\t' ) for next_term_tuple in MAP ]:
-                    if cda_common_name != '__CDA_UNASSIGNED__':
-                        harmonized_value[table][column][old_value] = cda_common_name
-
-            else:
-                for ( old_value, new_value ) in [ next_term_pair.rstrip( '\n' ).split( '\t' ) for next_term_pair in MAP ]:
-                    if new_value != '__CDA_UNASSIGNED__':
-                        harmonized_value[table][column][old_value] = new_value
+harmonized_value = load_harmonization_maps( harmonization_map_dir )
 
 print( 'done.', file=sys.stderr )
 
@@ -190,6 +163,19 @@ print( f"[{get_current_timestamp()}] Harmonizing tables...", end='\n\n', file=sy
 # Track counts of all distinct A-to-B value substitutions.
 all_subs_performed = dict()
 
+# With more than one job, tables (and shards of tables) are harmonized by a pool of worker
+# processes; we collect their results (and run deduplication) once everything's been handed out.
+# With one job, everything happens right here, one table at a time.
+executor = None
+if jobs > 1:
+    executor = ProcessPoolExecutor( max_workers=jobs )
+
+# Scratch space for table shards.
+shard_dir = None
+
+# ( table, its Table_harmonizer, new table file, new "before and after" file or None, gzipped, [ harmonization results or futures ], shard files or None )
+harmonized_tables = list()
+
 # Scan the input directory for files.
 for file_basename in sorted( listdir( cda_tsv_dir ) ):
     
@@ -206,7 +192,7 @@ for file_basename in sorted( listdir( cda_tsv_dir ) ):
         # Assign locations for harmonized versions and "before and after" value map files.
         old_table_file = path.join( cda_tsv_dir, file_basename )
         new_table_file = path.join( harmonized_cda_tsv_dir, file_basename )
-        new_unharmonized_table_file = ''
+        new_unharmonized_table_file = None
         if table in make_unharmonized_tsvs:
             new_unharmonized_table_file = path.join( harmonized_cda_tsv_dir, re.sub( r'\.tsv', r'_harmonization_value_map.tsv', file_basename ) )
 
@@ -222,190 +208,127 @@ for file_basename in sorted( listdir( cda_tsv_dir ) ):
                 print( f"   {column}", file=sys.stderr )
             print( file=sys.stderr )
 
-        # Create and activate file handles for reading and writing.
-        IN = open( old_table_file )
-        OUT = open( new_table_file, 'w' )
-        UNH = None
-        if table in make_unharmonized_tsvs:
-            UNH = open( new_unharmonized_table_file, 'w' )
-
         # Is this file gzipped? If so, its transformed version and "before and after" value map
-        # will also be gzipped -- switch to the right library for reading and writing such files
-        # using the same filehandles we just made.
+        # will also be gzipped (harmonize_tsv() takes care of this based on their names).
         if re.search( r'\.gz$', old_table_file ) is not None:
             gzipped = True
 
-            IN.close()
-            OUT.close()
-            if table in make_unharmonized_tsvs:
-                UNH.close()
-
-            IN = gzip.open( old_table_file, 'rt' )
-            OUT = gzip.open( new_table_file, 'wt' )
-            if table in make_unharmonized_tsvs:
-                UNH = gzip.open( new_unharmonized_table_file, 'wt' )
-
-        # Initialize the transformation counter for this table.
-        all_subs_performed[table] = dict()
-
-        # Pass all columns from the input TSV to its harmonized version.
-        colnames = next( IN ).rstrip( '\n' ).split( '\t' )
-        print( *colnames, sep='\t', file=OUT )
+        # All columns from the input TSV get passed to its harmonized version.
+        with TSV_reader( old_table_file ) as IN:
+            colnames = IN.column_names
+
+        # Compile what happens to each column: columns with an associated CDA harmonization map get
+        # harmonized and then QC'd; all other columns get QC'd unless we're not touching this table
+        # at all. Each column gets one Column_harmonizer, which remembers what it did to each
+        # distinct value, so repeated values (e.g. 'Not Reported') are only ever processed once.
+        column_harmonizers = dict()
+        for column in colnames:
+            if table in harmonized_value and column in harmonized_value[table]:
+                column_harmonizers[column] = Column_harmonizer( value_map=harmonized_value[table][column], delete_everywhere=delete_everywhere )
+            elif table not in exclude_tables:
+                column_harmonizers[column] = Column_harmonizer( delete_everywhere=delete_everywhere )
 
         # If we're creating a "before and after" value map for this table,
         # only work on columns that actually get transformed -- in other words,
         # don't bother mapping "before and after" data for columns whose
-        # "before" and "after" values   will always be identical.
-        unharmonized_tsv_colnames = list()
+        # "before" and "after" values   will always be identical. ID columns
+        # only get their original values recorded.
+        unharmonized_tsv_columns = None
         if table in make_unharmonized_tsvs:
+            unharmonized_tsv_columns = list()
             for colname in colnames:
                 if colname not in fields_to_ignore_for_unharmonized_tsvs[table]:
-                    if colname in { 'id', 'file_id', 'subject_id' }:
-                        unharmonized_tsv_colnames.append( colname )
-                    else:
-                        unharmonized_tsv_colnames.append( f"{colname}_unharmonized" )
-                        unharmonized_tsv_colnames.append( f"{colname}_harmonized" )
-            print( *unharmonized_tsv_colnames, sep='\t', file=UNH )
-
-        # Now go through the input TSV record by record, doing our transformations
-        # and writing results to our output file(s).
-        for next_line in IN:
-            line = next_line.rstrip( '\n' )
-            input_row_dict = dict( zip( colnames, line.split( '\t' ) ) )
-
-            output_row = list()
-            unharmonized_output_row = list()
-
-            # We might not end up forwarding this record to the output files if
-            # it ends up with its values all removed by harmonization and/or QC.
-            # Track that.
-            print_row = True
-
-            for column in colnames:
-                
-                old_value = input_row_dict[column]
-
-                # At no point does it help us to use Python `None` values for
-                # these transformation processes. Convert all such immediately to
-                # empty strings.
-                if old_value is None:
-                    old_value = ''
-
-                if table in harmonized_value and column in harmonized_value[table]:
-                    
-                    # This is a table column that has an associated CDA harmonization map.
-                    new_value = ''
-
-                    if old_value.strip().lower() in harmonized_value[table][column] and harmonized_value[table][column][old_value.strip().lower()] != 'null':
-                        # We have a match in the harmonization map to the original value. Convert the value
-                        # to its harmonized version unless that version is labeled 'null', in which case we
-                        # need do nothing, because we already initialized `new_value` to an empty string above.
-                        new_value = harmonized_value[table][column][old_value.strip().lower()]
-                    elif old_value.strip().lower() not in harmonized_value[table][column]:
-                        # Preserve original values we haven't seen or mapped yet.
-                        new_value = old_value
-
-                    # Check the resulting `new_value` data against global QC cleanup rules: `delete_everywhere` takes precedence.
-                    if re.sub( r'\s', r'', new_value.strip().lower() ) in delete_everywhere:
-                        new_value = ''
-
-                    # Save whatever we've got now for output to the appropriate files.
-                    output_row.append( new_value )
-                    if table in make_unharmonized_tsvs and column not in fields_to_ignore_for_unharmonized_tsvs[table]:
-                        unharmonized_output_row.append( old_value )
-                        unharmonized_output_row.append( new_value )
-
-                    # Count distinct A-to-B substitutions for this table.
-                    if column not in all_subs_performed[table]:
-                        all_subs_performed[table][column] = dict()
-                    if old_value not in all_subs_performed[table][column]:
-                        all_subs_performed[table][column][old_value] = { new_value : 1 }
-                    elif new_value not in all_subs_performed[table][column][old_value]:
-                        all_subs_performed[table][column][old_value][new_value] = 1
-                    else:
-                        all_subs_performed[table][column][old_value][new_value] = all_subs_performed[table][column][old_value][new_value] + 1
-
-                    # Did we delete the only value we care about? If so, don't print the (degenerate) results to the output files.
-                    if table in delete_row_if_nulled and new_value == '':
-                        print_row = False
-
-                elif table not in exclude_tables:
-                    # This isn't a table column that has an associated CDA harmonization map, but it might need cleanup QC.
-                    if re.sub( r'\s', r'', old_value.strip().lower() ) in delete_everywhere:
-                        # The original value needs deleting.
-                        new_value = ''
-                        output_row.append( new_value )
-                        if table in make_unharmonized_tsvs and column not in fields_to_ignore_for_unharmonized_tsvs[table]:
-                            if column in { 'id', 'file_id', 'subject_id' }:
-                                unharmonized_output_row.append( old_value )
-                            else:
-                                unharmonized_output_row.append( old_value )
-                                unharmonized_output_row.append( new_value )
-
-                        if column not in all_subs_performed[table]:
-                            all_subs_performed[table][column] = dict()
-                        if old_value not in all_subs_performed[table][column]:
-                            all_subs_performed[table][column][old_value] = { new_value : 1 }
-                        elif new_value not in all_subs_performed[table][column][old_value]:
-                            all_subs_performed[table][column][old_value][new_value] = 1
-                        else:
-                            all_subs_performed[table][column][old_value][new_value] = all_subs_performed[table][column][old_value][new_value] + 1
-
-                        # Did we delete the only value we care about? If so, don't print the (degenerate) results to the output files.
-                        if table in delete_row_if_nulled:
-                            print_row = False
-
-                    else:
-                        # This value was not deleted due to a delete-everywhere rule, and it's not a harmonized column. Keep the old value.
-                        output_row.append( old_value )
-                        if table in make_unharmonized_tsvs and column not in fields_to_ignore_for_unharmonized_tsvs[table]:
-                            if column in { 'id', 'file_id', 'subject_id' }:
-                                unharmonized_output_row.append( old_value )
-                            else:
-                                unharmonized_output_row.append( old_value )
-                                unharmonized_output_row.append( old_value )
-
+                    unharmonized_tsv_columns.append( ( colname, colname not in { 'id', 'file_id', 'subject_id' } ) )
+
+        # Rows left with all their values removed by harmonization and/or QC (as defined
+        # for this table in the PARAMETERS section) are dropped.
+        table_harmonizer = Table_harmonizer(
+            colnames,
+            column_harmonizers,
+            delete_row_if_nulled=( table in delete_row_if_nulled ),
+            delete_row_if_all_null_but=delete_row_if_all_null_but.get( table, None ),
+            unharmonized_columns=unharmonized_tsv_columns
+        )
+
+        if executor is None:
+            # Harmonize the whole table now.
+            harmonized_tables.append( ( table, table_harmonizer, new_table_file, new_unharmonized_table_file, gzipped, [ harmonize_tsv( table_harmonizer, old_table_file, new_table_file, new_unharmonized_table_file ) ], None ) )
+
+        elif table in shard_tables:
+            if shard_dir is None:
+                shard_dir = tempfile.mkdtemp( prefix='.harmonization_shards.', dir=harmonized_cda_tsv_dir )
+
+            # Byte ranges only make sense for uncompressed files: unpack gzipped input first.
+            shard_input_file = old_table_file
+            if gzipped:
+                shard_input_file = path.join( shard_dir, f"{table}.input.tsv" )
+                with gzip.open( old_table_file, 'rb' ) as IN, open( shard_input_file, 'wb' ) as OUT:
+                    shutil.copyfileobj( IN, OUT, 4 * 1024 * 1024 )
+
+            shard_count = max( 1, min( jobs, math.ceil( path.getsize( shard_input_file ) / shard_size_bytes ) ) )
+            byte_ranges = get_byte_range_shards( shard_input_file, shard_count )
+            print( f"   [{get_current_timestamp()}]    ...harmonizing {file_basename} in {len( byte_ranges )} shard(s)...", file=sys.stderr )
+
+            # Shard outputs keep their table's file suffix, so they're gzipped (or not) to match.
+            futures = list()
+            shard_files = list()
+            for shard_index, byte_range in enumerate( byte_ranges ):
+                shard_file = path.join( shard_dir, f"{shard_index:06d}.{file_basename}" )
+                shard_unharmonized_file = None
+                if new_unharmonized_table_file is not None:
+                    shard_unharmonized_file = path.join( shard_dir, f"{shard_index:06d}.{path.basename( new_unharmonized_table_file )}" )
+                futures.append( executor.submit( harmonize_tsv, table_harmonizer, shard_input_file, shard_file, shard_unharmonized_file, byte_range ) )
+                shard_files.append( ( shard_file, shard_unharmonized_file ) )
+
+            harmonized_tables.append( ( table, table_harmonizer, new_table_file, new_unharmonized_table_file, gzipped, futures, shard_files ) )
+
+        else:
+            harmonized_tables.append( ( table, table_harmonizer, new_table_file, new_unharmonized_table_file, gzipped, [ executor.submit( harmonize_tsv, table_harmonizer, old_table_file, new_table_file, new_unharmonized_table_file ) ], None ) )
+
+# Collect results table by table (in the same order a serial run would), stitch sharded tables back together,
+# and remove duplicate rows where needed.
+deduplication_futures = list()
+
+for ( table, table_harmonizer, new_table_file, new_unharmonized_table_file, gzipped, results, shard_files ) in harmonized_tables:
+    
+    # Merge distinct A-to-B substitution counts for this table (from all its shards, if it was sharded).
+    all_subs_performed[table] = dict()
+    for result in results:
+        merge_substitutions( all_subs_performed[table], result if executor is None else result.result() )
+
+    # Put sharded tables back together, in order, under their original headers.
+    if shard_files is not None:
+        concatenate_tsv_shards( table_harmonizer.column_names, [ shard_file for shard_file, shard_unharmonized_file in shard_files ], new_table_file )
+        if new_unharmonized_table_file is not None:
+            concatenate_tsv_shards( table_harmonizer.unharmonized_column_names, [ shard_unharmonized_file for shard_file, shard_unharmonized_file in shard_files ], new_unharmonized_table_file )
+
+    ignore_ids_when_deduplicating = None
+
+    # If this is a table for which we might generate identical rows, remove duplicates.
+    if table in remove_possible_dupes_including_ids:
+        ignore_ids_when_deduplicating = False
+
+    # If this is a table for which we might generate rows identical except for their row IDs, remove duplicates.
+    elif table in remove_possible_dupes_ignoring_ids:
+        ignore_ids_when_deduplicating = True
+
+    if ignore_ids_when_deduplicating is not None:
+        print( f"   [{get_current_timestamp()}]    ...deduplicating {new_table_file}...", file=sys.stderr )
+        for file_to_dedupe in [ new_table_file, new_unharmonized_table_file ]:
+            if file_to_dedupe is not None:
+                if executor is None:
+                    deduplicate_and_sort_unsorted_file_with_header( file_to_dedupe, gzipped, ignore_primary_id_field=ignore_ids_when_deduplicating )
                 else:
-                    # We're not analyzing values in this table for harmonization at all. Preserve all old values.
-                    output_row.append( old_value )
-                    if table in make_unharmonized_tsvs and column not in fields_to_ignore_for_unharmonized_tsvs[table]:
-                        if column in { 'id', 'file_id', 'subject_id' }:
-                            unharmonized_output_row.append( old_value )
-                        else:
-                            unharmonized_output_row.append( old_value )
-                            unharmonized_output_row.append( old_value )
-
-            # Check transformed rows to see if all their data was removed, and if it was, don't forward them to the output files.
-            if table in delete_row_if_all_null_but:
-                print_row = False
-                row_dict = dict( zip( colnames, output_row ) )
-                for colname in colnames:
-                    if colname not in delete_row_if_all_null_but[table] and row_dict[colname] is not None and row_dict[colname] != '':
-                        print_row = True
-
-            if print_row:
-                print( *output_row, sep='\t', file=OUT )
-                if table in make_unharmonized_tsvs:
-                    print( *unharmonized_output_row, sep='\t', file=UNH )
-
-        IN.close()
-        OUT.close()
-        if table in make_unharmonized_tsvs:
-            UNH.close()
+                    deduplication_futures.append( executor.submit( deduplicate_and_sort_unsorted_file_with_header, file_to_dedupe, gzipped, ignore_primary_id_field=ignore_ids_when_deduplicating ) )
 
-        # If this is a table for which we might generate identical rows, remove duplicates.
-        if table in remove_possible_dupes_including_ids:
-            print( f"   [{get_current_timestamp()}]    ...deduplicating {new_table_file}...", file=sys.stderr )
-            deduplicate_and_sort_unsorted_file_with_header( new_table_file, gzipped, ignore_primary_id_field=False )
-            if table in make_unharmonized_tsvs:
-                deduplicate_and_sort_unsorted_file_with_header( new_unharmonized_table_file, gzipped, ignore_primary_id_field=False )
+for future in deduplication_futures:
+    future.result()
 
-        # If this is a table for which we might generate rows identical except for their row IDs, remove duplicates.
-        elif table in remove_possible_dupes_ignoring_ids:
-            print( f"   [{get_current_timestamp()}]    ...deduplicating {new_table_file}...", file=sys.stderr )
-            deduplicate_and_sort_unsorted_file_with_header( new_table_file, gzipped, ignore_primary_id_field=True )
-            if table in make_unharmonized_tsvs:
-                deduplicate_and_sort_unsorted_file_with_header( new_unharmonized_table_file, gzipped, ignore_primary_id_field=True )
+if executor is not None:
+    executor.shutdown()
+
+if shard_dir is not None:
+    shutil.rmtree( shard_dir )
 
 print( f"\n[{get_current_timestamp()}] ...done.", file=sys.stderr )
 
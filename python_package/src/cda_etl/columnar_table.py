@@ -0,0 +1,192 @@
+import sys
+
+from collections.abc import Mapping
+from itertools import chain, islice
+
+from cda_etl.tsv_reader import TSV_reader
+
+# Columns are only interned if, among the first INTERN_SAMPLE_ROWS rows, they have at most
+# INTERN_MAX_DISTINCT_FRACTION as many distinct values as rows. Interning mostly-unique columns
+# (IDs, file names, checksums) costs time and saves nothing.
+
+INTERN_SAMPLE_ROWS = 1000
+
+INTERN_MAX_DISTINCT_FRACTION = 0.5
+
+class Columnar_row( Mapping ):
+    
+    """
+    Read-only view of one row of a Columnar_table, behaving like the dict( zip( column_names, values ) )
+    load_tsv_as_dict() would have built for it. Values are looked up in the table's column arrays on
+    access; nothing is copied.
+    """
+
+    __slots__ = ( 'table', 'row_number' )
+
+    def __init__( self, table, row_number ):
+        
+        self.table = table
+
+        self.row_number = row_number
+
+    def __getitem__( self, column_name ):
+        
+        return self.table.columns[self.table.column_positions[column_name]][self.row_number]
+
+    def __iter__( self ):
+        
+        return iter( self.table.column_positions )
+
+    def __len__( self ):
+        
+        return len( self.table.column_positions )
+
+    def __contains__( self, column_name ):
+        
+        return column_name in self.table.column_positions
+
+    def __repr__( self ):
+        
+        return repr( dict( self ) )
+
+class Columnar_row_group( Mapping ):
+    
+    """
+    Read-only second-level mapping ( second key -> Columnar_row ) for tables loaded with id_column_count=2.
+    """
+
+    __slots__ = ( 'table', 'row_numbers' )
+
+    def __init__( self, table, row_numbers ):
+        
+        self.table = table
+
+        self.row_numbers = row_numbers
+
+    def __getitem__( self, key ):
+        
+        return Columnar_row( self.table, self.row_numbers[key] )
+
+    def __iter__( self ):
+        
+        return iter( self.row_numbers )
+
+    def __len__( self ):
+        
+        return len( self.row_numbers )
+
+    def __contains__( self, key ):
+        
+        return key in self.row_numbers
+
+class Columnar_table( Mapping ):
+    
+    """
+    Read-only, memory-compact stand-in for load_tsv_as_dict( input_file, id_column_count ): the same
+    mapping API (record ID -> { column name -> value }, or, for id_column_count=2, ID one -> ID two ->
+    { column name -> value }), the same key order, and the same last-row-wins handling of repeated IDs.
+
+    Instead of one dict per row, each column is stored as a single list of values, so each cell costs one
+    pointer. Values in low-cardinality columns (e.g. 'Not Reported', data types, project names) are interned,
+    so each distinct value is stored once. Which columns those are is decided from a sample of leading rows
+    (the ID columns never are) unless `intern_columns` names them. Rows are located through one
+    ( key -> row number ) index, and rows are handed out as lazy Columnar_row views.
+
+        file = Columnar_table( file_input_tsv )
+
+        for file_id in file:
+            
+            file_name = file[file_id]['file_name']
+    """
+
+    def __init__( self, input_file, id_column_count=1, intern_columns=None ):
+        
+        if id_column_count not in { 1, 2 }:
+            
+            sys.exit( f"Columnar_table(): FATAL: id_column_count must be 1 or 2 (your value: '{id_column_count}'). Aborting." )
+
+        self.id_column_count = id_column_count
+
+        self.row_index = dict()
+
+        with TSV_reader( input_file ) as IN:
+            
+            self.column_names = IN.column_names
+
+            # As with dict( zip( column_names, values ) ): keys in order of first appearance, values from the last column with that name.
+
+            self.column_positions = dict()
+
+            for position, column_name in enumerate( self.column_names ):
+                
+                self.column_positions[column_name] = position
+
+            self.columns = [ list() for column_name in self.column_names ]
+
+            column_count = len( self.column_names )
+
+            rows = IN.rows()
+
+            sample_rows = list( islice( rows, INTERN_SAMPLE_ROWS ) )
+
+            if intern_columns is None:
+                
+                intern_positions = { position for position in range( id_column_count, column_count ) if len( { values[position] for values in sample_rows if len( values ) > position } ) <= INTERN_MAX_DISTINCT_FRACTION * len( sample_rows ) }
+
+            else:
+                
+                for column_name in intern_columns:
+                    
+                    if column_name not in self.column_positions:
+                        
+                        sys.exit( f"Columnar_table(): FATAL: intern_columns entry '{column_name}' is not a column of '{input_file}'. Aborting." )
+
+                intern_positions = { self.column_positions[column_name] for column_name in intern_columns }
+
+            interned = [ position in intern_positions for position in range( column_count ) ]
+
+            intern = sys.intern
+
+            for row_number, values in enumerate( chain( sample_rows, rows ) ):
+                
+                if len( values ) < column_count:
+                    
+                    sys.exit( f"Columnar_table(): FATAL: row {row_number + 1} of '{input_file}' has {len( values )} fields; expected {column_count}. Aborting." )
+
+                for column, value, intern_value in zip( self.columns, values, interned ):
+                    
+                    column.append( intern( value ) if intern_value else value )
+
+                # If the ID columns turn out not to be unique, only the last record will be stored for any repeated ID (as with load_tsv_as_dict()).
+
+                if id_column_count == 1:
+                    
+                    self.row_index[values[0]] = row_number
+
+                else:
+                    
+                    if values[0] not in self.row_index:
+                        
+                        self.row_index[values[0]] = dict()
+
+                    self.row_index[values[0]][values[1]] = row_number
+
+    def __getitem__( self, key ):
+        
+        if self.id_column_count == 1:
+            
+            return Columnar_row( self, self.row_index[key] )
+
+        return Columnar_row_group( self, self.row_index[key] )
+
+    def __iter__( self ):
+        
+        return iter( self.row_index )
+
+    def __len__( self ):
+        
+        return len( self.row_index )
+
+    def __contains__( self, key ):
+        
+        return key in self.row_index
@@ -0,0 +1,341 @@
+import heapq
+import re
+import shutil
+import tempfile
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count, path
+
+# Default cap (in bytes, approximately) on how much line data sort_lines() will hold in memory at once,
+# across the run currently being filled and all runs being sorted by worker processes.
+
+DEFAULT_MAX_SORT_MEMORY = 1024 * 1024 * 1024
+
+# Default number of worker processes sort_lines() will use to sort runs in parallel.
+
+DEFAULT_SORT_WORKERS = min( 4, cpu_count() or 1 )
+
+# Maximum number of run files we'll merge at once. More runs than this get merged in multiple passes.
+
+MAX_MERGE_FAN_IN = 256
+
+# Rough per-line overhead of holding a str in a list, used when estimating run sizes.
+
+LINE_OVERHEAD_BYTES = 64
+
+# Run files are tab- and newline-delimited: these characters are backslash-escaped in values
+# on the way out (backslash first) and restored on the way back in.
+
+_RUN_FILE_ESCAPES = [ ( '\\', '\\\\' ), ( '\t', '\\t' ), ( '\n', '\\n' ), ( '\r', '\\r' ) ]
+
+_RUN_FILE_UNESCAPES = { '\\': '\\', 't': '\t', 'n': '\n', 'r': '\r' }
+
+def _escape_value( value ):
+    
+    for character, escaped in _RUN_FILE_ESCAPES:
+        
+        value = value.replace( character, escaped )
+
+    return value
+
+def _unescape_value( value ):
+    
+    return re.sub( r'\\(.)', lambda match: _RUN_FILE_UNESCAPES[match.group( 1 )], value, flags=re.DOTALL ) if '\\' in value else value
+
+def _write_sorted_run( sorted_entries, run_file ):
+    
+    """
+    Write an already-sorted iterable of tuples of strings to `run_file`, one tab-delimited tuple per line
+    (with tabs, newlines and backslashes in values escaped).
+    """
+
+    with open( run_file, 'w', encoding='utf-8', newline='' ) as OUT:
+        
+        for entry in sorted_entries:
+            
+            OUT.write( '\t'.join( _escape_value( value ) for value in entry ) + '\n' )
+
+def _read_sorted_run( run_file ):
+    
+    with open( run_file, encoding='utf-8', newline='' ) as IN:
+        
+        for line in IN:
+            
+            yield tuple( _unescape_value( value ) for value in line[:-1].split( '\t' ) )
+
+def merge_sorted_entries( sorted_iterables ):
+    
+    """
+    k-way merge any number of sorted iterables of tuples into one sorted stream, dropping exact duplicates.
+    """
+
+    last_entry = None
+
+    for entry in heapq.merge( *sorted_iterables ):
+        
+        if entry != last_entry:
+            
+            yield entry
+
+        last_entry = entry
+
+class External_association_map:
+    
+    """
+    Bounded-memory stand-in for the dict-of-sets association maps built with lib.add_to_map()
+    and written with lib.write_association_pairs().
+
+    Entries (tuples of strings; ( id_one, id_two ) pairs for add_to_map() callers) are
+    deduplicated in memory until `max_entries_in_memory` distinct entries have accumulated,
+    at which point they're sorted and spilled to a run file in `spill_dir`. sorted_entries()
+    then k-way merges all runs (plus whatever's still in memory) into one sorted,
+    deduplicated stream -- the same rows, in the same order, that sorting the full
+    in-memory map would have produced. Values are always stored as str( value ) (as lib.add_to_map()
+    does for dict maps), whether or not they ever get spilled.
+    """
+
+    def __init__( self, spill_dir, max_entries_in_memory ):
+        
+        self.spill_dir = tempfile.mkdtemp( prefix='association_runs.', dir=spill_dir )
+
+        self.max_entries_in_memory = max_entries_in_memory
+
+        self.entries = set()
+
+        self.run_files = list()
+
+    def add( self, *values ):
+        
+        self.entries.add( tuple( str( value ) for value in values ) )
+
+        if len( self.entries ) >= self.max_entries_in_memory:
+            
+            self.__spill()
+
+    def __spill( self ):
+        
+        run_file = path.join( self.spill_dir, f"run.{len( self.run_files ):06d}.tsv" )
+
+        _write_sorted_run( sorted( self.entries ), run_file )
+
+        self.run_files.append( run_file )
+
+        self.entries = set()
+
+    def sorted_entries( self ):
+        
+        return merge_sorted_entries( [ _read_sorted_run( run_file ) for run_file in self.run_files ] + [ sorted( self.entries ) ] )
+
+    def close( self ):
+        
+        """
+        Discard all entries and delete any run files.
+        """
+
+        self.entries = set()
+
+        self.run_files = list()
+
+        shutil.rmtree( self.spill_dir, ignore_errors=True )
+
+def line_without_newline( line ):
+    
+    """
+    Sort key: a line without its trailing newline (so 'a' sorts before 'a\tb', as it would for rstripped lines).
+    """
+
+    return line[:-1] if line.endswith( '\n' ) else line
+
+def first_field_as_int( line ):
+    
+    """
+    Sort key: the first tab-delimited field of a line, as an integer.
+    """
+
+    return int( line.split( '\t', 1 )[0] )
+
+def _unique_adjacent( sorted_lines ):
+    
+    last_line = None
+
+    for line in sorted_lines:
+        
+        if line != last_line:
+            
+            yield line
+
+        last_line = line
+
+def _sort_run( lines, run_file, key, unique ):
+    
+    """
+    Sort one run's worth of lines and write them to `run_file`. Runs in a worker process.
+    """
+
+    if unique:
+        
+        lines = set( lines )
+
+    with open( run_file, 'w', encoding='utf-8', newline='' ) as OUT:
+        
+        OUT.writelines( sorted( lines, key=key ) )
+
+    return run_file
+
+def _read_run( run_file ):
+    
+    with open( run_file, encoding='utf-8', newline='' ) as IN:
+        
+        yield from IN
+
+def _merge_runs( sorted_runs, key, unique ):
+    
+    merged_lines = heapq.merge( *sorted_runs, key=key )
+
+    return _unique_adjacent( merged_lines ) if unique else merged_lines
+
+def sort_lines( lines, key=None, unique=False, max_memory=None, workers=None, temp_dir=None ):
+    
+    """
+    Yield `lines` in sorted order (by `key`, if given), dropping exact duplicates if `unique` is True.
+
+    Every line must end with a single '\n' and contain no other newlines, except that the last line
+    may be missing its newline (in which case it's compared, and yielded, as-is). Ties are resolved
+    the same way sorted() would resolve them (i.e. the sort is stable).
+
+    Input that fits within `max_memory` bytes is sorted in memory. Anything bigger is cut into
+    fixed-size runs, which are sorted and written to temporary files (under `temp_dir`) by up to
+    `workers` worker processes in parallel and then k-way merged back together.
+
+    `key` must be picklable (i.e. a module-level function) if the input might not fit in memory.
+    """
+
+    if max_memory is None:
+        
+        max_memory = DEFAULT_MAX_SORT_MEMORY
+
+    if workers is None:
+        
+        workers = DEFAULT_SORT_WORKERS
+
+    # Leave room for one run being filled plus one being sorted by each worker.
+
+    max_run_bytes = max( 1, max_memory // ( workers + 1 ) )
+
+    run_dir = None
+
+    run_files = list()
+
+    pending_runs = deque()
+
+    executor = None
+
+    try:
+        
+        current_run = list()
+
+        current_run_bytes = 0
+
+        # Lines without newlines can't be written to run files; there's at most one of these.
+
+        unterminated_lines = list()
+
+        for line in lines:
+            
+            if not line.endswith( '\n' ):
+                
+                unterminated_lines.append( line )
+
+                continue
+
+            current_run.append( line )
+
+            current_run_bytes += len( line ) + LINE_OVERHEAD_BYTES
+
+            if current_run_bytes >= max_run_bytes:
+                
+                if executor is None:
+                    
+                    run_dir = tempfile.mkdtemp( prefix='sort_runs.', dir=temp_dir )
+
+                    executor = ProcessPoolExecutor( max_workers=workers )
+
+                # Don't let more than `workers` runs' worth of lines pile up waiting to be sorted.
+
+                if len( pending_runs ) >= workers:
+                    
+                    run_files.append( pending_runs.popleft().result() )
+
+                run_file = path.join( run_dir, f"run.{len( run_files ) + len( pending_runs ):06d}.txt" )
+
+                pending_runs.append( executor.submit( _sort_run, current_run, run_file, key, unique ) )
+
+                current_run = list()
+
+                current_run_bytes = 0
+
+        if executor is None:
+            
+            # Everything fit in memory.
+
+            current_run.extend( unterminated_lines )
+
+            if unique:
+                
+                current_run = set( current_run )
+
+            yield from sorted( current_run, key=key )
+
+            return
+
+        if len( current_run ) > 0:
+            
+            run_file = path.join( run_dir, f"run.{len( run_files ) + len( pending_runs ):06d}.txt" )
+
+            pending_runs.append( executor.submit( _sort_run, current_run, run_file, key, unique ) )
+
+            current_run = list()
+
+        while len( pending_runs ) > 0:
+            
+            run_files.append( pending_runs.popleft().result() )
+
+        executor.shutdown()
+
+        executor = None
+
+        # Merge in multiple passes if we have too many runs to keep open at once. Runs are
+        # merged in their original order so ties still come out in input order.
+
+        merge_pass = 0
+
+        while len( run_files ) > MAX_MERGE_FAN_IN:
+            
+            merged_run_files = list()
+
+            for start_index in range( 0, len( run_files ), MAX_MERGE_FAN_IN ):
+                
+                merged_run_file = path.join( run_dir, f"merge.{merge_pass:03d}.{len( merged_run_files ):06d}.txt" )
+
+                with open( merged_run_file, 'w', encoding='utf-8', newline='' ) as OUT:
+                    
+                    OUT.writelines( _merge_runs( [ _read_run( run_file ) for run_file in run_files[start_index:start_index + MAX_MERGE_FAN_IN] ], key, unique ) )
+
+                merged_run_files.append( merged_run_file )
+
+            run_files = merged_run_files
+
+            merge_pass += 1
+
+        yield from _merge_runs( [ _read_run( run_file ) for run_file in run_files ] + [ sorted( unterminated_lines, key=key ) ], key, unique )
+
+    finally:
+        
+        if executor is not None:
+            
+            executor.shutdown( cancel_futures=True )
+
+        if run_dir is not None:
+            
+            shutil.rmtree( run_dir, ignore_errors=True )
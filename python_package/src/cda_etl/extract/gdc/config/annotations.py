@@ -9,6 +9,11 @@ number_of_field_list_chunks = 1
 
 result_page_size = 500
 
+# Maximum number of page/chunk requests we'll allow to be in flight against
+# this endpoint at any one time. Set to 1 to page through results serially.
+
+max_concurrent_requests = 2
+
 # Sub-objects we'll need to ask for with the API's 'expand' parameter
 # because asking for them field-by-field makes URLs that are too big
 # for the server to handle.
@@ -90,6 +95,13 @@ association_maps = {
     'annotation_in_project' : dict()
 }
 
+# Memory budget for building association tables: once any one association map
+# holds this many distinct entries, they're sorted and spilled to a run file
+# next to the API JSON, and all runs are merged (with deduplication) when the
+# table is written. Set to None to hold every map entirely in memory.
+
+max_association_entries_in_memory = None
+
 # Do we need to load association data by recursively scanning substructures
 # of records at this endpoint? (If not, we'll scrape all needed association
 # data from the top level without recursion.)
@@ -9,6 +9,11 @@ number_of_field_list_chunks = 2
 
 result_page_size = 5000
 
+# Maximum number of page/chunk requests we'll allow to be in flight against
+# this endpoint at any one time. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
 # Sub-objects we'll need to ask for with the API's 'expand' parameter
 # because asking for them field-by-field makes URLs that are too big
 # for the server to handle.
@@ -136,6 +141,13 @@ association_maps = {
     'read_group_qc_in_read_group' : dict()
 }
 
+# Memory budget for building association tables: once any one association map
+# holds this many distinct entries, they're sorted and spilled to a run file
+# next to the API JSON, and all runs are merged (with deduplication) when the
+# table is written. Set to None to hold every map entirely in memory.
+
+max_association_entries_in_memory = 2000000
+
 # Do we need to load association data by recursively scanning substructures
 # of records at this endpoint? (If not, we'll scrape all needed association
 # data from the top level without recursion.)
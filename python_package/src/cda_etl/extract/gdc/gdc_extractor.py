@@ -2,14 +2,17 @@ import gzip
 import json
 import jsonlines
 import re
-import requests
 import shutil
 import sys
 import time
 
-from collections import defaultdict
-from os import listdir, makedirs, path, rename
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import count
+from os import fsync, listdir, makedirs, path, remove, rename
 
+from cda_etl import http_client
+from cda_etl.external_sort import External_association_map
 from cda_etl.lib import add_to_map, associate_id_list_with_parent, get_current_date, get_safe_value, singularize, sort_file_with_header, write_association_pairs
 
 class GDC_extractor:
@@ -86,6 +89,11 @@ class GDC_extractor:
 
         self.api_result_file = f"{self.JSON_DIR}/{source}.{endpoint}.jsonl.gz"
 
+        # Checkpoint sidecar for self.api_result_file. This only exists while a pull is in
+        # progress (or was interrupted), and records enough state to resume it.
+
+        self.api_result_checkpoint_file = f"{self.api_result_file}.checkpoint.json"
+
         self.complex_structure_list_file = f"{self.METADATA_DIR}/non-atomic_substructures.txt"
 
         self.base_table_tsv = f"{self.TSV_DIR}/{self.endpoint_singular}.tsv"
@@ -108,6 +116,11 @@ class GDC_extractor:
 
         self.result_page_size = endpoint_config.result_page_size
 
+        # Maximum number of page/chunk requests we'll allow to be in flight
+        # against the API at the same time. 1 means page serially.
+
+        self.max_concurrent_requests = endpoint_config.max_concurrent_requests
+
         # Sub-objects we'll need to ask for with the API's 'expand' parameter
         # because asking for them field-by-field makes URLs that are too big
         # for the server to handle.
@@ -175,6 +188,21 @@ class GDC_extractor:
 
         self.association_maps = endpoint_config.association_maps
 
+        # Association maps holding per-project statistical summaries (keyed records, not ID pairs).
+        # These are small and are always kept in memory.
+
+        self.statistical_summary_association_maps = {
+            
+            'project_summary_data',
+            'project_data_category_summary_data',
+            'project_experimental_strategy_summary_data'
+        }
+
+        # Maximum number of distinct entries we'll hold in memory for any one association map
+        # before spilling a sorted run to disk. None means never spill.
+
+        self.max_association_entries_in_memory = endpoint_config.max_association_entries_in_memory
+
         # Do we need to load association data by recursively scanning substructures
         # of records at this endpoint? (If not, we'll scrape all needed association
         # data from the top level without recursion.)
@@ -198,7 +226,7 @@ class GDC_extractor:
             # Compute self.fields_to_use and self.groups_to_expand using the config
             # data for this endpoint along with live results from its _mapping url.
 
-            json_result = requests.get( self.mapping_url )
+            json_result = http_client.get( self.mapping_url )
 
             if not json_result.ok:
                 
@@ -272,68 +300,24 @@ class GDC_extractor:
         
         """
         Make a single GET call to the REST API at `url` with a query string built from `parameters`.
-        """
 
-        result = requests.Response()
+        Transient failures are retried (with backoff) by the shared HTTP client; anything
+        still failing after that is fatal.
+        """
 
         try:
-            result = requests.get( self.endpoint_url, params=parameters )
-        except Exception as e:
-            try:
-                print( f"WARNING: call to API /{self.endpoint_url} endpoint with parameters {parameters} generated an error: {e}", file=sys.stderr )
-                print( 'Retrying after 15s...', file=sys.stderr )
-                time.sleep( 15 )
-                result = requests.get( self.endpoint_url, params=parameters )
-            except Exception as e_2:
-                try:
-                    print( f"WARNING: call to API /{self.endpoint_url} endpoint with parameters {parameters} generated an error: {e_2}", file=sys.stderr )
-                    print( 'Retrying after 30s...', file=sys.stderr )
-                    time.sleep( 30 )
-                    result = requests.get( self.endpoint_url, params=parameters )
-                except Exception as e_3:
-                    sys.exit( f"Unrecoverable error. Final error message: {e_3}" )
-
-        if result.ok:
-            return result
+            
+            result = http_client.get( self.endpoint_url, params=parameters )
 
-        else:
-            print( f"WARNING: call to API /{self.endpoint_url} endpoint with parameters {parameters} failed. Response content: " + str( result.content ), file=sys.stderr )
-            print( 'Retrying after 15s...', file=sys.stderr )
-            try:
-                time.sleep( 15 )
-                result = requests.get( self.endpoint_url, params=parameters )
-            except Exception as e_2:
-                try:
-                    print( f"WARNING: call to API /{self.endpoint_url} endpoint with parameters {parameters} generated an error: {e_2}", file=sys.stderr )
-                    print( 'Retrying after 30s...', file=sys.stderr )
-                    time.sleep( 30 )
-                    result = requests.get( self.endpoint_url, params=parameters )
-                except Exception as e_3:
-                    sys.exit( f"Unrecoverable error. Final error message: {e_3}" )
+        except Exception as e:
+            
+            sys.exit( f"FATAL: call to API /{self.endpoint_url} endpoint with parameters {parameters} generated an unrecoverable error: {e}" )
 
-            if result.ok:
-                return result
+        if not result.ok:
+            
+            sys.exit( f"FATAL: call to API /{self.endpoint_url} endpoint with parameters {parameters} failed. Response content: " + str( result.content ) )
 
-            else:
-                print( f"WARNING: call to API /{self.endpoint_url} endpoint with parameters {parameters} failed. Response content: " + str( result.content ), file=sys.stderr )
-                print( 'Retrying after 30s...', file=sys.stderr )
-                try:
-                    time.sleep( 30 )
-                    result = requests.get( self.endpoint_url, params=parameters )
-                except Exception as e_2:
-                    try:
-                        print( f"WARNING: call to API /{self.endpoint_url} endpoint with parameters {parameters} generated an error: {e_2}", file=sys.stderr )
-                        print( 'Retrying after 60s...', file=sys.stderr )
-                        time.sleep( 60 )
-                        result = requests.get( self.endpoint_url, params=parameters )
-                    except Exception as e_3:
-                        sys.exit( f"Unrecoverable error. Final error message: {e_3}" )
-
-                if result.ok:
-                    return result
-                else:
-                    # Give up.
-                    sys.exit( f"FATAL: call to API /{self.endpoint_url} endpoint with parameters {parameters} failed. Response content: " + str( result.content ) )
+        return result
 
     def __partition_field_list_into_chunks( self ):
         
@@ -386,277 +370,408 @@ class GDC_extractor:
 
         return [ list_chunk for list_chunk in field_list_chunks if len(list_chunk) > 1 ]
 
-    def __paginate_endpoint_calls( self ):
+    def __get_page_chunk( self, record_offset, field_chunk ):
         
         """
-        Get data from the API at `url` one page at a time; yield resulting records one at a time.
+        Request one chunk of fields for one page of results (starting at `record_offset`) and return the decoded JSON.
+        """
+
+        parameters = {
+            
+            "format": "json",
+            "fields": ",".join(field_chunk),
+            "size": self.result_page_size,
+            "from": record_offset,
+        }
+
+        if len(self.groups_to_expand) > 0:
+            
+            parameters["expand"] = ",".join(self.groups_to_expand)
+
+        result = self.__get_endpoint_JSON( parameters )
+
+        return result.json()
+
+    def __merge_page_chunks( self, chunk_results ):
         
-        Returns:
-            List of dictionaries, each of which contains one record from the given endpoint.
+        """
+        Merge per-chunk API results for a single page into whole records, keyed on `id`.
 
-        Yields:
-            One dictionary representing one record from the given endpoint.
+        Chunk results are consumed in field-chunk order, so merged records (and the
+        order in which they're returned) don't depend on which request finished first.
         """
 
-        fields = self.fields_to_use
+        record_chunks = defaultdict( list )
+
+        for resultJSON in chunk_results:
+            
+            for result_chunk in resultJSON["data"]["hits"]:
+                
+                record_chunks[result_chunk["id"]].append(result_chunk)
 
-        expands = self.groups_to_expand
+        return [ { key: value for record in record_chunk for key, value in record.items() } for record_chunk in record_chunks.values() ]
 
-        url = self.endpoint_url
+    def __paginate_endpoint_calls( self, field_chunks, start_offset=0 ):
+        
+        """
+        Get data from the API at `url` one page at a time, beginning at record offset
+        `start_offset`; yield merged records one page at a time.
+
+        The first page is fetched on its own so we can learn the total page count from its
+        `pagination` block. After that, requests for (page, field chunk) pairs are issued
+        in parallel, up to self.max_concurrent_requests at a time, but pages are still
+        merged and yielded strictly in offset order.
+
+        Yields:
+            ( record_offset, records ): the `from` offset of the page and a list of
+            dictionaries, each of which contains one record from the given endpoint.
+        """
 
         page_size = self.result_page_size
 
-        number_of_chunks = self.number_of_field_list_chunks
+        # Bound the number of pages we'll have queued (or sitting in memory, finished but
+        # not yet yielded) at any one time.
 
-        field_chunks = self.__partition_field_list_into_chunks()
+        max_pending_pages = 2 * self.max_concurrent_requests
 
-        # Track the current page number. This'll be populated from API result data after it's used once;
-        # these are seed values so the loop invariant for the first iteration of the while loop is true and
-        # so we can print a "Pulling page 1" message for the first page at the right time.
+        first_page_index = start_offset // page_size
 
-        page_number = 0
+        with ThreadPoolExecutor( max_workers=self.max_concurrent_requests ) as executor:
+            
+            print( f"Pulling page {first_page_index + 1} / (unknown)...", end='', file=sys.stderr )
 
-        total_pages = 10000
+            chunk_results = [ future.result() for future in [ executor.submit( self.__get_page_chunk, start_offset, field_chunk ) for field_chunk in field_chunks ] ]
 
-        # Keep track of how many records we've completed so we can tell the API where to begin each successive page.
+            total_pages = chunk_results[-1]["data"]["pagination"]["pages"]
 
-        record_offset = 0
+            yield ( start_offset, self.__merge_page_chunks( chunk_results ) )
 
-        while page_number < total_pages:
+            # Queue of ( page_index, [ one future per field chunk ] ), in offset order.
 
-            record_chunks = defaultdict( list )
+            pending_pages = deque()
 
-            print_page_number = page_number + 1
-            print_total_pages = total_pages
-            if print_total_pages == 10000:
-                print_total_pages = '(unknown)'
-            print( f"Pulling page {print_page_number} / {print_total_pages}...", end='', file=sys.stderr )
+            next_page_index = first_page_index + 1
 
-            for field_chunk in field_chunks:
+            while next_page_index < total_pages or len( pending_pages ) > 0:
                 
-                field_parameters = ",".join(field_chunk)
-
-                parameters = {
+                while next_page_index < total_pages and len( pending_pages ) < max_pending_pages:
                     
-                    "format": "json",
-                    "fields": field_parameters,
-                    "size": page_size,
-                    "from": record_offset,
-                }
+                    record_offset = next_page_index * page_size
 
-                expand_parameters= ",".join(expands)
+                    pending_pages.append( ( next_page_index, [ executor.submit( self.__get_page_chunk, record_offset, field_chunk ) for field_chunk in field_chunks ] ) )
 
-                if len(expands) > 0:
-                    
-                    expand_parameters= ",".join(expands)
+                    next_page_index += 1
 
-                    parameters["expand"] = expand_parameters
+                page_index, futures = pending_pages.popleft()
 
-                result = self.__get_endpoint_JSON( parameters )
+                print( f"Pulling page {page_index + 1} / {total_pages}...", end='', file=sys.stderr )
 
-                resultJSON = result.json()
+                chunk_results = [ future.result() for future in futures ]
 
-                for result_chunk in resultJSON["data"]["hits"]:
-                    
-                    record_chunks[result_chunk["id"]].append(result_chunk)
+                yield ( page_index * page_size, self.__merge_page_chunks( chunk_results ) )
+
+    def __load_checkpoint( self ):
+        
+        """
+        Load the checkpoint left behind by an interrupted pull, if there is one and it's
+        still usable with the current configuration. Returns None otherwise.
+        """
 
-                page_number = resultJSON["data"]["pagination"]["page"]
+        if not path.exists( self.api_result_checkpoint_file ) or not path.exists( self.api_result_file ):
+            
+            return None
 
-                total_pages = resultJSON["data"]["pagination"]["pages"]
+        with open( self.api_result_checkpoint_file ) as IN:
+            
+            checkpoint = json.load( IN )
 
-            # Merge chunks of the same record.
+        checkpoint_fields = { field for field_chunk in checkpoint['field_chunks'] for field in field_chunk }
 
-            result_list = [ { key: value for record in record_chunk for key, value in record.items() } for record_chunk in record_chunks.values() ]
+        current_fields = set( self.fields_to_use ) | { 'id' }
 
-            # Yield merged records one at a time.
+        if checkpoint['page_size'] != self.result_page_size \
+            or sorted( checkpoint['groups_to_expand'] ) != sorted( self.groups_to_expand ) \
+            or checkpoint_fields != current_fields \
+            or path.getsize( self.api_result_file ) < checkpoint['committed_bytes']:
+            
+            print( f"WARNING: ignoring stale checkpoint file '{self.api_result_checkpoint_file}' (it doesn't match the current configuration or result file); restarting pull from offset 0.", file=sys.stderr )
 
-            for result in result_list:
-                
-                yield result
+            return None
+
+        return checkpoint
+
+    def __save_checkpoint( self, field_chunks, next_offset, committed_bytes, record_count ):
+        
+        """
+        Atomically record how far we've gotten: the next uncommitted `from` offset, the
+        size of the result file as of the last committed page, and the field-chunk
+        layout used to request pages (so a resumed pull merges chunks the same way).
+        """
+
+        checkpoint = {
+            
+            'page_size': self.result_page_size,
+            'groups_to_expand': sorted( self.groups_to_expand ),
+            'field_chunks': field_chunks,
+            'next_offset': next_offset,
+            'committed_bytes': committed_bytes,
+            'record_count': record_count
+        }
+
+        temp_file = self.api_result_checkpoint_file + '.tmp'
 
-            record_offset += page_size
+        with open( temp_file, 'w' ) as OUT:
+            
+            json.dump( checkpoint, OUT )
+
+            OUT.flush()
+
+            fsync( OUT.fileno() )
+
+        rename( temp_file, self.api_result_checkpoint_file )
 
     def get_endpoint_records( self ):
         
-        if self.refresh or not path.exists( self.api_result_file ):
+        """
+        Pull all records from the endpoint into self.api_result_file.
+
+        Each completed page is appended to the result file as its own gzip member and then
+        committed to a checkpoint sidecar file. If a previous pull was interrupted, we
+        discard anything written after its last committed page and resume from the next
+        uncommitted offset, so no records are duplicated or lost. The sidecar is
+        removed once the pull is complete.
+        """
+
+        if self.refresh or not path.exists( self.api_result_file ) or path.exists( self.api_result_checkpoint_file ):
             
             start_time = time.time()
 
-            record_count = 0
+            checkpoint = self.__load_checkpoint()
 
-            with gzip.open( self.api_result_file, "wb" ) as fp:
+            if checkpoint is not None:
                 
-                writer = jsonlines.Writer(fp)
+                field_chunks = checkpoint['field_chunks']
+
+                start_offset = checkpoint['next_offset']
+
+                record_count = checkpoint['record_count']
 
-                for record in self.__paginate_endpoint_calls():
+                # Drop any partially-written (uncommitted) page data.
+
+                with open( self.api_result_file, 'r+b' ) as RESULT:
                     
-                    writer.write(record)
+                    RESULT.truncate( checkpoint['committed_bytes'] )
 
-                    record_count += 1
+                sys.stderr.write( f"Resuming interrupted '{self.endpoint}' pull at offset {start_offset} ({record_count} records already committed).\n" )
 
-                    if record_count % self.result_page_size == 0:
+            else:
+                
+                field_chunks = self.__partition_field_list_into_chunks()
+
+                start_offset = 0
+
+                record_count = 0
+
+                # Start from an empty result file.
+
+                open( self.api_result_file, 'wb' ).close()
+
+                self.__save_checkpoint( field_chunks, 0, 0, 0 )
+
+            for record_offset, records in self.__paginate_endpoint_calls( field_chunks, start_offset ):
+                
+                with open( self.api_result_file, 'ab' ) as RESULT:
+                    
+                    with gzip.GzipFile( fileobj=RESULT, mode='wb' ) as fp:
                         
-                        elapsed_time = time.time() - start_time
+                        writer = jsonlines.Writer(fp)
+
+                        writer.write_all(records)
+
+                    RESULT.flush()
+
+                    fsync( RESULT.fileno() )
+
+                    committed_bytes = RESULT.tell()
+
+                record_count += len(records)
 
-                        sys.stderr.write( f"done. Wrote {record_count} '{self.endpoint_singular}' records in {elapsed_time:.1f}s.\n" )
+                self.__save_checkpoint( field_chunks, record_offset + self.result_page_size, committed_bytes, record_count )
+
+                elapsed_time = time.time() - start_time
+
+                sys.stderr.write( f"done. Wrote {record_count} '{self.endpoint_singular}' records in {elapsed_time:.1f}s.\n" )
+
+            remove( self.api_result_checkpoint_file )
 
             elapsed_time = time.time() - start_time
 
             sys.stderr.write( f"\nEndpoint pull complete. Wrote {record_count} '{self.endpoint_singular}' records in {elapsed_time:.1f}s.\n" )
 
-    def make_base_table( self ):
+            http_client.print_metrics()
+
+    def __scan_api_result_file( self, visitors ):
         
-        if self.refresh or not path.exists( self.base_table_tsv ):
+        """
+        Decode self.api_result_file exactly once, handing each record to every visitor
+        that wants records, then let every visitor finish up.
+
+        Each visitor is a dict with 'visit' (a function taking one record, or None if the
+        visitor has nothing to build from the record stream) and 'finish' (a function
+        taking no arguments) keys.
+        """
+
+        active_visitors = [ visitor for visitor in visitors if visitor['visit'] is not None ]
+
+        if len( active_visitors ) > 0:
             
-            input_file = self.api_result_file
-
-            output_tsv = self.base_table_tsv
-
-            fields_to_include = { field for field in self.fields_to_use if re.search( r'\.', field ) is None }
-
-            # We'll explicitly make the id field the first output column, then append the rest.
-
-            id_field = self.endpoint_singular + '_id'
-
-            fields_to_include.remove(id_field)
-
-            sys.stderr.write(f"Making {output_tsv}...")
-
-            sys.stderr.flush()
-
-            # For all metadata retrieved from the current endpoint, the goal here is to
-            # automatically distinguish between atomic fields (properties) directly bound
-            # to the endpoint entity and more complex structures, which we will handle separately.
-            # 
-            # More complex structures include both (a) associations with other entity types
-            # and (b) metadata structures that are more complicated than single fields,
-            # e.g. the `demographic` data structures attached to cases.
-            # 
-            # We need two read passes here to avoid having to manually enumerate which
-            # fields are which (necessitating the creation and loading of field-list files
-            # that then have to be explicitly maintained in sync with what the GDC API
-            # provides).
-            # 
-            # The 'acl' field, for example, is described by the files/_mapping endpoint as
-            # being of type "keyword", with no hint that it's actually an array. 'acl'
-            # isn't listed anywhere at that _mapping endpoint as a non-atomic structure:
-            # it does not appear under 'expand', nor under 'nested', nor under 'multi'.
-            # The only way to reliably find out which fields like this one (which don't
-            # contain '.' characters hinting at structural depth) aren't flat values
-            # is to actually check the API result JSON to observe the field's
-            # structure -- in our case, we check to see what sort of thing Python converts
-            # the JSON field's structure into (e.g. list or dict). Since not all fields
-            # are present in all records, all records must be actually checked to make
-            # sure no such structural information is missed.
-
-            complex_structures = set()
-
-            with gzip.open(input_file) as IN:
+            with gzip.open( self.api_result_file ) as IN:
                 
-                reader = jsonlines.Reader(IN)
+                reader = jsonlines.Reader( IN )
 
                 for record in reader:
                     
-                    for key in record:
+                    for visitor in active_visitors:
                         
-                        if isinstance(record[key], list) or isinstance(record[key], dict):
-                            
-                            complex_structures.add(key)
+                        visitor['visit']( record )
 
-                            if key in fields_to_include:
-                                
-                                fields_to_include.remove(key)
+        for visitor in visitors:
+            
+            visitor['finish']()
 
-            # Save the autodetected 'more complex structures' list for validation.
+    def __get_base_table_visitor( self ):
+        
+        """
+        Build the visitor that writes the base (endpoint-entity) table.
+
+        For all metadata retrieved from the current endpoint, the goal here is to
+        automatically distinguish between atomic fields (properties) directly bound
+        to the endpoint entity and more complex structures, which we will handle separately.
+
+        More complex structures include both (a) associations with other entity types
+        and (b) metadata structures that are more complicated than single fields,
+        e.g. the `demographic` data structures attached to cases.
+
+        The 'acl' field, for example, is described by the files/_mapping endpoint as
+        being of type "keyword", with no hint that it's actually an array. 'acl'
+        isn't listed anywhere at that _mapping endpoint as a non-atomic structure:
+        it does not appear under 'expand', nor under 'nested', nor under 'multi'.
+        The only way to reliably find out which fields like this one (which don't
+        contain '.' characters hinting at structural depth) aren't flat values
+        is to actually check the API result JSON to observe the field's
+        structure -- in our case, we check to see what sort of thing Python converts
+        the JSON field's structure into (e.g. list or dict). Since not all fields
+        are present in all records, all records must be actually checked to make
+        sure no such structural information is missed.
+
+        To avoid making a second pass over the API result JSON, rows are staged with
+        values for every candidate field; once all records have been seen, columns
+        found to hold complex structures are projected out of the staged rows as the
+        final TSV is written.
+        """
 
-            with open(self.complex_structure_list_file, 'w') as OUT:
-                
-                if len(complex_structures) > 0:
-                    
-                    print(*(sorted(complex_structures)), sep='\n', file=OUT)
+        output_tsv = self.base_table_tsv
 
-            # Save names of list substructures that have been aliased to the top-level entity type
-            # (e.g. "save contents of `index_files` as `file` records).
+        if not ( self.refresh or not path.exists( output_tsv ) ):
+            
+            return { 'visit': None, 'finish': lambda: None }
 
-            lists_to_promote = set()
+        staged_rows_file = f"{output_tsv}.staged.jsonl"
 
-            for substructure_name in self.save_entity_list_as:
-                
-                if self.save_entity_list_as[substructure_name] == self.endpoint_singular:
-                    
-                    lists_to_promote.add(substructure_name)
+        candidate_fields = { field for field in self.fields_to_use if re.search( r'\.', field ) is None }
 
-            # Now load all data in atomic fields (and any substructures flagged to load as the top-level entity) and save this data to output_tsv.
+        # We'll explicitly make the id field the first output column, then append the rest.
 
-            with gzip.open(input_file) as IN:
-                
-                reader = jsonlines.Reader(IN)
-                
-                with open(output_tsv, 'w') as OUT:
-                    
-                    print_field_list = list()
+        id_field = self.endpoint_singular + '_id'
 
-                    print_field_list.append(id_field)
+        candidate_fields.remove(id_field)
 
-                    print_field_list.extend(sorted(fields_to_include))
+        candidate_fields = sorted( candidate_fields )
 
-                    print( *print_field_list, sep='\t', file=OUT )
+        complex_structures = set()
 
-                    for record in reader:
-                        
-                        out_fields = list()
+        # Save names of list substructures that have been aliased to the top-level entity type
+        # (e.g. "save contents of `index_files` as `file` records).
 
-                        if id_field not in record:
-                            
-                            sys.exit(f"FATAL: encountered '{self.endpoint_singular}' record with no {id_field} field. Aborting.")
+        lists_to_promote = sorted( [ substructure_name for substructure_name in self.save_entity_list_as if self.save_entity_list_as[substructure_name] == self.endpoint_singular ] )
 
-                        out_fields.append(record[id_field])
+        sys.stderr.write(f"Making {output_tsv}...")
 
-                        # Load values for target atomic fields and print to the base table file.
+        sys.stderr.flush()
 
-                        for key in sorted(fields_to_include):
-                            
-                            if key in record and record[key] is not None:
-                                
-                                out_fields.append(record[key])
+        STAGED = open( staged_rows_file, 'w' )
 
-                            else:
-                                
-                                out_fields.append('')
+        def stage_row( entity_record ):
+            
+            out_fields = [ entity_record[id_field] ]
 
-                        print(*out_fields, sep='\t', file=OUT)
+            for key in candidate_fields:
+                
+                if key in entity_record and entity_record[key] is not None:
+                    
+                    out_fields.append( entity_record[key] )
 
-                        # Load records from any substructures flagged as lists of top-level entity records (e.g. "load index_files as file records").
+                else:
+                    
+                    out_fields.append( '' )
+
+            print( json.dumps( out_fields ), file=STAGED )
 
-                        for subrecord_list_name in sorted( lists_to_promote ):
+        def visit( record ):
+            
+            for key in record:
+                
+                if isinstance(record[key], list) or isinstance(record[key], dict):
+                    
+                    complex_structures.add(key)
+
+            if id_field not in record:
+                
+                sys.exit(f"FATAL: encountered '{self.endpoint_singular}' record with no {id_field} field. Aborting.")
+
+            stage_row( record )
+
+            # Load records from any substructures flagged as lists of top-level entity records (e.g. "load index_files as file records").
+
+            for subrecord_list_name in lists_to_promote:
+                
+                if subrecord_list_name in record and record[subrecord_list_name] is not None:
+                    
+                    for subrecord in record[subrecord_list_name]:
+                        
+                        if id_field not in subrecord:
                             
-                            if subrecord_list_name in record and record[subrecord_list_name] is not None:
-                                
-                                for subrecord in record[subrecord_list_name]:
-                                    
-                                    # Doesn't matter if we overwrite same-named `out_fields` list as above: we're not using the antecedent list any more.
+                            sys.exit(f"FATAL: encountered '{self.endpoint_singular}.{subrecord_list_name}' record with no {id_field} field. Aborting.")
+
+                        stage_row( subrecord )
+
+        def finish( ):
+            
+            STAGED.close()
+
+            # Save the autodetected 'more complex structures' list for validation.
 
-                                    out_fields = list()
+            with open(self.complex_structure_list_file, 'w') as OUT:
+                
+                if len(complex_structures) > 0:
+                    
+                    print(*(sorted(complex_structures)), sep='\n', file=OUT)
 
-                                    if id_field not in subrecord:
-                                        
-                                        sys.exit(f"FATAL: encountered '{self.endpoint_singular}.{subrecord_list_name}' record with no {id_field} field. Aborting.")
+            # Keep the id column plus all candidate columns that never held a complex structure.
 
-                                    out_fields.append( subrecord[id_field] )
+            kept_columns = [ 0 ] + [ index + 1 for index, field in enumerate( candidate_fields ) if field not in complex_structures ]
 
-                                    # Load values for target atomic fields and print to the base table file.
+            with open( staged_rows_file ) as IN, open( output_tsv, 'w' ) as OUT:
+                
+                print( *( [ id_field ] + [ field for field in candidate_fields if field not in complex_structures ] ), sep='\t', file=OUT )
 
-                                    for key in sorted( fields_to_include ):
-                                        
-                                        if key in subrecord and subrecord[key] is not None:
-                                            
-                                            out_fields.append( subrecord[key] )
+                for line in IN:
+                    
+                    out_fields = json.loads( line )
 
-                                        else:
-                                            
-                                            out_fields.append( '' )
+                    print( *[ out_fields[index] for index in kept_columns ], sep='\t', file=OUT )
 
-                                    print( *out_fields, sep='\t', file=OUT )
+            remove( staged_rows_file )
 
             # Sort the TSV output.
 
@@ -664,6 +779,12 @@ class GDC_extractor:
 
             sys.stderr.write("done.\n")
 
+        return { 'visit': visit, 'finish': finish }
+
+    def make_base_table( self ):
+        
+        self.__scan_api_result_file( [ self.__get_base_table_visitor() ] )
+
     def __update_field_lists( self, field_name, field_lists ):
         """
             Take a (possibly mutiply nested) field name and recursively parse it to
@@ -688,7 +809,7 @@ class GDC_extractor:
 
     def get_substructure_field_lists( self ):
         
-        json_result = requests.get(self.mapping_url)
+        json_result = http_client.get( self.mapping_url )
 
         if not json_result.ok:
             
@@ -904,15 +1025,13 @@ class GDC_extractor:
                 
                 sys.exit(f"FATAL: Couldn't find expected id field '{id_field}' in {entity_type} substructure; aborting.")
 
-    def make_substructure_tables( self ):
+    def __get_substructure_table_visitor( self ):
         
         # Note: This subroutine will automatically collapse multiple objects with the
         # same ID, and it will not check multiple objects with the same ID for
         # possible discrepancies across repeated instances. If your goal is to
         # fully debug the GDC API data, this will need to be done differently.
 
-        input_file = self.api_result_file
-
         output_files = dict()
 
         seen_ids = dict()
@@ -983,71 +1102,72 @@ class GDC_extractor:
                 
                 seen_ids[entity_name] = set()
 
-        # Refresh-aware condition: only parse the API JSON if we're aiming to build (or rebuild) any TSV files.
+        id_field = self.endpoint_singular + '_id'
 
-        if len(seen_ids) > 0:
+        def visit( record ):
             
-            # Scan the API result JSON and extract substructure data directly into
-            # the appropriate output TSVs.
+            # Extract substructure data directly into the appropriate output TSVs.
 
-            with gzip.open(input_file) as IN:
+            if id_field not in record:
                 
-                id_field = self.endpoint_singular + '_id'
-
-                reader = jsonlines.Reader(IN)
-
-                for record in reader:
-                    
-                    if id_field not in record:
-                        
-                        sys.exit(f"FATAL (and strange): This '{self.endpoint_singular}' record doesn't have any '{id_field}' ID field. Aborting after dump. {record}")
+                sys.exit(f"FATAL (and strange): This '{self.endpoint_singular}' record doesn't have any '{id_field}' ID field. Aborting after dump. {record}")
 
-                    self.__traverse_substructure( self.endpoint_singular, record, output_files, seen_ids, output_field_lists )
+            self.__traverse_substructure( self.endpoint_singular, record, output_files, seen_ids, output_field_lists )
 
-        # Close TSV output files.
-
-        for entity_type in output_files:
+        def finish( ):
             
-            output_files[entity_type].close()
+            # Close TSV output files.
 
-        # Sort TSV output files.
+            for entity_type in output_files:
+                
+                output_files[entity_type].close()
 
-        for output_file in [ f"{self.TSV_DIR}/{singularize(entity_type)}.tsv" for entity_type in sorted(output_field_lists) ]:
-            
-            sort_file_with_header(output_file)
+            # Sort TSV output files.
 
-            sys.stderr.write(f"Making {output_file}...done.\n")
+            for output_file in [ f"{self.TSV_DIR}/{singularize(entity_type)}.tsv" for entity_type in sorted(output_field_lists) ]:
+                
+                sort_file_with_header(output_file)
 
-        # Save self.array_entities ID lists, which we had to handle separately in order to
-        # normalize this metadata.
+                sys.stderr.write(f"Making {output_file}...done.\n")
 
-        for entity_type in self.array_entities:
-            
-            entity_name = entity_type
+            # Save self.array_entities ID lists, which we had to handle separately in order to
+            # normalize this metadata.
 
-            if re.search( r'\.', entity_type ) is not None:
+            for entity_type in self.array_entities:
                 
-                entity_name = re.sub( r'^.*\.', r'', entity_type )
+                entity_name = entity_type
 
-            output_file = f"{self.TSV_DIR}/{singularize(entity_name)}.tsv"
+                if re.search( r'\.', entity_type ) is not None:
+                    
+                    entity_name = re.sub( r'^.*\.', r'', entity_type )
 
-            if self.refresh or not path.exists( output_file ):
-                
-                sys.stderr.write( f"Making {output_file}..." )
+                output_file = f"{self.TSV_DIR}/{singularize(entity_name)}.tsv"
 
-                sys.stderr.flush()
-
-                with open(output_file, 'w') as OUT:
+                if self.refresh or not path.exists( output_file ):
                     
-                    id_field = f"{singularize(entity_name)}_id"
+                    sys.stderr.write( f"Making {output_file}..." )
 
-                    print(id_field, file=OUT)
+                    sys.stderr.flush()
 
-                    for entity_id in sorted(seen_ids[entity_name]):
+                    with open(output_file, 'w') as OUT:
                         
-                        print(entity_id, file=OUT)
+                        id_field = f"{singularize(entity_name)}_id"
+
+                        print(id_field, file=OUT)
+
+                        for entity_id in sorted(seen_ids[entity_name]):
+                            
+                            print(entity_id, file=OUT)
 
-                sys.stderr.write( 'done.\n' )
+                    sys.stderr.write( 'done.\n' )
+
+        # Refresh-aware condition: only look at API records if we're aiming to build (or rebuild) any TSV files.
+
+        return { 'visit': visit if len( seen_ids ) > 0 else None, 'finish': finish }
+
+    def make_substructure_tables( self ):
+        
+        self.__scan_api_result_file( [ self.__get_substructure_table_visitor() ] )
 
     def __explore_substructure_for_association_data( self, root_id, parent_id, record_type, record, target_record_types, seen_ids, association_maps ):
         
@@ -1304,15 +1424,13 @@ class GDC_extractor:
                 
                 sys.exit(f"FATAL: Couldn't find expected id field '{id_field}' in {record_type} substructure; aborting.")
 
-    def make_association_tables( self ):
+    def __get_association_table_visitor( self ):
         
         # Note: This subroutine will automatically collapse multiple objects with the
         # same ID, and it will not check multiple objects with the same ID for
         # possible discrepancies across repeated instances. If your goal is to
         # fully debug the GDC API data, this will need to be done differently.
 
-        input_file = self.api_result_file
-
         seen_ids = dict()
 
         # Dicts to store association relationships.
@@ -1327,7 +1445,19 @@ class GDC_extractor:
 
             if self.refresh or not path.exists( association_table_file ):
                 
-                association_maps[association_name] = dict()
+                if self.max_association_entries_in_memory is not None and association_name not in self.statistical_summary_association_maps:
+                    
+                    # Spill sorted runs of this map to disk whenever it grows past our memory budget.
+
+                    association_maps[association_name] = External_association_map( self.JSON_DIR, self.max_association_entries_in_memory )
+
+                else:
+                    
+                    association_maps[association_name] = dict()
+
+        # Arrival-order counter for spilled file_associated_with_entity entries.
+
+        entry_sequence = count()
 
         # Cache a target list of sub-object entity types of interest.
 
@@ -1341,557 +1471,612 @@ class GDC_extractor:
             
             summary_field_list[summary_type] = [ field_name for field_name in sorted(self.substructure_field_lists[summary_type]) if field_name != singularize(summary_type) ]
 
-        # Refresh-aware condition: only load the API JSON if we're aiming to build some TSVs.
-
-        if len(association_maps) > 0:
+        def visit( record ):
             
-            # Scan the API result JSON and extract association data.
+            id_field = f"{self.endpoint_singular}_id"
 
-            with gzip.open(input_file) as IN:
+            self_id = get_safe_value( record, id_field )
+
+            # Load data for nested containment associations (when appropriate).
+
+            if self.scan_substructures_for_association_relationships:
                 
-                reader = jsonlines.Reader(IN)
+                self.__explore_substructure_for_association_data( self_id, self_id, self.endpoint_singular, record, target_record_types, seen_ids, association_maps )
+
+            # Grab top-level foreign-key associations (links between this record and other entities, by ID).
+
+            # I'm so tired.
+
+            if self.endpoint == 'annotations':
                 
-                for record in reader:
-                    
-                    id_field = f"{self.endpoint_singular}_id"
+                # annotation_in_project
 
-                    self_id = get_safe_value( record, id_field )
+                if 'project' in record and 'annotation_in_project' in association_maps:
+                    
+                    add_to_map( association_maps['annotation_in_project'], self_id, get_safe_value( record['project'], 'project_id' ) )
 
-                    # Load data for nested containment associations (when appropriate).
+            elif self.endpoint == 'cases':
+                
+                # case_has_annotation
+                
+                if 'annotations' in record and 'case_has_annotation' in association_maps:
+                    
+                    associate_id_list_with_parent( record, self_id, 'annotations', 'annotation_id', association_maps['case_has_annotation'] )
+    
+                # demographic_of_case
+                
+                if 'demographic' in record and 'demographic_of_case' in association_maps:
+                    
+                    add_to_map( association_maps['demographic_of_case'], get_safe_value( record['demographic'], 'demographic_id' ), self_id )
+    
+                # diagnosis_of_case
+                
+                if 'diagnoses' in record and 'diagnosis_of_case' in association_maps:
+                    
+                    associate_id_list_with_parent( record, self_id, 'diagnoses', 'diagnosis_id', association_maps['diagnosis_of_case'], reverse_column_order=True )
+    
+                # exposure_of_case
+    
+                if 'exposures' in record and 'exposure_of_case' in association_maps:
+                    
+                    associate_id_list_with_parent( record, self_id, 'exposures', 'exposure_id', association_maps['exposure_of_case'], reverse_column_order=True )
+    
+                # family_history_of_case
+    
+                if 'family_histories' in record and 'family_history_of_case' in association_maps:
+                    
+                    associate_id_list_with_parent( record, self_id, 'family_histories', 'family_history_id', association_maps['family_history_of_case'], reverse_column_order=True )
+    
+                # follow_up_of_case
+    
+                if 'follow_ups' in record and 'follow_up_of_case' in association_maps:
+                    
+                    associate_id_list_with_parent( record, self_id, 'follow_ups', 'follow_up_id', association_maps['follow_up_of_case'], reverse_column_order=True )
+    
+                # case_in_project
+    
+                if 'project' in record and 'case_in_project' in association_maps:
+                    
+                    add_to_map( association_maps['case_in_project'], self_id, get_safe_value( record['project'], 'project_id' ) )
+    
+                # sample_from_case
+    
+                if 'samples' in record and 'sample_from_case' in association_maps:
+                    
+                    associate_id_list_with_parent( record, self_id, 'samples', 'sample_id', association_maps['sample_from_case'], reverse_column_order=True )
+    
+                # tissue_source_site_of_case
+    
+                if 'tissue_source_site' in record and 'tissue_source_site_of_case' in association_maps:
+                    
+                    add_to_map( association_maps['tissue_source_site_of_case'], get_safe_value( record['tissue_source_site'], 'tissue_source_site_id' ), self_id )
 
-                    if self.scan_substructures_for_association_relationships:
-                        
-                        self.__explore_substructure_for_association_data( self_id, self_id, self.endpoint_singular, record, target_record_types, seen_ids, association_maps )
+            elif self.endpoint == 'files':
+                
+                # analysis_consumed_input_file
 
-                    # Grab top-level foreign-key associations (links between this record and other entities, by ID).
+                if 'analysis' in record and 'analysis_consumed_input_file' in association_maps:
+                    
+                    associate_id_list_with_parent( record['analysis'], get_safe_value( record['analysis'], 'analysis_id' ), 'input_files', 'file_id', association_maps['analysis_consumed_input_file'] )
 
-                    # I'm so tired.
+                # file_from_center
 
-                    if self.endpoint == 'annotations':
-                        
-                        # annotation_in_project
+                if 'center' in record and 'file_from_center' in association_maps:
+                    
+                    add_to_map( association_maps['file_from_center'], self_id, get_safe_value( record['center'], 'center_id' ) )
 
-                        if 'project' in record and 'annotation_in_project' in association_maps:
-                            
-                            add_to_map( association_maps['annotation_in_project'], self_id, get_safe_value( record['project'], 'project_id' ) )
+                # analysis_downstream_from_file, downstream_analysis_produced_output_file
 
-                    elif self.endpoint == 'cases':
-                        
-                        # case_has_annotation
-                        
-                        if 'annotations' in record and 'case_has_annotation' in association_maps:
-                            
-                            associate_id_list_with_parent( record, self_id, 'annotations', 'annotation_id', association_maps['case_has_annotation'] )
-            
-                        # demographic_of_case
+                if 'downstream_analyses' in record:
+                    
+                    if 'analysis_downstream_from_file' in association_maps:
                         
-                        if 'demographic' in record and 'demographic_of_case' in association_maps:
-                            
-                            add_to_map( association_maps['demographic_of_case'], get_safe_value( record['demographic'], 'demographic_id' ), self_id )
-            
-                        # diagnosis_of_case
+                        associate_id_list_with_parent( record, self_id, 'downstream_analyses', 'analysis_id', association_maps['analysis_downstream_from_file'], reverse_column_order=True )
+
+                    if 'downstream_analysis_produced_output_file' in association_maps:
                         
-                        if 'diagnoses' in record and 'diagnosis_of_case' in association_maps:
-                            
-                            associate_id_list_with_parent( record, self_id, 'diagnoses', 'diagnosis_id', association_maps['diagnosis_of_case'], reverse_column_order=True )
-            
-                        # exposure_of_case
-            
-                        if 'exposures' in record and 'exposure_of_case' in association_maps:
-                            
-                            associate_id_list_with_parent( record, self_id, 'exposures', 'exposure_id', association_maps['exposure_of_case'], reverse_column_order=True )
-            
-                        # family_history_of_case
-            
-                        if 'family_histories' in record and 'family_history_of_case' in association_maps:
-                            
-                            associate_id_list_with_parent( record, self_id, 'family_histories', 'family_history_id', association_maps['family_history_of_case'], reverse_column_order=True )
-            
-                        # follow_up_of_case
-            
-                        if 'follow_ups' in record and 'follow_up_of_case' in association_maps:
-                            
-                            associate_id_list_with_parent( record, self_id, 'follow_ups', 'follow_up_id', association_maps['follow_up_of_case'], reverse_column_order=True )
-            
-                        # case_in_project
-            
-                        if 'project' in record and 'case_in_project' in association_maps:
-                            
-                            add_to_map( association_maps['case_in_project'], self_id, get_safe_value( record['project'], 'project_id' ) )
-            
-                        # sample_from_case
-            
-                        if 'samples' in record and 'sample_from_case' in association_maps:
+                        for downstream_analysis in record['downstream_analyses']:
                             
-                            associate_id_list_with_parent( record, self_id, 'samples', 'sample_id', association_maps['sample_from_case'], reverse_column_order=True )
-            
-                        # tissue_source_site_of_case
-            
-                        if 'tissue_source_site' in record and 'tissue_source_site_of_case' in association_maps:
-                            
-                            add_to_map( association_maps['tissue_source_site_of_case'], get_safe_value( record['tissue_source_site'], 'tissue_source_site_id' ), self_id )
+                            associate_id_list_with_parent( downstream_analysis, get_safe_value( downstream_analysis, 'analysis_id' ), 'output_files', 'file_id', association_maps['downstream_analysis_produced_output_file'] )
 
-                    elif self.endpoint == 'files':
-                        
-                        # analysis_consumed_input_file
+                # file_has_annotation
 
-                        if 'analysis' in record and 'analysis_consumed_input_file' in association_maps:
-                            
-                            associate_id_list_with_parent( record['analysis'], get_safe_value( record['analysis'], 'analysis_id' ), 'input_files', 'file_id', association_maps['analysis_consumed_input_file'] )
+                if 'annotations' in record and 'file_has_annotation' in association_maps:
+                    
+                    associate_id_list_with_parent( record, self_id, 'annotations', 'annotation_id', association_maps['file_has_annotation'] )
 
-                        # file_from_center
+                # file_has_index_file
 
-                        if 'center' in record and 'file_from_center' in association_maps:
-                            
-                            add_to_map( association_maps['file_from_center'], self_id, get_safe_value( record['center'], 'center_id' ) )
+                if 'index_files' in record and 'file_has_index_file' in association_maps:
+                    
+                    associate_id_list_with_parent( record, self_id, 'index_files', 'file_id', association_maps['file_has_index_file'] )
 
-                        # analysis_downstream_from_file, downstream_analysis_produced_output_file
+                # file_has_metadata_file
 
-                        if 'downstream_analyses' in record:
-                            
-                            if 'analysis_downstream_from_file' in association_maps:
-                                
-                                associate_id_list_with_parent( record, self_id, 'downstream_analyses', 'analysis_id', association_maps['analysis_downstream_from_file'], reverse_column_order=True )
+                if 'metadata_files' in record and 'file_has_metadata_file' in association_maps:
+                    
+                    associate_id_list_with_parent( record, self_id, 'metadata_files', 'file_id', association_maps['file_has_metadata_file'] )
 
-                            if 'downstream_analysis_produced_output_file' in association_maps:
-                                
-                                for downstream_analysis in record['downstream_analyses']:
-                                    
-                                    associate_id_list_with_parent( downstream_analysis, get_safe_value( downstream_analysis, 'analysis_id' ), 'output_files', 'file_id', association_maps['downstream_analysis_produced_output_file'] )
+                # file_in_case
 
-                        # file_has_annotation
+                if 'cases' in record and 'file_in_case' in association_maps:
+                    
+                    associate_id_list_with_parent( record, self_id, 'cases', 'case_id', association_maps['file_in_case'] )
+
+                    # Index files don't appear as normal results from the `files` endpoint and so must be manually connected to their corresponding cases (transitively via the case associations with the files for which they are indexes).
 
-                        if 'annotations' in record and 'file_has_annotation' in association_maps:
+                    if 'index_files' in record:
+                        
+                        for index_file in record['index_files']:
                             
-                            associate_id_list_with_parent( record, self_id, 'annotations', 'annotation_id', association_maps['file_has_annotation'] )
+                            associate_id_list_with_parent( record, index_file['file_id'], 'cases', 'case_id', association_maps['file_in_case'] )
 
-                        # file_has_index_file
+                # file_associated_with_entity
 
-                        if 'index_files' in record and 'file_has_index_file' in association_maps:
+                if 'associated_entities' in record and 'file_associated_with_entity' in association_maps:
+                    
+                    for associated_entity in record['associated_entities']:
+                        
+                        if 'case_id' not in associated_entity or 'entity_id' not in associated_entity or 'entity_submitter_id' not in associated_entity or 'entity_type' not in associated_entity:
                             
-                            associate_id_list_with_parent( record, self_id, 'index_files', 'file_id', association_maps['file_has_index_file'] )
+                            sys.exit(f"FATAL: Something screwy is missing with one of the associated_entities attached to file {self_id}; aborting.")
 
-                        # file_has_metadata_file
+                        case_id = associated_entity['case_id']
+                        entity_id = associated_entity['entity_id']
+                        entity_type = associated_entity['entity_type']
+                        entity_submitter_id = associated_entity['entity_submitter_id']
 
-                        if 'metadata_files' in record and 'file_has_metadata_file' in association_maps:
+                        if isinstance( association_maps['file_associated_with_entity'], External_association_map ):
                             
-                            associate_id_list_with_parent( record, self_id, 'metadata_files', 'file_id', association_maps['file_has_metadata_file'] )
+                            # Tag each entry with its arrival order, so that when we write the table we can
+                            # keep only the last one seen for each ( file_id, entity_id ) pair -- which is what
+                            # the in-memory version (below) does by overwriting.
 
-                        # file_in_case
+                            association_maps['file_associated_with_entity'].add( self_id, entity_id, f"{next( entry_sequence ):015d}", entity_type, entity_submitter_id, case_id )
 
-                        if 'cases' in record and 'file_in_case' in association_maps:
+                        else:
                             
-                            associate_id_list_with_parent( record, self_id, 'cases', 'case_id', association_maps['file_in_case'] )
+                            # Same str() coercion as the spilled version above.
 
-                            # Index files don't appear as normal results from the `files` endpoint and so must be manually connected to their corresponding cases (transitively via the case associations with the files for which they are indexes).
+                            self_id, entity_id, entity_type, entity_submitter_id, case_id = [ str( value ) for value in [ self_id, entity_id, entity_type, entity_submitter_id, case_id ] ]
 
-                            if 'index_files' in record:
+                            if self_id not in association_maps['file_associated_with_entity']:
                                 
-                                for index_file in record['index_files']:
-                                    
-                                    associate_id_list_with_parent( record, index_file['file_id'], 'cases', 'case_id', association_maps['file_in_case'] )
-
-                        # file_associated_with_entity
+                                association_maps['file_associated_with_entity'][self_id] = dict()
 
-                        if 'associated_entities' in record and 'file_associated_with_entity' in association_maps:
-                            
-                            for associated_entity in record['associated_entities']:
+                            if entity_id not in association_maps['file_associated_with_entity'][self_id]:
                                 
-                                if 'case_id' not in associated_entity or 'entity_id' not in associated_entity or 'entity_submitter_id' not in associated_entity or 'entity_type' not in associated_entity:
-                                    
-                                    sys.exit(f"FATAL: Something screwy is missing with one of the associated_entities attached to file {self_id}; aborting.")
+                                association_maps['file_associated_with_entity'][self_id][entity_id] = dict()
 
-                                if self_id not in association_maps['file_associated_with_entity']:
-                                    
-                                    association_maps['file_associated_with_entity'][self_id] = dict()
+                            association_maps['file_associated_with_entity'][self_id][entity_id]['case_id'] = case_id
+                            association_maps['file_associated_with_entity'][self_id][entity_id]['entity_type'] = entity_type
+                            association_maps['file_associated_with_entity'][self_id][entity_id]['entity_submitter_id'] = entity_submitter_id
 
-                                case_id = associated_entity['case_id']
-                                entity_id = associated_entity['entity_id']
-                                entity_type = associated_entity['entity_type']
-                                entity_submitter_id = associated_entity['entity_submitter_id']
+            elif self.endpoint == 'projects':
+                
+                # project_in_program
 
-                                if entity_id not in association_maps['file_associated_with_entity'][self_id]:
-                                    
-                                    association_maps['file_associated_with_entity'][self_id][entity_id] = dict()
+                if 'program' in record and 'project_in_program' in association_maps:
+                    
+                    add_to_map( association_maps['project_in_program'], self_id, get_safe_value( record['program'], 'program_id' ) )
 
-                                association_maps['file_associated_with_entity'][self_id][entity_id]['case_id'] = case_id
-                                association_maps['file_associated_with_entity'][self_id][entity_id]['entity_type'] = entity_type
-                                association_maps['file_associated_with_entity'][self_id][entity_id]['entity_submitter_id'] = entity_submitter_id
+                # project_studies_primary_site
+                
+                if 'primary_site' in record and 'project_studies_primary_site' in association_maps:
+                    
+                    # This is a flat list.
 
-                    elif self.endpoint == 'projects':
+                    for primary_site in record['primary_site']:
                         
-                        # project_in_program
+                        add_to_map( association_maps['project_studies_primary_site'], self_id, primary_site )
 
-                        if 'program' in record and 'project_in_program' in association_maps:
-                            
-                            add_to_map( association_maps['project_in_program'], self_id, get_safe_value( record['program'], 'program_id' ) )
+                # project_studies_disease_type
+                
+                if 'disease_type' in record and 'project_studies_disease_type' in association_maps:
+                    
+                    # This is a flat list.
 
-                        # project_studies_primary_site
+                    for disease_type in record['disease_type']:
                         
-                        if 'primary_site' in record and 'project_studies_primary_site' in association_maps:
-                            
-                            # This is a flat list.
+                        add_to_map( association_maps['project_studies_disease_type'], self_id, disease_type )
 
-                            for primary_site in record['primary_site']:
-                                
-                                add_to_map( association_maps['project_studies_primary_site'], self_id, primary_site )
+                # project_summary_data
+
+                if 'summary' in record and 'project_summary_data' in association_maps:
+                    
+                    summary = record['summary']
+
+                    association_maps['project_summary_data'][self_id] = dict()
 
-                        # project_studies_disease_type
+                    for field in summary_field_list['summary']:
                         
-                        if 'disease_type' in record and 'project_studies_disease_type' in association_maps:
+                        if field in summary:
                             
-                            # This is a flat list.
+                            association_maps['project_summary_data'][self_id][field] = summary[field]
 
-                            for disease_type in record['disease_type']:
-                                
-                                add_to_map( association_maps['project_studies_disease_type'], self_id, disease_type )
+                        else:
+                            
+                            association_maps['project_summary_data'][self_id][field] = ''
+
+                    # project_data_category_summary_data
+
+                    if 'data_categories' in summary and 'project_data_category_summary_data' in association_maps:
+                        
+                        association_maps['project_data_category_summary_data'][self_id] = dict()
+
+                        # This is a list of dicts.
 
-                        # project_summary_data
+                        data_category_summaries = summary['data_categories']
 
-                        if 'summary' in record and 'project_summary_data' in association_maps:
+                        for data_category_summary in data_category_summaries:
                             
-                            summary = record['summary']
+                            data_category = get_safe_value( data_category_summary, 'data_category' )
 
-                            association_maps['project_summary_data'][self_id] = dict()
+                            association_maps['project_data_category_summary_data'][self_id][data_category] = dict()
 
-                            for field in summary_field_list['summary']:
+                            for field in summary_field_list['data_categories']:
                                 
-                                if field in summary:
+                                if field in data_category_summary:
                                     
-                                    association_maps['project_summary_data'][self_id][field] = summary[field]
+                                    association_maps['project_data_category_summary_data'][self_id][data_category][field] = data_category_summary[field]
 
                                 else:
                                     
-                                    association_maps['project_summary_data'][self_id][field] = ''
+                                    association_maps['project_data_category_summary_data'][self_id][data_category][field] = ''
 
-                            # project_data_category_summary_data
+                    # project_experimental_strategy_summary_data
 
-                            if 'data_categories' in summary and 'project_data_category_summary_data' in association_maps:
-                                
-                                association_maps['project_data_category_summary_data'][self_id] = dict()
+                    if 'experimental_strategies' in summary and 'project_experimental_strategy_summary_data' in association_maps:
+                        
+                        association_maps['project_experimental_strategy_summary_data'][self_id] = dict()
 
-                                # This is a list of dicts.
+                        # This is a list of dicts.
 
-                                data_category_summaries = summary['data_categories']
+                        experimental_strategy_summaries = summary['experimental_strategies']
 
-                                for data_category_summary in data_category_summaries:
-                                    
-                                    data_category = get_safe_value( data_category_summary, 'data_category' )
+                        for experimental_strategy_summary in experimental_strategy_summaries:
+                            
+                            experimental_strategy = get_safe_value( experimental_strategy_summary, 'experimental_strategy' )
 
-                                    association_maps['project_data_category_summary_data'][self_id][data_category] = dict()
+                            association_maps['project_experimental_strategy_summary_data'][self_id][experimental_strategy] = dict()
 
-                                    for field in summary_field_list['data_categories']:
-                                        
-                                        if field in data_category_summary:
-                                            
-                                            association_maps['project_data_category_summary_data'][self_id][data_category][field] = data_category_summary[field]
+                            for field in summary_field_list['experimental_strategies']:
+                                
+                                if field in experimental_strategy_summary:
+                                    
+                                    association_maps['project_experimental_strategy_summary_data'][self_id][experimental_strategy][field] = experimental_strategy_summary[field]
 
-                                        else:
-                                            
-                                            association_maps['project_data_category_summary_data'][self_id][data_category][field] = ''
+                                else:
+                                    
+                                    association_maps['project_experimental_strategy_summary_data'][self_id][experimental_strategy][field] = ''
 
-                            # project_experimental_strategy_summary_data
+        def finish( ):
+            
+            # Save all association data to TSV.
 
-                            if 'experimental_strategies' in summary and 'project_experimental_strategy_summary_data' in association_maps:
-                                
-                                association_maps['project_experimental_strategy_summary_data'][self_id] = dict()
+            if self.endpoint == 'annotations':
+                
+                if 'annotation_in_project' in association_maps:
+                    
+                    write_association_pairs( association_maps['annotation_in_project'], f"{self.TSV_DIR}/annotation_in_project.tsv", 'annotation_id', 'project_id' )
 
-                                # This is a list of dicts.
+            elif self.endpoint == 'cases':
+                
+                if 'case_has_annotation' in association_maps:
+                    write_association_pairs( association_maps['case_has_annotation'], f"{self.TSV_DIR}/case_has_annotation.tsv", 'case_id', 'annotation_id' )
 
-                                experimental_strategy_summaries = summary['experimental_strategies']
 
-                                for experimental_strategy_summary in experimental_strategy_summaries:
-                                    
-                                    experimental_strategy = get_safe_value( experimental_strategy_summary, 'experimental_strategy' )
+                if 'diagnosis_has_annotation' in association_maps:
+                    write_association_pairs( association_maps['diagnosis_has_annotation'], f"{self.TSV_DIR}/diagnosis_has_annotation.tsv", 'diagnosis_id', 'annotation_id' )
 
-                                    association_maps['project_experimental_strategy_summary_data'][self_id][experimental_strategy] = dict()
 
-                                    for field in summary_field_list['experimental_strategies']:
-                                        
-                                        if field in experimental_strategy_summary:
-                                            
-                                            association_maps['project_experimental_strategy_summary_data'][self_id][experimental_strategy][field] = experimental_strategy_summary[field]
+                if 'diagnosis_has_site_of_involvement' in association_maps:
+                    write_association_pairs( association_maps['diagnosis_has_site_of_involvement'], f"{self.TSV_DIR}/diagnosis_has_site_of_involvement.tsv", 'diagnosis_id', 'site_of_involvement_id' )
 
-                                        else:
-                                            
-                                            association_maps['project_experimental_strategy_summary_data'][self_id][experimental_strategy][field] = ''
 
-        # Save all association data to TSV.
+                if 'diagnosis_has_weiss_assessment_finding' in association_maps:
+                    write_association_pairs( association_maps['diagnosis_has_weiss_assessment_finding'], f"{self.TSV_DIR}/diagnosis_has_weiss_assessment_finding.tsv", 'diagnosis_id', 'weiss_assessment_finding_id' )
 
-        if self.endpoint == 'annotations':
-            
-            if 'annotation_in_project' in association_maps:
-                
-                write_association_pairs( association_maps['annotation_in_project'], f"{self.TSV_DIR}/annotation_in_project.tsv", 'annotation_id', 'project_id' )
 
-        elif self.endpoint == 'cases':
-            
-            if 'case_has_annotation' in association_maps:
-                write_association_pairs( association_maps['case_has_annotation'], f"{self.TSV_DIR}/case_has_annotation.tsv", 'case_id', 'annotation_id' )
+                if 'sample_has_annotation' in association_maps:
+                    write_association_pairs( association_maps['sample_has_annotation'], f"{self.TSV_DIR}/sample_has_annotation.tsv", 'sample_id', 'annotation_id' )
 
 
-            if 'diagnosis_has_annotation' in association_maps:
-                write_association_pairs( association_maps['diagnosis_has_annotation'], f"{self.TSV_DIR}/diagnosis_has_annotation.tsv", 'diagnosis_id', 'annotation_id' )
+                if 'portion_has_annotation' in association_maps:
+                    write_association_pairs( association_maps['portion_has_annotation'], f"{self.TSV_DIR}/portion_has_annotation.tsv", 'portion_id', 'annotation_id' )
 
 
-            if 'diagnosis_has_site_of_involvement' in association_maps:
-                write_association_pairs( association_maps['diagnosis_has_site_of_involvement'], f"{self.TSV_DIR}/diagnosis_has_site_of_involvement.tsv", 'diagnosis_id', 'site_of_involvement_id' )
+                if 'analyte_has_annotation' in association_maps:
+                    write_association_pairs( association_maps['analyte_has_annotation'], f"{self.TSV_DIR}/analyte_has_annotation.tsv", 'analyte_id', 'annotation_id' )
 
 
-            if 'diagnosis_has_weiss_assessment_finding' in association_maps:
-                write_association_pairs( association_maps['diagnosis_has_weiss_assessment_finding'], f"{self.TSV_DIR}/diagnosis_has_weiss_assessment_finding.tsv", 'diagnosis_id', 'weiss_assessment_finding_id' )
+                if 'aliquot_has_annotation' in association_maps:
+                    write_association_pairs( association_maps['aliquot_has_annotation'], f"{self.TSV_DIR}/aliquot_has_annotation.tsv", 'aliquot_id', 'annotation_id' )
 
 
-            if 'sample_has_annotation' in association_maps:
-                write_association_pairs( association_maps['sample_has_annotation'], f"{self.TSV_DIR}/sample_has_annotation.tsv", 'sample_id', 'annotation_id' )
+                if 'slide_has_annotation' in association_maps:
+                    write_association_pairs( association_maps['slide_has_annotation'], f"{self.TSV_DIR}/slide_has_annotation.tsv", 'slide_id', 'annotation_id' )
 
 
-            if 'portion_has_annotation' in association_maps:
-                write_association_pairs( association_maps['portion_has_annotation'], f"{self.TSV_DIR}/portion_has_annotation.tsv", 'portion_id', 'annotation_id' )
+                if 'case_in_project' in association_maps:
+                    write_association_pairs( association_maps['case_in_project'], f"{self.TSV_DIR}/case_in_project.tsv", 'case_id', 'project_id' )
 
 
-            if 'analyte_has_annotation' in association_maps:
-                write_association_pairs( association_maps['analyte_has_annotation'], f"{self.TSV_DIR}/analyte_has_annotation.tsv", 'analyte_id', 'annotation_id' )
+                if 'aliquot_of_analyte' in association_maps:
+                    write_association_pairs( association_maps['aliquot_of_analyte'], f"{self.TSV_DIR}/aliquot_of_analyte.tsv", 'aliquot_id', 'analyte_id' )
 
 
-            if 'aliquot_has_annotation' in association_maps:
-                write_association_pairs( association_maps['aliquot_has_annotation'], f"{self.TSV_DIR}/aliquot_has_annotation.tsv", 'aliquot_id', 'annotation_id' )
+                if 'aliquot_from_center' in association_maps:
+                    write_association_pairs( association_maps['aliquot_from_center'], f"{self.TSV_DIR}/aliquot_from_center.tsv", 'aliquot_id', 'center_id' )
 
 
-            if 'slide_has_annotation' in association_maps:
-                write_association_pairs( association_maps['slide_has_annotation'], f"{self.TSV_DIR}/slide_has_annotation.tsv", 'slide_id', 'annotation_id' )
+                if 'analyte_from_portion' in association_maps:
+                    write_association_pairs( association_maps['analyte_from_portion'], f"{self.TSV_DIR}/analyte_from_portion.tsv", 'analyte_id', 'portion_id' )
 
 
-            if 'case_in_project' in association_maps:
-                write_association_pairs( association_maps['case_in_project'], f"{self.TSV_DIR}/case_in_project.tsv", 'case_id', 'project_id' )
+                if 'slide_from_portion' in association_maps:
+                    write_association_pairs( association_maps['slide_from_portion'], f"{self.TSV_DIR}/slide_from_portion.tsv", 'slide_id', 'portion_id' )
 
 
-            if 'aliquot_of_analyte' in association_maps:
-                write_association_pairs( association_maps['aliquot_of_analyte'], f"{self.TSV_DIR}/aliquot_of_analyte.tsv", 'aliquot_id', 'analyte_id' )
+                if 'portion_from_sample' in association_maps:
+                    write_association_pairs( association_maps['portion_from_sample'], f"{self.TSV_DIR}/portion_from_sample.tsv", 'portion_id', 'sample_id' )
 
 
-            if 'aliquot_from_center' in association_maps:
-                write_association_pairs( association_maps['aliquot_from_center'], f"{self.TSV_DIR}/aliquot_from_center.tsv", 'aliquot_id', 'center_id' )
+                if 'portion_from_center' in association_maps:
+                    write_association_pairs( association_maps['portion_from_center'], f"{self.TSV_DIR}/portion_from_center.tsv", 'portion_id', 'center_id' )
 
 
-            if 'analyte_from_portion' in association_maps:
-                write_association_pairs( association_maps['analyte_from_portion'], f"{self.TSV_DIR}/analyte_from_portion.tsv", 'analyte_id', 'portion_id' )
+                if 'sample_from_case' in association_maps:
+                    write_association_pairs( association_maps['sample_from_case'], f"{self.TSV_DIR}/sample_from_case.tsv", 'sample_id', 'case_id' )
 
 
-            if 'slide_from_portion' in association_maps:
-                write_association_pairs( association_maps['slide_from_portion'], f"{self.TSV_DIR}/slide_from_portion.tsv", 'slide_id', 'portion_id' )
+                if 'demographic_of_case' in association_maps:
+                    write_association_pairs( association_maps['demographic_of_case'], f"{self.TSV_DIR}/demographic_of_case.tsv", 'demographic_id', 'case_id' )
 
 
-            if 'portion_from_sample' in association_maps:
-                write_association_pairs( association_maps['portion_from_sample'], f"{self.TSV_DIR}/portion_from_sample.tsv", 'portion_id', 'sample_id' )
+                if 'diagnosis_of_case' in association_maps:
+                    write_association_pairs( association_maps['diagnosis_of_case'], f"{self.TSV_DIR}/diagnosis_of_case.tsv", 'diagnosis_id', 'case_id' )
 
 
-            if 'portion_from_center' in association_maps:
-                write_association_pairs( association_maps['portion_from_center'], f"{self.TSV_DIR}/portion_from_center.tsv", 'portion_id', 'center_id' )
+                if 'exposure_of_case' in association_maps:
+                    write_association_pairs( association_maps['exposure_of_case'], f"{self.TSV_DIR}/exposure_of_case.tsv", 'exposure_id', 'case_id' )
 
 
-            if 'sample_from_case' in association_maps:
-                write_association_pairs( association_maps['sample_from_case'], f"{self.TSV_DIR}/sample_from_case.tsv", 'sample_id', 'case_id' )
+                if 'family_history_of_case' in association_maps:
+                    write_association_pairs( association_maps['family_history_of_case'], f"{self.TSV_DIR}/family_history_of_case.tsv", 'family_history_id', 'case_id' )
 
 
-            if 'demographic_of_case' in association_maps:
-                write_association_pairs( association_maps['demographic_of_case'], f"{self.TSV_DIR}/demographic_of_case.tsv", 'demographic_id', 'case_id' )
+                if 'follow_up_of_case' in association_maps:
+                    write_association_pairs( association_maps['follow_up_of_case'], f"{self.TSV_DIR}/follow_up_of_case.tsv", 'follow_up_id', 'case_id' )
 
 
-            if 'diagnosis_of_case' in association_maps:
-                write_association_pairs( association_maps['diagnosis_of_case'], f"{self.TSV_DIR}/diagnosis_of_case.tsv", 'diagnosis_id', 'case_id' )
+                if 'molecular_test_from_follow_up' in association_maps:
+                    write_association_pairs( association_maps['molecular_test_from_follow_up'], f"{self.TSV_DIR}/molecular_test_from_follow_up.tsv", 'molecular_test_id', 'follow_up_id' )
 
 
-            if 'exposure_of_case' in association_maps:
-                write_association_pairs( association_maps['exposure_of_case'], f"{self.TSV_DIR}/exposure_of_case.tsv", 'exposure_id', 'case_id' )
+                if 'pathology_detail_of_diagnosis' in association_maps:
+                    write_association_pairs( association_maps['pathology_detail_of_diagnosis'], f"{self.TSV_DIR}/pathology_detail_of_diagnosis.tsv", 'pathology_detail_id', 'diagnosis_id' )
 
 
-            if 'family_history_of_case' in association_maps:
-                write_association_pairs( association_maps['family_history_of_case'], f"{self.TSV_DIR}/family_history_of_case.tsv", 'family_history_id', 'case_id' )
+                if 'treatment_of_diagnosis' in association_maps:
+                    write_association_pairs( association_maps['treatment_of_diagnosis'], f"{self.TSV_DIR}/treatment_of_diagnosis.tsv", 'treatment_id', 'diagnosis_id' )
 
 
-            if 'follow_up_of_case' in association_maps:
-                write_association_pairs( association_maps['follow_up_of_case'], f"{self.TSV_DIR}/follow_up_of_case.tsv", 'follow_up_id', 'case_id' )
+                if 'tissue_source_site_of_case' in association_maps:
+                    write_association_pairs( association_maps['tissue_source_site_of_case'], f"{self.TSV_DIR}/tissue_source_site_of_case.tsv", 'tissue_source_site_id', 'case_id' )
 
 
-            if 'molecular_test_from_follow_up' in association_maps:
-                write_association_pairs( association_maps['molecular_test_from_follow_up'], f"{self.TSV_DIR}/molecular_test_from_follow_up.tsv", 'molecular_test_id', 'follow_up_id' )
+                if 'aliquot_from_case' in association_maps:
+                    write_association_pairs( association_maps['aliquot_from_case'], f"{self.TSV_DIR}/aliquot_from_case.tsv", 'aliquot_id', 'case_id' )
 
 
-            if 'pathology_detail_of_diagnosis' in association_maps:
-                write_association_pairs( association_maps['pathology_detail_of_diagnosis'], f"{self.TSV_DIR}/pathology_detail_of_diagnosis.tsv", 'pathology_detail_id', 'diagnosis_id' )
+                if 'analyte_from_case' in association_maps:
+                    write_association_pairs( association_maps['analyte_from_case'], f"{self.TSV_DIR}/analyte_from_case.tsv", 'analyte_id', 'case_id' )
 
 
-            if 'treatment_of_diagnosis' in association_maps:
-                write_association_pairs( association_maps['treatment_of_diagnosis'], f"{self.TSV_DIR}/treatment_of_diagnosis.tsv", 'treatment_id', 'diagnosis_id' )
+                if 'portion_from_case' in association_maps:
+                    write_association_pairs( association_maps['portion_from_case'], f"{self.TSV_DIR}/portion_from_case.tsv", 'portion_id', 'case_id' )
 
 
-            if 'tissue_source_site_of_case' in association_maps:
-                write_association_pairs( association_maps['tissue_source_site_of_case'], f"{self.TSV_DIR}/tissue_source_site_of_case.tsv", 'tissue_source_site_id', 'case_id' )
+                if 'slide_from_case' in association_maps:
+                    write_association_pairs( association_maps['slide_from_case'], f"{self.TSV_DIR}/slide_from_case.tsv", 'slide_id', 'case_id' )
 
+            elif self.endpoint == 'files':
+                
+                if 'analysis_consumed_input_file' in association_maps:
+                    write_association_pairs( association_maps['analysis_consumed_input_file'], f"{self.TSV_DIR}/analysis_consumed_input_file.tsv", 'analysis_id', 'input_file_id' )
 
-            if 'aliquot_from_case' in association_maps:
-                write_association_pairs( association_maps['aliquot_from_case'], f"{self.TSV_DIR}/aliquot_from_case.tsv", 'aliquot_id', 'case_id' )
 
+                if 'analysis_downstream_from_file' in association_maps:
+                    write_association_pairs( association_maps['analysis_downstream_from_file'], f"{self.TSV_DIR}/analysis_downstream_from_file.tsv", 'analysis_id', 'file_id' )
 
-            if 'analyte_from_case' in association_maps:
-                write_association_pairs( association_maps['analyte_from_case'], f"{self.TSV_DIR}/analyte_from_case.tsv", 'analyte_id', 'case_id' )
 
+                if 'analysis_produced_file' in association_maps:
+                    write_association_pairs( association_maps['analysis_produced_file'], f"{self.TSV_DIR}/analysis_produced_file.tsv", 'analysis_id', 'file_id' )
 
-            if 'portion_from_case' in association_maps:
-                write_association_pairs( association_maps['portion_from_case'], f"{self.TSV_DIR}/portion_from_case.tsv", 'portion_id', 'case_id' )
 
+                if 'downstream_analysis_produced_output_file' in association_maps:
+                    write_association_pairs( association_maps['downstream_analysis_produced_output_file'], f"{self.TSV_DIR}/downstream_analysis_produced_output_file.tsv", 'analysis_id', 'output_file_id' )
 
-            if 'slide_from_case' in association_maps:
-                write_association_pairs( association_maps['slide_from_case'], f"{self.TSV_DIR}/slide_from_case.tsv", 'slide_id', 'case_id' )
 
-        elif self.endpoint == 'files':
-            
-            if 'analysis_consumed_input_file' in association_maps:
-                write_association_pairs( association_maps['analysis_consumed_input_file'], f"{self.TSV_DIR}/analysis_consumed_input_file.tsv", 'analysis_id', 'input_file_id' )
+                if 'file_from_center' in association_maps:
+                    write_association_pairs( association_maps['file_from_center'], f"{self.TSV_DIR}/file_from_center.tsv", 'file_id', 'center_id' )
 
 
-            if 'analysis_downstream_from_file' in association_maps:
-                write_association_pairs( association_maps['analysis_downstream_from_file'], f"{self.TSV_DIR}/analysis_downstream_from_file.tsv", 'analysis_id', 'file_id' )
+                if 'file_has_acl' in association_maps:
+                    write_association_pairs( association_maps['file_has_acl'], f"{self.TSV_DIR}/file_has_acl.tsv", 'file_id', 'acl_id' )
 
 
-            if 'analysis_produced_file' in association_maps:
-                write_association_pairs( association_maps['analysis_produced_file'], f"{self.TSV_DIR}/analysis_produced_file.tsv", 'analysis_id', 'file_id' )
+                if 'file_has_annotation' in association_maps:
+                    write_association_pairs( association_maps['file_has_annotation'], f"{self.TSV_DIR}/file_has_annotation.tsv", 'file_id', 'annotation_id' )
 
 
-            if 'downstream_analysis_produced_output_file' in association_maps:
-                write_association_pairs( association_maps['downstream_analysis_produced_output_file'], f"{self.TSV_DIR}/downstream_analysis_produced_output_file.tsv", 'analysis_id', 'output_file_id' )
+                if 'file_has_index_file' in association_maps:
+                    write_association_pairs( association_maps['file_has_index_file'], f"{self.TSV_DIR}/file_has_index_file.tsv", 'file_id', 'index_file_id' )
 
 
-            if 'file_from_center' in association_maps:
-                write_association_pairs( association_maps['file_from_center'], f"{self.TSV_DIR}/file_from_center.tsv", 'file_id', 'center_id' )
+                if 'file_has_metadata_file' in association_maps:
+                    write_association_pairs( association_maps['file_has_metadata_file'], f"{self.TSV_DIR}/file_has_metadata_file.tsv", 'file_id', 'metadata_file_id' )
 
 
-            if 'file_has_acl' in association_maps:
-                write_association_pairs( association_maps['file_has_acl'], f"{self.TSV_DIR}/file_has_acl.tsv", 'file_id', 'acl_id' )
+                if 'file_in_archive' in association_maps:
+                    write_association_pairs( association_maps['file_in_archive'], f"{self.TSV_DIR}/file_in_archive.tsv", 'file_id', 'archive_id' )
 
 
-            if 'file_has_annotation' in association_maps:
-                write_association_pairs( association_maps['file_has_annotation'], f"{self.TSV_DIR}/file_has_annotation.tsv", 'file_id', 'annotation_id' )
+                if 'file_in_case' in association_maps:
+                    write_association_pairs( association_maps['file_in_case'], f"{self.TSV_DIR}/file_in_case.tsv", 'file_id', 'case_id' )
 
 
-            if 'file_has_index_file' in association_maps:
-                write_association_pairs( association_maps['file_has_index_file'], f"{self.TSV_DIR}/file_has_index_file.tsv", 'file_id', 'index_file_id' )
+                if 'read_group_in_analysis' in association_maps:
+                    write_association_pairs( association_maps['read_group_in_analysis'], f"{self.TSV_DIR}/read_group_in_analysis.tsv", 'read_group_id', 'analysis_id' )
 
 
-            if 'file_has_metadata_file' in association_maps:
-                write_association_pairs( association_maps['file_has_metadata_file'], f"{self.TSV_DIR}/file_has_metadata_file.tsv", 'file_id', 'metadata_file_id' )
+                if 'read_group_qc_in_read_group' in association_maps:
+                    write_association_pairs( association_maps['read_group_qc_in_read_group'], f"{self.TSV_DIR}/read_group_qc_in_read_group.tsv", 'read_group_qc_id', 'read_group_id' )
 
+                if 'file_associated_with_entity' in association_maps:
+                    
+                    file_associated_with_entity_tsv = f"{self.TSV_DIR}/file_associated_with_entity.tsv"
 
-            if 'file_in_archive' in association_maps:
-                write_association_pairs( association_maps['file_in_archive'], f"{self.TSV_DIR}/file_in_archive.tsv", 'file_id', 'archive_id' )
+                    sys.stderr.write(f"Making {file_associated_with_entity_tsv}...")
 
+                    sys.stderr.flush()
 
-            if 'file_in_case' in association_maps:
-                write_association_pairs( association_maps['file_in_case'], f"{self.TSV_DIR}/file_in_case.tsv", 'file_id', 'case_id' )
+                    with open( file_associated_with_entity_tsv, 'w' ) as OUT:
+                        
+                        print(*['file_id', 'entity_id', 'entity_type', 'entity_submitter_id', 'entity_case_id'], sep='\t', file=OUT)
 
+                        if isinstance( association_maps['file_associated_with_entity'], External_association_map ):
+                            
+                            # Entries come back sorted by ( file_id, entity_id, arrival order ): print the last one for each pair.
 
-            if 'read_group_in_analysis' in association_maps:
-                write_association_pairs( association_maps['read_group_in_analysis'], f"{self.TSV_DIR}/read_group_in_analysis.tsv", 'read_group_id', 'analysis_id' )
+                            last_entry = None
 
+                            for entry in association_maps['file_associated_with_entity'].sorted_entries():
+                                
+                                if last_entry is not None and entry[0:2] != last_entry[0:2]:
+                                    
+                                    print(*( last_entry[0:2] + last_entry[3:] ), sep='\t', file=OUT)
 
-            if 'read_group_qc_in_read_group' in association_maps:
-                write_association_pairs( association_maps['read_group_qc_in_read_group'], f"{self.TSV_DIR}/read_group_qc_in_read_group.tsv", 'read_group_qc_id', 'read_group_id' )
+                                last_entry = entry
 
-            if 'file_associated_with_entity' in association_maps:
-                
-                file_associated_with_entity_tsv = f"{self.TSV_DIR}/file_associated_with_entity.tsv"
+                            if last_entry is not None:
+                                
+                                print(*( last_entry[0:2] + last_entry[3:] ), sep='\t', file=OUT)
 
-                sys.stderr.write(f"Making {file_associated_with_entity_tsv}...")
+                        else:
+                            
+                            for file_id in sorted(association_maps['file_associated_with_entity']):
+                                
+                                for entity_id in sorted(association_maps['file_associated_with_entity'][file_id]):
+                                    
+                                    print(*[file_id, entity_id, association_maps['file_associated_with_entity'][file_id][entity_id]['entity_type'],
+                                        association_maps['file_associated_with_entity'][file_id][entity_id]['entity_submitter_id'],
+                                        association_maps['file_associated_with_entity'][file_id][entity_id]['case_id']],
+                                        sep='\t', file=OUT)
 
-                sys.stderr.flush()
+                    sys.stderr.write("done.\n")
 
-                with open( file_associated_with_entity_tsv, 'w' ) as OUT:
-                    
-                    print(*['file_id', 'entity_id', 'entity_type', 'entity_submitter_id', 'entity_case_id'], sep='\t', file=OUT)
+            elif self.endpoint == 'projects':
+                
+                if 'project_in_program' in association_maps:
+                    write_association_pairs( association_maps['project_in_program'], f"{self.TSV_DIR}/project_in_program.tsv", 'project_id', 'program_id' )
 
-                    for file_id in sorted(association_maps['file_associated_with_entity']):
-                        
-                        for entity_id in sorted(association_maps['file_associated_with_entity'][file_id]):
-                            
-                            print(*[file_id, entity_id, association_maps['file_associated_with_entity'][file_id][entity_id]['entity_type'],
-                                association_maps['file_associated_with_entity'][file_id][entity_id]['entity_submitter_id'],
-                                association_maps['file_associated_with_entity'][file_id][entity_id]['case_id']],
-                                sep='\t', file=OUT)
 
-                sys.stderr.write("done.\n")
+                if 'project_studies_primary_site' in association_maps:
+                    write_association_pairs( association_maps['project_studies_primary_site'], f"{self.TSV_DIR}/project_studies_primary_site.tsv", 'project_id', 'primary_site' )
 
-        elif self.endpoint == 'projects':
-            
-            if 'project_in_program' in association_maps:
-                write_association_pairs( association_maps['project_in_program'], f"{self.TSV_DIR}/project_in_program.tsv", 'project_id', 'program_id' )
 
+                if 'project_studies_disease_type' in association_maps:
+                    write_association_pairs( association_maps['project_studies_disease_type'], f"{self.TSV_DIR}/project_studies_disease_type.tsv", 'project_id', 'disease_type' )
 
-            if 'project_studies_primary_site' in association_maps:
-                write_association_pairs( association_maps['project_studies_primary_site'], f"{self.TSV_DIR}/project_studies_primary_site.tsv", 'project_id', 'primary_site' )
 
+                if 'project_summary_data' in association_maps:
+                    
+                    project_summary_data_tsv = f"{self.TSV_DIR}/project_summary_data.tsv"
 
-            if 'project_studies_disease_type' in association_maps:
-                write_association_pairs( association_maps['project_studies_disease_type'], f"{self.TSV_DIR}/project_studies_disease_type.tsv", 'project_id', 'disease_type' )
+                    sys.stderr.write(f"Making {project_summary_data_tsv}...")
 
+                    sys.stderr.flush()
 
-            if 'project_summary_data' in association_maps:
-                
-                project_summary_data_tsv = f"{self.TSV_DIR}/project_summary_data.tsv"
+                    with open(project_summary_data_tsv, 'w') as OUT:
+                        
+                        print(*(['project_id'] + sorted(summary_field_list['summary'])), sep='\t', file=OUT)
 
-                sys.stderr.write(f"Making {project_summary_data_tsv}...")
+                        for project_id in sorted(association_maps['project_summary_data']):
+                            
+                            print(*([project_id] + [ association_maps['project_summary_data'][project_id][field] for field in sorted(summary_field_list['summary']) ]), sep='\t', file=OUT)
 
-                sys.stderr.flush()
+                    sys.stderr.write("done.\n")
 
-                with open(project_summary_data_tsv, 'w') as OUT:
+                if 'project_data_category_summary_data' in association_maps:
                     
-                    print(*(['project_id'] + sorted(summary_field_list['summary'])), sep='\t', file=OUT)
+                    project_data_category_summary_data_tsv = f"{self.TSV_DIR}/project_data_category_summary_data.tsv"
 
-                    for project_id in sorted(association_maps['project_summary_data']):
-                        
-                        print(*([project_id] + [ association_maps['project_summary_data'][project_id][field] for field in sorted(summary_field_list['summary']) ]), sep='\t', file=OUT)
+                    sys.stderr.write(f"Making {project_data_category_summary_data_tsv}...")
 
-                sys.stderr.write("done.\n")
+                    sys.stderr.flush()
 
-            if 'project_data_category_summary_data' in association_maps:
-                
-                project_data_category_summary_data_tsv = f"{self.TSV_DIR}/project_data_category_summary_data.tsv"
+                    with open(project_data_category_summary_data_tsv, 'w') as OUT:
+                        
+                        print(*(['project_id'] + ['data_category'] + sorted(summary_field_list['data_categories'])), sep='\t', file=OUT)
 
-                sys.stderr.write(f"Making {project_data_category_summary_data_tsv}...")
+                        for project_id in sorted(association_maps['project_data_category_summary_data']):
+                            
+                            for data_category in sorted(association_maps['project_data_category_summary_data'][project_id]):
+                                
+                                print(*([project_id] + [data_category] + [ association_maps['project_data_category_summary_data'][project_id][data_category][field] for field in sorted(summary_field_list['data_categories']) ]), sep='\t', file=OUT)
 
-                sys.stderr.flush()
+                    sys.stderr.write("done.\n")
 
-                with open(project_data_category_summary_data_tsv, 'w') as OUT:
+                if 'project_experimental_strategy_summary_data' in association_maps:
                     
-                    print(*(['project_id'] + ['data_category'] + sorted(summary_field_list['data_categories'])), sep='\t', file=OUT)
+                    project_experimental_strategy_summary_data_tsv = f"{self.TSV_DIR}/project_experimental_strategy_summary_data.tsv"
+
+                    sys.stderr.write(f"Making {project_experimental_strategy_summary_data_tsv}...")
+
+                    sys.stderr.flush()
 
-                    for project_id in sorted(association_maps['project_data_category_summary_data']):
+                    with open(project_experimental_strategy_summary_data_tsv, 'w') as OUT:
                         
-                        for data_category in sorted(association_maps['project_data_category_summary_data'][project_id]):
+                        print(*(['project_id'] + ['experimental_strategy'] + sorted(summary_field_list['experimental_strategies'])), sep='\t', file=OUT)
+
+                        for project_id in sorted(association_maps['project_experimental_strategy_summary_data']):
                             
-                            print(*([project_id] + [data_category] + [ association_maps['project_data_category_summary_data'][project_id][data_category][field] for field in sorted(summary_field_list['data_categories']) ]), sep='\t', file=OUT)
+                            for experimental_strategy in sorted(association_maps['project_experimental_strategy_summary_data'][project_id]):
+                                
+                                print(*([project_id] + [experimental_strategy] + [ association_maps['project_experimental_strategy_summary_data'][project_id][experimental_strategy][field] for field in sorted(summary_field_list['experimental_strategies']) ]), sep='\t', file=OUT)
 
-                sys.stderr.write("done.\n")
+                    sys.stderr.write("done.\n")
+
+            # Clean up any spilled runs.
 
-            if 'project_experimental_strategy_summary_data' in association_maps:
+            for association_map in association_maps.values():
                 
-                project_experimental_strategy_summary_data_tsv = f"{self.TSV_DIR}/project_experimental_strategy_summary_data.tsv"
+                if isinstance( association_map, External_association_map ):
+                    
+                    association_map.close()
 
-                sys.stderr.write(f"Making {project_experimental_strategy_summary_data_tsv}...")
+        # Refresh-aware condition: only look at API records if we're aiming to build some TSVs.
 
-                sys.stderr.flush()
+        return { 'visit': visit if len( association_maps ) > 0 else None, 'finish': finish }
 
-                with open(project_experimental_strategy_summary_data_tsv, 'w') as OUT:
-                    
-                    print(*(['project_id'] + ['experimental_strategy'] + sorted(summary_field_list['experimental_strategies'])), sep='\t', file=OUT)
+    def make_association_tables( self ):
+        
+        self.__scan_api_result_file( [ self.__get_association_table_visitor() ] )
 
-                    for project_id in sorted(association_maps['project_experimental_strategy_summary_data']):
-                        
-                        for experimental_strategy in sorted(association_maps['project_experimental_strategy_summary_data'][project_id]):
-                            
-                            print(*([project_id] + [experimental_strategy] + [ association_maps['project_experimental_strategy_summary_data'][project_id][experimental_strategy][field] for field in sorted(summary_field_list['experimental_strategies']) ]), sep='\t', file=OUT)
+    def make_all_tables( self ):
+        
+        """
+        Build the base, substructure and association tables from a single pass over
+        self.api_result_file (instead of the three full decompress-and-parse passes made
+        by calling make_base_table(), make_substructure_tables() and make_association_tables()
+        one after the other).
 
-                sys.stderr.write("done.\n")
+        Requires get_substructure_field_lists() to have been run first.
+        """
+
+        self.__scan_api_result_file( [ self.__get_base_table_visitor(), self.__get_substructure_table_visitor(), self.__get_association_table_visitor() ] )
 
     def save_API_status_endpoint( self ):
         
@@ -1903,7 +2088,7 @@ class GDC_extractor:
 
         if self.refresh or not path.exists( self.status_file ):
             
-            result = requests.get( self.status_url )
+            result = http_client.get( self.status_url )
 
             if result.ok:
                 
@@ -1971,21 +2156,28 @@ class GDC_extractor:
 
                     rename( temp_file_full_path, dest_file_full_path )
 
-    def extract( self ):
+    def extract_endpoint_data( self ):
         
+        """
+        Pull all data for this endpoint and build all of its TSVs in self.TSV_DIR.
+
+        This touches nothing outside this endpoint's own directories, so it's safe to run
+        for several endpoints at once (see extract_endpoints_in_parallel()).
+        """
+
         self.save_API_status_endpoint()
 
         self.get_field_lists_for_API_calls()
 
         self.get_endpoint_records()
 
-        self.make_base_table()
-
         self.get_substructure_field_lists()
 
-        self.make_substructure_tables()
+        self.make_all_tables()
 
-        self.make_association_tables()
+    def extract( self ):
+        
+        self.extract_endpoint_data()
 
         self.update_merged_output_directory()
 
@@ -1993,4 +2185,61 @@ class GDC_extractor:
             
             print( get_current_date(), file=OUT )
 
+def _extract_endpoint_data( endpoint, source, refresh ):
+    
+    GDC_extractor( endpoint, source=source, refresh=refresh ).extract_endpoint_data()
+
+    return endpoint
+
+def extract_endpoints_in_parallel( endpoint_list, source='gdc', refresh=True ):
+    
+    """
+    Run GDC_extractor.extract_endpoint_data() for every endpoint in `endpoint_list` at the same
+    time, each in its own process, so one endpoint's (CPU-bound) table-building overlaps with
+    the others' (network-bound) downloads and total wall-clock time approaches that of the
+    slowest single endpoint.
+
+    Once every endpoint has finished, merge all per-endpoint TSVs into the shared output
+    directory (one endpoint at a time, in `endpoint_list` order) and record the extraction date.
+    """
+
+    failed_endpoints = list()
+
+    with ProcessPoolExecutor( max_workers=len( endpoint_list ) ) as executor:
+        
+        futures = { endpoint: executor.submit( _extract_endpoint_data, endpoint, source, refresh ) for endpoint in endpoint_list }
+
+        for endpoint in endpoint_list:
+            
+            try:
+                
+                futures[endpoint].result()
+
+                print( f"Extraction of GDC '{endpoint}' endpoint data complete.", file=sys.stderr )
+
+            except BaseException as e:
+                
+                print( f"ERROR: extraction of GDC '{endpoint}' endpoint data failed: {e}", file=sys.stderr )
+
+                failed_endpoints.append( endpoint )
+
+    if len( failed_endpoints ) > 0:
+        
+        sys.exit( f"FATAL: extraction failed for GDC endpoint(s) {failed_endpoints}; not updating merged output. Aborting." )
+
+    # Barrier: all endpoints are done. Merging writes into one shared directory, so do it serially.
+
+    extractor = None
+
+    for endpoint in endpoint_list:
+        
+        extractor = GDC_extractor( endpoint, source=source, refresh=refresh )
+
+        extractor.update_merged_output_directory()
+
+    if extractor is not None:
+        
+        with open( extractor.extraction_date_file, 'w' ) as OUT:
+            
+            print( get_current_date(), file=OUT )
 
@@ -0,0 +1,139 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type adverse_event {
+#     day_in_cycle: Int
+#     date_of_onset: String
+#     existing_adverse_event: String
+#     date_of_resolution: String
+#     ongoing_adverse_event: String
+#     adverse_event_term: String
+#     adverse_event_description: String
+#     adverse_event_grade: String
+#     adverse_event_grade_description: String
+#     adverse_event_agent_name: String
+#     adverse_event_agent_dose: String
+#     attribution_to_research: String
+#     attribution_to_ind: String
+#     attribution_to_disease: String
+#     attribution_to_commercial: String
+#     attribution_to_other: String
+#     other_attribution_description: String
+#     dose_limiting_toxicity: String
+#     unexpected_adverse_event: String
+#     case {
+#         case_id
+#     }
+#     agent {
+#         medication
+#         document_number
+#     }
+#     cases( first: {page_size}, offset: 0, orderBy: [ case_id_asc ] ) {
+#         case_id
+#     }
+#     next_adverse_event {
+#         # Exploration only; there are no reliable record IDs here
+#         adverse_event_term
+#     }
+#     prior_adverse_event {
+#         # Exploration only; there are no reliable record IDs here
+#         adverse_event_term
+#     }
+# }
+
+scalar_fields = [
+    'day_in_cycle',
+    'date_of_onset',
+    'existing_adverse_event',
+    'date_of_resolution',
+    'ongoing_adverse_event',
+    'adverse_event_term',
+    'adverse_event_description',
+    'adverse_event_grade',
+    'adverse_event_grade_description',
+    'adverse_event_agent_name',
+    'adverse_event_agent_dose',
+    'attribution_to_research',
+    'attribution_to_ind',
+    'attribution_to_disease',
+    'attribution_to_commercial',
+    'attribution_to_other',
+    'other_attribution_description',
+    'dose_limiting_toxicity',
+    'unexpected_adverse_event'
+]
+
+# type agent {
+#     medication: String
+#     document_number: String
+#     study_arms(first: Int, offset: Int, orderBy: [_study_armOrdering!], filter: _study_armFilter): [study_arm]
+#     agent_administrations(first: Int, offset: Int, orderBy: [_agent_administrationOrdering!], filter: _agent_administrationFilter): [agent_administration]
+#     adverse_events(first: Int, offset: Int, orderBy: [_adverse_eventOrdering!], filter: _adverse_eventFilter): [adverse_event]
+# }
+
+scalar_agent_fields = [
+    'medication',
+    'document_number'
+]
+
+# adverse_event(day_in_cycle: Int, date_of_onset: String, existing_adverse_event: String, date_of_resolution: String, ongoing_adverse_event: String, adverse_event_term: String, adverse_event_description: String, adverse_event_grade: String, adverse_event_grade_description: String, adverse_event_agent_name: String, adverse_event_agent_dose: String, attribution_to_research: String, attribution_to_ind: String, attribution_to_disease: String, attribution_to_commercial: String, attribution_to_other: String, other_attribution_description: String, dose_limiting_toxicity: String, unexpected_adverse_event: String, filter: _adverse_eventFilter, first: Int, offset: Int, orderBy: [_adverse_eventOrdering!]): [adverse_event!]!
+
+# Sort order for paging through adverse_event records.
+
+order_by = [ 'date_of_onset_asc' ]
+
+# Fields identifying a adverse_event record in log messages.
+
+label_fields = [ 'adverse_event_term', 'date_of_onset' ]
+
+# Sub-objects to request along with each adverse_event record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'case': { 'fields': [ 'case_id' ] },
+    'agent': {
+        'fields': scalar_agent_fields,
+        'sub_objects': {
+            'study_arms': { 'fields': [ 'arm_id' ], 'order_by': [ 'arm_id_asc' ] },
+            'agent_administrations': { 'fields': [ 'medication', 'document_number' ], 'order_by': [ 'medication_asc', 'document_number_asc' ] }
+        }
+    },
+    'cases': { 'fields': [ 'case_id' ], 'order_by': [ 'case_id_asc' ] },
+    'prior_adverse_event': { 'fields': [ 'adverse_event_term' ] },
+    'next_adverse_event': { 'fields': [ 'adverse_event_term' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'adverse_event', 'adverse_event.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ] + [
+            ( 'prior_adverse_event.adverse_event_term', 'prior_adverse_event.adverse_event_term', 'value' ),
+            ( 'next_adverse_event.adverse_event_term', 'next_adverse_event.adverse_event_term', 'value' ),
+            ( 'case_id', 'case.case_id', 'value' ),
+            ( 'cases.case_id', 'cases.case_id', 'join' ),
+            ( 'agent.medication', 'agent.medication', 'value' ),
+            ( 'agent.document_number', 'agent.document_number', 'value' )
+        ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'agent.study_arms.arm_id.from_adverse_event_query.tsv' ),
+        'rows_from': 'agent.study_arms',
+        'columns': [ ( 'agent.medication', '^medication', 'value' ), ( 'agent.document_number', '^document_number', 'value' ), ( 'study_arm.arm_id', 'arm_id', 'raw' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'agent.agent_administrations.medication_and_document_number.from_adverse_event_query.tsv' ),
+        'rows_from': 'agent.agent_administrations',
+        'columns': [ ( 'agent.medication', '^medication', 'value' ), ( 'agent.document_number', '^document_number', 'value' ), ( 'agent_administration.medication', 'medication', 'value' ), ( 'agent_administration.document_number', 'document_number', 'value' ) ]
+    }
+]
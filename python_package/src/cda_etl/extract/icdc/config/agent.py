@@ -0,0 +1,67 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type agent {
+#     medication: String
+#     document_number: String
+#     study_arms(first: Int, offset: Int, orderBy: [_study_armOrdering!], filter: _study_armFilter): [study_arm]
+#     agent_administrations(first: Int, offset: Int, orderBy: [_agent_administrationOrdering!], filter: _agent_administrationFilter): [agent_administration]
+#     adverse_events(first: Int, offset: Int, orderBy: [_adverse_eventOrdering!], filter: _adverse_eventFilter): [adverse_event]
+# }
+
+scalar_fields = [
+    'medication',
+    'document_number'
+]
+
+# agent(medication: String, document_number: String, filter: _agentFilter, first: Int, offset: Int, orderBy: [_agentOrdering!]): [agent!]!
+
+# Sort order for paging through agent records.
+
+order_by = [ 'medication_asc', 'document_number_asc' ]
+
+# Fields identifying a agent record in log messages.
+
+label_fields = [ 'medication', 'document_number' ]
+
+# Sub-objects to request along with each agent record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'study_arms': { 'fields': [ 'arm_id' ], 'order_by': [ 'arm_id_asc' ] },
+    'agent_administrations': { 'fields': [ 'medication', 'document_number' ], 'order_by': [ 'medication_asc', 'document_number_asc' ] },
+    'adverse_events': { 'fields': [ 'adverse_event_term' ], 'order_by': [ 'date_of_onset_asc' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'agent', 'agent.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        'output_file': path.join( 'agent', 'agent.adverse_events.adverse_event_term.tsv' ),
+        'rows_from': 'adverse_events',
+        'columns': [ ( 'agent.medication', '^medication', 'scalar' ), ( 'agent.document_number', '^document_number', 'scalar' ), ( 'adverse_event.adverse_event_term', 'adverse_event_term', 'value' ) ]
+    },
+    {
+        'output_file': path.join( 'agent', 'agent.agent_administrations.medication_and_document_number.tsv' ),
+        'rows_from': 'agent_administrations',
+        'columns': [ ( 'agent.medication', '^medication', 'scalar' ), ( 'agent.document_number', '^document_number', 'scalar' ), ( 'agent_administration.medication', 'medication', 'value' ), ( 'agent_administration.document_number', 'document_number', 'value' ) ]
+    },
+    {
+        'output_file': path.join( 'agent', 'agent.study_arms.arm_id.tsv' ),
+        'rows_from': 'study_arms',
+        'columns': [ ( 'agent.medication', '^medication', 'scalar' ), ( 'agent.document_number', '^document_number', 'scalar' ), ( 'study_arm.arm_id', 'arm_id', 'raw' ) ]
+    }
+]
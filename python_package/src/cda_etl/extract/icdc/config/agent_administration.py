@@ -0,0 +1,155 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type agent_administration {
+#     document_number: String
+#     medication: String
+#     route_of_administration: String
+#     medication_lot_number: String
+#     medication_vial_id: String
+#     medication_actual_units_of_measure: String
+#     medication_duration: Float
+#     medication_duration_unit: String
+#     medication_duration_original: Float
+#     medication_duration_original_unit: String
+#     medication_units_of_measure: String
+#     medication_actual_dose: Float
+#     medication_actual_dose_unit: String
+#     medication_actual_dose_original: Float
+#     medication_actual_dose_original_unit: String
+#     phase: String
+#     start_time: String
+#     stop_time: String
+#     dose_level: Float
+#     dose_level_unit: String
+#     dose_level_original: Float
+#     dose_level_original_unit: String
+#     dose_units_of_measure: String
+#     date_of_missed_dose: String
+#     medication_missed_dose: String
+#     missed_dose_amount: Float
+#     missed_dose_amount_unit: String
+#     missed_dose_amount_original: Float
+#     missed_dose_amount_original_unit: String
+#     missed_dose_units_of_measure: String
+#     medication_course_number: String
+#     comment: String
+#     agent {
+#         medication
+#         document_number
+#         adverse_events( first: {page_size}, offset: __OFFSET__, orderBy: [ date_of_onset_asc ] ) {
+#             # Exploration only; there are no reliable record IDs here
+#             adverse_event_term
+#         }
+#         study_arms( first: {page_size}, offset: __OFFSET__, orderBy: [ arm_id_asc ] ) {
+#             # Just for validation.
+#             arm_id
+#         }
+#     }
+#     visit {
+#         visit_id
+#     }
+# }
+
+scalar_fields = [
+    'document_number',
+    'medication',
+    'route_of_administration',
+    'medication_lot_number',
+    'medication_vial_id',
+    'medication_actual_units_of_measure',
+    'medication_duration',
+    'medication_duration_unit',
+    'medication_duration_original',
+    'medication_duration_original_unit',
+    'medication_units_of_measure',
+    'medication_actual_dose',
+    'medication_actual_dose_unit',
+    'medication_actual_dose_original',
+    'medication_actual_dose_original_unit',
+    'phase',
+    'start_time',
+    'stop_time',
+    'dose_level',
+    'dose_level_unit',
+    'dose_level_original',
+    'dose_level_original_unit',
+    'dose_units_of_measure',
+    'date_of_missed_dose',
+    'medication_missed_dose',
+    'missed_dose_amount',
+    'missed_dose_amount_unit',
+    'missed_dose_amount_original',
+    'missed_dose_amount_original_unit',
+    'missed_dose_units_of_measure',
+    'medication_course_number',
+    'comment'
+]
+
+# type agent {
+#     medication: String
+#     document_number: String
+#     study_arms(first: Int, offset: Int, orderBy: [_study_armOrdering!], filter: _study_armFilter): [study_arm]
+#     agent_administrations(first: Int, offset: Int, orderBy: [_agent_administrationOrdering!], filter: _agent_administrationFilter): [agent_administration]
+#     adverse_events(first: Int, offset: Int, orderBy: [_adverse_eventOrdering!], filter: _adverse_eventFilter): [adverse_event]
+# }
+
+scalar_agent_fields = [
+    'medication',
+    'document_number'
+]
+
+# Sort order for paging through agent_administration records.
+
+order_by = [ 'medication_asc', 'document_number_asc' ]
+
+# Fields identifying a agent_administration record in log messages.
+
+label_fields = [ 'medication', 'document_number' ]
+
+# Sub-objects to request along with each agent_administration record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'agent': {
+        'fields': scalar_agent_fields,
+        'sub_objects': {
+            'adverse_events': { 'fields': [ 'adverse_event_term' ], 'order_by': [ 'date_of_onset_asc' ] },
+            'study_arms': { 'fields': [ 'arm_id' ], 'order_by': [ 'arm_id_asc' ] }
+        }
+    },
+    'visit': { 'fields': [ 'visit_id' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'agent_administration', 'agent_administration.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ] + [ ( 'agent.medication', 'agent.medication', 'value' ), ( 'agent.document_number', 'agent.document_number', 'value' ) ]
+    },
+    {
+        'output_file': path.join( 'agent_administration', 'agent_administration.visit_id.tsv' ),
+        'columns': [ ( 'medication', 'medication', 'scalar' ), ( 'document_number', 'document_number', 'scalar' ), ( 'visit_id', 'visit.visit_id', 'value' ) ],
+        'skip_if_null': [ 'visit.visit_id' ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'agent.adverse_events.adverse_event_term.from_agent_administration_query.tsv' ),
+        'rows_from': 'agent.adverse_events',
+        'columns': [ ( 'agent_administration.medication', '^^medication', 'scalar' ), ( 'agent_administration.document_number', '^^document_number', 'scalar' ), ( 'agent.medication', '^medication', 'value' ), ( 'agent.document_number', '^document_number', 'value' ), ( 'agent.adverse_event.adverse_event_term', 'adverse_event_term', 'raw' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'agent.study_arms.arm_id.from_agent_administration_query.tsv' ),
+        'rows_from': 'agent.study_arms',
+        'columns': [ ( 'agent_administration.medication', '^^medication', 'scalar' ), ( 'agent_administration.document_number', '^^document_number', 'scalar' ), ( 'agent.medication', '^medication', 'value' ), ( 'agent.document_number', '^document_number', 'value' ), ( 'agent.study_arm.arm_id', 'arm_id', 'raw' ) ]
+    }
+]
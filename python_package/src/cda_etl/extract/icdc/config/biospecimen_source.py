@@ -0,0 +1,44 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type biospecimen_source {
+#     biospecimen_repository_acronym: String
+#     biospecimen_repository_full_name: String
+# }
+
+scalar_fields = [
+    'biospecimen_repository_acronym',
+    'biospecimen_repository_full_name'
+]
+
+# biospecimen_source(biospecimen_repository_acronym: String, biospecimen_repository_full_name: String, filter: _biospecimen_sourceFilter, first: Int, offset: Int, orderBy: [_biospecimen_sourceOrdering!]): [biospecimen_source!]!
+
+# Sort order for paging through biospecimen_source records.
+
+order_by = [ 'biospecimen_repository_acronym_asc' ]
+
+# Fields identifying a biospecimen_source record in log messages.
+
+label_fields = [ 'biospecimen_repository_acronym' ]
+
+# Sub-objects to request along with each biospecimen_source record (see ICDC_extractor for the format).
+
+sub_objects = dict()
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'biospecimen_source', 'biospecimen_source.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    }
+]
@@ -0,0 +1,247 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type case {
+#    case_id: String
+#    patient_id: String
+#    patient_first_name: String
+#    cohort: cohort
+#    study: study
+#    enrollment: enrollment
+#    demographic: demographic
+#    study_arm: study_arm
+#    adverse_event: adverse_event
+#    off_study: off_study
+#    off_treatment: off_treatment
+#    canine_individual: canine_individual
+#    diagnoses(first: Int, offset: Int, orderBy: [_diagnosisOrdering!], filter: _diagnosisFilter): [diagnosis]
+#    cycles(first: Int, offset: Int, orderBy: [_cycleOrdering!], filter: _cycleFilter): [cycle]
+#    follow_ups(first: Int, offset: Int, orderBy: [_follow_upOrdering!], filter: _follow_upFilter): [follow_up]
+#    samples(first: Int, offset: Int, orderBy: [_sampleOrdering!], filter: _sampleFilter): [sample]
+#    files(first: Int, offset: Int, orderBy: [_fileOrdering!], filter: _fileFilter): [file]
+#    visits(first: Int, offset: Int, orderBy: [_visitOrdering!], filter: _visitFilter): [visit]
+#    adverse_events(first: Int, offset: Int, orderBy: [_adverse_eventOrdering!], filter: _adverse_eventFilter): [adverse_event]
+#    registrations(first: Int, offset: Int, orderBy: [_registrationOrdering!], filter: _registrationFilter): [registration]
+# }
+
+scalar_fields = [
+    'case_id',
+    'patient_id',
+    'patient_first_name'
+]
+
+# type off_study {
+#     document_number: String
+#     date_off_study: String
+#     reason_off_study: String
+#     date_of_disease_progression: String
+#     date_off_treatment: String
+#     best_resp_vet_tx_tp_secondary_response: String
+#     date_last_medication_administration: String
+#     best_resp_vet_tx_tp_best_response: String
+#     date_of_best_response: String
+#     case: case
+# }
+
+scalar_off_study_fields = [
+    'document_number',
+    'date_off_study',
+    'reason_off_study',
+    'date_of_disease_progression',
+    'date_off_treatment',
+    'best_resp_vet_tx_tp_secondary_response',
+    'date_last_medication_administration',
+    'best_resp_vet_tx_tp_best_response',
+    'date_of_best_response'
+]
+
+# type off_treatment {
+#     document_number: String
+#     date_off_treatment: String
+#     reason_off_treatment: String
+#     date_of_disease_progression: String
+#     best_resp_vet_tx_tp_secondary_response: String
+#     date_last_medication_administration: String
+#     best_resp_vet_tx_tp_best_response: String
+#     date_of_best_response: String
+#     case: case
+# }
+
+scalar_off_treatment_fields = [
+    'document_number',
+    'date_off_treatment',
+    'reason_off_treatment',
+    'date_of_disease_progression',
+    'best_resp_vet_tx_tp_secondary_response',
+    'date_last_medication_administration',
+    'best_resp_vet_tx_tp_best_response',
+    'date_of_best_response'
+]
+
+# type canine_individual {
+#     canine_individual_id: String
+#     cases(first: Int, offset: Int, orderBy: [_caseOrdering!], filter: _caseFilter): [case]
+# }
+
+scalar_canine_individual_fields = [
+    'canine_individual_id'
+]
+
+# type follow_up {
+#     document_number: String
+#     date_of_last_contact: String
+#     patient_status: String
+#     explain_unknown_status: String
+#     contact_type: String
+#     treatment_since_last_contact: Boolean
+#     physical_exam_performed: Boolean
+#     physical_exam_changes: String
+#     case: case
+# }
+
+scalar_follow_up_fields = [
+    'document_number',
+    'date_of_last_contact',
+    'patient_status',
+    'explain_unknown_status',
+    'contact_type',
+    'treatment_since_last_contact',
+    'physical_exam_performed',
+    'physical_exam_changes'
+]
+
+# type registration {
+#     registration_origin: String
+#     registration_id: String
+#     cases(first: Int, offset: Int, orderBy: [_caseOrdering!], filter: _caseFilter): [case]
+# }
+
+
+scalar_registration_fields = [
+    'registration_id',
+    'registration_origin'
+]
+
+# case(case_id: String, patient_id: String, patient_first_name: String, filter: _caseFilter, first: Int, offset: Int, orderBy: [_caseOrdering!]): [case!]!
+
+# Sort order for paging through case records.
+
+order_by = [ 'case_id_asc' ]
+
+# Fields identifying a case record in log messages.
+
+label_fields = [ 'case_id' ]
+
+# Fields uniquely identifying a case record (used to join batched child lists back onto case records).
+
+key_fields = [ 'case_id' ]
+
+# Sub-objects to request along with each case record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'cohort': { 'fields': [ 'cohort_id' ] },
+    'study': { 'fields': [ 'clinical_study_designation' ] },
+    'enrollment': { 'fields': [ 'enrollment_id' ] },
+    'demographic': { 'fields': [ 'demographic_id' ] },
+    'study_arm': { 'fields': [ 'arm_id' ] },
+    'off_study': { 'fields': scalar_off_study_fields },
+    'off_treatment': { 'fields': scalar_off_treatment_fields },
+    'canine_individual': { 'fields': scalar_canine_individual_fields },
+    'diagnoses': { 'fields': [ 'diagnosis_id' ], 'order_by': [ 'diagnosis_id_asc' ], 'key_fields': [ 'diagnosis_id' ] },
+    'follow_ups': { 'fields': scalar_follow_up_fields, 'order_by': [ 'document_number_asc' ] },
+    'samples': { 'fields': [ 'sample_id' ], 'order_by': [ 'sample_id_asc' ], 'key_fields': [ 'sample_id' ] },
+    'files': { 'fields': [ 'uuid' ], 'order_by': [ 'uuid_asc' ], 'key_fields': [ 'uuid' ] },
+    'visits': { 'fields': [ 'visit_id' ], 'order_by': [ 'visit_id_asc' ], 'key_fields': [ 'visit_id' ] },
+    'registrations': { 'fields': scalar_registration_fields, 'order_by': [ 'registration_id_asc' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'case', 'case.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        'output_file': path.join( 'case', 'case.cohort_id.tsv' ),
+        'columns': [ ( 'case_id', 'case_id', 'raw' ), ( 'cohort_id', 'cohort.cohort_id', 'raw' ) ],
+        'skip_if_null': [ 'cohort.cohort_id' ]
+    },
+    {
+        'output_file': path.join( 'case', 'case.clinical_study_designation.tsv' ),
+        'columns': [ ( 'case_id', 'case_id', 'raw' ), ( 'clinical_study_designation', 'study.clinical_study_designation', 'text' ) ],
+        'skip_if_null': [ 'study.clinical_study_designation' ]
+    },
+    {
+        'output_file': path.join( 'case', 'case.enrollment_id.tsv' ),
+        'columns': [ ( 'case_id', 'case_id', 'raw' ), ( 'enrollment_id', 'enrollment.enrollment_id', 'raw' ) ],
+        'skip_if_null': [ 'enrollment.enrollment_id' ]
+    },
+    {
+        # demographic_id shouldn't ever be null, but it sometimes is: keep the row anyway.
+
+        'output_file': path.join( 'case', 'case.demographic_id.tsv' ),
+        'rows_from': 'demographic',
+        'columns': [ ( 'case_id', '^case_id', 'raw' ), ( 'demographic_id', 'demographic_id', 'value' ) ]
+    },
+    {
+        'output_file': path.join( 'case', 'case.study_arm_id.tsv' ),
+        'columns': [ ( 'case_id', 'case_id', 'raw' ), ( 'arm_id', 'study_arm.arm_id', 'raw' ) ],
+        'skip_if_null': [ 'study_arm.arm_id' ]
+    },
+    {
+        'output_file': path.join( 'case', 'case.diagnosis_id.tsv' ),
+        'rows_from': 'diagnoses',
+        'columns': [ ( 'case_id', '^case_id', 'raw' ), ( 'diagnosis_id', 'diagnosis_id', 'raw' ) ]
+    },
+    {
+        'output_file': path.join( 'case', 'case.sample_id.tsv' ),
+        'rows_from': 'samples',
+        'columns': [ ( 'case_id', '^case_id', 'raw' ), ( 'sample_id', 'sample_id', 'raw' ) ]
+    },
+    {
+        'output_file': path.join( 'case', 'case.file_uuid.tsv' ),
+        'rows_from': 'files',
+        'columns': [ ( 'case_id', '^case_id', 'raw' ), ( 'file.uuid', 'uuid', 'raw' ) ]
+    },
+    {
+        'output_file': path.join( 'case', 'case.visit_id.tsv' ),
+        'rows_from': 'visits',
+        'columns': [ ( 'case_id', '^case_id', 'raw' ), ( 'visit_id', 'visit_id', 'raw' ) ]
+    },
+    {
+        'output_file': path.join( 'off_study', 'off_study.tsv' ),
+        'rows_from': 'off_study',
+        'columns': [ ( 'case_id', '^case_id', 'raw' ) ] + [ ( field_name, field_name, 'text' ) for field_name in scalar_off_study_fields ]
+    },
+    {
+        'output_file': path.join( 'off_treatment', 'off_treatment.tsv' ),
+        'rows_from': 'off_treatment',
+        'columns': [ ( 'case_id', '^case_id', 'raw' ) ] + [ ( field_name, field_name, 'text' ) for field_name in scalar_off_treatment_fields ]
+    },
+    {
+        'output_file': path.join( 'canine_individual', 'canine_individual.tsv' ),
+        'rows_from': 'canine_individual',
+        'columns': [ ( 'case_id', '^case_id', 'raw' ) ] + [ ( field_name, field_name, 'text' ) for field_name in scalar_canine_individual_fields ]
+    },
+    {
+        'output_file': path.join( 'follow_up', 'follow_up.tsv' ),
+        'rows_from': 'follow_ups',
+        'columns': [ ( 'case_id', '^case_id', 'raw' ) ] + [ ( field_name, field_name, 'text' ) for field_name in scalar_follow_up_fields ]
+    },
+    {
+        'output_file': path.join( 'registration', 'registration.tsv' ),
+        'rows_from': 'registrations',
+        'columns': [ ( 'case_id', '^case_id', 'raw' ) ] + [ ( field_name, field_name, 'text' ) for field_name in scalar_registration_fields ]
+    }
+]
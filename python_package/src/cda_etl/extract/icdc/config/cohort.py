@@ -0,0 +1,82 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type cohort {
+#     cohort_description: String
+#     cohort_dose: String
+#     cohort_id: String
+#     cases( first: {page_size}, offset: __OFFSET__, orderBy: [ case_id_asc ] ) {
+#         # Just for validation.
+#         case_id
+#     }
+#     study_arm {
+#         # Just for validation.
+#         arm_id
+#         arm
+#     }
+#     study {
+#         clinical_study_designation
+#     }
+# }
+
+scalar_fields = [
+    'cohort_id',
+    'cohort_description',
+    'cohort_dose'
+]
+
+# cohort(cohort_description: String, cohort_dose: String, cohort_id: String, filter: _cohortFilter, first: Int, offset: Int, orderBy: [_cohortOrdering!]): [cohort!]!
+
+# Sort order for paging through cohort records.
+
+order_by = [ 'cohort_id_asc' ]
+
+# Fields identifying a cohort record in log messages.
+
+label_fields = [ 'cohort_id' ]
+
+# Fields uniquely identifying a cohort record (used to join batched child lists back onto cohort records).
+
+key_fields = [ 'cohort_id' ]
+
+# Sub-objects to request along with each cohort record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'cases': { 'fields': [ 'case_id' ], 'order_by': [ 'case_id_asc' ], 'key_fields': [ 'case_id' ] },
+    'study_arm': { 'fields': [ 'arm_id', 'arm' ] },
+    'study': { 'fields': [ 'clinical_study_designation' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'cohort', 'cohort.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        # cohort_id shouldn't ever be null, but it sometimes is.
+
+        'output_file': path.join( 'cohort', 'cohort.clinical_study_designation.tsv' ),
+        'columns': [ ( 'cohort_id', 'cohort_id', 'value' ), ( 'clinical_study_designation', 'study.clinical_study_designation', 'value' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'cohort.study_arm.tsv' ),
+        'columns': [ ( 'cohort_id', 'cohort_id', 'value' ), ( 'arm_id', 'study_arm.arm_id', 'value' ), ( 'arm', 'study_arm.arm', 'value' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'cohort.case_id.tsv' ),
+        'rows_from': 'cases',
+        'columns': [ ( 'cohort_id', '^cohort_id', 'value' ), ( 'case_id', 'case_id', 'raw' ) ]
+    }
+]
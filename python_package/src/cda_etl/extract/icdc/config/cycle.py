@@ -0,0 +1,67 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type cycle {
+#     cycle_number: Int
+#     date_of_cycle_start: String
+#     date_of_cycle_end: String
+#     case {
+#         # Just for validation
+#         case_id
+#     }
+#     visits( first: {page_size}, offset: __OFFSET__, orderBy: [ visit_id_asc ] ) {
+#         # Just for validation
+#         visit_id
+#     }
+# }
+
+scalar_fields = [
+    'cycle_number',
+    'date_of_cycle_start',
+    'date_of_cycle_end'
+]
+
+# cycle(cycle_number: Int, date_of_cycle_start: String, date_of_cycle_end: String, filter: _cycleFilter, first: Int, offset: Int, orderBy: [_cycleOrdering!]): [cycle!]!
+
+# Sort order for paging through cycle records.
+
+order_by = [ 'date_of_cycle_start_asc', 'cycle_number_asc' ]
+
+# Fields identifying a cycle record in log messages.
+
+label_fields = [ 'cycle_number', 'date_of_cycle_start', 'date_of_cycle_end' ]
+
+# Sub-objects to request along with each cycle record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'case': { 'fields': [ 'case_id' ] },
+    'visits': { 'fields': [ 'visit_id' ], 'order_by': [ 'visit_id_asc' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'cycle', 'cycle.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        'output_file': path.join( 'cycle', 'cycle.case_id.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ] + [ ( 'case_id', 'case.case_id', 'value' ) ]
+    },
+    {
+        'output_file': path.join( 'cycle', 'cycle.case_id_and_visit_id.tsv' ),
+        'rows_from': 'visits',
+        'columns': [ ( field_name, f"^{field_name}", 'scalar' ) for field_name in scalar_fields ] + [ ( 'case_id', '^case.case_id', 'value' ), ( 'visit_id', 'visit_id', 'raw' ) ]
+    }
+]
@@ -0,0 +1,80 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type demographic {
+#     demographic_id: String
+#     breed: String
+#     additional_breed_detail: String
+#     patient_age_at_enrollment: Float
+#     patient_age_at_enrollment_unit: String
+#     patient_age_at_enrollment_original: Float
+#     patient_age_at_enrollment_original_unit: String
+#     date_of_birth: String
+#     sex: String
+#     weight: Float
+#     weight_unit: String
+#     weight_original: Float
+#     weight_original_unit: String
+#     neutered_indicator: String
+#     case {
+#         # Because demographic_id is sometimes null.
+#         case_id
+#     }
+# }
+
+scalar_fields = [
+    'demographic_id',
+    'breed',
+    'additional_breed_detail',
+    'patient_age_at_enrollment',
+    'patient_age_at_enrollment_unit',
+    'patient_age_at_enrollment_original',
+    'patient_age_at_enrollment_original_unit',
+    'date_of_birth',
+    'sex',
+    'weight',
+    'weight_unit',
+    'weight_original',
+    'weight_original_unit',
+    'neutered_indicator'
+]
+
+# demographic(demographic_id: String, breed: String, additional_breed_detail: String, patient_age_at_enrollment: Float, patient_age_at_enrollment_unit: String, patient_age_at_enrollment_original: Float, patient_age_at_enrollment_original_unit: String, date_of_birth: String, sex: String, weight: Float, weight_unit: String, weight_original: Float, weight_original_unit: String, neutered_indicator: String, filter: _demographicFilter, first: Int, offset: Int, orderBy: [_demographicOrdering!]): [demographic!]!
+
+# Sort order for paging through demographic records.
+
+order_by = [ 'demographic_id_asc' ]
+
+# Fields identifying a demographic record in log messages.
+
+label_fields = [ 'demographic_id' ]
+
+# Sub-objects to request along with each demographic record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    # Because demographic_id is sometimes null.
+
+    'case': { 'fields': [ 'case_id' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        # Every demographic record has to be linked to a case: downstream code assumes so.
+
+        'output_file': path.join( 'demographic', 'demographic.tsv' ),
+        'columns': [ ( 'case_id', 'case.case_id', 'raw' ) ] + [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ],
+        'required': [ 'case.case_id' ]
+    }
+]
@@ -0,0 +1,94 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type diagnosis {
+#     diagnosis_id: String
+#     disease_term: String
+#     primary_disease_site: String
+#     stage_of_disease: String
+#     date_of_diagnosis: String
+#     histology_cytopathology: String
+#     date_of_histology_confirmation: String
+#     histological_grade: String
+#     best_response: String
+#     pathology_report: String
+#     treatment_data: String
+#     follow_up_data: String
+#     concurrent_disease: String
+#     concurrent_disease_type: String
+#     case {
+#         # Just for validation
+#         case_id
+#     }
+#     files( first: {page_size}, offset: 0, orderBy: [ uuid_asc ] ) {
+#         # Just for validation
+#         uuid
+#     }
+# }
+
+scalar_fields = [
+    'diagnosis_id',
+    'disease_term',
+    'primary_disease_site',
+    'stage_of_disease',
+    'date_of_diagnosis',
+    'histology_cytopathology',
+    'date_of_histology_confirmation',
+    'histological_grade',
+    'best_response',
+    'pathology_report',
+    'treatment_data',
+    'follow_up_data',
+    'concurrent_disease',
+    'concurrent_disease_type'
+]
+
+# diagnosis(diagnosis_id: String, disease_term: String, primary_disease_site: String, stage_of_disease: String, date_of_diagnosis: String, histology_cytopathology: String, date_of_histology_confirmation: String, histological_grade: String, best_response: String, pathology_report: String, treatment_data: String, follow_up_data: String, concurrent_disease: String, concurrent_disease_type: String, filter: _diagnosisFilter, first: Int, offset: Int, orderBy: [_diagnosisOrdering!]): [diagnosis!]!
+
+# Sort order for paging through diagnosis records.
+
+order_by = [ 'diagnosis_id_asc' ]
+
+# Fields identifying a diagnosis record in log messages.
+
+label_fields = [ 'diagnosis_id' ]
+
+# Fields uniquely identifying a diagnosis record (used to join batched child lists back onto diagnosis records).
+
+key_fields = [ 'diagnosis_id' ]
+
+# Sub-objects to request along with each diagnosis record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'case': { 'fields': [ 'case_id' ] },
+    'files': { 'fields': [ 'uuid' ], 'order_by': [ 'uuid_asc' ], 'key_fields': [ 'uuid' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'diagnosis', 'diagnosis.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        'output_file': path.join( 'diagnosis', 'diagnosis.case_id.tsv' ),
+        'columns': [ ( 'diagnosis_id', 'diagnosis_id', 'raw' ), ( 'case_id', 'case.case_id', 'raw' ) ],
+        'skip_if_null': [ 'case.case_id' ]
+    },
+    {
+        'output_file': path.join( 'diagnosis', 'diagnosis.file_uuid.tsv' ),
+        'rows_from': 'files',
+        'columns': [ ( 'diagnosis_id', '^diagnosis_id', 'raw' ), ( 'file.uuid', 'uuid', 'raw' ) ]
+    }
+]
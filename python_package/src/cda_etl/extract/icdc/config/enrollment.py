@@ -0,0 +1,227 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type enrollment {
+#     enrollment_id: String
+#     date_of_registration: String
+#     registering_institution: String
+#     initials: String
+#     date_of_informed_consent: String
+#     site_short_name: String
+#     veterinary_medical_center: String
+#     patient_subgroup: String
+#     case: case
+#     prior_therapies(first: Int, offset: Int, orderBy: [_prior_therapyOrdering!], filter: _prior_therapyFilter): [prior_therapy]
+#     prior_surgeries(first: Int, offset: Int, orderBy: [_prior_surgeryOrdering!], filter: _prior_surgeryFilter): [prior_surgery]
+#     physical_exams(first: Int, offset: Int, orderBy: [_physical_examOrdering!], filter: _physical_examFilter): [physical_exam]
+# }
+
+scalar_fields = [
+    'enrollment_id',
+    'date_of_registration',
+    'registering_institution',
+    'initials',
+    'date_of_informed_consent',
+    'site_short_name',
+    'veterinary_medical_center',
+    'patient_subgroup'
+]
+
+# type prior_therapy {
+#     date_of_first_dose: String
+#     date_of_last_dose: String
+#     agent_name: String
+#     dose_schedule: String
+#     total_dose: Float
+#     total_dose_unit: String
+#     total_dose_original: Float
+#     total_dose_original_unit: String
+#     agent_units_of_measure: String
+#     best_response_to_prior_therapy: String
+#     nonresponse_therapy_type: String
+#     prior_therapy_type: String
+#     prior_steroid_exposure: Boolean
+#     number_of_prior_regimens_steroid: Int
+#     total_number_of_doses_steroid: Int
+#     date_of_last_dose_steroid: String
+#     prior_nsaid_exposure: Boolean
+#     number_of_prior_regimens_nsaid: Int
+#     total_number_of_doses_nsaid: Int
+#     date_of_last_dose_nsaid: String
+#     tx_loc_geo_loc_ind_nsaid: String
+#     min_rsdl_dz_tx_ind_nsaids_treatment_pe: String
+#     therapy_type: String
+#     any_therapy: Boolean
+#     number_of_prior_regimens_any_therapy: Int
+#     total_number_of_doses_any_therapy: Int
+#     date_of_last_dose_any_therapy: String
+#     treatment_performed_at_site: Boolean
+#     treatment_performed_in_minimal_residual: Boolean
+#     enrollment: enrollment
+#     next_prior_therapy: prior_therapy
+#     prior_prior_therapy: prior_therapy
+# }
+
+scalar_prior_therapy_fields = [
+    'date_of_first_dose',
+    'date_of_last_dose',
+    'agent_name',
+    'dose_schedule',
+    'total_dose',
+    'total_dose_unit',
+    'total_dose_original',
+    'total_dose_original_unit',
+    'agent_units_of_measure',
+    'best_response_to_prior_therapy',
+    'nonresponse_therapy_type',
+    'prior_therapy_type',
+    'prior_steroid_exposure',
+    'number_of_prior_regimens_steroid',
+    'total_number_of_doses_steroid',
+    'date_of_last_dose_steroid',
+    'prior_nsaid_exposure',
+    'number_of_prior_regimens_nsaid',
+    'total_number_of_doses_nsaid',
+    'date_of_last_dose_nsaid',
+    'tx_loc_geo_loc_ind_nsaid',
+    'min_rsdl_dz_tx_ind_nsaids_treatment_pe',
+    'therapy_type',
+    'any_therapy',
+    'number_of_prior_regimens_any_therapy',
+    'total_number_of_doses_any_therapy',
+    'date_of_last_dose_any_therapy',
+    'treatment_performed_at_site',
+    'treatment_performed_in_minimal_residual'
+]
+
+# type prior_surgery {
+#     date_of_surgery: String
+#     procedure: String
+#     anatomical_site_of_surgery: String
+#     surgical_finding: String
+#     residual_disease: String
+#     therapeutic_indicator: String
+#     enrollment: enrollment
+#     next_prior_surgery: prior_surgery
+#     prior_prior_surgery: prior_surgery
+# }
+
+scalar_prior_surgery_fields = [
+    'date_of_surgery',
+    'procedure',
+    'anatomical_site_of_surgery',
+    'surgical_finding',
+    'residual_disease',
+    'therapeutic_indicator'
+]
+
+# type physical_exam {
+#     date_of_examination: String
+#     day_in_cycle: Int
+#     body_system: String
+#     pe_finding: String
+#     pe_comment: String
+#     phase_pe: String
+#     assessment_timepoint: Int
+#     enrollment: enrollment
+#     visit: visit
+# }
+
+scalar_physical_exam_fields = [
+    'date_of_examination',
+    'day_in_cycle',
+    'body_system',
+    'pe_finding',
+    'pe_comment',
+    'phase_pe',
+    'assessment_timepoint'
+]
+
+# enrollment(enrollment_id: String, date_of_registration: String, registering_institution: String, initials: String, date_of_informed_consent: String, site_short_name: String, veterinary_medical_center: String, patient_subgroup: String, filter: _enrollmentFilter, first: Int, offset: Int, orderBy: [_enrollmentOrdering!]): [enrollment!]!
+
+# Sort order for paging through enrollment records.
+
+order_by = [ 'enrollment_id_asc' ]
+
+# Fields identifying a enrollment record in log messages.
+
+label_fields = [ 'enrollment_id' ]
+
+# Fields uniquely identifying an enrollment record (used to join batched child lists back onto enrollment records).
+
+key_fields = [ 'enrollment_id' ]
+
+# Sub-objects to request along with each enrollment record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'case': { 'fields': [ 'case_id' ] },
+    'prior_therapies': {
+        'fields': scalar_prior_therapy_fields,
+        'order_by': [ 'date_of_first_dose_asc' ],
+        'sub_objects': {
+            'enrollment': { 'fields': [ 'enrollment_id' ] },
+            'next_prior_therapy': { 'fields': [ 'date_of_first_dose' ] },
+            'prior_prior_therapy': { 'fields': [ 'date_of_first_dose' ] }
+        }
+    },
+    'prior_surgeries': {
+        'fields': scalar_prior_surgery_fields,
+        'order_by': [ 'date_of_surgery_asc' ],
+        'sub_objects': {
+            'enrollment': { 'fields': [ 'enrollment_id' ] },
+            'next_prior_surgery': { 'fields': [ 'date_of_surgery' ] },
+            'prior_prior_surgery': { 'fields': [ 'date_of_surgery' ] }
+        }
+    },
+    'physical_exams': {
+        'fields': scalar_physical_exam_fields,
+        'order_by': [ 'date_of_examination_asc' ],
+        'sub_objects': {
+            'enrollment': { 'fields': [ 'enrollment_id' ] },
+            'visit': { 'fields': [ 'visit_id' ] }
+        }
+    }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'enrollment', 'enrollment.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        'output_file': path.join( 'prior_therapy', 'prior_therapy.tsv' ),
+        'rows_from': 'prior_therapies',
+        'columns': [ ( 'enrollment_id', '^enrollment_id', 'raw' ), ( 'enrollment_id.sub_field_sanity_check', 'enrollment.enrollment_id', 'value' ) ] \
+            + [ ( field_name, field_name, 'text' ) for field_name in scalar_prior_therapy_fields ] \
+            + [ ( 'prior_prior_therapy.date_of_first_dose', 'prior_prior_therapy.date_of_first_dose', 'value' ), ( 'next_prior_therapy.date_of_first_dose', 'next_prior_therapy.date_of_first_dose', 'value' ) ]
+    },
+    {
+        'output_file': path.join( 'prior_surgery', 'prior_surgery.tsv' ),
+        'rows_from': 'prior_surgeries',
+        'columns': [ ( 'enrollment_id', '^enrollment_id', 'raw' ), ( 'enrollment_id.sub_field_sanity_check', 'enrollment.enrollment_id', 'value' ) ] \
+            + [ ( field_name, field_name, 'text' ) for field_name in scalar_prior_surgery_fields ] \
+            + [ ( 'prior_prior_surgery.date_of_surgery', 'prior_prior_surgery.date_of_surgery', 'value' ), ( 'next_prior_surgery.date_of_surgery', 'next_prior_surgery.date_of_surgery', 'value' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'enrollment.case_id.tsv' ),
+        'columns': [ ( 'enrollment_id', 'enrollment_id', 'raw' ), ( 'case_id', 'case.case_id', 'value' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'enrollment.physical_exam.tsv' ),
+        'rows_from': 'physical_exams',
+        'columns': [ ( 'visit_id', 'visit.visit_id', 'value' ), ( 'enrollment_id', '^enrollment_id', 'raw' ), ( 'enrollment_id.sub_field_sanity_check', 'enrollment.enrollment_id', 'value' ) ] \
+            + [ ( field_name, field_name, 'text' ) for field_name in scalar_physical_exam_fields ]
+    }
+]
@@ -0,0 +1,102 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type file {
+#     file_name: String
+#     file_type: String
+#     file_description: String
+#     file_format: String
+#     file_size: Float
+#     md5sum: String
+#     file_status: String
+#     uuid: String
+#     file_location: String
+#     case {
+#         # Just for validation
+#         case_id
+#     }
+#     study {
+#         clinical_study_designation
+#     }
+#     sample {
+#         # Just one?
+#         sample_id
+#     }
+#     assay {
+#         [nothing]
+#     }
+#     diagnosis {
+#         # Just one?
+#         diagnosis_id
+#     }
+# }
+
+scalar_fields = [
+    'uuid',
+    'file_name',
+    'file_type',
+    'file_description',
+    'file_format',
+    'file_size',
+    'md5sum',
+    'file_status',
+    'file_location'
+]
+
+# file(file_name: String, file_type: String, file_description: String, file_format: String, file_size: Float, md5sum: String, file_status: String, uuid: String, file_location: String, filter: _fileFilter, first: Int, offset: Int, orderBy: [_fileOrdering!]): [file!]!
+
+# Sort order for paging through file records.
+
+order_by = [ 'uuid_asc' ]
+
+# Fields identifying a file record in log messages.
+
+label_fields = [ 'uuid' ]
+
+# Sub-objects to request along with each file record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'study': { 'fields': [ 'clinical_study_designation' ] },
+    'case': { 'fields': [ 'case_id' ] },
+    'diagnosis': { 'fields': [ 'diagnosis_id' ] },
+    'sample': { 'fields': [ 'sample_id' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'file', 'file.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        'output_file': path.join( 'file', 'file.clinical_study_designation.tsv' ),
+        'columns': [ ( 'file.uuid', 'uuid', 'raw' ), ( 'clinical_study_designation', 'study.clinical_study_designation', 'text' ) ],
+        'skip_if_null': [ 'study.clinical_study_designation' ]
+    },
+    {
+        'output_file': path.join( 'file', 'file.case_id.tsv' ),
+        'columns': [ ( 'file.uuid', 'uuid', 'raw' ), ( 'case_id', 'case.case_id', 'raw' ) ],
+        'skip_if_null': [ 'case.case_id' ]
+    },
+    {
+        'output_file': path.join( 'file', 'file.diagnosis_id.tsv' ),
+        'columns': [ ( 'file.uuid', 'uuid', 'raw' ), ( 'diagnosis_id', 'diagnosis.diagnosis_id', 'raw' ) ],
+        'skip_if_null': [ 'diagnosis.diagnosis_id' ]
+    },
+    {
+        'output_file': path.join( 'file', 'file.sample_id.tsv' ),
+        'columns': [ ( 'file.uuid', 'uuid', 'raw' ), ( 'sample_id', 'sample.sample_id', 'raw' ) ],
+        'skip_if_null': [ 'sample.sample_id' ]
+    }
+]
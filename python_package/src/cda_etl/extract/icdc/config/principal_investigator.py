@@ -0,0 +1,57 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type principal_investigator {
+#     pi_first_name: String
+#     pi_last_name: String
+#     pi_middle_initial: String
+#     studies( first: {page_size}, offset: __OFFSET__, orderBy: [ clinical_study_designation_asc ] ) {
+#         clinical_study_designation
+#     }
+# }
+
+scalar_fields = [
+    'pi_first_name',
+    'pi_last_name',
+    'pi_middle_initial'
+]
+
+# principal_investigator(pi_first_name: String, pi_last_name: String, pi_middle_initial: String, filter: _principal_investigatorFilter, first: Int, offset: Int, orderBy: [_principal_investigatorOrdering!]): [principal_investigator!]!
+
+# Sort order for paging through principal_investigator records.
+
+order_by = [ 'pi_last_name_asc', 'pi_first_name_asc' ]
+
+# Fields identifying a principal_investigator record in log messages.
+
+label_fields = [ 'pi_first_name', 'pi_middle_initial', 'pi_last_name' ]
+
+# Sub-objects to request along with each principal_investigator record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'studies': { 'fields': [ 'clinical_study_designation' ], 'order_by': [ 'clinical_study_designation_asc' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'principal_investigator', 'principal_investigator.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        'output_file': path.join( 'principal_investigator', 'principal_investigator.clinical_study_designation.tsv' ),
+        'rows_from': 'studies',
+        'columns': [ ( field_name, f"^{field_name}", 'scalar' ) for field_name in scalar_fields ] + [ ( 'clinical_study_designation', 'clinical_study_designation', 'raw' ) ]
+    }
+]
@@ -0,0 +1,67 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type program {
+#     program_name: String
+#     program_acronym: String
+#     program_short_description: String
+#     program_full_description: String
+#     program_external_url: String
+#     program_sort_order: Int
+#     studies( first: {page_size}, offset: __OFFSET__, orderBy: [ clinical_study_designation_asc ] ) {
+#         clinical_study_designation
+#     }
+# }
+
+scalar_fields = [
+    'program_name',
+    'program_acronym',
+    'program_short_description',
+    'program_full_description',
+    'program_external_url',
+    'program_sort_order'
+]
+
+# program(program_name: String, program_acronym: String, program_short_description: String, program_full_description: String, program_external_url: String, program_sort_order: Int, filter: _programFilter, first: Int, offset: Int, orderBy: [_programOrdering!]): [program!]!
+
+# Sort order for paging through program records.
+
+order_by = [ 'program_acronym_asc' ]
+
+# Fields identifying a program record in log messages.
+
+label_fields = [ 'program_acronym' ]
+
+# Fields uniquely identifying a program record (used to join batched child lists back onto program records).
+
+key_fields = [ 'program_acronym' ]
+
+# Sub-objects to request along with each program record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'studies': { 'fields': [ 'clinical_study_designation' ], 'order_by': [ 'clinical_study_designation_asc' ], 'key_fields': [ 'clinical_study_designation' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'program', 'program.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        'output_file': path.join( 'program', 'program.clinical_study_designation.tsv' ),
+        'rows_from': 'studies',
+        'columns': [ ( 'program_acronym', '^program_acronym', 'scalar' ), ( 'clinical_study_designation', 'clinical_study_designation', 'raw' ) ]
+    }
+]
@@ -0,0 +1,150 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type sample {
+#     sample_id: String
+#     sample_site: String
+#     physical_sample_type: String
+#     general_sample_pathology: String
+#     tumor_sample_origin: String
+#     summarized_sample_type: String
+#     molecular_subtype: String
+#     specific_sample_pathology: String
+#     date_of_sample_collection: String
+#     sample_chronology: String
+#     necropsy_sample: String
+#     tumor_grade: String
+#     length_of_tumor: Float
+#     length_of_tumor_unit: String
+#     length_of_tumor_original: Float
+#     length_of_tumor_original_unit: String
+#     width_of_tumor: Float
+#     width_of_tumor_unit: String
+#     width_of_tumor_original: Float
+#     width_of_tumor_original_unit: String
+#     volume_of_tumor: Float
+#     volume_of_tumor_unit: String
+#     volume_of_tumor_original: Float
+#     volume_of_tumor_original_unit: String
+#     percentage_tumor: String
+#     sample_preservation: String
+#     comment: String
+#     case {
+#         # Just for validation
+#         case_id
+#     }
+#     visit {
+#         visit_id
+#     }
+#     assays {
+#         [nothing]
+#     }
+#     files( first: {page_size}, offset: 0, orderBy: [ uuid_asc ] ) {
+#         # Just for validation
+#         uuid
+#     }
+#     next_sample {
+#         sample_id
+#     }
+#     prior_sample {
+#         sample_id
+#     }
+# }
+
+scalar_fields = [
+    'sample_id',
+    'sample_site',
+    'physical_sample_type',
+    'general_sample_pathology',
+    'tumor_sample_origin',
+    'summarized_sample_type',
+    'molecular_subtype',
+    'specific_sample_pathology',
+    'date_of_sample_collection',
+    'sample_chronology',
+    'necropsy_sample',
+    'tumor_grade',
+    'length_of_tumor',
+    'length_of_tumor_unit',
+    'length_of_tumor_original',
+    'length_of_tumor_original_unit',
+    'width_of_tumor',
+    'width_of_tumor_unit',
+    'width_of_tumor_original',
+    'width_of_tumor_original_unit',
+    'volume_of_tumor',
+    'volume_of_tumor_unit',
+    'volume_of_tumor_original',
+    'volume_of_tumor_original_unit',
+    'percentage_tumor',
+    'sample_preservation',
+    'comment'
+]
+
+# sample(sample_id: String, sample_site: String, physical_sample_type: String, general_sample_pathology: String, tumor_sample_origin: String, summarized_sample_type: String, molecular_subtype: String, specific_sample_pathology: String, date_of_sample_collection: String, sample_chronology: String, necropsy_sample: String, tumor_grade: String, length_of_tumor: Float, length_of_tumor_unit: String, length_of_tumor_original: Float, length_of_tumor_original_unit: String, width_of_tumor: Float, width_of_tumor_unit: String, width_of_tumor_original: Float, width_of_tumor_original_unit: String, volume_of_tumor: Float, volume_of_tumor_unit: String, volume_of_tumor_original: Float, volume_of_tumor_original_unit: String, percentage_tumor: String, sample_preservation: String, comment: String, filter: _sampleFilter, first: Int, offset: Int, orderBy: [_sampleOrdering!]): [sample!]!
+
+# Sort order for paging through sample records.
+
+order_by = [ 'sample_id_asc' ]
+
+# Fields identifying a sample record in log messages.
+
+label_fields = [ 'sample_id' ]
+
+# Fields uniquely identifying a sample record (used to join batched child lists back onto sample records).
+
+key_fields = [ 'sample_id' ]
+
+# Sub-objects to request along with each sample record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'case': { 'fields': [ 'case_id' ] },
+    'visit': { 'fields': [ 'visit_id' ] },
+    'files': { 'fields': [ 'uuid' ], 'order_by': [ 'uuid_asc' ], 'key_fields': [ 'uuid' ] },
+    'next_sample': { 'fields': [ 'sample_id' ] },
+    'prior_sample': { 'fields': [ 'sample_id' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'sample', 'sample.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        'output_file': path.join( 'sample', 'sample.case_id.tsv' ),
+        'columns': [ ( 'sample_id', 'sample_id', 'raw' ), ( 'case_id', 'case.case_id', 'raw' ) ],
+        'skip_if_null': [ 'case.case_id' ]
+    },
+    {
+        'output_file': path.join( 'sample', 'sample.file_uuid.tsv' ),
+        'rows_from': 'files',
+        'columns': [ ( 'sample_id', '^sample_id', 'raw' ), ( 'file.uuid', 'uuid', 'raw' ) ]
+    },
+    {
+        'output_file': path.join( 'sample', 'sample.visit_id.tsv' ),
+        'columns': [ ( 'sample_id', 'sample_id', 'raw' ), ( 'visit_id', 'visit.visit_id', 'raw' ) ],
+        'skip_if_null': [ 'visit.visit_id' ]
+    },
+    {
+        'output_file': path.join( 'sample', 'sample.prior_sample_sample_id.tsv' ),
+        'columns': [ ( 'sample_id', 'sample_id', 'raw' ), ( 'prior_sample.sample_id', 'prior_sample.sample_id', 'raw' ) ],
+        'skip_if_null': [ 'prior_sample.sample_id' ]
+    },
+    {
+        'output_file': path.join( 'sample', 'sample.next_sample_sample_id.tsv' ),
+        'columns': [ ( 'sample_id', 'sample_id', 'raw' ), ( 'next_sample.sample_id', 'next_sample.sample_id', 'raw' ) ],
+        'skip_if_null': [ 'next_sample.sample_id' ]
+    }
+]
@@ -0,0 +1,266 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type study {
+#     clinical_study_designation: String
+#     clinical_study_id: String
+#     clinical_study_name: String
+#     clinical_study_description: String
+#     clinical_study_type: String
+#     date_of_iacuc_approval: String
+#     dates_of_conduct: String
+#     accession_id: String
+#     study_disposition: String
+#     program {
+#         # Just for validation.
+#         program_acronym
+#     }
+#     study_sites( first: {page_size}, offset: __OFFSET__, orderBy: [ site_short_name_asc ] ) {
+#         site_short_name: String
+#         veterinary_medical_center: String
+#         registering_institution: String
+#         studies( first: {page_size}, offset: __OFFSET__, orderBy: [ clinical_study_designation_asc ] ) {
+#             # Just for validation.
+#             clinical_study_designation
+#         }
+#     }
+#     image_collections( first: {page_size}, offset: __OFFSET__, orderBy: [ image_collection_name_asc ] ) {
+#         image_collection_name: String
+#         image_type_included: String
+#         image_collection_url: String
+#         repository_name: String
+#         collection_access: String
+#         study {
+#             # Just for validation.
+#             clinical_study_designation
+#         }
+#     }
+#     publications( first: {page_size}, offset: __OFFSET__, orderBy: [ publication_title_asc ] ) {
+#         publication_title: String
+#         authorship: String
+#         year_of_publication: Float
+#         journal_citation: String
+#         digital_object_id: String
+#         pubmed_id: Float
+#         study {
+#             # Just for validation.
+#             clinical_study_designation
+#         }
+#     }
+#     cases( first: {page_size}, offset: __OFFSET__, orderBy: [ case_id_asc ] ) {
+#         # Just for validation.
+#         case_id
+#     }
+#     cohorts( first: {page_size}, offset: __OFFSET__, orderBy: [ cohort_id_asc ] ) {
+#         # Just for validation.
+#         cohort_id
+#     }
+#     files( first: {page_size}, offset: __OFFSET__, orderBy: [ uuid_asc ] ) {
+#         # Just for validation
+#         uuid
+#     }
+#     principal_investigators( first: {page_size}, offset: __OFFSET__, orderBy: [ pi_last_name_asc, pi_first_name_asc ] ) {
+#         pi_first_name: String
+#         pi_last_name: String
+#         pi_middle_initial: String
+#         studies( first: {page_size}, offset: __OFFSET__, orderBy: [ clinical_study_designation_asc ] ) {
+#             # Just for validation.
+#             clinical_study_designation
+#         }
+#     }
+#     study_arms( first: {page_size}, offset: __OFFSET__, orderBy: [ arm_id_asc ] ) {
+#         # Just for validation.
+#         arm_id
+#         arm
+#     }
+# }
+
+scalar_fields = [
+    'clinical_study_designation',
+    'clinical_study_id',
+    'clinical_study_name',
+    'clinical_study_description',
+    'clinical_study_type',
+    'date_of_iacuc_approval',
+    'dates_of_conduct',
+    'accession_id',
+    'study_disposition'
+]
+
+# type study_site {
+#     site_short_name: String
+#     veterinary_medical_center: String
+#     registering_institution: String
+#     studies(first: Int, offset: Int, orderBy: [_studyOrdering!], filter: _studyFilter): [study]
+# }
+
+scalar_study_site_fields = [
+    'site_short_name',
+    'veterinary_medical_center',
+    'registering_institution'
+]
+
+# type image_collection {
+#     image_collection_name: String
+#     image_type_included: String
+#     image_collection_url: String
+#     repository_name: String
+#     collection_access: String
+#     study: study
+# }
+
+scalar_image_collection_fields = [
+    'image_collection_name',
+    'image_type_included',
+    'image_collection_url',
+    'repository_name',
+    'collection_access'
+]
+
+# type publication {
+#     publication_title: String
+#     authorship: String
+#     year_of_publication: Float
+#     journal_citation: String
+#     digital_object_id: String
+#     pubmed_id: Float
+#     study: study
+# }
+
+scalar_publication_fields = [
+    'publication_title',
+    'authorship',
+    'year_of_publication',
+    'journal_citation',
+    'digital_object_id',
+    'pubmed_id'
+]
+
+# type principal_investigator {
+#     pi_first_name: String
+#     pi_last_name: String
+#     pi_middle_initial: String
+#     studies(first: Int, offset: Int, orderBy: [_studyOrdering!], filter: _studyFilter): [study]
+# }
+
+scalar_principal_investigator_fields = [
+    'pi_first_name',
+    'pi_last_name',
+    'pi_middle_initial'
+]
+
+# study(clinical_study_id: String, clinical_study_designation: String, clinical_study_name: String, clinical_study_description: String, clinical_study_type: String, date_of_iacuc_approval: String, dates_of_conduct: String, accession_id: String, study_disposition: String, filter: _studyFilter, first: Int, offset: Int, orderBy: [_studyOrdering!]): [study!]!
+
+# Sort order for paging through study records.
+
+order_by = [ 'clinical_study_designation_asc' ]
+
+# Fields identifying a study record in log messages.
+
+label_fields = [ 'clinical_study_designation' ]
+
+# Fields uniquely identifying a study record (used to join batched child lists back onto study records).
+
+key_fields = [ 'clinical_study_designation' ]
+
+# Sub-objects to request along with each study record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'program': { 'fields': [ 'program_acronym' ] },
+    'study_sites': {
+        'fields': scalar_study_site_fields,
+        'order_by': [ 'site_short_name_asc' ],
+        'sub_objects': { 'studies': { 'fields': [ 'clinical_study_designation' ], 'order_by': [ 'clinical_study_designation_asc' ] } }
+    },
+    'image_collections': {
+        'fields': scalar_image_collection_fields,
+        'order_by': [ 'image_collection_name_asc' ],
+        'sub_objects': { 'study': { 'fields': [ 'clinical_study_designation' ] } }
+    },
+    'publications': {
+        'fields': scalar_publication_fields,
+        'order_by': [ 'publication_title_asc' ],
+        'sub_objects': { 'study': { 'fields': [ 'clinical_study_designation' ] } }
+    },
+    'cases': { 'fields': [ 'case_id' ], 'order_by': [ 'case_id_asc' ], 'key_fields': [ 'case_id' ] },
+    'cohorts': { 'fields': [ 'cohort_id' ], 'order_by': [ 'cohort_id_asc' ], 'key_fields': [ 'cohort_id' ] },
+    'files': { 'fields': [ 'uuid' ], 'order_by': [ 'uuid_asc' ], 'key_fields': [ 'uuid' ] },
+    'principal_investigators': {
+        'fields': scalar_principal_investigator_fields,
+        'order_by': [ 'pi_last_name_asc', 'pi_first_name_asc' ],
+        'sub_objects': { 'studies': { 'fields': [ 'clinical_study_designation' ], 'order_by': [ 'clinical_study_designation_asc' ] } }
+    },
+    'study_arms': { 'fields': [ 'arm_id', 'arm' ], 'order_by': [ 'arm_id_asc' ], 'key_fields': [ 'arm_id' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'study', 'study.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        'output_file': path.join( 'study_site', 'study_site.tsv' ),
+        'rows_from': 'study_sites',
+        'columns': [ ( 'clinical_study_designation', '^clinical_study_designation', 'raw' ) ] + [ ( field_name, field_name, 'text' ) for field_name in scalar_study_site_fields ],
+        'sanity_check': { 'values': 'studies.clinical_study_designation', 'must_include': '^clinical_study_designation', 'label': [ 'site_short_name' ] }
+    },
+    {
+        'output_file': path.join( 'image_collection', 'image_collection.tsv' ),
+        'rows_from': 'image_collections',
+        'columns': [ ( 'clinical_study_designation', '^clinical_study_designation', 'raw' ) ] + [ ( field_name, field_name, 'text' ) for field_name in scalar_image_collection_fields ],
+        'sanity_check': { 'values': 'study.clinical_study_designation', 'must_include': '^clinical_study_designation', 'label': [ 'image_collection_name' ] }
+    },
+    {
+        'output_file': path.join( 'publication', 'publication.tsv' ),
+        'rows_from': 'publications',
+        'columns': [ ( 'clinical_study_designation', '^clinical_study_designation', 'raw' ) ] + [ ( field_name, field_name, 'text' ) for field_name in scalar_publication_fields ],
+        'sanity_check': { 'values': 'study.clinical_study_designation', 'must_include': '^clinical_study_designation', 'label': [ 'publication_title' ] }
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'study.program_acronym.tsv' ),
+        'columns': [ ( 'clinical_study_designation', 'clinical_study_designation', 'raw' ), ( 'program_acronym', 'program.program_acronym', 'raw' ) ],
+        'skip_if_null': [ 'program.program_acronym' ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'study.case_id.tsv' ),
+        'rows_from': 'cases',
+        'columns': [ ( 'clinical_study_designation', '^clinical_study_designation', 'raw' ), ( 'case_id', 'case_id', 'raw' ) ]
+    },
+    {
+        # cohort_id shouldn't ever be null, but it sometimes is.
+
+        'output_file': path.join( '__redundant_relationship_validation', 'study.cohort_id.tsv' ),
+        'rows_from': 'cohorts',
+        'columns': [ ( 'clinical_study_designation', '^clinical_study_designation', 'raw' ), ( 'cohort_id', 'cohort_id', 'value' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'study.file_uuid.tsv' ),
+        'rows_from': 'files',
+        'columns': [ ( 'clinical_study_designation', '^clinical_study_designation', 'raw' ), ( 'file.uuid', 'uuid', 'raw' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'study.principal_investigator.tsv' ),
+        'rows_from': 'principal_investigators',
+        'columns': [ ( 'clinical_study_designation', '^clinical_study_designation', 'raw' ) ] + [ ( field_name, field_name, 'text' ) for field_name in scalar_principal_investigator_fields ],
+        'sanity_check': { 'values': 'studies.clinical_study_designation', 'must_include': '^clinical_study_designation', 'label': [ 'pi_first_name', 'pi_middle_initial', 'pi_last_name' ] }
+    },
+    {
+        # arm_id and arm shouldn't ever be null, but they sometimes are.
+
+        'output_file': path.join( '__redundant_relationship_validation', 'study.study_arm.tsv' ),
+        'rows_from': 'study_arms',
+        'columns': [ ( 'clinical_study_designation', '^clinical_study_designation', 'raw' ), ( 'arm_id', 'arm_id', 'value' ), ( 'arm', 'arm', 'value' ) ]
+    }
+]
@@ -0,0 +1,126 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type study_arm {
+#     arm: String
+#     ctep_treatment_assignment_code: String
+#     arm_description: String
+#     arm_id: String
+#     study {
+#         clinical_study_designation
+#     }
+#     cohorts( first: {page_size}, offset: __OFFSET__, orderBy: [ cohort_id_asc ] ) {
+#         cohort_id
+#     }
+#     cases( first: {page_size}, offset: __OFFSET__, orderBy: [ case_id_asc ] ) {
+#         # Just for validation.
+#         case_id
+#     }
+#     agents( first: {page_size}, offset: __OFFSET__, orderBy: [ medication_asc, document_number_asc ] ) {
+#         medication
+#         document_number
+#         adverse_events( first: {page_size}, offset: __OFFSET__, orderBy: [ date_of_onset_asc ] ) {
+#             # Exploration only; there are no reliable record IDs here
+#             adverse_event_term
+#         }
+#         agent_administrations( first: {page_size}, offset: __OFFSET__, orderBy: [ medication_asc, document_number_asc ] ) {
+#             medication
+#             document_number
+#         }
+#     }
+# }
+
+scalar_fields = [
+    'arm',
+    'ctep_treatment_assignment_code',
+    'arm_description',
+    'arm_id'
+]
+
+# type agent {
+#     medication: String
+#     document_number: String
+#     study_arms(first: Int, offset: Int, orderBy: [_study_armOrdering!], filter: _study_armFilter): [study_arm]
+#     agent_administrations(first: Int, offset: Int, orderBy: [_agent_administrationOrdering!], filter: _agent_administrationFilter): [agent_administration]
+#     adverse_events(first: Int, offset: Int, orderBy: [_adverse_eventOrdering!], filter: _adverse_eventFilter): [adverse_event]
+# }
+
+scalar_agent_fields = [
+    'medication',
+    'document_number'
+]
+
+# study_arm(arm: String, ctep_treatment_assignment_code: String, arm_description: String, arm_id: String, filter: _study_armFilter, first: Int, offset: Int, orderBy: [_study_armOrdering!]): [study_arm!]!
+
+# Sort order for paging through study_arm records.
+
+order_by = [ 'arm_id_asc' ]
+
+# Fields identifying a study_arm record in log messages.
+
+label_fields = [ 'arm_id' ]
+
+# Fields uniquely identifying a study_arm record (used to join batched child lists back onto study_arm records).
+
+key_fields = [ 'arm_id' ]
+
+# Sub-objects to request along with each study_arm record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'agents': {
+        'fields': scalar_agent_fields,
+        'order_by': [ 'medication_asc', 'document_number_asc' ],
+        'sub_objects': {
+            'adverse_events': { 'fields': [ 'adverse_event_term' ], 'order_by': [ 'date_of_onset_asc' ] },
+            'agent_administrations': { 'fields': [ 'medication', 'document_number' ], 'order_by': [ 'medication_asc', 'document_number_asc' ] }
+        }
+    },
+    'study': { 'fields': [ 'clinical_study_designation' ] },
+    'cohorts': { 'fields': [ 'cohort_id' ], 'order_by': [ 'cohort_id_asc' ], 'key_fields': [ 'cohort_id' ] },
+    'cases': { 'fields': [ 'case_id' ], 'order_by': [ 'case_id_asc' ], 'key_fields': [ 'case_id' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'study_arm', 'study_arm.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        # arm_id and arm shouldn't ever be null, but they sometimes are.
+
+        'output_file': path.join( 'study_arm', 'study_arm.clinical_study_designation.tsv' ),
+        'columns': [ ( 'arm_id', 'arm_id', 'value' ), ( 'arm', 'arm', 'value' ), ( 'clinical_study_designation', 'study.clinical_study_designation', 'value' ) ]
+    },
+    {
+        'output_file': path.join( 'study_arm', 'study_arm.cohort_id.tsv' ),
+        'rows_from': 'cohorts',
+        'columns': [ ( 'arm_id', '^arm_id', 'value' ), ( 'cohort_id', 'cohort_id', 'value' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'study_arm.case_id.tsv' ),
+        'rows_from': 'cases',
+        'columns': [ ( 'arm_id', '^arm_id', 'value' ), ( 'case_id', 'case_id', 'raw' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'agent.adverse_events.adverse_event_term.from_study_arm_query.tsv' ),
+        'rows_from': 'agents.adverse_events',
+        'columns': [ ( 'agent.medication', '^medication', 'value' ), ( 'agent.document_number', '^document_number', 'value' ), ( 'adverse_event.adverse_event_term', 'adverse_event_term', 'raw' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'agent.agent_administrations.medication_and_document_number.from_study_arm_query.tsv' ),
+        'rows_from': 'agents.agent_administrations',
+        'columns': [ ( 'agent.medication', '^medication', 'value' ), ( 'agent.document_number', '^document_number', 'value' ), ( 'agent_administration.medication', 'medication', 'value' ), ( 'agent_administration.document_number', 'document_number', 'value' ) ]
+    }
+]
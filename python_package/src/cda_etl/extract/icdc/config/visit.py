@@ -0,0 +1,250 @@
+from os import path
+
+# Number of records we ask the API for per page. Nested lists are requested with the
+# same limit (and we warn about any that come back full).
+
+page_size = 1000
+
+# Maximum number of page requests we'll keep in flight for this entity once it turns
+# out to have more than one page of records. Set to 1 to page through results serially.
+
+max_concurrent_requests = 4
+
+# type visit {
+#     visit_date: String
+#     visit_number: String
+#     visit_id: String
+#     case: case
+#     cycle: cycle
+#     agent_administrations(first: Int, offset: Int, orderBy: [_agent_administrationOrdering!], filter: _agent_administrationFilter): [agent_administration]
+#     samples(first: Int, offset: Int, orderBy: [_sampleOrdering!], filter: _sampleFilter): [sample]
+#     physical_exams(first: Int, offset: Int, orderBy: [_physical_examOrdering!], filter: _physical_examFilter): [physical_exam]
+#     lab_exams(first: Int, offset: Int, filter: _lab_examFilter): [lab_exam]
+#     disease_extents(first: Int, offset: Int, orderBy: [_disease_extentOrdering!], filter: _disease_extentFilter): [disease_extent]
+#     vital_signs(first: Int, offset: Int, orderBy: [_vital_signsOrdering!], filter: _vital_signsFilter): [vital_signs]
+#     next_visit: visit
+#     prior_visit: visit
+# }
+
+scalar_fields = [
+    'visit_id',
+    'visit_date',
+    'visit_number'
+]
+
+# type physical_exam {
+#     date_of_examination: String
+#     day_in_cycle: Int
+#     body_system: String
+#     pe_finding: String
+#     pe_comment: String
+#     phase_pe: String
+#     assessment_timepoint: Int
+#     enrollment: enrollment
+#     visit: visit
+# }
+
+scalar_physical_exam_fields = [
+    'date_of_examination',
+    'day_in_cycle',
+    'body_system',
+    'pe_finding',
+    'pe_comment',
+    'phase_pe',
+    'assessment_timepoint'
+]
+
+# type disease_extent {
+#     lesion_number: String
+#     lesion_site: String
+#     lesion_description: String
+#     previously_irradiated: String
+#     previously_treated: String
+#     measurable_lesion: String
+#     target_lesion: String
+#     date_of_evaluation: String
+#     measured_how: String
+#     longest_measurement: Float
+#     longest_measurement_unit: String
+#     longest_measurement_original: Float
+#     longest_measurement_original_unit: String
+#     evaluation_number: String
+#     evaluation_code: String
+#     visit: visit
+# }
+
+scalar_disease_extent_fields = [
+    'lesion_number',
+    'lesion_site',
+    'lesion_description',
+    'previously_irradiated',
+    'previously_treated',
+    'measurable_lesion',
+    'target_lesion',
+    'date_of_evaluation',
+    'measured_how',
+    'longest_measurement',
+    'longest_measurement_unit',
+    'longest_measurement_original',
+    'longest_measurement_original_unit',
+    'evaluation_number',
+    'evaluation_code'
+]
+
+# type vital_signs {
+#     date_of_vital_signs: String
+#     body_temperature: Float
+#     body_temperature_unit: String
+#     body_temperature_original: Float
+#     body_temperature_original_unit: String
+#     pulse: Int
+#     pulse_unit: String
+#     pulse_original: Int
+#     pulse_original_unit: String
+#     respiration_rate: Int
+#     respiration_rate_unit: String
+#     respiration_rate_original: Int
+#     respiration_rate_original_unit: String
+#     respiration_pattern: String
+#     systolic_bp: Int
+#     systolic_bp_unit: String
+#     systolic_bp_original: Int
+#     systolic_bp_original_unit: String
+#     pulse_ox: Float
+#     pulse_ox_unit: String
+#     pulse_ox_original: Float
+#     pulse_ox_original_unit: String
+#     patient_weight: Float
+#     patient_weight_unit: String
+#     patient_weight_original: Float
+#     patient_weight_original_unit: String
+#     body_surface_area: Float
+#     body_surface_area_unit: String
+#     body_surface_area_original: Float
+#     body_surface_area_original_unit: String
+#     modified_ecog: String
+#     ecg: String
+#     assessment_timepoint: Int
+#     phase: String
+#     visit: visit
+# }
+
+scalar_vital_signs_fields = [
+    'date_of_vital_signs',
+    'body_temperature',
+    'body_temperature_unit',
+    'body_temperature_original',
+    'body_temperature_original_unit',
+    'pulse',
+    'pulse_unit',
+    'pulse_original',
+    'pulse_original_unit',
+    'respiration_rate',
+    'respiration_rate_unit',
+    'respiration_rate_original',
+    'respiration_rate_original_unit',
+    'respiration_pattern',
+    'systolic_bp',
+    'systolic_bp_unit',
+    'systolic_bp_original',
+    'systolic_bp_original_unit',
+    'pulse_ox',
+    'pulse_ox_unit',
+    'pulse_ox_original',
+    'pulse_ox_original_unit',
+    'patient_weight',
+    'patient_weight_unit',
+    'patient_weight_original',
+    'patient_weight_original_unit',
+    'body_surface_area',
+    'body_surface_area_unit',
+    'body_surface_area_original',
+    'body_surface_area_original_unit',
+    'modified_ecog',
+    'ecg',
+    'assessment_timepoint',
+    'phase'
+]
+
+# visit(visit_date: String, visit_number: String, visit_id: String, filter: _visitFilter, first: Int, offset: Int, orderBy: [_visitOrdering!]): [visit!]!
+
+# Sort order for paging through visit records.
+
+order_by = [ 'visit_id_asc' ]
+
+# Fields identifying a visit record in log messages.
+
+label_fields = [ 'visit_id' ]
+
+# Fields uniquely identifying a visit record (used to join batched child lists back onto visit records).
+
+key_fields = [ 'visit_id' ]
+
+# Sub-objects to request along with each visit record (see ICDC_extractor for the format).
+
+sub_objects = {
+    
+    'case': { 'fields': [ 'case_id' ] },
+    'cycle': { 'fields': [ 'cycle_number' ], 'sub_objects': { 'case': { 'fields': [ 'case_id' ] } } },
+    'agent_administrations': { 'fields': [ 'document_number', 'medication' ], 'order_by': [ 'document_number_asc', 'medication_asc' ] },
+    'samples': { 'fields': [ 'sample_id' ], 'order_by': [ 'sample_id_asc' ], 'key_fields': [ 'sample_id' ] },
+    'physical_exams': { 'fields': scalar_physical_exam_fields, 'order_by': [ 'date_of_examination_asc' ], 'sub_objects': { 'enrollment': { 'fields': [ 'enrollment_id' ] } } },
+    'disease_extents': { 'fields': scalar_disease_extent_fields, 'order_by': [ 'date_of_evaluation_asc', 'evaluation_number_asc', 'evaluation_code_asc', 'lesion_site_asc' ] },
+    'vital_signs': { 'fields': scalar_vital_signs_fields, 'order_by': [ 'date_of_vital_signs_asc' ] },
+    'next_visit': { 'fields': [ 'visit_id' ] },
+    'prior_visit': { 'fields': [ 'visit_id' ] }
+}
+
+# TSVs to write (see ICDC_extractor for the format).
+
+output_tables = [
+    {
+        'output_file': path.join( 'visit', 'visit.tsv' ),
+        'columns': [ ( field_name, field_name, 'scalar' ) for field_name in scalar_fields ]
+    },
+    {
+        'output_file': path.join( 'visit', 'visit.prior_visit_visit_id.tsv' ),
+        'columns': [ ( 'visit_id', 'visit_id', 'raw' ), ( 'prior_visit.visit_id', 'prior_visit.visit_id', 'raw' ) ],
+        'skip_if_null': [ 'prior_visit.visit_id' ]
+    },
+    {
+        'output_file': path.join( 'visit', 'visit.next_visit_visit_id.tsv' ),
+        'columns': [ ( 'visit_id', 'visit_id', 'raw' ), ( 'next_visit.visit_id', 'next_visit.visit_id', 'raw' ) ],
+        'skip_if_null': [ 'next_visit.visit_id' ]
+    },
+    {
+        'output_file': path.join( 'physical_exam', 'physical_exam.tsv' ),
+        'rows_from': 'physical_exams',
+        'columns': [ ( 'visit_id', '^visit_id', 'raw' ), ( 'enrollment_id', 'enrollment.enrollment_id', 'raw' ) ] + [ ( field_name, field_name, 'text' ) for field_name in scalar_physical_exam_fields ]
+    },
+    {
+        'output_file': path.join( 'disease_extent', 'disease_extent.tsv' ),
+        'rows_from': 'disease_extents',
+        'columns': [ ( 'visit_id', '^visit_id', 'raw' ) ] + [ ( field_name, field_name, 'text' ) for field_name in scalar_disease_extent_fields ]
+    },
+    {
+        'output_file': path.join( 'vital_signs', 'vital_signs.tsv' ),
+        'rows_from': 'vital_signs',
+        'columns': [ ( 'visit_id', '^visit_id', 'raw' ) ] + [ ( field_name, field_name, 'text' ) for field_name in scalar_vital_signs_fields ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'visit.case_id.tsv' ),
+        'columns': [ ( 'visit_id', 'visit_id', 'raw' ), ( 'case_id', 'case.case_id', 'raw' ) ],
+        'skip_if_null': [ 'case.case_id' ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'visit.cycle_case_id_and_cycle_number.tsv' ),
+        'rows_from': 'cycle',
+        'columns': [ ( 'visit_id', '^visit_id', 'raw' ), ( 'case_id', 'case.case_id', 'raw' ), ( 'cycle_number', 'cycle_number', 'value' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'visit.agent_administration_document_number_and_medication.tsv' ),
+        'rows_from': 'agent_administrations',
+        'columns': [ ( 'visit_id', '^visit_id', 'raw' ), ( 'document_number', 'document_number', 'value' ), ( 'medication', 'medication', 'value' ) ]
+    },
+    {
+        'output_file': path.join( '__redundant_relationship_validation', 'visit.sample_id.tsv' ),
+        'rows_from': 'samples',
+        'columns': [ ( 'visit_id', '^visit_id', 'raw' ), ( 'sample_id', 'sample_id', 'raw' ) ]
+    }
+]
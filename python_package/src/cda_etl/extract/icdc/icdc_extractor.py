@@ -0,0 +1,845 @@
+import json
+import sys
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from os import makedirs, path
+from urllib.parse import urlsplit
+
+from cda_etl import http_client
+from cda_etl.lib import get_current_date
+from cda_etl.tsv_writer import TSV_writer
+
+# ICDC GraphQL API endpoint.
+
+DEFAULT_API_URL = 'https://caninecommons.cancer.gov/v1/graphql/'
+
+# Where we put everything we extract.
+
+DEFAULT_OUTPUT_ROOT = path.join( 'extracted_data', 'icdc' )
+
+# Maximum number of page requests we'll allow to be in flight against the ICDC API at
+# any one time, across all entities being extracted.
+
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+
+# Where scripts/000_get_schema_via_introspection.py saves the ICDC schema.
+
+DEFAULT_SCHEMA_FILE = path.join( 'auxiliary_metadata', '__schemas', 'ICDC_schema.json' )
+
+# GraphQL alias under which child-edge queries ask for each child's parent record(s).
+
+_PARENT_ALIAS = '_parent'
+
+# Value returned by __get_value() for a path that runs through a missing (or null) sub-object,
+# as opposed to a path that ends in a null value.
+
+_MISSING = object()
+
+def _is_null( value ):
+    
+    return value is None or value is _MISSING
+
+def run_query( api_url, api_query_json ):
+    
+    """
+    POST one GraphQL query to the ICDC API and return the decoded JSON result.
+
+    If the HTTP response code is not OK (200), dump the query, print the http error result and exit.
+    """
+
+    response = http_client.post( api_url, json=api_query_json )
+
+    if not response.ok:
+        
+        print( api_query_json['query'], file=sys.stderr )
+
+        response.raise_for_status()
+
+    return json.loads( response.content )
+
+def _get_type_name( type_ref ):
+    
+    # ( name of the named type under any NON_NULL and LIST wrappers, whether there was a LIST wrapper )
+
+    is_list = False
+
+    while type_ref is not None and type_ref['kind'] in { 'NON_NULL', 'LIST' }:
+        
+        if type_ref['kind'] == 'LIST':
+            
+            is_list = True
+
+        type_ref = type_ref['ofType']
+
+    return ( None if type_ref is None else type_ref['name'], is_list )
+
+def load_schema( schema_file=DEFAULT_SCHEMA_FILE ):
+    
+    """
+    Load the ICDC schema saved by scripts/000_get_schema_via_introspection.py, as
+    { object type name -> { field name -> ( field type name, whether the field is a list ) } }.
+    """
+
+    if not path.exists( schema_file ):
+        
+        sys.exit( f"load_schema(): FATAL: can't find ICDC schema file '{schema_file}' (run 000_get_schema_via_introspection.py first). Aborting." )
+
+    with open( schema_file ) as IN:
+        
+        schema = json.load( IN )
+
+    object_types = dict()
+
+    for current_type in schema['data']['__schema']['types']:
+        
+        if current_type['kind'] == 'OBJECT' and current_type['fields'] is not None:
+            
+            object_types[current_type['name']] = { field['name']: _get_type_name( field['type'] ) for field in current_type['fields'] }
+
+    return object_types
+
+class ICDC_extractor:
+    
+    """
+    Page through one ICDC GraphQL entity query ( e.g. `case( first: 1000, offset: ..., orderBy: [ case_id_asc ] ) { ... }` )
+    and save what comes back: every page of raw JSON (pretty-printed, in page order) to
+    `<output_root>/__API_result_json/<entity>_metadata.json`, and field and association data
+    to TSVs.
+
+    Everything specific to an entity lives in its config module (cda_etl.extract.icdc.config.<entity>):
+        
+        scalar_fields           fields requested on (and saved for) each top-level record
+        order_by                orderBy clause for the top-level query
+        label_fields            fields identifying a record in log messages
+        sub_objects             nested selections, keyed by GraphQL field name; each is a dict with
+                                'fields' (scalar fields to request), optionally 'order_by' (which
+                                makes it a list, requested as `name( first: page_size, offset: 0, orderBy: [...] )`),
+                                optionally 'key_fields' (fields uniquely identifying a record in the list; needed
+                                for child-edge batching) and optionally 'sub_objects' (more of the same, one
+                                level down)
+        output_tables           one dict per TSV to write (see below)
+        page_size               records per page (also the `first:` limit on nested lists)
+        max_concurrent_requests page requests to keep in flight for this entity once it turns out
+                                to need more than one page
+        key_fields              (optional) fields uniquely identifying a top-level record; needed
+                                for child-edge batching (see below)
+
+    Each output table dict has:
+        
+        'output_file'   path of the TSV, relative to output_root
+        'columns'       list of ( column name, value path, style ) tuples
+        'rows_from'     (optional) path to the sub-object(s) each row describes: one row per object
+                        found there (lists are walked). Default: one row per top-level record.
+        'skip_if_null'  (optional) value paths: skip the row if any of these is null or missing
+        'required'      (optional) value paths: abort if any of these is null or missing
+        'sanity_check'  (optional) dict( values=path, must_include=path, label=[ paths ] ): warn if the
+                        value at `must_include` isn't among the values found at `values`
+
+    Value paths are dot-separated field names, resolved from the row's object. Each leading '^'
+    climbs one level back up the `rows_from` path first: for rows from 'agents.adverse_events',
+    '^medication' is the medication of the agent an adverse_event was listed under, and
+    '^^arm_id' is the arm_id of the top-level study_arm record. Styles say how a value becomes
+    a TSV field:
+        
+        'scalar'    json.dumps(), quotes stripped, null -> ''
+        'text'      as 'scalar', but only applied to non-null values
+        'value'     the value as-is; null or missing -> ''
+        'raw'       the value as-is, including null (written as 'None'); missing sub-object -> ''
+        'join'      comma-separated list of all the (non-null) values found along the path, walking lists
+
+    If `schema` (as returned by load_schema()) is given and the entity's config has key_fields,
+    top-level nested lists with key_fields of their own are not requested inside the entity query
+    at all. Instead, for each such list sub-object (e.g. case.diagnoses), the schema is used to find
+    the child type's own top-level query and the field on the child type pointing back at the
+    parent type (e.g. diagnosis.case); every child record is then paged through once, ordered by
+    the list's (unique) key_fields so that concurrent offset pages can't overlap or leave gaps,
+    with its parent's key_fields. Children are attached to their parent records locally and
+    re-sorted there into the sub-object's order_by order. This trades one nested (and possibly
+    truncated) list per record for a few bulk queries per list. Raw child-edge pages are saved to
+    `<output_root>/__API_result_json/<entity>.<list field name>_metadata.json`. Lists without
+    key_fields, and lists the schema can't resolve unambiguously, are requested nested, as usual.
+    """
+
+    def __init__( self, entity, api_url=DEFAULT_API_URL, output_root=DEFAULT_OUTPUT_ROOT, schema=None ):
+        
+        self.entity = entity
+
+        self.api_url = api_url
+
+        self.output_root = output_root
+
+        self.json_out_dir = path.join( output_root, '__API_result_json' )
+
+        self.output_json = path.join( self.json_out_dir, f"{entity}_metadata.json" )
+
+        # Load entity-specific configuration metadata.
+
+        entity_config = __import__( f"cda_etl.extract.icdc.config.{entity}", fromlist=[None] )
+
+        self.scalar_fields = entity_config.scalar_fields
+
+        self.order_by = entity_config.order_by
+
+        self.label_fields = entity_config.label_fields
+
+        self.sub_objects = entity_config.sub_objects
+
+        self.output_tables = entity_config.output_tables
+
+        self.page_size = entity_config.page_size
+
+        self.max_concurrent_requests = entity_config.max_concurrent_requests
+
+        self.key_fields = getattr( entity_config, 'key_fields', None )
+
+        # Top-level list sub-objects we'll fetch as separate child-edge queries rather than nested
+        # in the entity query (field name -> edge query plan).
+
+        self.batched_lists = dict()
+
+        if schema is not None and self.key_fields is not None:
+            
+            self.batched_lists = self.__get_batched_lists( schema )
+
+        self.query_template = self.__get_query_template()
+
+        # Paths (from the top-level record) of every nested list we ask for, so we can warn when one fills up.
+        # Batched lists are always complete, so they're left out.
+
+        self.list_paths = [ list_path for list_path in self.__get_list_paths( self.sub_objects ) if not ( len( list_path ) == 1 and list_path[0] in self.batched_lists ) ]
+
+        # Resolve all the path strings in self.output_tables once, up front.
+
+        self.tables = [ self.__compile_table( table ) for table in self.output_tables ]
+
+    def __get_selection( self, fields, sub_objects, indent ):
+        
+        lines = [ f"{indent}{field_name}" for field_name in fields ]
+
+        for field_name, sub_object in sub_objects.items():
+            
+            if 'order_by' in sub_object:
+                
+                lines.append( f"{indent}{field_name}( first: {self.page_size}, offset: 0, orderBy: [ {', '.join( sub_object['order_by'] )} ] ) {{" )
+
+            else:
+                
+                lines.append( f"{indent}{field_name} {{" )
+
+            lines = lines + self.__get_selection( sub_object['fields'], sub_object.get( 'sub_objects', dict() ), indent + '    ' )
+
+            lines.append( f"{indent}}}" )
+
+        return lines
+
+    def __get_query_template( self ):
+        
+        sub_objects = { field_name: sub_object for field_name, sub_object in self.sub_objects.items() if field_name not in self.batched_lists }
+
+        lines = [ '    {', f"        {self.entity}( first: {self.page_size}, offset: __OFFSET__, orderBy: [ {', '.join( self.order_by )} ] ) {{" ]
+
+        lines = lines + self.__get_selection( self.scalar_fields, sub_objects, '            ' )
+
+        lines = lines + [ '        }', '    }' ]
+
+        return '\n'.join( lines )
+
+    def get_query( self, offset, query_template=None ):
+        
+        if query_template is None:
+            
+            query_template = self.query_template
+
+        return {
+            
+            'query': query_template.replace( '__OFFSET__', str( offset ) )
+        }
+
+    def __get_batched_lists( self, schema ):
+        
+        """
+        Work out, from the schema, how to fetch each top-level list sub-object as a separate child-edge
+        query. Lists we can't resolve unambiguously are left out (and so get requested nested).
+        """
+
+        query_fields = schema.get( 'Query', dict() )
+
+        if self.entity not in query_fields:
+            
+            print( f"WARNING: ICDC_extractor( '{self.entity}' ): no top-level '{self.entity}' query in the ICDC schema; fetching all nested lists inline.", file=sys.stderr )
+
+            return dict()
+
+        parent_type = query_fields[self.entity][0]
+
+        batched_lists = dict()
+
+        for field_name, sub_object in self.sub_objects.items():
+            
+            if 'order_by' not in sub_object:
+                
+                continue
+
+            reason = None
+
+            sort_keys = self.__get_sort_keys( sub_object )
+
+            child_type = schema.get( parent_type, dict() ).get( field_name, ( None, False ) )[0]
+
+            # The child type's own top-level query (preferring the one named after the type).
+
+            child_queries = sorted( query_name for query_name, ( type_name, is_list ) in query_fields.items() if type_name == child_type and is_list )
+
+            # Field(s) on the child type pointing back at the parent type.
+
+            reverse_fields = sorted( reverse_field for reverse_field, ( type_name, is_list ) in schema.get( child_type, dict() ).items() if type_name == parent_type )
+
+            if 'key_fields' not in sub_object:
+                
+                reason = "no key_fields configured for it, and offset paging needs a unique sort key"
+
+            elif sort_keys is None:
+                
+                reason = f"its order_by {sub_object['order_by']} can't be reproduced locally from its fields"
+
+            elif child_type is None:
+                
+                reason = f"the schema has no '{parent_type}.{field_name}' field"
+
+            elif child_type == parent_type:
+                
+                reason = f"'{field_name}' links {parent_type} records to each other"
+
+            elif len( child_queries ) == 0:
+                
+                reason = f"the schema has no top-level query for '{child_type}' records"
+
+            elif len( reverse_fields ) != 1:
+                
+                reason = f"'{child_type}' has {len( reverse_fields )} fields pointing back at '{parent_type}' ({reverse_fields}); expected exactly one"
+
+            if reason is not None:
+                
+                print( f"WARNING: ICDC_extractor( '{self.entity}' ): can't batch '{field_name}' ({reason}); fetching it nested under each {self.entity} instead.", file=sys.stderr )
+
+                continue
+
+            child_query = child_type if child_type in child_queries else child_queries[0]
+
+            reverse_field = reverse_fields[0]
+
+            reverse_is_list = schema[child_type][reverse_field][1]
+
+            batched_lists[field_name] = {
+                
+                'child_query': child_query,
+                'reverse_field': reverse_field,
+                'reverse_is_list': reverse_is_list,
+                'sort_keys': sort_keys,
+                'query_template': self.__get_edge_query_template( child_query, sub_object, reverse_field, reverse_is_list ),
+                'output_json': path.join( self.json_out_dir, f"{self.entity}.{field_name}_metadata.json" )
+            }
+
+        return batched_lists
+
+    def __get_sort_keys( self, sub_object ):
+        
+        """
+        Translate a list sub-object's order_by clause (e.g. [ 'date_of_evaluation_asc', 'lesion_site_asc' ])
+        into [ ( field name, descending? ), ... ], or None if it isn't built only from fields we request.
+        """
+
+        sort_keys = list()
+
+        for order_by in sub_object['order_by']:
+            
+            field_name, direction = order_by.rsplit( '_', 1 ) if '_' in order_by else ( order_by, None )
+
+            if direction not in { 'asc', 'desc' } or field_name not in sub_object['fields']:
+                
+                return None
+
+            sort_keys.append( ( field_name, direction == 'desc' ) )
+
+        return sort_keys
+
+    def __sort_children( self, children, sort_keys ):
+        
+        """
+        Sort one parent's children the way the nested list would have been sorted: one stable sort per
+        order_by field, last field first, with nulls last when ascending and first when descending
+        (as the ICDC API's Neo4j backend does). Ties keep the order they arrived in, i.e. key_fields order.
+        """
+
+        for field_name, descending in reversed( sort_keys ):
+            
+            children.sort( key=lambda child: ( child.get( field_name ) is None, child.get( field_name ) if child.get( field_name ) is not None else '' ), reverse=descending )
+
+    def __get_edge_query_template( self, child_query, sub_object, reverse_field, reverse_is_list ):
+        
+        # Page on the list's unique key: with ties in the sort order, records could move between
+        # (concurrently requested) offset pages. Per-parent order_by order is restored locally.
+
+        lines = [ '    {', f"        {child_query}( first: {self.page_size}, offset: __OFFSET__, orderBy: [ {', '.join( f'{field_name}_asc' for field_name in sub_object['key_fields'] )} ] ) {{" ]
+
+        lines = lines + self.__get_selection( sub_object['fields'], sub_object.get( 'sub_objects', dict() ), '            ' )
+
+        if reverse_is_list:
+            
+            lines.append( f"            {_PARENT_ALIAS}: {reverse_field}( first: {self.page_size}, offset: 0 ) {{" )
+
+        else:
+            
+            lines.append( f"            {_PARENT_ALIAS}: {reverse_field} {{" )
+
+        lines = lines + [ f"                {field_name}" for field_name in self.key_fields ]
+
+        lines = lines + [ '            }', '        }', '    }' ]
+
+        return '\n'.join( lines )
+
+    def __get_list_paths( self, sub_objects, prefix=None ):
+        
+        list_paths = list()
+
+        for field_name, sub_object in sub_objects.items():
+            
+            field_path = [ field_name ] if prefix is None else prefix + [ field_name ]
+
+            if 'order_by' in sub_object:
+                
+                list_paths.append( field_path )
+
+            list_paths = list_paths + self.__get_list_paths( sub_object.get( 'sub_objects', dict() ), field_path )
+
+        return list_paths
+
+    def __compile_path( self, value_path ):
+        
+        # ( number of levels to climb from the row's object before starting, [ field names ] )
+
+        levels_up = len( value_path ) - len( value_path.lstrip( '^' ) )
+
+        return ( levels_up, value_path[levels_up:].split( '.' ) )
+
+    def __compile_table( self, table ):
+        
+        for style in [ column[2] for column in table['columns'] ]:
+            
+            if style not in { 'scalar', 'text', 'value', 'raw', 'join' }:
+                
+                sys.exit( f"ICDC_extractor( '{self.entity}' ): FATAL: unknown column style '{style}' in output table '{table['output_file']}'. Aborting." )
+
+        compiled_table = {
+            
+            'output_file': path.join( self.output_root, table['output_file'] ),
+            'column_names': [ column[0] for column in table['columns'] ],
+            'columns': [ ( self.__compile_path( column[1] ), column[2] ) for column in table['columns'] ],
+            'rows_from': None if 'rows_from' not in table else table['rows_from'],
+            'skip_if_null': [ self.__compile_path( value_path ) for value_path in table.get( 'skip_if_null', list() ) ],
+            'required': [ ( value_path, self.__compile_path( value_path ) ) for value_path in table.get( 'required', list() ) ],
+            'sanity_check': None
+        }
+
+        if 'sanity_check' in table:
+            
+            sanity_check = table['sanity_check']
+
+            compiled_table['sanity_check'] = {
+                
+                'values': sanity_check['values'],
+                'values_path': self.__compile_path( sanity_check['values'] ),
+                'must_include': self.__compile_path( sanity_check['must_include'] ),
+                'label': [ self.__compile_path( value_path ) for value_path in sanity_check['label'] ]
+            }
+
+        return compiled_table
+
+    def __get_start( self, item, ancestors, levels_up ):
+        
+        # Climb `levels_up` levels (at most to the top-level record).
+
+        if levels_up == 0 or len( ancestors ) == 0:
+            
+            return item
+
+        return ancestors[max( 0, len( ancestors ) - levels_up )]
+
+    def __get_value( self, item, ancestors, compiled_path ):
+        
+        """
+        Follow a compiled path through nested objects. Returns _MISSING if the path runs through a
+        missing or null sub-object (or names a field we don't have), otherwise whatever's at the end
+        of it (which may be None).
+        """
+
+        ( levels_up, field_names ) = compiled_path
+
+        current = self.__get_start( item, ancestors, levels_up )
+
+        for field_name in field_names:
+            
+            if not isinstance( current, dict ) or field_name not in current:
+                
+                return _MISSING
+
+            current = current[field_name]
+
+        return current
+
+    def __get_items( self, start, field_names ):
+        
+        """
+        Follow `field_names` from `start`, walking every element of any list encountered on the way
+        (including at the end). Returns ( item, ancestors ) for each non-null object or value found,
+        where `ancestors` lists the objects stepped through to get there, `start` first.
+        """
+
+        current_items = [ ( start, [] ) ]
+
+        for field_name in field_names:
+            
+            next_items = list()
+
+            for current, ancestors in current_items:
+                
+                if isinstance( current, dict ) and field_name in current and current[field_name] is not None:
+                    
+                    if isinstance( current[field_name], list ):
+                        
+                        next_items = next_items + [ ( value, ancestors + [ current ] ) for value in current[field_name] if value is not None ]
+
+                    else:
+                        
+                        next_items.append( ( current[field_name], ancestors + [ current ] ) )
+
+            current_items = next_items
+
+        return current_items
+
+    def __get_values( self, item, ancestors, compiled_path ):
+        
+        ( levels_up, field_names ) = compiled_path
+
+        return [ value for value, value_ancestors in self.__get_items( self.__get_start( item, ancestors, levels_up ), field_names ) ]
+
+    def __format_value( self, item, ancestors, compiled_path, style ):
+        
+        if style == 'join':
+            
+            return ','.join( str( value ) for value in self.__get_values( item, ancestors, compiled_path ) )
+
+        value = self.__get_value( item, ancestors, compiled_path )
+
+        if style == 'scalar':
+            
+            # There are newlines, carriage returns, quotes and/or nonprintables in some text fields,
+            # hence the json.dumps() wrap.
+
+            field_value = json.dumps( None if value is _MISSING else value ).strip( '"' )
+
+            return '' if field_value == 'null' else field_value
+
+        if value is _MISSING:
+            
+            return ''
+
+        if style == 'raw':
+            
+            return value
+
+        if value is None:
+            
+            return ''
+
+        if style == 'text':
+            
+            return json.dumps( value ).strip( '"' )
+
+        # 'value'
+
+        return value
+
+    def __get_label( self, record ):
+        
+        return ' '.join( str( record[field_name] ) for field_name in self.label_fields if field_name in record and record[field_name] is not None )
+
+    def __check_list_sizes( self, record ):
+        
+        for list_path in self.list_paths:
+            
+            for parent, ancestors in self.__get_items( record, list_path[:-1] ):
+                
+                if isinstance( parent, dict ) and isinstance( parent.get( list_path[-1] ), list ) and len( parent[list_path[-1]] ) == self.page_size:
+                    
+                    print( f"WARNING: {self.entity} \"{self.__get_label( record )}\" has at least {self.page_size} {'.'.join( list_path )} records: implement paging here or risk data loss.", file=sys.stderr )
+
+    def __get_rows( self, record, table ):
+        
+        if table['rows_from'] is None:
+            
+            items = [ ( record, [] ) ]
+
+        else:
+            
+            items = self.__get_items( record, table['rows_from'].split( '.' ) )
+
+        for item, ancestors in items:
+            
+            if any( _is_null( self.__get_value( item, ancestors, compiled_path ) ) for compiled_path in table['skip_if_null'] ):
+                
+                continue
+
+            for value_path, compiled_path in table['required']:
+                
+                if _is_null( self.__get_value( item, ancestors, compiled_path ) ):
+                    
+                    sys.exit( f"FATAL: {self.entity} \"{self.__get_label( record )}\" has no {value_path}; violates downstream assumptions, aborting." )
+
+            sanity_check = table['sanity_check']
+
+            if sanity_check is not None:
+                
+                expected_value = self.__get_value( item, ancestors, sanity_check['must_include'] )
+
+                if expected_value not in self.__get_values( item, ancestors, sanity_check['values_path'] ):
+                    
+                    label = ' '.join( str( value ) for value in [ self.__get_value( item, ancestors, compiled_path ) for compiled_path in sanity_check['label'] ] if not _is_null( value ) )
+
+                    print( f"WARNING: {table['rows_from']} record \"{label}\" doesn't have a {sanity_check['values']} value matching \"{expected_value}\" -- please investigate", file=sys.stderr )
+
+            yield [ self.__format_value( item, ancestors, compiled_path, style ) for ( compiled_path, style ) in table['columns'] ]
+
+    def get_pages( self, executor, query_name=None, query_template=None ):
+        
+        """
+        Yield ( offset, result, records ) for each page of results, in offset order, up to and
+        including the first empty page. By default this pages through the entity query; pass
+        `query_name` and `query_template` to page through some other top-level query instead.
+
+        Page requests are submitted to `executor`. The first page is requested on its own; after
+        any full page (i.e. whenever more are likely to follow), up to self.max_concurrent_requests
+        pages are kept in flight, and results that come back early are held until it's their turn.
+
+        Exits if a page comes back with GraphQL errors or without data for `query_name`.
+        """
+
+        if query_name is None:
+            
+            query_name = self.entity
+
+        # Queue of ( offset, future ), in offset order.
+
+        pending_pages = deque()
+
+        next_offset = 0
+
+        max_pending_pages = 1
+
+        try:
+            
+            while True:
+                
+                while len( pending_pages ) < max_pending_pages:
+                    
+                    pending_pages.append( ( next_offset, executor.submit( run_query, self.api_url, self.get_query( next_offset, query_template ) ) ) )
+
+                    next_offset = next_offset + self.page_size
+
+                offset, future = pending_pages.popleft()
+
+                result = future.result()
+
+                if result.get( 'errors' ):
+                    
+                    sys.exit( f"ICDC_extractor( '{self.entity}' ): FATAL: `{query_name}( first: {self.page_size}, offset: {offset} )` returned errors: {result['errors']}. Aborting." )
+
+                records = ( result.get( 'data' ) or dict() ).get( query_name )
+
+                if records is None:
+                    
+                    sys.exit( f"ICDC_extractor( '{self.entity}' ): FATAL: `{query_name}( first: {self.page_size}, offset: {offset} )` returned no data (result: {result}). Aborting." )
+
+                yield ( offset, result, records )
+
+                if len( records ) == 0:
+                    
+                    return
+
+                max_pending_pages = self.max_concurrent_requests if len( records ) == self.page_size else 1
+
+        finally:
+            
+            # Don't bother running speculative requests past the end of the data.
+
+            for offset, future in pending_pages:
+                
+                future.cancel()
+
+    def __get_parent_keys( self, edge ):
+        
+        parents = edge.get( _PARENT_ALIAS )
+
+        if parents is None:
+            
+            return []
+
+        if not isinstance( parents, list ):
+            
+            parents = [ parents ]
+
+        return [ tuple( parent.get( field_name ) for field_name in self.key_fields ) for parent in parents if parent is not None ]
+
+    def __get_children_by_parent( self, executor, field_name ):
+        
+        """
+        Page through every child record of one batched list (saving the raw pages as JSON), and
+        return { parent key -> [ child records, in order ] }.
+        """
+
+        batched_list = self.batched_lists[field_name]
+
+        children_by_parent = dict()
+
+        with open( batched_list['output_json'], 'w', buffering=4 * 1024 * 1024 ) as JSON:
+            
+            for offset, result, edges in self.get_pages( executor, batched_list['child_query'], batched_list['query_template'] ):
+                
+                print( json.dumps( result, indent=4, sort_keys=False ), file=JSON )
+
+                for edge in edges:
+                    
+                    if batched_list['reverse_is_list'] and isinstance( edge.get( _PARENT_ALIAS ), list ) and len( edge[_PARENT_ALIAS] ) == self.page_size:
+                        
+                        print( f"WARNING: {batched_list['child_query']} record at offset {offset} has at least {self.page_size} {batched_list['reverse_field']} records: implement paging here or risk data loss.", file=sys.stderr )
+
+                    child = { key: value for key, value in edge.items() if key != _PARENT_ALIAS }
+
+                    for parent_key in self.__get_parent_keys( edge ):
+                        
+                        if parent_key not in children_by_parent:
+                            
+                            children_by_parent[parent_key] = list()
+
+                        children_by_parent[parent_key].append( child )
+
+        for children in children_by_parent.values():
+            
+            self.__sort_children( children, batched_list['sort_keys'] )
+
+        return children_by_parent
+
+    def extract( self, executor=None ):
+        
+        """
+        Pull every page of this entity's records and save them (as raw JSON and as TSVs).
+        If `executor` is given, page requests are run on it (so they can share a worker pool with
+        other extractions); otherwise we make our own.
+        """
+
+        if executor is None:
+            
+            with ThreadPoolExecutor( max_workers=self.max_concurrent_requests ) as own_executor:
+                
+                return self.extract( own_executor )
+
+        for output_dir in sorted( { path.dirname( table['output_file'] ) for table in self.tables } | { self.json_out_dir } ):
+            
+            if not path.exists( output_dir ):
+                
+                makedirs( output_dir, exist_ok=True )
+
+        writers = list()
+
+        try:
+            
+            for table in self.tables:
+                
+                writers.append( TSV_writer( table['output_file'], table['column_names'] ) )
+
+            # Pull batched child lists first, so they can be joined onto each record as it comes in.
+
+            children = { field_name: self.__get_children_by_parent( executor, field_name ) for field_name in self.batched_lists }
+
+            with open( self.output_json, 'w', buffering=4 * 1024 * 1024 ) as JSON:
+                
+                for offset, result, records in self.get_pages( executor ):
+                    
+                    # Save a version of the returned data as raw JSON.
+
+                    print( json.dumps( result, indent=4, sort_keys=False ), file=JSON )
+
+                    # Save fields and association data as TSVs.
+
+                    for record in records:
+                        
+                        if len( children ) > 0:
+                            
+                            record_key = tuple( record.get( field_name ) for field_name in self.key_fields )
+
+                            for field_name in children:
+                                
+                                record[field_name] = children[field_name].get( record_key, [] )
+
+                        for table, writer in zip( self.tables, writers ):
+                            
+                            writer.write_rows( self.__get_rows( record, table ) )
+
+                        self.__check_list_sizes( record )
+
+        finally:
+            
+            for writer in writers:
+                
+                writer.close()
+
+def extract_entities_in_parallel( entity_list, api_url=DEFAULT_API_URL, output_root=DEFAULT_OUTPUT_ROOT, max_concurrent_requests=DEFAULT_MAX_CONCURRENT_REQUESTS, requests_per_second=None, schema_file=None ):
+    
+    """
+    Run ICDC_extractor.extract() for every entity in `entity_list` at the same time, as one job:
+    each entity is processed in its own thread, and all their page requests share one pool of
+    `max_concurrent_requests` workers (and http_client's connection pool, retries and, if
+    `requests_per_second` is given, per-host throttle).
+
+    If `schema_file` is given, the schema saved there is used to batch child-edge fetches
+    (see ICDC_extractor).
+
+    If every entity succeeds, record the extraction date.
+    """
+
+    if requests_per_second is not None:
+        
+        http_client.set_rate_limit( urlsplit( api_url ).netloc, requests_per_second )
+
+    schema = None if schema_file is None else load_schema( schema_file )
+
+    failed_entities = list()
+
+    with ThreadPoolExecutor( max_workers=max_concurrent_requests ) as request_executor:
+        
+        with ThreadPoolExecutor( max_workers=len( entity_list ) ) as entity_executor:
+            
+            futures = { entity: entity_executor.submit( ICDC_extractor( entity, api_url=api_url, output_root=output_root, schema=schema ).extract, request_executor ) for entity in entity_list }
+
+            for entity in entity_list:
+                
+                try:
+                    
+                    futures[entity].result()
+
+                    print( f"Extraction of ICDC '{entity}' metadata complete.", file=sys.stderr )
+
+                except BaseException as e:
+                    
+                    print( f"ERROR: extraction of ICDC '{entity}' metadata failed: {e}", file=sys.stderr )
+
+                    failed_entities.append( entity )
+
+    if len( failed_entities ) > 0:
+        
+        sys.exit( f"FATAL: extraction failed for ICDC entities {failed_entities}. Aborting." )
+
+    with open( path.join( output_root, 'extraction_date.txt' ), 'w' ) as OUT:
+        
+        print( get_current_date(), file=OUT )
@@ -1,12 +1,13 @@
 #!/usr/bin/env python3 -u
 
-import requests
 import json
 import re
 import sys
 
 from os import makedirs, path
 
+from cda_etl import http_client
+
 api_url = 'https://caninecommons.cancer.gov/v1/graphql/'
 
 output_dir = path.join( 'auxiliary_metadata', '__schemas' )
@@ -87,7 +88,7 @@ if not path.exists( output_dir ):
     
     makedirs( output_dir )
 
-response = requests.post( api_url, json={ 'query': query } )
+response = http_client.post( api_url, json={ 'query': query } )
 
 if( response.ok ):
     
@@ -0,0 +1,44 @@
+#!/usr/bin/env python -u
+
+from cda_etl.extract.icdc.icdc_extractor import DEFAULT_SCHEMA_FILE, extract_entities_in_parallel
+
+# PARAMETERS
+
+entity_list = [
+    
+    'case',
+    'file',
+    'diagnosis',
+    'sample',
+    'visit',
+    'enrollment',
+    'adverse_event',
+    'agent',
+    'agent_administration',
+    'cycle',
+    'study_arm',
+    'cohort',
+    'study',
+    'program',
+    'principal_investigator',
+    'demographic',
+    'biospecimen_source'
+]
+
+# Maximum number of page requests in flight against the ICDC API at any one time, across all entities.
+
+max_concurrent_requests = 8
+
+# Saved by 000_get_schema_via_introspection.py. Used to fetch child lists (for entities whose configs
+# define key_fields) as bulk child-edge queries joined back on locally, instead of nested in every record.
+
+schema_file = DEFAULT_SCHEMA_FILE
+
+# EXECUTION
+
+# All entities are pulled concurrently, as one job (one thread per entity, sharing one pool of
+# request workers); the extraction date is recorded once all of them have succeeded.
+
+if __name__ == '__main__':
+    
+    extract_entities_in_parallel( entity_list, max_concurrent_requests=max_concurrent_requests, schema_file=schema_file )
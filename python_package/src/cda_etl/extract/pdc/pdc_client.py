@@ -0,0 +1,464 @@
+import gzip
+import json
+import sys
+import time
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from os import makedirs, path, rename
+from urllib.parse import urlsplit
+
+from cda_etl import http_client
+
+# Maximum number of per-study PDC queries we'll allow to be in flight at any one time.
+# Set to 1 to query studies one at a time.
+
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8
+
+# Maximum number of request starts per second we'll allow against the PDC API host,
+# however many workers are running.
+
+DEFAULT_REQUESTS_PER_SECOND = 10
+
+# How many cases fetch_cases_in_batches() asks for in each query.
+
+DEFAULT_CASE_BATCH_SIZE = 100
+
+# Where PDC_paginator remembers, per query, the page size and inter-page delay it
+# had settled on by the end of the last run.
+
+DEFAULT_PAGINATOR_SETTINGS_FILE = 'extracted_data/pdc/__paginator_settings.json'
+
+def run_query( api_url, api_query_json ):
+    
+    """
+    POST one GraphQL query to the PDC API and return the decoded JSON result.
+
+    If the HTTP response code is not OK (200), dump the query, print the http error result and exit.
+    """
+
+    response = http_client.post( api_url, json=api_query_json )
+
+    if not response.ok:
+        
+        print( api_query_json['query'], file=sys.stderr )
+
+        response.raise_for_status()
+
+    return json.loads( response.content )
+
+def run_queries_in_order( api_url, keys, make_query, max_concurrent_requests=DEFAULT_MAX_CONCURRENT_REQUESTS ):
+    
+    """
+    Run one PDC GraphQL query per item in `keys` (built by `make_query( key )`) and yield ( key, result )
+    pairs in `keys` order. Up to `max_concurrent_requests` queries are in flight at once; results that
+    come back early are buffered until it's their turn.
+    """
+
+    keys = list( keys )
+
+    # Bound the number of queries we'll have queued (or sitting in memory, finished but
+    # not yet yielded) at any one time.
+
+    max_pending_queries = 2 * max_concurrent_requests
+
+    with ThreadPoolExecutor( max_workers=max_concurrent_requests ) as executor:
+        
+        # Queue of ( key, future ), in `keys` order.
+
+        pending_queries = deque()
+
+        next_key_index = 0
+
+        while next_key_index < len( keys ) or len( pending_queries ) > 0:
+            
+            while next_key_index < len( keys ) and len( pending_queries ) < max_pending_queries:
+                
+                key = keys[next_key_index]
+
+                pending_queries.append( ( key, executor.submit( run_query, api_url, make_query( key ) ) ) )
+
+                next_key_index += 1
+
+            key, future = pending_queries.popleft()
+
+            yield ( key, future.result() )
+
+def fetch_per_study( api_url, pdc_study_ids, make_query, max_concurrent_requests=DEFAULT_MAX_CONCURRENT_REQUESTS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND ):
+    
+    """
+    Run one PDC GraphQL query per study and yield ( pdc_study_id, result ) pairs.
+
+    `make_query( pdc_study_id )` builds the query JSON for one study. Up to `max_concurrent_requests`
+    queries are in flight at once (all sharing http_client's connection pool and a per-host throttle
+    of `requests_per_second`), but results are buffered per study and yielded strictly in sorted
+    pdc_study_id order, so whatever the caller writes from them comes out the same on every run.
+    """
+
+    if requests_per_second is not None:
+        
+        http_client.set_rate_limit( urlsplit( api_url ).netloc, requests_per_second )
+
+    yield from run_queries_in_order( api_url, sorted( pdc_study_ids ), make_query, max_concurrent_requests=max_concurrent_requests )
+
+def get_all_case_ids( api_url ):
+    
+    """
+    Get the sorted list of every case_id PDC knows about (one small query: IDs only).
+    """
+
+    result = run_query( api_url, { 'query': '{ case( acceptDUA: true ) { case_id } }' } )
+
+    return sorted( { case['case_id'] for case in result['data']['case'] } )
+
+def get_case_batch_query( case_ids, case_fields ):
+    
+    """
+    Build one query asking for `case_fields` (a GraphQL selection set) on each of `case_ids`,
+    as one aliased case( case_id: ... ) field per case.
+    """
+
+    case_queries = [ f'''    case_{index}: case( case_id: "{case_id}", acceptDUA: true ) {{
+{case_fields}
+    }}''' for index, case_id in enumerate( case_ids ) ]
+
+    return {
+        'query': '{\n' + '\n'.join( case_queries ) + '\n}'
+    }
+
+def _fetch_one_case( api_url, case_id, case_fields, JSON ):
+    
+    """
+    Re-query one case_id that came back null (or errored) in a batch query, and return its
+    records. Exit if PDC still won't give it to us.
+    """
+
+    result = run_query( api_url, get_case_batch_query( ( case_id, ), case_fields ) )
+
+    if JSON is not None:
+        
+        print( json.dumps( result, separators=( ',', ':' ) ), file=JSON )
+
+    cases = ( result.get( 'data' ) or dict() ).get( 'case_0' )
+
+    if 'errors' in result or cases is None:
+        
+        sys.exit( f"FATAL: PDC case query for case_id '{case_id}' failed (errors: {result.get( 'errors' )}); cannot continue without it." )
+
+    return cases
+
+def fetch_cases_in_batches( api_url, case_fields, case_ids=None, batch_size=DEFAULT_CASE_BATCH_SIZE, max_concurrent_requests=DEFAULT_MAX_CONCURRENT_REQUESTS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND, json_archive_file=None ):
+    
+    """
+    Yield PDC Case records (with `case_fields` filled in) one at a time, without ever asking for
+    (or holding) the whole case universe in one response.
+
+    Cases are requested `batch_size` case_ids per query (all case_ids, via get_all_case_ids(), if
+    `case_ids` isn't given), with up to `max_concurrent_requests` batches in flight at once. Each
+    batch is parsed and handed back as soon as it's its turn (batches are yielded in case_id order),
+    so only a bounded number of batch responses is ever in memory, and a failed request only has
+    to be retried for its own batch. Any case that comes back null, or that a GraphQL error in the
+    batch result points at, is re-queried on its own; if that fails too, we exit.
+
+    If `json_archive_file` is given, each batch's raw result is appended to it as one line of
+    compact JSON (gzipped if the file name ends in '.gz').
+    """
+
+    if requests_per_second is not None:
+        
+        http_client.set_rate_limit( urlsplit( api_url ).netloc, requests_per_second )
+
+    if case_ids is None:
+        
+        case_ids = get_all_case_ids( api_url )
+
+    case_ids = sorted( case_ids )
+
+    batches = [ tuple( case_ids[start:start + batch_size] ) for start in range( 0, len( case_ids ), batch_size ) ]
+
+    JSON = None
+
+    if json_archive_file is not None:
+        
+        JSON = gzip.open( json_archive_file, 'wt' ) if json_archive_file.endswith( '.gz' ) else open( json_archive_file, 'w' )
+
+    try:
+        
+        for batch_number, ( batch, result ) in enumerate( run_queries_in_order( api_url, batches, lambda batch: get_case_batch_query( batch, case_fields ), max_concurrent_requests=max_concurrent_requests ) ):
+            
+            print( f"   ...got case batch {batch_number + 1} / {len( batches )}.", file=sys.stderr )
+
+            if JSON is not None:
+                
+                print( json.dumps( result, separators=( ',', ':' ) ), file=JSON )
+
+            batch_data = result.get( 'data' ) or dict()
+
+            # Cases that came back null, plus any that GraphQL errors point at (all of them, if an error doesn't say where it happened).
+
+            failed_aliases = { f"case_{index}" for index in range( len( batch ) ) if batch_data.get( f"case_{index}" ) is None }
+
+            for error in result.get( 'errors' ) or list():
+                
+                error_path = error.get( 'path' ) if isinstance( error, dict ) else None
+
+                if error_path:
+                    
+                    failed_aliases.add( error_path[0] )
+
+                else:
+                    
+                    failed_aliases.update( f"case_{index}" for index in range( len( batch ) ) )
+
+            failed_case_ids = { case_id for index, case_id in enumerate( batch ) if f"case_{index}" in failed_aliases }
+
+            if len( failed_case_ids ) > 0:
+                
+                print( f"WARNING: case batch {batch_number + 1} came back with {len( failed_case_ids )} failed or missing case(s) (errors: {result.get( 'errors' )}); re-querying those one at a time.", file=sys.stderr )
+
+            for index, case_id in enumerate( batch ):
+                
+                if case_id in failed_case_ids:
+                    
+                    yield from _fetch_one_case( api_url, case_id, case_fields, JSON )
+
+                else:
+                    
+                    yield from batch_data[f"case_{index}"]
+
+    finally:
+        
+        if JSON is not None:
+            
+            JSON.close()
+
+class PDC_paginator:
+    
+    """
+    Page through an offset/limit PDC GraphQL query, tuning page size and the delay between pages as we go.
+
+    PDC throttles clients that pull too much too fast, and once it does, retrieval time balloons
+    (for fileMetadata, from 25 minutes to nearly 2 hours). Instead of hand-tuned page sizes and sleeps,
+    this watches each page's latency (per record returned) and whether http_client had to retry it,
+    and runs an AIMD-style controller:
+    
+    - A page that was retried, or whose per-record latency is more than `slowdown_factor` times the
+      best we've recently seen, counts as a throttling signal: page size is cut in half and the delay
+      between pages doubled (to at least `delay_step` seconds).
+    - Any other page grows the page size by `page_size_step` records and shrinks the delay by a quarter.
+
+    The settings we end up with are saved (per `query_name`) to `settings_file` after every page, and
+    used as the starting point the next time the same query is paged through.
+
+        paginator = PDC_paginator( api_url, 'fileMetadata', make_query, get_records, page_size=10000 )
+
+        for offset, result, records in paginator.pages():
+            ...
+
+    `make_query( offset, limit )` builds the query JSON for one page; `get_records( result )` picks
+    the list of returned records out of the decoded result. Paging stops at the first empty page.
+    Each page starts right after the last record actually returned, and a short page followed by
+    a nonempty one is taken as a server-side cap on page size.
+    """
+
+    def __init__( self, api_url, query_name, make_query, get_records, page_size=500, min_page_size=100, max_page_size=10000, page_size_step=None, delay=0.0, delay_step=1.0, max_delay=300.0, slowdown_factor=2.0, settings_file=DEFAULT_PAGINATOR_SETTINGS_FILE ):
+        
+        self.api_url = api_url
+
+        self.host = urlsplit( api_url ).netloc
+
+        self.query_name = query_name
+
+        self.make_query = make_query
+
+        self.get_records = get_records
+
+        self.min_page_size = min_page_size
+
+        self.max_page_size = max_page_size
+
+        self.page_size_step = page_size_step if page_size_step is not None else max( 1, page_size // 10 )
+
+        self.delay_step = delay_step
+
+        self.max_delay = max_delay
+
+        self.slowdown_factor = slowdown_factor
+
+        self.settings_file = settings_file
+
+        self.page_size = page_size
+
+        self.delay = delay
+
+        # Best recent per-record latency (seconds). It drifts upward by 10% per page so a
+        # single unusually fast page doesn't make everything after it look throttled.
+
+        self.baseline_seconds_per_record = None
+
+        self.__load_settings()
+
+        self.page_size = min( max( self.page_size, self.min_page_size ), self.max_page_size )
+
+        self.delay = min( max( self.delay, 0.0 ), self.max_delay )
+
+    def __load_settings( self ):
+        
+        if self.settings_file is None or not path.exists( self.settings_file ):
+            
+            return
+
+        with open( self.settings_file ) as IN:
+            
+            settings = json.load( IN )
+
+        if self.query_name in settings:
+            
+            self.page_size = settings[self.query_name]['page_size']
+
+            self.delay = settings[self.query_name]['delay']
+
+            print( f"{self.query_name}: starting from saved settings (page size {self.page_size}, delay {self.delay:.1f}s).", file=sys.stderr )
+
+    def __save_settings( self ):
+        
+        if self.settings_file is None:
+            
+            return
+
+        settings = dict()
+
+        if path.exists( self.settings_file ):
+            
+            with open( self.settings_file ) as IN:
+                
+                settings = json.load( IN )
+
+        else:
+            
+            settings_dir = path.dirname( self.settings_file )
+
+            if settings_dir != '' and not path.exists( settings_dir ):
+                
+                makedirs( settings_dir )
+
+        settings[self.query_name] = {
+            
+            'page_size': self.page_size,
+            'delay': round( self.delay, 3 ),
+            'seconds_per_record': self.baseline_seconds_per_record
+        }
+
+        temp_file = self.settings_file + '.tmp'
+
+        with open( temp_file, 'w' ) as OUT:
+            
+            json.dump( settings, OUT, indent=4, sort_keys=True )
+
+        rename( temp_file, self.settings_file )
+
+    def __get_retry_count( self ):
+        
+        return http_client.get_shared_client().get_metrics().get( self.host, dict() ).get( 'retries', 0 )
+
+    def __adjust( self, elapsed, record_count, retried ):
+        
+        seconds_per_record = elapsed / record_count
+
+        if self.baseline_seconds_per_record is None:
+            
+            self.baseline_seconds_per_record = seconds_per_record
+
+        throttled = retried or seconds_per_record > self.slowdown_factor * self.baseline_seconds_per_record
+
+        self.baseline_seconds_per_record = min( seconds_per_record, self.baseline_seconds_per_record * 1.1 )
+
+        if throttled:
+            
+            # Multiplicative decrease.
+
+            self.page_size = max( self.min_page_size, self.page_size // 2 )
+
+            self.delay = min( self.max_delay, max( self.delay_step, 2 * self.delay ) )
+
+            print( f"WARNING: {self.query_name}: page looks throttled ({'retried' if retried else f'{seconds_per_record * 1000:.2f}ms per record'}); backing off to page size {self.page_size}, delay {self.delay:.1f}s.", file=sys.stderr )
+
+        else:
+            
+            # Additive increase.
+
+            self.page_size = min( self.max_page_size, self.page_size + self.page_size_step )
+
+            self.delay = 0.75 * self.delay if 0.75 * self.delay >= self.delay_step / 4 else 0.0
+
+    def __cap_page_size( self, page_size_cap ):
+        
+        if page_size_cap >= self.max_page_size:
+            
+            return
+
+        print( f"WARNING: {self.query_name}: server returned only {page_size_cap} records for a full page; capping page size at {page_size_cap}.", file=sys.stderr )
+
+        self.max_page_size = page_size_cap
+
+        self.min_page_size = min( self.min_page_size, page_size_cap )
+
+        self.page_size = min( self.page_size, page_size_cap )
+
+    def pages( self ):
+        
+        """
+        Yield ( offset, result, records ) for each nonempty page, in offset order.
+        """
+
+        offset = 0
+
+        # Record count of the previous page, if it came back with fewer records than we asked for.
+
+        short_page_size = None
+
+        while True:
+            
+            limit = self.page_size
+
+            # Help a bored user out.
+
+            print( f"Running `{self.query_name}( offset: {offset}, limit: {limit} )`...", file=sys.stderr )
+
+            retries_before = self.__get_retry_count()
+
+            start_time = time.monotonic()
+
+            result = run_query( self.api_url, self.make_query( offset, limit ) )
+
+            elapsed = time.monotonic() - start_time
+
+            records = self.get_records( result )
+
+            if records is None or len( records ) == 0:
+                
+                return
+
+            if short_page_size is not None:
+                
+                # A short page that wasn't the last one means the server caps page size:
+                # don't ask for more than that many records from here on.
+
+                self.__cap_page_size( short_page_size )
+
+            yield ( offset, result, records )
+
+            # Increment the paging offset in advance of the next query iteration. Advance by what we
+            # actually got, not what we asked for, so nothing gets skipped if the server returned less.
+
+            offset = offset + len( records )
+
+            short_page_size = len( records ) if len( records ) < limit else None
+
+            self.__adjust( elapsed, len( records ), self.__get_retry_count() > retries_before )
+
+            self.__save_settings()
+
+            if self.delay > 0:
+                
+                time.sleep( self.delay )
@@ -1,11 +1,11 @@
 #!/usr/bin/env python -u
 
-import requests
 import json
 import sys
 
 from os import makedirs, path
 
+from cda_etl import http_client
 from cda_etl.lib import get_current_date
 
 # PARAMETERS
@@ -41,7 +41,7 @@ with open( extraction_date_file, 'w' ) as OUT:
 
 # Send the uiDataVersionSoftwareVersion() query to the API server.
 
-response = requests.post(api_url, json=api_query_json)
+response = http_client.post(api_url, json=api_query_json)
 
 # If the HTTP response code is not OK (200), dump the query, print the http
 # error result and exit.
@@ -1,12 +1,12 @@
 #!/usr/bin/env python -u
 
 import re
-import requests
 import json
 import sys
 
 from os import makedirs, path, rename
 
+from cda_etl import http_client
 from cda_etl.lib import sort_file_with_header
 
 # PARAMETERS
@@ -177,7 +177,7 @@ for output_dir in ( json_out_dir, program_out_dir, project_out_dir, study_out_di
 
 # Send the allPrograms() query to the API server.
 
-response = requests.post(api_url, json=api_query_json)
+response = http_client.post(api_url, json=api_query_json)
 
 # If the HTTP response code is not OK (200), dump the query, print the http
 # error result and exit.
@@ -356,7 +356,7 @@ for program in result['data']['allPrograms']:
                                 'query': study_subquery
                             }
 
-                            subquery_response = requests.post( api_url, json=subquery_json )
+                            subquery_response = http_client.post( api_url, json=subquery_json )
 
                             if not subquery_response.ok:
                                 
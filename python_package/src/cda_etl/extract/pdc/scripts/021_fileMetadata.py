@@ -1,12 +1,11 @@
 #!/usr/bin/env python -u
 
-import requests
 import json
 import sys
-import time
 
 from os import makedirs, path, rename
 
+from cda_etl.extract.pdc.pdc_client import PDC_paginator
 from cda_etl.lib import sort_file_with_header
 
 # PARAMETERS
@@ -65,17 +64,32 @@ scalar_aliquot_fields = (
     'case_submitter_id'
 )
 
-offset = 0
+# Conservative paging, plus sleep intervals between pages, is now (Feb 2024) necessary to avoid
+# triggering server-side throttling which ends up quadrupling retrieval time (for this script, from
+# 25 minutes to nearly 2 hours). PDC_paginator tunes both as it goes (and remembers what it settled
+# on for next time); these are just the starting values, taken from what we'd tested by hand
+# (10000-record pages, 1m41s between pulls).
 
-# Conservative paging, plus pre-tested sleep intervals between pages and between
-# batches of pages, is now (Feb 2024) necessary to avoid triggering server-side throttling
-# which ends up quadrupling retrieval time (for this script, from 25 minutes to nearly 2 hours).
+initial_page_size = 10000
 
-# Pre-fix for above: offset_increment = 500
+initial_delay = 101
 
-offset_increment = 10000
+def fileMetadata_query( offset, limit ):
+    
+    return {
+        'query': '''            {
+            fileMetadata( ''' + f"offset: {offset}, limit: {limit}" + ''', acceptDUA: true ) {
+                ''' + '\n                    '.join(scalar_file_metadata_fields) + '''
+                aliquots {
+                    ''' + '\n                        '.join(scalar_aliquot_fields) + '''
+                }
+            }
+        }'''
+    }
 
-returned_nothing = False
+def fileMetadata_records( result ):
+    
+    return result['data']['fileMetadata']
 
 # EXECUTION
 
@@ -130,126 +144,74 @@ seen_aliquot_IDs = set()
 
 seen_aliquot_IDs_by_fileMetadata = dict()
 
-while not returned_nothing:
-    
-    api_query_json = {
-        'query': '''            {
-            fileMetadata( ''' + f"offset: {offset}, limit: {offset_increment}" + ''', acceptDUA: true ) {
-                ''' + '\n                    '.join(scalar_file_metadata_fields) + '''
-                aliquots {
-                    ''' + '\n                        '.join(scalar_aliquot_fields) + '''
-                }
-            }
-        }'''
-    }
+paginator = PDC_paginator( api_url, 'fileMetadata', fileMetadata_query, fileMetadata_records, page_size=initial_page_size, min_page_size=500, max_page_size=20000, delay=initial_delay )
 
-    # Help a bored user out.
-
-    print( f"Running `fileMetadata( offset: {offset}, limit: {offset_increment}, acceptDUA: true )`...", file=sys.stderr )
-
-    # Send the fileMetadata() query to the API server.
+for offset, result, records in paginator.pages():
+    
+    # Save a version of the returned data as JSON.
 
-    response = requests.post(api_url, json=api_query_json)
+    upper_limit = offset + (len(result['data']['fileMetadata']) - 1)
 
-    # If the HTTP response code is not OK (200), dump the query, print the http
-    # error result and exit.
+    fileMetadata_json_output_file = f"{json_out_dir}/fileMetadata.{offset:06}-{upper_limit:06}.json"
 
-    if not response.ok:
+    with open(fileMetadata_json_output_file, 'w') as JSON:
         
-        print( api_query_json['query'], file=sys.stderr )
+        print( json.dumps(result, indent=4, sort_keys=False), file=JSON )
 
-        response.raise_for_status()
+    # Parse the returned data and save to TSV.
 
-    # Retrieve the server's JSON response as a Python object.
-
-    result = json.loads(response.content)
-
-    if result['data']['fileMetadata'] is None or len(result['data']['fileMetadata']) == 0:
+    for file_metadata in result['data']['fileMetadata']:
         
-        returned_nothing = True
+        file_metadata_row = list()
 
-    else:
-        
-        # Save a version of the returned data as JSON.
-
-        upper_limit = offset + (len(result['data']['fileMetadata']) - 1)
-
-        fileMetadata_json_output_file = f"{json_out_dir}/fileMetadata.{offset:06}-{upper_limit:06}.json"
-
-        with open(fileMetadata_json_output_file, 'w') as JSON:
-            
-            print( json.dumps(result, indent=4, sort_keys=False), file=JSON )
-
-        # Parse the returned data and save to TSV.
-
-        for file_metadata in result['data']['fileMetadata']:
+        for field_name in scalar_file_metadata_fields:
             
-            file_metadata_row = list()
-
-            for field_name in scalar_file_metadata_fields:
+            if file_metadata[field_name] is not None:
                 
-                if file_metadata[field_name] is not None:
-                    
-                    # There are newlines, carriage returns, quotes and nonprintables in some PDC text fields, hence the json.dumps() wrap here.
+                # There are newlines, carriage returns, quotes and nonprintables in some PDC text fields, hence the json.dumps() wrap here.
 
-                    file_metadata_row.append(json.dumps(file_metadata[field_name]).strip('"'))
+                file_metadata_row.append(json.dumps(file_metadata[field_name]).strip('"'))
 
-                else:
-                    
-                    file_metadata_row.append('')
+            else:
+                
+                file_metadata_row.append('')
 
-            print( *file_metadata_row, sep='\t', end='\n', file=output_tsvs['FILE_METADATA'] )
+        print( *file_metadata_row, sep='\t', end='\n', file=output_tsvs['FILE_METADATA'] )
 
-            if file_metadata['aliquots'] is not None and len(file_metadata['aliquots']) > 0:
+        if file_metadata['aliquots'] is not None and len(file_metadata['aliquots']) > 0:
+            
+            for aliquot in file_metadata['aliquots']:
                 
-                for aliquot in file_metadata['aliquots']:
+                if aliquot['aliquot_id'] not in seen_aliquot_IDs:
                     
-                    if aliquot['aliquot_id'] not in seen_aliquot_IDs:
-                        
-                        seen_aliquot_IDs.add(aliquot['aliquot_id'])
+                    seen_aliquot_IDs.add(aliquot['aliquot_id'])
 
-                        aliquot_row = list()
+                    aliquot_row = list()
 
-                        for field_name in scalar_aliquot_fields:
-                            
-                            if aliquot[field_name] is not None:
-                                
-                                aliquot_row.append(aliquot[field_name])
-
-                            else:
-                                
-                                aliquot_row.append('')
-
-                        print( *aliquot_row, sep='\t', end='\n', file=output_tsvs['ALIQUOT'] )
-
-                    # Associate each Aliquot record with each of its containing FileMetadata record exactly once (despite the fact that
-                    # this query returns multiple identical Aliquot records within the same FileMetadata record).
-
-                    if file_metadata['file_id'] not in seen_aliquot_IDs_by_fileMetadata or aliquot['aliquot_id'] not in seen_aliquot_IDs_by_fileMetadata[file_metadata['file_id']]:
+                    for field_name in scalar_aliquot_fields:
                         
-                        if file_metadata['file_id'] not in seen_aliquot_IDs_by_fileMetadata:
+                        if aliquot[field_name] is not None:
                             
-                            seen_aliquot_IDs_by_fileMetadata[file_metadata['file_id']] = set()
-
-                        seen_aliquot_IDs_by_fileMetadata[file_metadata['file_id']].add(aliquot['aliquot_id'])
+                            aliquot_row.append(aliquot[field_name])
 
-                        print( *(file_metadata['file_id'], aliquot['aliquot_id']), sep='\t', end='\n', file=output_tsvs['FILE_METADATA_ALIQUOTS'] )
-
-        # Increment the paging offset in advance of the next query iteration.
+                        else:
+                            
+                            aliquot_row.append('')
 
-        offset = offset + offset_increment
+                    print( *aliquot_row, sep='\t', end='\n', file=output_tsvs['ALIQUOT'] )
 
-        # Empirically figuring out how best to self-regulate request size over time to avoid getting bandwidth-throttled has proven somewhat cumbersome (Feb 2024), but this seems to work pretty reliably. Today.
+                # Associate each Aliquot record with each of its containing FileMetadata record exactly once (despite the fact that
+                # this query returns multiple identical Aliquot records within the same FileMetadata record).
 
-        # Update 2024-05: this bit was crafted for when we had to page in batches of 500; leave as is (1m41s delay between pulls) unless a reason appears.
+                if file_metadata['file_id'] not in seen_aliquot_IDs_by_fileMetadata or aliquot['aliquot_id'] not in seen_aliquot_IDs_by_fileMetadata[file_metadata['file_id']]:
+                    
+                    if file_metadata['file_id'] not in seen_aliquot_IDs_by_fileMetadata:
+                        
+                        seen_aliquot_IDs_by_fileMetadata[file_metadata['file_id']] = set()
 
-        if offset % 10000 == 0:
-            
-            time.sleep( 101 )
+                    seen_aliquot_IDs_by_fileMetadata[file_metadata['file_id']].add(aliquot['aliquot_id'])
 
-        else:
-            
-            time.sleep( 3 )
+                    print( *(file_metadata['file_id'], aliquot['aliquot_id']), sep='\t', end='\n', file=output_tsvs['FILE_METADATA_ALIQUOTS'] )
 
 # Sort the rows in the TSV output files.
 
@@ -1,11 +1,11 @@
 #!/usr/bin/env python -u
 
-import requests
 import json
 import sys
 
 from os import makedirs, path, rename
 
+from cda_etl.extract.pdc.pdc_client import fetch_per_study
 from cda_etl.lib import get_unique_values_from_tsv_column, sort_file_with_header
 
 # PARAMETERS
@@ -40,6 +40,16 @@ scalar_file_per_study_fields = (
 
 pdc_study_ids = get_unique_values_from_tsv_column( f"{output_root}/Study/Study.tsv", 'pdc_study_id' )
 
+def filesPerStudy_query( pdc_study_id ):
+    
+    return {
+        'query': '''        {
+            filesPerStudy( ''' + f'pdc_study_id: "{pdc_study_id}", acceptDUA: true' + ''' ) {
+                ''' + '\n                '.join(scalar_file_per_study_fields) + '''
+            }
+        }'''
+    }
+
 # EXECUTION
 
 for output_dir in ( json_out_dir, file_per_study_out_dir ):
@@ -80,33 +90,10 @@ with open( filesPerStudy_json_output_file, 'w' ) as JSON:
 
     print( *scalar_file_per_study_fields, sep='\t', end='\n', file=output_tsvs['FILE_PER_STUDY'] )
 
-    for pdc_study_id in pdc_study_ids:
-        
-        api_query_json = {
-            'query': '''            {
-                filesPerStudy( ''' + f'pdc_study_id: "{pdc_study_id}", acceptDUA: true' + ''' ) {
-                    ''' + '\n                    '.join(scalar_file_per_study_fields) + '''
-                }
-            }'''
-        }
-
-        # Send the filesPerStudy() query to the API server.
-
-        response = requests.post(api_url, json=api_query_json)
-
-        # If the HTTP response code is not OK (200), dump the query, print the http
-        # error result and exit.
-
-        if not response.ok:
-            
-            print( api_query_json['query'], file=sys.stderr )
-
-            response.raise_for_status()
-
-        # Retrieve the server's JSON response as a Python object.
-
-        result = json.loads(response.content)
+    # Queries for different studies are sent concurrently; results come back (and get written) in pdc_study_id order.
 
+    for pdc_study_id, result in fetch_per_study( api_url, pdc_study_ids, filesPerStudy_query ):
+        
         # Save a version of the returned data as JSON (caching the PDC Study ID ahead of each block).
 
         print( pdc_study_id, file=JSON )
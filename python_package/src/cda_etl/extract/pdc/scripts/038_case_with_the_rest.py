@@ -1,11 +1,11 @@
 #!/usr/bin/env python -u
 
-import requests
 import json
 import sys
 
 from os import makedirs, path, rename
 
+from cda_etl.extract.pdc.pdc_client import fetch_cases_in_batches
 from cda_etl.lib import sort_file_with_header
 
 # PARAMETERS
@@ -67,7 +67,7 @@ sample_diagnoses_tsv = f"{case_out_dir}/Sample.diagnoses.tsv"
 sample_case_tsv = f"{case_out_dir}/Sample.case.tsv"
 sample_project_tsv = f"{case_out_dir}/Sample.project.tsv"
 
-json_output_file = f"{json_out_dir}/case_with_the_rest.json"
+json_output_file = f"{json_out_dir}/case_with_the_rest.jsonl.gz"
 
 scalar_case_fields = (
     'case_id',
@@ -465,10 +465,10 @@ scalar_treatment_fields = (
     'project_submitter_id'
 )
 
-api_query_json = {
-    'query': '''    {
-        case( acceptDUA: true ) {
-            ''' + '\n            '.join(scalar_case_fields) + '''
+# Fields we ask for on each Case. Cases are fetched in batches of case_ids (see
+# fetch_cases_in_batches()) rather than all at once in one massive case() response.
+
+case_fields = '            ' + '\n            '.join(scalar_case_fields) + '''
             externalReferences {
                 ''' + '\n                '.join(scalar_entity_reference_fields) + '''
             }
@@ -483,10 +483,7 @@ api_query_json = {
             }
             treatments {
                 ''' + '\n                '.join(scalar_treatment_fields) + '''
-            }
-        }
-    }'''
-}
+            }'''
 
 #api_query_json = {
 #    'query': '''    {
@@ -558,29 +555,6 @@ for output_dir in ( json_out_dir, case_out_dir, demographic_out_dir, diagnosis_o
         
         makedirs(output_dir)
 
-# Send the case() query to the API server.
-
-response = requests.post(api_url, json=api_query_json)
-
-# If the HTTP response code is not OK (200), dump the query, print the http
-# error result and exit.
-
-if not response.ok:
-    
-    print( api_query_json['query'], file=sys.stderr )
-
-    response.raise_for_status()
-
-# Retrieve the server's JSON response as a Python object.
-
-result = json.loads(response.content)
-
-# Save a version of the returned data as JSON.
-
-with open(json_output_file, 'w') as JSON:
-    
-    print( json.dumps(result, indent=4, sort_keys=False), file=JSON )
-
 # Open handles for output files to save TSVs describing the returned objects and (as needed) association TSVs
 # enumerating containment relationships between objects and sub-objects as well as association TSVs enumerating
 # relationships between objects and keyword-style dictionaries.
@@ -700,9 +674,9 @@ print( *['case_id', 'treatment_id'], sep='\t', end='\n', file=output_tsvs['CASE_
 
 seen_external_reference_IDs = set()
 
-# Parse the returned data and save to TSV.
+# Fetch Cases a batch at a time and save each batch to TSV as it arrives (archiving raw results as compact JSON lines).
 
-for case in result['data']['case']:
+for case in fetch_cases_in_batches( api_url, case_fields, json_archive_file=json_output_file ):
     
     case_row = list()
 
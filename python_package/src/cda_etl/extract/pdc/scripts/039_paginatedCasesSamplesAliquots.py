@@ -1,11 +1,11 @@
 #!/usr/bin/env python -u
 
-import requests
 import json
 import sys
 
 from os import makedirs, path, rename
 
+from cda_etl.extract.pdc.pdc_client import PDC_paginator
 from cda_etl.lib import sort_file_with_header
 
 # PARAMETERS
@@ -320,11 +320,40 @@ scalar_protocol_fields = (
     'program_submitter_id'
 )
 
-offset = 0
+# Starting page size; PDC_paginator tunes it (and the delay between pages) as it goes.
 
-offset_increment = 500
+initial_page_size = 500
 
-returned_nothing = False
+def paginatedCasesSamplesAliquots_query( offset, limit ):
+    
+    return {
+        'query': '''            {
+            paginatedCasesSamplesAliquots( ''' + f"offset: {offset}, limit: {limit}" + ''', acceptDUA: true ) {
+                casesSamplesAliquots {
+                    ''' + '\n                        '.join(scalar_case_fields) + '''
+                    samples {
+                        ''' + '\n                            '.join(scalar_sample_fields) + '''
+                        diagnoses {
+                            ''' + '\n                                '.join(scalar_diagnosis_fields) + '''
+                        }
+                        aliquots {
+                            ''' + '\n                                '.join(scalar_aliquot_fields) + '''
+                            aliquot_run_metadata {
+                                ''' + '\n                                    '.join(scalar_aliquot_run_metadata_fields) + '''
+                                protocol {
+                                    ''' + '\n                                        '.join(scalar_protocol_fields) + '''
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }'''
+    }
+
+def paginatedCasesSamplesAliquots_records( result ):
+    
+    return result['data']['paginatedCasesSamplesAliquots']['casesSamplesAliquots']
 
 # EXECUTION
 
@@ -395,191 +424,141 @@ print( *('sample_id', 'aliquot_id'), sep='\t', end='\n', file=output_tsvs['SAMPL
 print( *('aliquot_id', 'aliquot_run_metadata_id'), sep='\t', end='\n', file=output_tsvs['ALIQUOT_ARM'] )
 print( *('aliquot_run_metadata_id', 'protocol_id'), sep='\t', end='\n', file=output_tsvs['ARM_PROTOCOL'] )
 
-while not returned_nothing:
-    
-    api_query_json = {
-        'query': '''            {
-            paginatedCasesSamplesAliquots( ''' + f"offset: {offset}, limit: {offset_increment}" + ''', acceptDUA: true ) {
-                casesSamplesAliquots {
-                    ''' + '\n                        '.join(scalar_case_fields) + '''
-                    samples {
-                        ''' + '\n                            '.join(scalar_sample_fields) + '''
-                        diagnoses {
-                            ''' + '\n                                '.join(scalar_diagnosis_fields) + '''
-                        }
-                        aliquots {
-                            ''' + '\n                                '.join(scalar_aliquot_fields) + '''
-                            aliquot_run_metadata {
-                                ''' + '\n                                    '.join(scalar_aliquot_run_metadata_fields) + '''
-                                protocol {
-                                    ''' + '\n                                        '.join(scalar_protocol_fields) + '''
-                                }
-                            }
-                        }
-                    }
-                }
-            }
-        }'''
-    }
+paginator = PDC_paginator( api_url, 'paginatedCasesSamplesAliquots', paginatedCasesSamplesAliquots_query, paginatedCasesSamplesAliquots_records, page_size=initial_page_size, min_page_size=100, max_page_size=5000 )
 
-    # Send the fileMetadata() query to the API server.
+for offset, result, records in paginator.pages():
+    
+    # Save a version of the returned data as JSON.
 
-    response = requests.post(api_url, json=api_query_json)
+    upper_limit = offset + (len(result['data']['paginatedCasesSamplesAliquots']['casesSamplesAliquots']) - 1)
 
-    # If the HTTP response code is not OK (200), dump the query, print the http
-    # error result and exit.
+    paginatedCasesSamplesAliquots_json_output_file = f"{json_out_dir}/paginatedCasesSamplesAliquots.{offset:06}-{upper_limit:06}.json"
 
-    if not response.ok:
+    with open(paginatedCasesSamplesAliquots_json_output_file, 'w') as JSON:
         
-        print( api_query_json['query'], file=sys.stderr )
-
-        response.raise_for_status()
+        print( json.dumps(result, indent=4, sort_keys=False), file=JSON )
 
-    # Retrieve the server's JSON response as a Python object.
-
-    result = json.loads(response.content)
-
-    if result['data']['paginatedCasesSamplesAliquots']['casesSamplesAliquots'] is None or len(result['data']['paginatedCasesSamplesAliquots']['casesSamplesAliquots']) == 0:
-        
-        returned_nothing = True
+    # Parse the returned data and save to TSV.
 
-    else:
+    for case in result['data']['paginatedCasesSamplesAliquots']['casesSamplesAliquots']:
         
-        # Save a version of the returned data as JSON.
+        case_row = list()
 
-        upper_limit = offset + (len(result['data']['paginatedCasesSamplesAliquots']['casesSamplesAliquots']) - 1)
-
-        paginatedCasesSamplesAliquots_json_output_file = f"{json_out_dir}/paginatedCasesSamplesAliquots.{offset:06}-{upper_limit:06}.json"
-
-        with open(paginatedCasesSamplesAliquots_json_output_file, 'w') as JSON:
-            
-            print( json.dumps(result, indent=4, sort_keys=False), file=JSON )
-
-        # Parse the returned data and save to TSV.
-
-        for case in result['data']['paginatedCasesSamplesAliquots']['casesSamplesAliquots']:
+        for field_name in scalar_case_fields:
             
-            case_row = list()
-
-            for field_name in scalar_case_fields:
+            if case[field_name] is not None:
                 
-                if case[field_name] is not None:
-                    
-                    case_row.append(case[field_name])
+                case_row.append(case[field_name])
 
-                else:
-                    
-                    case_row.append('')
+            else:
+                
+                case_row.append('')
 
-            print( *case_row, sep='\t', end='\n', file=output_tsvs['CASE'] )
+        print( *case_row, sep='\t', end='\n', file=output_tsvs['CASE'] )
 
-            if case['samples'] is not None and len(case['samples']) > 0:
+        if case['samples'] is not None and len(case['samples']) > 0:
+            
+            for sample in case['samples']:
                 
-                for sample in case['samples']:
-                    
-                    sample_row = list()
+                sample_row = list()
 
-                    for field_name in scalar_sample_fields:
+                for field_name in scalar_sample_fields:
+                    
+                    if sample[field_name] is not None:
                         
-                        if sample[field_name] is not None:
-                            
-                            sample_row.append(sample[field_name])
+                        sample_row.append(sample[field_name])
 
-                        else:
-                            
-                            sample_row.append('')
+                    else:
+                        
+                        sample_row.append('')
 
-                    print( *sample_row, sep='\t', end='\n', file=output_tsvs['SAMPLE'] )
+                print( *sample_row, sep='\t', end='\n', file=output_tsvs['SAMPLE'] )
 
-                    print( *( case['case_id'], sample['sample_id'] ), sep='\t', end='\n', file=output_tsvs['CASE_SAMPLES'] )
+                print( *( case['case_id'], sample['sample_id'] ), sep='\t', end='\n', file=output_tsvs['CASE_SAMPLES'] )
 
-                    if sample['diagnoses'] is not None and len(sample['diagnoses']) > 0:
+                if sample['diagnoses'] is not None and len(sample['diagnoses']) > 0:
+                    
+                    for diagnosis in sample['diagnoses']:
                         
-                        for diagnosis in sample['diagnoses']:
-                            
-                            diagnosis_row = list()
+                        diagnosis_row = list()
 
-                            for field_name in scalar_diagnosis_fields:
+                        for field_name in scalar_diagnosis_fields:
+                            
+                            if diagnosis[field_name] is not None:
                                 
-                                if diagnosis[field_name] is not None:
-                                    
-                                    # There are newlines, carriage returns, quotes and nonprintables in some PDC text fields, hence the json.dumps() wrap here.
+                                # There are newlines, carriage returns, quotes and nonprintables in some PDC text fields, hence the json.dumps() wrap here.
 
-                                    diagnosis_row.append(json.dumps(diagnosis[field_name]).strip('"'))
+                                diagnosis_row.append(json.dumps(diagnosis[field_name]).strip('"'))
 
-                                else:
-                                    
-                                    diagnosis_row.append('')
+                            else:
+                                
+                                diagnosis_row.append('')
 
-                            print( *diagnosis_row, sep='\t', end='\n', file=output_tsvs['DIAGNOSIS'] )
+                        print( *diagnosis_row, sep='\t', end='\n', file=output_tsvs['DIAGNOSIS'] )
 
-                            print( *( sample['sample_id'], diagnosis['diagnosis_id'] ), sep='\t', end='\n', file=output_tsvs['SAMPLE_DIAGNOSES'] )
+                        print( *( sample['sample_id'], diagnosis['diagnosis_id'] ), sep='\t', end='\n', file=output_tsvs['SAMPLE_DIAGNOSES'] )
 
-                    if sample['aliquots'] is not None and len(sample['aliquots']) > 0:
+                if sample['aliquots'] is not None and len(sample['aliquots']) > 0:
+                    
+                    for aliquot in sample['aliquots']:
                         
-                        for aliquot in sample['aliquots']:
-                            
-                            aliquot_row = list()
+                        aliquot_row = list()
 
-                            for field_name in scalar_aliquot_fields:
+                        for field_name in scalar_aliquot_fields:
+                            
+                            if aliquot[field_name] is not None:
                                 
-                                if aliquot[field_name] is not None:
-                                    
-                                    aliquot_row.append(aliquot[field_name])
+                                aliquot_row.append(aliquot[field_name])
 
-                                else:
-                                    
-                                    aliquot_row.append('')
+                            else:
+                                
+                                aliquot_row.append('')
 
-                            print( *aliquot_row, sep='\t', end='\n', file=output_tsvs['ALIQUOT'] )
+                        print( *aliquot_row, sep='\t', end='\n', file=output_tsvs['ALIQUOT'] )
 
-                            print( *( sample['sample_id'], aliquot['aliquot_id'] ), sep='\t', end='\n', file=output_tsvs['SAMPLE_ALIQUOTS'] )
+                        print( *( sample['sample_id'], aliquot['aliquot_id'] ), sep='\t', end='\n', file=output_tsvs['SAMPLE_ALIQUOTS'] )
 
-                            if aliquot['aliquot_run_metadata'] is not None and len(aliquot['aliquot_run_metadata']) > 0:
+                        if aliquot['aliquot_run_metadata'] is not None and len(aliquot['aliquot_run_metadata']) > 0:
+                            
+                            for aliquot_run_metadata in aliquot['aliquot_run_metadata']:
                                 
-                                for aliquot_run_metadata in aliquot['aliquot_run_metadata']:
-                                    
-                                    aliquot_run_metadata_row = list()
+                                aliquot_run_metadata_row = list()
 
-                                    for field_name in scalar_aliquot_run_metadata_fields:
+                                for field_name in scalar_aliquot_run_metadata_fields:
+                                    
+                                    if aliquot_run_metadata[field_name] is not None:
                                         
-                                        if aliquot_run_metadata[field_name] is not None:
-                                            
-                                            aliquot_run_metadata_row.append(aliquot_run_metadata[field_name])
+                                        aliquot_run_metadata_row.append(aliquot_run_metadata[field_name])
 
-                                        else:
-                                            
-                                            aliquot_run_metadata_row.append('')
+                                    else:
+                                        
+                                        aliquot_run_metadata_row.append('')
 
-                                    print( *aliquot_run_metadata_row, sep='\t', end='\n', file=output_tsvs['ARM'] )
+                                print( *aliquot_run_metadata_row, sep='\t', end='\n', file=output_tsvs['ARM'] )
 
-                                    print( *( aliquot['aliquot_id'], aliquot_run_metadata['aliquot_run_metadata_id'] ), sep='\t', end='\n', file=output_tsvs['ALIQUOT_ARM'] )
+                                print( *( aliquot['aliquot_id'], aliquot_run_metadata['aliquot_run_metadata_id'] ), sep='\t', end='\n', file=output_tsvs['ALIQUOT_ARM'] )
 
-                                    if aliquot_run_metadata['protocol'] is not None:
-                                        
-                                        protocol = aliquot_run_metadata['protocol']
+                                if aliquot_run_metadata['protocol'] is not None:
+                                    
+                                    protocol = aliquot_run_metadata['protocol']
 
-                                        protocol_row = list()
+                                    protocol_row = list()
 
-                                        for field_name in scalar_protocol_fields:
+                                    for field_name in scalar_protocol_fields:
+                                        
+                                        if protocol[field_name] is not None:
                                             
-                                            if protocol[field_name] is not None:
-                                                
-                                                # There are newlines, carriage returns, quotes and nonprintables in some PDC text fields, hence the json.dumps() wrap here.
-
-                                                protocol_row.append(json.dumps(protocol[field_name]).strip('"'))
-
-                                            else:
-                                                
-                                                protocol_row.append('')
+                                            # There are newlines, carriage returns, quotes and nonprintables in some PDC text fields, hence the json.dumps() wrap here.
 
-                                        print( *protocol_row, sep='\t', end='\n', file=output_tsvs['PROTOCOL'] )
+                                            protocol_row.append(json.dumps(protocol[field_name]).strip('"'))
 
-                                        print( *( aliquot_run_metadata['aliquot_run_metadata_id'], protocol['protocol_id'] ), sep='\t', end='\n', file=output_tsvs['ARM_PROTOCOL'] )
+                                        else:
+                                            
+                                            protocol_row.append('')
 
-        # Increment the paging offset in advance of the next query iteration.
+                                    print( *protocol_row, sep='\t', end='\n', file=output_tsvs['PROTOCOL'] )
 
-        offset = offset + offset_increment
+                                    print( *( aliquot_run_metadata['aliquot_run_metadata_id'], protocol['protocol_id'] ), sep='\t', end='\n', file=output_tsvs['ARM_PROTOCOL'] )
 
 # Sort the rows in the TSV output files.
 
@@ -1,11 +1,11 @@
 #!/usr/bin/env python -u
 
-import requests
 import json
 import sys
 
 from os import makedirs, path, rename
 
+from cda_etl.extract.pdc.pdc_client import fetch_per_study
 from cda_etl.lib import get_unique_values_from_tsv_column, sort_file_with_header
 
 # PARAMETERS
@@ -80,6 +80,19 @@ scalar_protocol_fields = (
 
 pdc_study_ids = get_unique_values_from_tsv_column( f"{output_root}/Study/Study.tsv", 'pdc_study_id' )
 
+def uiProtocol_query( pdc_study_id ):
+    
+    return {
+        'query': '''        {
+            uiProtocol( ''' + f'pdc_study_id: "{pdc_study_id}"' + ''' ) {
+                ''' + '\n                '.join(scalar_protocol_fields) + '''
+                study {
+                    study_id
+                }
+            }
+        }'''
+    }
+
 # EXECUTION
 
 for output_dir in ( json_out_dir, protocol_out_dir ):
@@ -126,36 +139,10 @@ with open(uiProtocol_json_output_file, 'w') as JSON:
     print( *('protocol_id', 'study_id'), sep='\t', end='\n', file=output_tsvs['PROTOCOL_STUDY'] )
     print( *('protocol_id', 'pdc_study_id'), sep='\t', end='\n', file=output_tsvs['PROTOCOL_PDC_STUDY_ID'] )
 
-    for pdc_study_id in pdc_study_ids:
-        
-        api_query_json = {
-            'query': '''            {
-                uiProtocol( ''' + f'pdc_study_id: "{pdc_study_id}"' + ''' ) {
-                    ''' + '\n                    '.join(scalar_protocol_fields) + '''
-                    study {
-                        study_id
-                    }
-                }
-            }'''
-        }
-
-        # Send the uiProtocol() query to the API server.
-
-        response = requests.post(api_url, json=api_query_json)
-
-        # If the HTTP response code is not OK (200), dump the query, print the http
-        # error result and exit.
-
-        if not response.ok:
-            
-            print( api_query_json['query'], file=sys.stderr )
-
-            response.raise_for_status()
-
-        # Retrieve the server's JSON response as a Python object.
-
-        result = json.loads(response.content)
+    # Queries for different studies are sent concurrently; results come back (and get written) in pdc_study_id order.
 
+    for pdc_study_id, result in fetch_per_study( api_url, pdc_study_ids, uiProtocol_query ):
+        
         # Save a version of the returned data as JSON (caching the PDC Study ID ahead of each block).
 
         print( pdc_study_id, file=JSON ) 
@@ -1,11 +1,11 @@
 #!/usr/bin/env python -u
 
-import requests
 import json
 import sys
 
 from os import makedirs, path, rename
 
+from cda_etl import http_client
 from cda_etl.lib import get_unique_values_from_tsv_column, sort_file_with_header
 
 # PARAMETERS
@@ -104,7 +104,7 @@ with open(clinicalMetadata_json_output_file, 'w') as JSON:
 
         # Send the clinicalMetadata() query to the API server.
 
-        response = requests.post(api_url, json=api_query_json)
+        response = http_client.post(api_url, json=api_query_json)
 
         # If the HTTP response code is not OK (200), dump the query, print the http
         # error result and exit.
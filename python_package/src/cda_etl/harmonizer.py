@@ -0,0 +1,467 @@
+import gzip
+import re
+import shutil
+
+from collections import Counter
+from itertools import compress, islice, repeat
+from operator import eq
+from os import path
+
+from cda_etl.tsv_reader import TSV_reader
+
+# Number of rows harmonize_rows() callers should hand over at once.
+
+DEFAULT_BATCH_SIZE = 10000
+
+# Cap on the number of distinct raw values each Column_harmonizer will remember results for.
+# Categorical columns never get anywhere near this; ID-like columns (where nothing repeats)
+# stop filling their memo table here instead of growing it without bound.
+
+DEFAULT_MAX_MEMOIZED_VALUES = 200000
+
+# The deletion check compares values case-insensitively with all whitespace removed.
+
+WHITESPACE = re.compile( r'\s' )
+
+def load_harmonization_maps( harmonization_map_dir, tables=None ):
+    
+    """
+    Load the concept maps named in `harmonization_map_dir`/000_cda_column_targets.tsv, optionally
+    restricted to the CDA tables in `tables`. Returns { table: { column: { raw_value: harmonized_value } } },
+    leaving out raw values whose harmonized value is '__CDA_UNASSIGNED__'.
+    """
+
+    harmonized_value = dict()
+
+    with TSV_reader( path.join( harmonization_map_dir, '000_cda_column_targets.tsv' ) ) as IN:
+        
+        for ( table, column, concept_map_name ) in IN.rows( [ 'cda_table', 'cda_column', 'concept_map_name' ] ):
+            
+            if tables is not None and table not in tables:
+                
+                continue
+
+            if table not in harmonized_value:
+                
+                harmonized_value[table] = dict()
+
+            if column not in harmonized_value[table]:
+                
+                harmonized_value[table][column] = dict()
+
+            # Which field of the concept map holds the harmonized term depends on the concept.
+
+            target_index = 1
+
+            if concept_map_name in { 'anatomic_site', 'disease' }:
+                
+                target_index = 2
+
+            elif concept_map_name == 'species':
+                
+                target_index = 3
+
+            with TSV_reader( path.join( harmonization_map_dir, f"{concept_map_name}.tsv" ) ) as MAP:
+                
+                term_pairs = ( ( term_tuple[0], term_tuple[target_index] ) for term_tuple in MAP.rows() )
+
+                for ( old_value, new_value ) in term_pairs:
+                    
+                    if new_value != '__CDA_UNASSIGNED__':
+                        
+                        harmonized_value[table][column][old_value] = new_value
+
+    return harmonized_value
+
+def iterate_in_batches( iterable, batch_size=DEFAULT_BATCH_SIZE ):
+    
+    """
+    Yield the items of `iterable` in lists of (at most) `batch_size` items.
+    """
+
+    iterator = iter( iterable )
+
+    batch = list( islice( iterator, batch_size ) )
+
+    while len( batch ) > 0:
+        
+        yield batch
+
+        batch = list( islice( iterator, batch_size ) )
+
+class _Memo( dict ):
+    
+    """
+    raw value -> harmonized value. Lookups of values we haven't seen yet fall through to
+    `compute_value` (and are remembered, up to `max_size` distinct values).
+    """
+
+    def __init__( self, compute_value, max_size ):
+        
+        super().__init__()
+
+        self.compute_value = compute_value
+
+        self.max_size = max_size
+
+    def __missing__( self, old_value ):
+        
+        new_value = self.compute_value( old_value )
+
+        if len( self ) < self.max_size:
+            
+            self[old_value] = new_value
+
+        return new_value
+
+class Column_harmonizer:
+    
+    """
+    Everything we do to the values of one column, compiled into a single memoized lookup.
+
+    With a `value_map` (raw value, lowercased and stripped -> harmonized value), raw values are
+    replaced by their harmonized versions ('null' meaning ''; unmapped values are kept as is),
+    and then any result matching `delete_everywhere` is deleted. Every substitution is counted,
+    including values that came through unchanged.
+
+    Without a `value_map`, values matching `delete_everywhere` are deleted and everything else
+    is kept. Only deletions are counted.
+
+    Values that aren't strings (e.g. booleans from JSON) are never changed.
+    """
+
+    def __init__( self, value_map=None, delete_everywhere=None, max_memoized_values=DEFAULT_MAX_MEMOIZED_VALUES ):
+        
+        self.value_map = value_map
+
+        self.delete_everywhere = delete_everywhere if delete_everywhere is not None else set()
+
+        self.count_all_substitutions = value_map is not None
+
+        self.memo = _Memo( self.compute_value, max_memoized_values )
+
+        self.substitution_counts = Counter()
+
+        # Whether deleting a value can leave it looking exactly as it did (only possible if
+        # `delete_everywhere` matches the empty string).
+
+        self.deletes_empty_values = self.is_deleted( '' )
+
+    def is_deleted( self, value ):
+        
+        return isinstance( value, str ) and WHITESPACE.sub( '', value ).lower() in self.delete_everywhere
+
+    def compute_value( self, old_value ):
+        
+        if not isinstance( old_value, str ):
+            
+            return old_value
+
+        new_value = old_value
+
+        if self.value_map is not None:
+            
+            key = old_value.strip().lower()
+
+            if key in self.value_map:
+                
+                new_value = self.value_map[key] if self.value_map[key] != 'null' else ''
+
+        return '' if self.is_deleted( new_value ) else new_value
+
+    def harmonize_value( self, old_value ):
+        
+        """
+        Harmonize and count one value.
+        """
+
+        new_value = self.memo[old_value]
+
+        if self.count_all_substitutions or ( new_value == '' and ( old_value != '' or self.deletes_empty_values ) ):
+            
+            self.substitution_counts[old_value] += 1
+
+        return new_value
+
+    def harmonize_values( self, old_values ):
+        
+        """
+        Harmonize and count a sequence of values; returns a list of their harmonized versions.
+        """
+
+        new_values = list( map( self.memo.__getitem__, old_values ) )
+
+        if self.count_all_substitutions:
+            
+            self.substitution_counts.update( old_values )
+
+        else:
+            
+            # Deleted values are the ones that came out empty. (Any already-empty values this
+            # also counts are dropped again in substitutions(), unless they really were deleted.)
+
+            self.substitution_counts.update( compress( old_values, map( eq, new_values, repeat( '' ) ) ) )
+
+        return new_values
+
+    def nulled_flags( self, old_values, new_values ):
+        
+        """
+        For each ( old, new ) value pair, did harmonization leave us without a value?
+        """
+
+        if self.count_all_substitutions:
+            
+            return [ new_value == '' for new_value in new_values ]
+
+        return [ new_value == '' and ( old_value != '' or self.deletes_empty_values ) for old_value, new_value in zip( old_values, new_values ) ]
+
+    def substitutions( self ):
+        
+        """
+        Return counts of all substitutions performed so far, as { raw_value: { harmonized_value: count } }.
+        """
+
+        result = dict()
+
+        for old_value, count in self.substitution_counts.items():
+            
+            if old_value == '' and not self.count_all_substitutions and not self.deletes_empty_values:
+                
+                continue
+
+            result[old_value] = { self.memo[old_value]: count }
+
+        return result
+
+class Table_harmonizer:
+    
+    """
+    Applies a Column_harmonizer to each harmonized or QC'd column of a table, a batch of rows at a time.
+
+    `column_harmonizers` maps column names to Column_harmonizers; columns without one pass through unchanged.
+
+    Rows can be dropped after harmonization: if `delete_row_if_nulled` is True, any row in which
+    a harmonizer nulled a value is dropped; if `delete_row_if_all_null_but` is a set of column names,
+    any row with no values left outside those columns is dropped.
+
+    If `unharmonized_columns` is given, a "before and after" row is built alongside each output row:
+    for each ( column name, paired ) entry, the column's original value, followed (if paired) by its
+    harmonized value. The matching header is `unharmonized_column_names`: paired columns appear
+    as `column`_unharmonized and `column`_harmonized, unpaired ones under their own names.
+
+    Table_harmonizers (and Column_harmonizers) can be pickled, so they can be handed to worker processes.
+    """
+
+    def __init__( self, column_names, column_harmonizers, delete_row_if_nulled=False, delete_row_if_all_null_but=None, unharmonized_columns=None ):
+        
+        self.column_names = column_names
+
+        self.column_harmonizers = column_harmonizers
+
+        self.delete_row_if_nulled = delete_row_if_nulled
+
+        self.harmonizers_by_index = [ ( index, column_harmonizers[column_name] ) for index, column_name in enumerate( column_names ) if column_name in column_harmonizers ]
+
+        self.all_null_check_indices = None
+
+        if delete_row_if_all_null_but is not None:
+            
+            self.all_null_check_indices = [ index for index, column_name in enumerate( column_names ) if column_name not in delete_row_if_all_null_but ]
+
+        self.unharmonized_column_indices = None
+
+        self.unharmonized_column_names = None
+
+        if unharmonized_columns is not None:
+            
+            column_index = { column_name: index for index, column_name in enumerate( column_names ) }
+
+            self.unharmonized_column_indices = [ ( column_index[column_name], paired ) for column_name, paired in unharmonized_columns ]
+
+            self.unharmonized_column_names = list()
+
+            for column_name, paired in unharmonized_columns:
+                
+                if paired:
+                    
+                    self.unharmonized_column_names.append( f"{column_name}_unharmonized" )
+
+                    self.unharmonized_column_names.append( f"{column_name}_harmonized" )
+
+                else:
+                    
+                    self.unharmonized_column_names.append( column_name )
+
+    def harmonize_rows( self, rows ):
+        
+        """
+        Harmonize a batch of rows (equal-length sequences of values, in `column_names` order). Returns
+        ( output rows, "before and after" rows ) for the rows we're keeping; the second list is
+        None if we're not making "before and after" rows.
+        """
+
+        if len( rows ) == 0:
+            
+            return ( list(), None if self.unharmonized_column_indices is None else list() )
+
+        old_columns = list( zip( *rows ) )
+
+        new_columns = list( old_columns )
+
+        for index, column_harmonizer in self.harmonizers_by_index:
+            
+            new_columns[index] = column_harmonizer.harmonize_values( old_columns[index] )
+
+        # Decide which rows to keep.
+
+        keep_row = None
+
+        if self.all_null_check_indices is not None:
+            
+            if len( self.all_null_check_indices ) == 0:
+                
+                keep_row = [ False ] * len( rows )
+
+            else:
+                
+                keep_row = list( map( any, zip( *[ new_columns[index] for index in self.all_null_check_indices ] ) ) )
+
+        elif self.delete_row_if_nulled and len( self.harmonizers_by_index ) > 0:
+            
+            nulled_columns = [ column_harmonizer.nulled_flags( old_columns[index], new_columns[index] ) for index, column_harmonizer in self.harmonizers_by_index ]
+
+            keep_row = [ not any( row_nulled_flags ) for row_nulled_flags in zip( *nulled_columns ) ]
+
+        output_rows = list( zip( *new_columns ) )
+
+        unharmonized_rows = None
+
+        if self.unharmonized_column_indices is not None:
+            
+            unharmonized_columns = list()
+
+            for index, paired in self.unharmonized_column_indices:
+                
+                unharmonized_columns.append( old_columns[index] )
+
+                if paired:
+                    
+                    unharmonized_columns.append( new_columns[index] )
+
+            unharmonized_rows = list( zip( *unharmonized_columns ) ) if len( unharmonized_columns ) > 0 else [ tuple() ] * len( rows )
+
+        if keep_row is not None:
+            
+            output_rows = list( compress( output_rows, keep_row ) )
+
+            if unharmonized_rows is not None:
+                
+                unharmonized_rows = list( compress( unharmonized_rows, keep_row ) )
+
+        return ( output_rows, unharmonized_rows )
+
+    def substitutions( self ):
+        
+        """
+        Return { column: { raw_value: { harmonized_value: count } } } for every column with at least one counted substitution.
+        """
+
+        result = dict()
+
+        for column_name in sorted( self.column_harmonizers ):
+            
+            column_substitutions = self.column_harmonizers[column_name].substitutions()
+
+            if len( column_substitutions ) > 0:
+                
+                result[column_name] = column_substitutions
+
+        return result
+
+def _open_output_tsv( file_path ):
+    
+    return gzip.open( file_path, 'wt' ) if file_path.endswith( '.gz' ) else open( file_path, 'w' )
+
+def harmonize_tsv( table_harmonizer, input_file, output_file, unharmonized_output_file=None, byte_range=None, batch_size=DEFAULT_BATCH_SIZE ):
+    
+    """
+    Run every row of `input_file` (or, given a `byte_range` from tsv_reader.get_byte_range_shards(),
+    just the rows in that range) through `table_harmonizer`, writing kept rows to `output_file`
+    and "before and after" rows to `unharmonized_output_file` (if given). Output files whose names
+    end in '.gz' are gzipped. Headers are only written when harmonizing a whole file.
+
+    Returns the substitution counts for the rows processed, as from table_harmonizer.substitutions().
+    """
+
+    with TSV_reader( input_file, byte_range=byte_range ) as IN, _open_output_tsv( output_file ) as OUT:
+        
+        UNH = _open_output_tsv( unharmonized_output_file ) if unharmonized_output_file is not None else None
+
+        if byte_range is None:
+            
+            print( *table_harmonizer.column_names, sep='\t', file=OUT )
+
+            if UNH is not None:
+                
+                print( *table_harmonizer.unharmonized_column_names, sep='\t', file=UNH )
+
+        for input_rows in iterate_in_batches( IN.rows( table_harmonizer.column_names ), batch_size ):
+            
+            output_rows, unharmonized_output_rows = table_harmonizer.harmonize_rows( input_rows )
+
+            OUT.writelines( '\t'.join( output_row ) + '\n' for output_row in output_rows )
+
+            if UNH is not None:
+                
+                UNH.writelines( '\t'.join( unharmonized_output_row ) + '\n' for unharmonized_output_row in unharmonized_output_rows )
+
+        if UNH is not None:
+            
+            UNH.close()
+
+    return table_harmonizer.substitutions()
+
+def concatenate_tsv_shards( header, shard_files, output_file ):
+    
+    """
+    Write `header` (a list of column names) to `output_file`, followed by the contents of each
+    of `shard_files` (headerless harmonize_tsv() output), in order.
+    Gzipped shards are copied as-is: a series of gzip members is itself a valid gzip file.
+    """
+
+    with _open_output_tsv( output_file ) as OUT:
+        
+        print( *header, sep='\t', file=OUT )
+
+    with open( output_file, 'ab' ) as OUT:
+        
+        for shard_file in shard_files:
+            
+            with open( shard_file, 'rb' ) as IN:
+                
+                shutil.copyfileobj( IN, OUT, 4 * 1024 * 1024 )
+
+def merge_substitutions( all_substitutions, new_substitutions ):
+    
+    """
+    Add the counts in `new_substitutions` into `all_substitutions` (both { column: { raw_value: { harmonized_value: count } } }).
+    """
+
+    for column in new_substitutions:
+        
+        if column not in all_substitutions:
+            
+            all_substitutions[column] = dict()
+
+        for old_value in new_substitutions[column]:
+            
+            if old_value not in all_substitutions[column]:
+                
+                all_substitutions[column][old_value] = dict()
+
+            for new_value, count in new_substitutions[column][old_value].items():
+                
+                all_substitutions[column][old_value][new_value] = all_substitutions[column][old_value].get( new_value, 0 ) + count
+
+    return all_substitutions
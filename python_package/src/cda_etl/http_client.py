@@ -0,0 +1,289 @@
+import random
+import requests
+import sys
+import threading
+import time
+
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+
+class HTTP_client:
+    
+    """
+    One pooled HTTP session shared by all upstream API clients (GDC REST, PDC and ICDC GraphQL, dbGaP).
+
+    - Connections are kept alive and reused across requests (and across threads) instead of
+      paying for TCP/TLS setup on every page.
+    - Retryable failures (connection errors, timeouts, 408/429/5xx responses) are retried with
+      jittered exponential backoff, honoring any `Retry-After` header the server sends us.
+    - Requests to any given host can be throttled to a minimum interval between request starts.
+    - Per-host request counts, retries, failures and timings are recorded for reporting.
+    """
+
+    def __init__( self, max_retries=6, backoff_base=2.0, backoff_max=300.0, timeout=( 30, 1800 ), pool_size=32 ):
+        
+        # How many times we'll retry a single request before giving up on it.
+
+        self.max_retries = max_retries
+
+        # Backoff before retry number N (starting at 0) is drawn from [ cap/2, cap ], where
+        # cap = min( backoff_max, backoff_base * 2**N ). Server-supplied `Retry-After` values
+        # take precedence over this schedule.
+
+        self.backoff_base = backoff_base
+
+        self.backoff_max = backoff_max
+
+        # ( connect, read ) timeouts in seconds, applied to any request that doesn't set its own.
+
+        self.timeout = timeout
+
+        # Response status codes that mean "try again later," as opposed to "your request is broken."
+
+        self.retry_status_codes = { 408, 429, 500, 502, 503, 504 }
+
+        self.session = requests.Session()
+
+        self.session.headers.update( { 'Accept-Encoding': 'gzip, deflate' } )
+
+        adapter = HTTPAdapter( pool_connections=pool_size, pool_maxsize=pool_size )
+
+        self.session.mount( 'https://', adapter )
+
+        self.session.mount( 'http://', adapter )
+
+        # Per-host throttling: minimum number of seconds between the starts of successive
+        # requests to the same host, and the earliest time the next request may start.
+
+        self.min_request_interval = dict()
+
+        self.next_request_time = dict()
+
+        self.rate_limit_lock = threading.Lock()
+
+        # Per-host request metrics.
+
+        self.metrics = dict()
+
+        self.metrics_lock = threading.Lock()
+
+    def set_rate_limit( self, host, requests_per_second ):
+        
+        """
+        Allow at most `requests_per_second` request starts per second against `host`. Pass None to remove the limit.
+        """
+
+        with self.rate_limit_lock:
+            
+            if requests_per_second is None:
+                
+                self.min_request_interval.pop( host, None )
+
+            else:
+                
+                self.min_request_interval[host] = 1.0 / requests_per_second
+
+    def __wait_for_rate_limit( self, host ):
+        
+        with self.rate_limit_lock:
+            
+            if host not in self.min_request_interval:
+                
+                return
+
+            now = time.monotonic()
+
+            start_time = max( now, self.next_request_time.get( host, now ) )
+
+            self.next_request_time[host] = start_time + self.min_request_interval[host]
+
+        if start_time > now:
+            
+            time.sleep( start_time - now )
+
+    def __record( self, host, elapsed, retried=False, failed=False ):
+        
+        with self.metrics_lock:
+            
+            if host not in self.metrics:
+                
+                self.metrics[host] = {
+
+                    'requests': 0,
+                    'retries': 0,
+                    'failures': 0,
+                    'total_seconds': 0.0,
+                    'max_seconds': 0.0
+                }
+
+            host_metrics = self.metrics[host]
+
+            host_metrics['requests'] += 1
+
+            host_metrics['total_seconds'] += elapsed
+
+            host_metrics['max_seconds'] = max( host_metrics['max_seconds'], elapsed )
+
+            if retried:
+                
+                host_metrics['retries'] += 1
+
+            if failed:
+                
+                host_metrics['failures'] += 1
+
+    def __get_retry_delay( self, attempt, response=None ):
+        
+        """
+        Compute how long to wait before retry number `attempt` (0-based).
+        """
+
+        if response is not None and 'Retry-After' in response.headers:
+            
+            retry_after = response.headers['Retry-After'].strip()
+
+            try:
+                
+                return min( self.backoff_max, max( 0.0, float( retry_after ) ) )
+
+            except ValueError:
+                
+                try:
+                    
+                    retry_at = parsedate_to_datetime( retry_after )
+
+                    return min( self.backoff_max, max( 0.0, retry_at.timestamp() - time.time() ) )
+
+                except ( TypeError, ValueError ):
+                    
+                    pass
+
+        cap = min( self.backoff_max, self.backoff_base * ( 2 ** attempt ) )
+
+        return random.uniform( cap / 2, cap )
+
+    def request( self, method, url, **kwargs ):
+        
+        """
+        Make an HTTP request, retrying retryable failures.
+
+        Returns the final `requests.Response` (which callers should still check with `.ok`,
+        since non-retryable and retry-exhausted error responses are passed back as-is).
+        Re-raises the last transport-level exception if every attempt failed without a response.
+        """
+
+        host = urlsplit( url ).netloc
+
+        if 'timeout' not in kwargs:
+            
+            kwargs['timeout'] = self.timeout
+
+        attempt = 0
+
+        while True:
+            
+            self.__wait_for_rate_limit( host )
+
+            start_time = time.monotonic()
+
+            response = None
+
+            error = None
+
+            try:
+                
+                response = self.session.request( method, url, **kwargs )
+
+            except ( requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.ChunkedEncodingError ) as e:
+                
+                error = e
+
+            elapsed = time.monotonic() - start_time
+
+            retryable = error is not None or response.status_code in self.retry_status_codes
+
+            if not retryable or attempt >= self.max_retries:
+                
+                self.__record( host, elapsed, retried=( attempt > 0 ), failed=retryable )
+
+                if error is not None:
+                    
+                    raise error
+
+                return response
+
+            self.__record( host, elapsed, retried=( attempt > 0 ) )
+
+            delay = self.__get_retry_delay( attempt, response )
+
+            if error is not None:
+                
+                print( f"WARNING: {method} {url} generated an error: {error}", file=sys.stderr )
+
+            else:
+                
+                print( f"WARNING: {method} {url} returned HTTP {response.status_code}.", file=sys.stderr )
+
+            print( f"Retrying after {delay:.1f}s (retry {attempt + 1} of {self.max_retries})...", file=sys.stderr )
+
+            time.sleep( delay )
+
+            attempt += 1
+
+    def get( self, url, **kwargs ):
+        
+        return self.request( 'GET', url, **kwargs )
+
+    def post( self, url, **kwargs ):
+        
+        return self.request( 'POST', url, **kwargs )
+
+    def get_metrics( self ):
+        
+        with self.metrics_lock:
+            
+            return { host: dict( self.metrics[host] ) for host in self.metrics }
+
+    def print_metrics( self, file=sys.stderr ):
+        
+        for host, host_metrics in sorted( self.get_metrics().items() ):
+            
+            mean_seconds = host_metrics['total_seconds'] / host_metrics['requests'] if host_metrics['requests'] > 0 else 0.0
+
+            print( f"HTTP {host}: {host_metrics['requests']} requests ({host_metrics['retries']} retries, {host_metrics['failures']} failures); " \
+                + f"total {host_metrics['total_seconds']:.1f}s, mean {mean_seconds:.2f}s, max {host_metrics['max_seconds']:.2f}s.", file=file )
+
+# One client per process, so every API caller in that process shares the same connection pool, throttles and metrics.
+
+_shared_client = None
+
+_shared_client_lock = threading.Lock()
+
+def get_shared_client( ):
+    
+    global _shared_client
+
+    with _shared_client_lock:
+        
+        if _shared_client is None:
+            
+            _shared_client = HTTP_client()
+
+        return _shared_client
+
+def get( url, **kwargs ):
+    
+    return get_shared_client().get( url, **kwargs )
+
+def post( url, **kwargs ):
+    
+    return get_shared_client().post( url, **kwargs )
+
+def set_rate_limit( host, requests_per_second ):
+    
+    get_shared_client().set_rate_limit( host, requests_per_second )
+
+def print_metrics( file=sys.stderr ):
+    
+    get_shared_client().print_metrics( file=file )
@@ -1,18 +1,33 @@
 import gzip
 import re
-import requests
 import sys
 
 from datetime import datetime
 from os import path, rename
 
+from cda_etl import http_client
+from cda_etl.external_sort import External_association_map, first_field_as_int, line_without_newline, sort_lines
+from cda_etl.map_cache import get_source_signature, load_cached_maps, save_cached_maps
+from cda_etl.tsv_reader import TSV_reader
+
 def add_to_map( association_map, id_one, id_two ):
     
+    if isinstance( association_map, External_association_map ):
+        
+        association_map.add( id_one, id_two )
+
+        return
+
+    # Store IDs as strings, exactly as External_association_map does, so the
+    # table we write doesn't depend on which kind of map was used.
+
+    id_one = str( id_one )
+
     if id_one not in association_map:
         
         association_map[id_one] = set()
 
-    association_map[id_one].add(id_two)
+    association_map[id_one].add( str( id_two ) )
 
 def associate_id_list_with_parent( parent, parent_id, list_field_name, list_element_id_field_name, association_map, reverse_column_order=False ):
     
@@ -1682,7 +1697,9 @@ def deduplicate_sorted_file_with_header( file_path, gzipped=False ):
 
     line_count = 0
 
-    for next_line in [ line.rstrip( '\n' ) for line in IN ]:
+    # Stream: the input is already sorted, so we only ever need to remember the previous line.
+
+    for next_line in ( line.rstrip( '\n' ) for line in IN ):
         
         line_count = line_count + 1
 
@@ -1698,8 +1715,17 @@ def deduplicate_sorted_file_with_header( file_path, gzipped=False ):
 
     rename( file_path + '.tmp', file_path )
 
-def deduplicate_and_sort_unsorted_file_with_header( file_path, gzipped=False, ignore_primary_id_field=False ):
+def deduplicate_and_sort_unsorted_file_with_header( file_path, gzipped=False, ignore_primary_id_field=False, max_memory=None, workers=None ):
     
+    """
+    Sort the data rows of a TSV and remove duplicates. If `ignore_primary_id_field` is True, rows
+    that are identical except for their `id` (or numeric `id_alias`) value are also collapsed,
+    keeping the first such row in the file.
+
+    Sorting is done by cda_etl.external_sort.sort_lines(), so tables too big for memory are
+    sorted in runs on disk: `max_memory` (bytes) and `workers` are passed through to it.
+    """
+
     IN = open( path.join( file_path ) )
 
     OUT = open( path.join( file_path + '.tmp' ), 'w' )
@@ -1718,23 +1744,18 @@ def deduplicate_and_sort_unsorted_file_with_header( file_path, gzipped=False, ig
 
     print( header, file=OUT )
 
+    temp_dir = path.dirname( path.abspath( file_path ) )
+
     if not ignore_primary_id_field:
         
-        # Sort the set of lines (as unparsed strings) and make sure we don't repeat identical adjacent lines.
-
-        last_line = ''
-
-        line_count = 0
+        # Sort the lines (as unparsed strings) and make sure we don't repeat identical lines.
+        # Empty lines are dropped.
 
-        for next_line in sorted( [ line.rstrip( '\n' ) for line in IN ] ):
+        for next_line in sort_lines( ( line.rstrip( '\n' ) + '\n' for line in IN ), key=line_without_newline, unique=True, max_memory=max_memory, workers=workers, temp_dir=temp_dir ):
             
-            line_count = line_count + 1
-
-            if next_line != last_line:
+            if next_line != '\n':
                 
-                print( next_line, file=OUT )
-
-            last_line = next_line
+                OUT.write( next_line )
 
     else:
         
@@ -1760,31 +1781,46 @@ def deduplicate_and_sort_unsorted_file_with_header( file_path, gzipped=False, ig
             
             sys.exit( f"\n   FATAL: deduplicate_and_sort_unsorted_file_with_header(): Parameter 'ignore_primary_id_field' was set to True, but the table encoded in '{file_path}' has neither 'id' nor 'id_alias' fields. Cannot continue.\n" )
 
-        record_data = set()
-
-        output_lines = set()
+        # Each stage holds at most half of our memory budget, since the second one is fed as the first one drains.
 
-        for next_line in [ line.rstrip( '\n' ) for line in IN ]:
+        if max_memory is not None:
             
-            record_string = '\t'.join( [ value for index, value in enumerate( next_line.split( '\t' ) ) if index != alias_index ] )
+            max_memory = max_memory // 2
 
-            if record_string not in record_data:
+        # Stage 1: tag each line with the rest of its record (everything but the ID) and its position in the
+        # file, then sort so all copies of each record are adjacent, in file order, and keep only the first.
+
+        def tag_lines( ):
+            
+            for line_number, line in enumerate( IN ):
                 
-                output_lines.add( next_line )
+                next_line = line.rstrip( '\n' )
+
+                record_string = '\t'.join( [ value for index, value in enumerate( next_line.split( '\t' ) ) if index != alias_index ] )
 
-            record_data.add( record_string )
+                yield f"{record_string}\0{line_number:015d}\0{next_line}\n"
 
-        if not numeric_sort:
+        def first_line_for_each_record( ):
             
-            for next_line in sorted( output_lines ):
+            last_record_string = None
+
+            for tagged_line in sort_lines( tag_lines(), max_memory=max_memory, workers=workers, temp_dir=temp_dir ):
                 
-                print( next_line, file=OUT )
+                record_string, line_number, next_line = tagged_line.split( '\0', 2 )
 
-        else:
+                if record_string != last_record_string:
+                    
+                    yield next_line
+
+                last_record_string = record_string
+
+        # Stage 2: sort the surviving lines for output.
+
+        sort_key = line_without_newline if not numeric_sort else first_field_as_int
+
+        for next_line in sort_lines( first_line_for_each_record(), key=sort_key, unique=True, max_memory=max_memory, workers=workers, temp_dir=temp_dir ):
             
-            for next_line in sorted( output_lines, key=lambda line_with_alias : int( line_with_alias.split( '\t' )[0] ) ):
-                
-                print( next_line, file=OUT )
+            OUT.write( next_line )
 
     IN.close()
 
@@ -2851,7 +2887,7 @@ def get_dbgap_study_metadata( dbgap_study_id ):
 
     # Make the http request.
 
-    response = requests.get( dbgap_full_web_url )
+    response = http_client.get( dbgap_full_web_url )
 
     if not response.ok:
         
@@ -3074,21 +3110,13 @@ def get_unique_values_from_tsv_column( tsv_path, column_name ):
         
         sys.exit(f"FATAL: Can't find specified TSV \"{tsv_path}\"; aborting.\n")
 
-    with open( tsv_path ) as IN:
+    with TSV_reader( tsv_path ) as IN:
         
-        headers = next( IN ).rstrip( '\n' ).split( '\t' )
-
-        if column_name not in headers:
+        if not IN.has_columns( column_name ):
             
             sys.exit( f"FATAL: TSV '{tsv_path}' has no column named '{column_name}'; aborting.\n" )
 
-        values_seen = set()
-
-        for line in [ next_line.rstrip( '\n' ) for next_line in IN ]:
-            
-            row_dict = dict( zip( headers, line.split( '\t' ) ) )
-
-            values_seen.add( row_dict[column_name] )
+        values_seen = set( IN.column_values( column_name ) )
 
         return sorted( values_seen )
 
@@ -3199,22 +3227,10 @@ def load_qualified_id_association( input_file, qualifier_field_name, id_one_fiel
     
     result = dict()
 
-    with open( input_file ) as IN:
+    with TSV_reader( input_file ) as IN:
         
-        colnames = next( IN ).rstrip( '\n' ).split( '\t' )
-
-        for line in [ next_line.rstrip( '\n' ) for next_line in IN ]:
+        for qualifier, id_one, id_two in IN.rows( [ qualifier_field_name, id_one_field_name, id_two_field_name ] ):
             
-            values = line.split( '\t' )
-
-            record = dict( zip( colnames, values ) )
-
-            qualifier = record[qualifier_field_name]
-
-            id_one = record[id_one_field_name]
-
-            id_two = record[id_two_field_name]
-
             if qualifier not in result:
                 
                 result[qualifier] = dict()
@@ -3231,16 +3247,14 @@ def load_tsv_as_dict( input_file, id_column_count=1 ):
     
     result = dict()
 
-    with open( input_file ) as IN:
+    with TSV_reader( input_file ) as IN:
         
-        colnames = next( IN ).rstrip( '\n' ).split( '\t' )
+        colnames = IN.column_names
 
         if id_column_count == 1:
             
-            for line in [ next_line.rstrip( '\n' ) for next_line in IN ]:
+            for values in IN.rows():
                 
-                values = line.split( '\t' )
-
                 # First column is a unique ID column, according to id_column_count.
                 # If this doesn't end up being true, only the last record will
                 # be stored for any repeated ID.
@@ -3261,10 +3275,8 @@ def load_tsv_as_dict( input_file, id_column_count=1 ):
 
         else:
             
-            for line in [ next_line.rstrip( '\n' ) for next_line in IN ]:
+            for values in IN.rows():
                 
-                values = line.split( '\t' )
-
                 key_one = values[0]
 
                 key_two = values[1]
@@ -3280,19 +3292,143 @@ def load_tsv_as_dict( input_file, id_column_count=1 ):
 
     return result
 
-def map_columns_one_to_many( input_file, from_field, to_field, where_field=None, where_value=None, gzipped=False ):
+def map_columns_multiple( input_file, map_specs, gzipped=False, use_cache=False ):
     
-    return_map = dict()
+    """
+    Build several column maps from one pass over `input_file`, instead of rescanning the file once per map.
 
-    if gzipped:
+    `map_specs` is a list of dicts, each describing one map with the same parameters map_columns_one_to_one()
+    and map_columns_one_to_many() take:
+
+        {
+            'from_field': ...,
+            'to_field': ...,
+            'where_field': ...,             # optional
+            'where_value': ...,             # optional
+            'cardinality': 'one_to_many'    # optional: 'one_to_one' (the default) or 'one_to_many'
+        }
+
+    Returns a list of maps, in the same order as `map_specs`, each identical to what the corresponding
+    map_columns_one_to_one() or map_columns_one_to_many() call would have returned.
+
+    If `use_cache` is True, results are cached on disk (see cda_etl.map_cache) and reused until the contents of `input_file` change.
+    """
+
+    if use_cache:
         
-        IN = gzip.open( input_file, 'rt' )
+        source_signature = get_source_signature( input_file )
 
-    else:
+        cached_maps = load_cached_maps( input_file, gzipped, map_specs, source_signature )
+
+        if cached_maps is not None:
+            
+            return cached_maps
+
+    IN = TSV_reader( input_file, gzipped=gzipped )
+
+    column_names = IN.column_names
+
+    # Resolve each spec to positions in the list of columns we'll ask the reader for.
+
+    needed_columns = list()
+
+    compiled_specs = list()
+
+    return_maps = list()
+
+    for map_spec in map_specs:
+        
+        from_field = map_spec['from_field']
+
+        to_field = map_spec['to_field']
+
+        where_field = map_spec.get( 'where_field', None )
+
+        cardinality = map_spec.get( 'cardinality', 'one_to_one' )
+
+        if cardinality not in { 'one_to_one', 'one_to_many' }:
+            
+            sys.exit( f"FATAL: Unrecognized map cardinality '{cardinality}' requested from map_columns_multiple(); aborting.\n" )
+
+        if from_field not in column_names or to_field not in column_names:
+            
+            sys.exit( f"FATAL: One or both requested map fields ('{from_field}', '{to_field}') not found in specified input file '{input_file}'; aborting.\n" )
+
+        if where_field is not None and where_field not in column_names:
+            
+            sys.exit( f"FATAL: Requested filter field (where_field='{where_field}') not found in specified input file '{input_file}'; aborting.\n" )
+
+        for column_name in [ from_field, to_field, where_field ]:
+            
+            if column_name is not None and column_name not in needed_columns:
+                
+                needed_columns.append( column_name )
+
+        return_map = dict()
+
+        compiled_specs.append( (
+            
+            needed_columns.index( from_field ),
+            needed_columns.index( to_field ),
+            needed_columns.index( where_field ) if where_field is not None else None,
+            map_spec.get( 'where_value', None ),
+            cardinality == 'one_to_many',
+            return_map
+        ) )
+
+        return_maps.append( return_map )
+
+    for values in IN.rows( needed_columns ):
+        
+        for from_index, to_index, where_index, where_value, one_to_many, return_map in compiled_specs:
+            
+            if where_index is not None and values[where_index] != where_value:
+                
+                continue
+
+            current_from = values[from_index]
+
+            if one_to_many:
+                
+                if current_from not in return_map:
+                    
+                    return_map[current_from] = set()
+
+                return_map[current_from].add( values[to_index] )
+
+            else:
+                
+                return_map[current_from] = values[to_index]
+
+    IN.close()
+
+    if use_cache:
+        
+        save_cached_maps( input_file, gzipped, map_specs, return_maps, source_signature )
+
+    return return_maps
+
+def map_columns_one_to_many( input_file, from_field, to_field, where_field=None, where_value=None, gzipped=False, use_cache=False ):
+    
+    # If `use_cache` is True, results are cached on disk (see cda_etl.map_cache) and reused until the contents of `input_file` change.
+
+    if use_cache:
         
-        IN = open( input_file )
+        map_spec = { 'from_field': from_field, 'to_field': to_field, 'where_field': where_field, 'where_value': where_value, 'cardinality': 'one_to_many' }
+
+        source_signature = get_source_signature( input_file )
+
+        cached_maps = load_cached_maps( input_file, gzipped, [ map_spec ], source_signature )
 
-    column_names = next( IN ).rstrip( '\n' ).split( '\t' )
+        if cached_maps is not None:
+            
+            return cached_maps[0]
+
+    return_map = dict()
+
+    IN = TSV_reader( input_file, gzipped=gzipped )
+
+    column_names = IN.column_names
 
     if from_field not in column_names or to_field not in column_names:
         
@@ -3302,20 +3438,16 @@ def map_columns_one_to_many( input_file, from_field, to_field, where_field=None,
         
         sys.exit( f"FATAL: Requested filter field (where_field='{where_field}') not found in specified input file '{input_file}'; aborting.\n" )
 
-    for next_line in IN:
-        
-        record = dict( zip( column_names, next_line.rstrip( '\n' ).split( '\t' ) ) )
-        
-        current_from = record[from_field]
+    # With no filter, just read from_field twice: cheaper than reshaping every row.
 
-        current_to = record[to_field]
+    filter_field = where_field if where_field is not None else from_field
 
+    for current_from, current_to, current_where_value in IN.rows( [ from_field, to_field, filter_field ] ):
+        
         map_current = False
 
         if where_field is not None:
             
-            current_where_value = record[where_field]
-
             if current_where_value == where_value:
                 
                 map_current = True
@@ -3334,21 +3466,33 @@ def map_columns_one_to_many( input_file, from_field, to_field, where_field=None,
 
     IN.close()
 
+    if use_cache:
+        
+        save_cached_maps( input_file, gzipped, [ map_spec ], [ return_map ], source_signature )
+
     return return_map
 
-def map_columns_one_to_one( input_file, from_field, to_field, where_field=None, where_value=None, gzipped=False ):
+def map_columns_one_to_one( input_file, from_field, to_field, where_field=None, where_value=None, gzipped=False, use_cache=False ):
     
-    return_map = dict()
+    # If `use_cache` is True, results are cached on disk (see cda_etl.map_cache) and reused until the contents of `input_file` change.
 
-    if gzipped:
+    if use_cache:
         
-        IN = gzip.open( input_file, 'rt' )
+        map_spec = { 'from_field': from_field, 'to_field': to_field, 'where_field': where_field, 'where_value': where_value, 'cardinality': 'one_to_one' }
 
-    else:
-        
-        IN = open( input_file )
+        source_signature = get_source_signature( input_file )
+
+        cached_maps = load_cached_maps( input_file, gzipped, [ map_spec ], source_signature )
 
-    column_names = next( IN ).rstrip( '\n' ).split( '\t' )
+        if cached_maps is not None:
+            
+            return cached_maps[0]
+
+    return_map = dict()
+
+    IN = TSV_reader( input_file, gzipped=gzipped )
+
+    column_names = IN.column_names
 
     if from_field not in column_names or to_field not in column_names:
         
@@ -3358,20 +3502,16 @@ def map_columns_one_to_one( input_file, from_field, to_field, where_field=None,
         
         sys.exit( f"FATAL: Requested filter field (where_field='{where_field}') not found in specified input file '{input_file}'; aborting.\n" )
 
-    for next_line in IN:
-        
-        record = dict( zip( column_names, next_line.rstrip( '\n' ).split( '\t' ) ) )
+    # With no filter, just read from_field twice: cheaper than reshaping every row.
 
-        current_from = record[from_field]
-
-        current_to = record[to_field]
+    filter_field = where_field if where_field is not None else from_field
 
+    for current_from, current_to, current_where_value in IN.rows( [ from_field, to_field, filter_field ] ):
+        
         map_current = False
 
         if where_field is not None:
             
-            current_where_value = record[where_field]
-
             if current_where_value == where_value:
                 
                 map_current = True
@@ -3386,6 +3526,10 @@ def map_columns_one_to_one( input_file, from_field, to_field, where_field=None,
 
     IN.close()
 
+    if use_cache:
+        
+        save_cached_maps( input_file, gzipped, [ map_spec ], [ return_map ], source_signature )
+
     return return_map
 
 def singularize( name ):
@@ -3431,89 +3575,75 @@ def singularize( name ):
         
         return name
 
-def sort_and_uniquify_file_with_header( file_path, gzipped=False ):
+def sort_and_uniquify_file_with_header( file_path, gzipped=False, max_memory=None, workers=None ):
     
+    """
+    Sort the data rows of a TSV (compared without their newlines) and remove duplicate rows.
+
+    Tables too big for memory are sorted in runs on disk by cda_etl.external_sort.sort_lines():
+    `max_memory` (bytes) and `workers` are passed through to it.
+    """
+
     if not gzipped:
         
-        with open( file_path ) as IN:
-            
-            header = next( IN ).rstrip( '\n' )
+        IN = open( file_path )
 
-            lines = set()
+        OUT = open( file_path + '.tmp', 'w' )
 
-            for line in IN:
-                
-                lines.add( line.rstrip( '\n' ) )
+    else:
+        
+        IN = gzip.open( file_path, 'rt' )
 
-        with open( file_path + '.tmp', 'w' ) as OUT:
-            
-            print( header, sep='', end='\n', file=OUT )
+        OUT = gzip.open( file_path + '.tmp', 'wt' )
 
-            if len( lines ) > 0:
-                
-                print( *sorted( lines ), sep='\n', end='\n', file=OUT )
+    header = next( IN ).rstrip( '\n' )
 
-            rename( file_path + '.tmp', file_path )
+    print( header, sep='', end='\n', file=OUT )
 
-    else:
-        
-        with gzip.open( file_path, 'rt' ) as IN:
-            
-            header = next( IN ).rstrip( '\n' )
+    OUT.writelines( sort_lines( ( line.rstrip( '\n' ) + '\n' for line in IN ), key=line_without_newline, unique=True, max_memory=max_memory, workers=workers, temp_dir=path.dirname( path.abspath( file_path ) ) ) )
 
-            lines = set()
+    IN.close()
 
-            for line in IN:
-                
-                lines.add( line.rstrip( '\n' ) )
+    OUT.close()
 
-        with gzip.open( file_path + '.tmp', 'wt' ) as OUT:
-            
-            print( header, sep='', end='\n', file=OUT )
+    rename( file_path + '.tmp', file_path )
 
-            if len( lines ) > 0:
-                
-                print( *sorted( lines ), sep='\n', end='\n', file=OUT )
+def sort_file_with_header( file_path, gzipped=False, max_memory=None, workers=None ):
+    
+    """
+    Sort the data rows of a TSV (compared as raw lines, including newlines), keeping duplicates.
 
-            rename( file_path + '.tmp', file_path )
+    Tables too big for memory are sorted in runs on disk by cda_etl.external_sort.sort_lines():
+    `max_memory` (bytes) and `workers` are passed through to it.
+    """
 
-def sort_file_with_header( file_path, gzipped=False ):
-    
     if not gzipped:
         
-        with open( file_path ) as IN:
-            
-            header = next( IN ).rstrip( '\n' )
+        IN = open( file_path )
 
-            lines = [ line.rstrip( '\n' ) for line in sorted( IN ) ]
+        OUT = open( file_path + '.tmp', 'w' )
 
-        with open( file_path + '.tmp', 'w' ) as OUT:
-            
-            print( header, sep='', end='\n', file=OUT )
+    else:
+        
+        IN = gzip.open( file_path, 'rt' )
 
-            if len( lines ) > 0:
-                
-                print( *lines, sep='\n', end='\n', file=OUT )
+        OUT = gzip.open( file_path + '.tmp', 'wt' )
 
-            rename( file_path + '.tmp', file_path )
+    header = next( IN ).rstrip( '\n' )
 
-    else:
-        
-        with gzip.open( file_path, 'rt' ) as IN:
-            
-            header = next( IN ).rstrip( '\n' )
+    print( header, sep='', end='\n', file=OUT )
 
-            lines = [ line.rstrip( '\n' ) for line in sorted( IN ) ]
+    # Note: if the last line of the file doesn't end with a newline, it's compared as-is (and gets one on output).
 
-        with gzip.open( file_path + '.tmp', 'wt' ) as OUT:
-            
-            print( header, sep='', end='\n', file=OUT )
+    for line in sort_lines( IN, max_memory=max_memory, workers=workers, temp_dir=path.dirname( path.abspath( file_path ) ) ):
+        
+        OUT.write( line if line.endswith( '\n' ) else line + '\n' )
 
-            if len( lines ) > 0:
-                
-                print( *lines, sep='\n', end='\n', file=OUT )
+    IN.close()
 
-            rename( file_path + '.tmp', file_path )
+    OUT.close()
+
+    rename( file_path + '.tmp', file_path )
 
 def write_association_pairs( association_map, tsv_filename, field_one_name, field_two_name ):
     
@@ -3525,12 +3655,20 @@ def write_association_pairs( association_map, tsv_filename, field_one_name, fiel
         
         print( *[field_one_name, field_two_name], sep='\t', file=OUT )
     
-        for value_one in sorted(association_map):
+        if isinstance( association_map, External_association_map ):
             
-            for value_two in sorted(association_map[value_one]):
+            for value_one, value_two in association_map.sorted_entries():
                 
                 print( *[value_one, value_two], sep='\t', file=OUT )
 
+        else:
+            
+            for value_one in sorted(association_map):
+                
+                for value_two in sorted(association_map[value_one]):
+                    
+                    print( *[value_one, value_two], sep='\t', file=OUT )
+
     sys.stderr.write("done.\n")
 
 
@@ -1,10 +1,488 @@
 import gzip
+import hashlib
+import io
 import re
+import shutil
 import sys
+import tempfile
+import time
 
-from cda_etl.lib import get_unique_values_from_tsv_column
+from cda_etl.external_sort import sort_lines
+from cda_etl.lib import get_column_metadata, get_unique_values_from_tsv_column
+from cda_etl.tsv_reader import TSV_reader, open_tsv
 
-from os import listdir, makedirs, path
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from functools import partial
+from itertools import islice
+from os import cpu_count, listdir, makedirs, path, remove
+
+# Default number of tables to stream into PostgreSQL at once (one worker process and one database connection per table).
+
+DEFAULT_LOAD_JOBS = min( 4, cpu_count() or 1 )
+
+# Approximate number of bytes of TSV data transcoded into COPY data at a time.
+
+COPY_BUFFER_SIZE = 4 * 1024 * 1024
+
+# gzip level for the COPY files written by transform_dir_to_SQL(). Level 6 costs a few
+# percent in size relative to 9, in a fraction of the time.
+
+DEFAULT_SQL_COMPRESSION_LEVEL = 6
+
+# Maximum number of id_alias values per DELETE statement in delta loads.
+
+DELETE_BATCH_SIZE = 10000
+
+# Zero-width match at the position of every empty field in a buffer of whole TSV lines.
+
+EMPTY_FIELD = re.compile( rb'(?<![^\t\n])(?=[\t\n])' )
+
+def transcode_tsv_lines_to_copy_data( tsv_lines ):
+    
+    """
+    Turn a bytes buffer of complete TSV data lines (each ending in a newline) into PostgreSQL
+    text-format COPY data: every empty field becomes \\N (NULL); everything else passes through as-is.
+    """
+
+    return EMPTY_FIELD.sub( rb'\\N', tsv_lines )
+
+class COPY_data_stream( io.RawIOBase ):
+    
+    """
+    Read-only binary stream of the data rows of a TSV (plain or gzipped), transcoded on the fly into
+    the body of a text-format COPY ... FROM STDIN. Input is read and transcoded COPY_BUFFER_SIZE
+    bytes (rounded up to a whole line) at a time; no per-row or per-value objects are built.
+    """
+
+    def __init__( self, tsv_file, buffer_size=COPY_BUFFER_SIZE ):
+        
+        self.IN = gzip.open( tsv_file, 'rb' ) if tsv_file.endswith( '.gz' ) else open( tsv_file, 'rb' )
+
+        # Skip the header.
+
+        self.IN.readline()
+
+        self.buffer_size = buffer_size
+
+        self.pending = b''
+
+        self.offset = 0
+
+    def readable( self ):
+        
+        return True
+
+    def readinto( self, buffer ):
+        
+        while self.offset >= len( self.pending ):
+            
+            tsv_lines = self.IN.read( self.buffer_size )
+
+            if len( tsv_lines ) == 0:
+                
+                return 0
+
+            # Finish the last line we read (and terminate it, if it's the last line in the file and has no newline).
+
+            if not tsv_lines.endswith( b'\n' ):
+                
+                tsv_lines += self.IN.readline()
+
+                if not tsv_lines.endswith( b'\n' ):
+                    
+                    tsv_lines += b'\n'
+
+            self.pending = transcode_tsv_lines_to_copy_data( tsv_lines )
+
+            self.offset = 0
+
+        bytes_read = min( len( buffer ), len( self.pending ) - self.offset )
+
+        memoryview( buffer )[:bytes_read] = self.pending[self.offset:self.offset + bytes_read]
+
+        self.offset += bytes_read
+
+        return bytes_read
+
+    def close( self ):
+        
+        self.IN.close()
+
+        super().close()
+
+def connect_to_postgres( connection_parameters ):
+    
+    """
+    Open a pg8000 connection using `connection_parameters` (keyword arguments for pg8000.native.Connection:
+    user, password, host, port, database, ...). pg8000 is only needed for direct loads, so it's imported here.
+    """
+
+    import pg8000.native
+
+    return pg8000.native.Connection( **connection_parameters )
+
+def _copy_tsv_into_table( connection_parameters, input_file, target_table ):
+    
+    """
+    Stream the data rows of `input_file` into `target_table` over a connection of their own.
+    """
+
+    with TSV_reader( input_file ) as IN:
+        
+        colnames = IN.column_names
+
+    connection = connect_to_postgres( connection_parameters )
+
+    try:
+        
+        with COPY_data_stream( input_file ) as stream:
+            
+            connection.run( f"COPY {target_table} (" + ', '.join( colnames ) + ') FROM STDIN', stream=stream )
+
+    finally:
+        
+        connection.close()
+
+    return target_table
+
+def _transcode_tsv_to_SQL( input_file, target_table, output_file, compression_level ):
+    
+    """
+    Write the data rows of `input_file` to `output_file` as a complete COPY ... FROM stdin block, copying
+    transcoded bytes a block at a time. Output is gzipped at `compression_level`.
+    """
+
+    with TSV_reader( input_file ) as IN:
+        
+        colnames = IN.column_names
+
+    with gzip.open( output_file, 'wb', compresslevel=compression_level ) as OUT, COPY_data_stream( input_file ) as IN:
+        
+        # COPY diagnosis (id, primary_diagnosis, age_at_diagnosis, morphology, stage, grade, method_of_diagnosis) FROM stdin;
+
+        OUT.write( ( f"COPY {target_table} (" + ', '.join( colnames ) + ') FROM stdin;\n' ).encode( 'utf-8' ) )
+
+        shutil.copyfileobj( IN, OUT, COPY_BUFFER_SIZE )
+
+        OUT.write( b'\\.\n\n' )
+
+def get_content_hash( tsv_file ):
+    
+    """
+    SHA-256 of a TSV's (decompressed, if gzipped) contents.
+    """
+
+    content_hash = hashlib.sha256()
+
+    with ( gzip.open( tsv_file, 'rb' ) if tsv_file.endswith( '.gz' ) else open( tsv_file, 'rb' ) ) as IN:
+        
+        for block in iter( lambda: IN.read( COPY_BUFFER_SIZE ), b'' ):
+            
+            content_hash.update( block )
+
+    return content_hash.hexdigest()
+
+def _field_value( field_index, line ):
+    
+    """
+    Sort key (with functools.partial): the value of one field of a TSV line.
+    """
+
+    return line.rstrip( '\n' ).split( '\t' )[field_index]
+
+def _sorted_data_lines( tsv_file, key_index ):
+    
+    """
+    Yield the data lines of `tsv_file`, newline-terminated and (stably) sorted by the field at `key_index`.
+    """
+
+    with open_tsv( tsv_file ) as IN:
+        
+        next( IN )
+
+        for line in sort_lines( IN, key=partial( _field_value, key_index ) ):
+            
+            yield line if line.endswith( '\n' ) else line + '\n'
+
+def _diff_keyed_tsvs( previous_file, input_file, key_index, DELETES, UPSERTS ):
+    
+    """
+    Merge-join the data rows of `previous_file` and `input_file` on the field at `key_index`, writing the key of every
+    deleted or changed row to DELETES (one per line) and every new or changed row to UPSERTS. Returns counts of
+    ( inserted, updated, deleted ) rows, or None if a key isn't unique within one of the files.
+    """
+
+    counts = [ 0, 0, 0 ]
+
+    previous_lines = _sorted_data_lines( previous_file, key_index )
+
+    new_lines = _sorted_data_lines( input_file, key_index )
+
+    previous_line = next( previous_lines, None )
+
+    new_line = next( new_lines, None )
+
+    last_keys = [ None, None ]
+
+    while previous_line is not None or new_line is not None:
+        
+        previous_key = _field_value( key_index, previous_line ) if previous_line is not None else None
+
+        new_key = _field_value( key_index, new_line ) if new_line is not None else None
+
+        if new_key is None or previous_key is not None and previous_key < new_key:
+            
+            # Row removed.
+
+            if previous_key == last_keys[0]:
+                
+                return None
+
+            last_keys[0] = previous_key
+
+            DELETES.write( previous_key + '\n' )
+
+            counts[2] += 1
+
+            previous_line = next( previous_lines, None )
+
+        elif previous_key is None or new_key < previous_key:
+            
+            # Row added.
+
+            if new_key == last_keys[1]:
+                
+                return None
+
+            last_keys[1] = new_key
+
+            UPSERTS.write( new_line )
+
+            counts[0] += 1
+
+            new_line = next( new_lines, None )
+
+        else:
+            
+            # Same key in both: replace the old row if anything about it has changed.
+
+            if previous_key == last_keys[0] or new_key == last_keys[1]:
+                
+                return None
+
+            last_keys = [ previous_key, new_key ]
+
+            if previous_line != new_line:
+                
+                DELETES.write( previous_key + '\n' )
+
+                UPSERTS.write( new_line )
+
+                counts[1] += 1
+
+            previous_line = next( previous_lines, None )
+
+            new_line = next( new_lines, None )
+
+    return tuple( counts )
+
+def _write_table_delta( input_file, previous_file, target_table, output_file, compression_level ):
+    
+    """
+    Write the SQL (to `output_file`, gzipped at `compression_level`) that turns the contents
+    of `target_table` as loaded from `previous_file` (None if it wasn't) into the contents of `input_file`:
+        
+        * nothing at all, if the two files' contents are identical
+        * otherwise, if both files have the same columns including a unique `id_alias`, one transaction
+          deleting (in batches) every removed or changed row by id_alias, then COPYing in every new or changed row
+        * otherwise, one transaction truncating the table and COPYing in all of `input_file`
+
+    Returns ( 'unchanged' | 'delta' | 'reload', inserted rows, updated rows, deleted rows ); counts are None for reloads.
+    """
+
+    if previous_file is not None and get_content_hash( previous_file ) == get_content_hash( input_file ):
+        
+        return ( 'unchanged', 0, 0, 0 )
+
+    with TSV_reader( input_file ) as IN:
+        
+        colnames = IN.column_names
+
+    counts = None
+
+    with tempfile.TemporaryFile( 'w+' ) as DELETES, tempfile.TemporaryFile( 'w+' ) as UPSERTS:
+        
+        if previous_file is not None and 'id_alias' in colnames:
+            
+            with TSV_reader( previous_file ) as IN:
+                
+                previous_colnames = IN.column_names
+
+            if previous_colnames == colnames:
+                
+                counts = _diff_keyed_tsvs( previous_file, input_file, colnames.index( 'id_alias' ), DELETES, UPSERTS )
+
+                if counts == ( 0, 0, 0 ):
+                    
+                    # Same rows, different order.
+
+                    return ( 'unchanged', 0, 0, 0 )
+
+        with gzip.open( output_file, 'wb', compresslevel=compression_level ) as OUT:
+            
+            OUT.write( b'BEGIN;\n' )
+
+            if counts is None:
+                
+                OUT.write( f"TRUNCATE {target_table};\n".encode( 'utf-8' ) )
+
+            else:
+                
+                DELETES.seek( 0 )
+
+                for keys in iter( lambda: [ line.rstrip( '\n' ) for line in islice( DELETES, DELETE_BATCH_SIZE ) ], [] ):
+                    
+                    OUT.write( ( f"DELETE FROM {target_table} WHERE id_alias IN ( " + ', '.join( [ "'" + key.replace( "'", "''" ) + "'" for key in keys ] ) + ' );\n' ).encode( 'utf-8' ) )
+
+            OUT.write( ( f"COPY {target_table} (" + ', '.join( colnames ) + ') FROM stdin;\n' ).encode( 'utf-8' ) )
+
+            if counts is None:
+                
+                with COPY_data_stream( input_file ) as IN:
+                    
+                    shutil.copyfileobj( IN, OUT, COPY_BUFFER_SIZE )
+
+            else:
+                
+                UPSERTS.seek( 0 )
+
+                for tsv_lines in iter( lambda: UPSERTS.read( COPY_BUFFER_SIZE ) + UPSERTS.readline(), '' ):
+                    
+                    OUT.write( transcode_tsv_lines_to_copy_data( tsv_lines.encode( 'utf-8' ) ) )
+
+            OUT.write( b'\\.\n\nCOMMIT;\n\n' )
+
+    if counts is None:
+        
+        return ( 'reload', None, None, None )
+
+    return ( 'delta', ) + counts
+
+# Alias universes for null-table worker processes: { foreign table: ( sorted aliases, { alias: position in sorted aliases } ) }; set once per worker by _init_null_TSV_worker().
+
+_worker_alias_universes = None
+
+def _init_null_TSV_worker( alias_universes ):
+    
+    global _worker_alias_universes
+
+    _worker_alias_universes = alias_universes
+
+def _get_null_TSV_columns( input_table, colnames ):
+    
+    """
+    Work out which table `input_table` hangs off of (from its first non-`id_alias` alias column) and
+    which of its columns get null flags. Returns ( foreign table, [ columns to keep ] ).
+    """
+
+    foreign_table = ''
+
+    columns_to_keep = list()
+
+    for colname in colnames:
+        
+        if foreign_table == '' and re.search( r'^.+_alias$', colname ) is None:
+            
+            sys.exit( f"Cannot find foreign table from which '{input_table}' is derived; aborting. Observed columns:\n\n{colnames}\n\n" )
+
+        elif foreign_table == '' and colname != 'id_alias':
+            
+            foreign_table = re.search( r'^(.+)_alias$', colname ).group(1)
+
+        elif foreign_table != '' and colname != 'data_source_count' and re.search( r'^data_at_.+$', colname ) is None:
+            
+            columns_to_keep.append( colname )
+
+    return ( foreign_table, columns_to_keep )
+
+def _write_null_TSV( input_tsv, output_tsv, input_table, foreign_table, columns_to_keep, alias_universes=None ):
+    
+    """
+    Flag, for every alias in `foreign_table`'s alias universe, which of `columns_to_keep` are null (or missing) in
+    all of its `input_table` rows. Flags are kept in one bytearray per column (plus one recording which aliases
+    have any rows at all), indexed by each alias's position in the (sorted) universe: no per-alias objects.
+    """
+
+    if alias_universes is None:
+        
+        alias_universes = _worker_alias_universes
+
+    ( foreign_table_aliases, alias_positions ) = alias_universes[foreign_table]
+
+    foreign_alias_column_name = f"{foreign_table}_alias"
+
+    seen = bytearray( len( foreign_table_aliases ) )
+
+    not_null = [ bytearray( len( foreign_table_aliases ) ) for column_to_keep in columns_to_keep ]
+
+    with TSV_reader( input_tsv ) as IN:
+        
+        kept_column_flags = list( zip( [ IN.column_index( column_to_keep ) for column_to_keep in columns_to_keep ], not_null ) )
+
+        foreign_alias_index = IN.column_index( foreign_alias_column_name )
+
+        for values in IN.rows():
+            
+            # Rows for aliases outside the universe (if any) can't show up in the output, so don't bother with them.
+
+            position = alias_positions.get( values[foreign_alias_index], None )
+
+            if position is None:
+                
+                continue
+
+            seen[position] = 1
+
+            for ( column_index, flags ) in kept_column_flags:
+                
+                if values[column_index] != '':
+                    
+                    flags[position] = 1
+
+    with open( output_tsv, 'w' ) as OUT:
+        
+        if input_table in { 'file_anatomic_site', 'file_tumor_vs_normal' }:
+            
+            # Just list one column of file_alias values whose files have none of the specified tags.
+
+            print( 'file_alias', file=OUT )
+
+            for position, file_alias in enumerate( foreign_table_aliases ):
+                
+                if not seen[position]:
+                    
+                    print( file_alias, file=OUT )
+
+        else:
+            
+            print( *( [ foreign_alias_column_name ] + [ f"{column_to_keep}_null" for column_to_keep in columns_to_keep ] ), sep='\t', file=OUT )
+
+            # Aliases we never saw have no records in `input_table`: all their flags stay True.
+
+            for position, foreign_alias in enumerate( foreign_table_aliases ):
+                
+                print( *( [ foreign_alias ] + [ 'False' if flags[position] else 'True' for flags in not_null ] ), sep='\t', file=OUT )
+
+    return output_tsv
+
+def _run_timed_statement( connection, statement ):
+    
+    start_time = time.perf_counter()
+
+    connection.run( statement )
+
+    return time.perf_counter() - start_time
 
 class CDA_loader:
     
@@ -39,100 +517,117 @@ class CDA_loader:
                 
                 makedirs( target_dir )
 
-    def make_null_TSV( self, input_dir, input_table ):
+    def make_column_metadata_TSV( self, input_dir ):
         
-        input_tsv = path.join( input_dir, f"{input_table}.tsv" )
-
-        output_tsv = path.join( input_dir, f"{input_table}_nulls.tsv" )
+        """
+        Write `input_dir`/column_metadata.tsv (loaded alongside the CDA tables) from lib.get_column_metadata().
+        """
 
-        print( f"Making {output_tsv}...", end='', file=sys.stderr )
+        output_file = path.join( input_dir, 'column_metadata.tsv' )
 
-        try:
+        column_metadata_fields = [
             
-            with open( input_tsv ) as IN:
-                
-                colnames = next( IN ).rstrip( '\n' ).split( '\t' )
+            'cda_table',
+            'cda_column',
+            'column_type',
+            'summary_returns',
+            'data_returns',
+            'process_before_display',
+            'virtual_table'
+        ]
 
-                foreign_table = ''
+        column_metadata = get_column_metadata()
 
-                columns_to_keep = list()
+        with open( output_file, 'w' ) as OUT:
+            
+            print( *column_metadata_fields, sep='\t', file=OUT )
 
-                for colname in colnames:
-                    
-                    if foreign_table == '' and re.search( r'^.+_alias$', colname ) is None:
-                        sys.exit( f"Cannot find foreign table from which '{input_table}' is derived; aborting. Observed columns:\n\n{colnames}\n\n" )
+            for table_name in sorted( column_metadata ):
+                
+                # Python 3 preserves insert order for dicts. That means column data will be displayed
+                # in the order in which columns are listed in the definition (in lib.py) of
+                # get_column_metadata(). Handy. Also worth noting because it's not obvious.
 
-                    elif foreign_table == '' and colname != 'id_alias':
-                        foreign_table = re.search( r'^(.+)_alias$', colname ).group(1)
+                for column_name in column_metadata[table_name]:
+                    
+                    current_record = column_metadata[table_name][column_name]
 
-                    elif foreign_table != '' and colname != 'data_source_count' and re.search( r'^data_at_.+$', colname ) is None:
-                        columns_to_keep.append( colname )
+                    process_before_display = ''
 
-                foreign_alias_column_name = f"{foreign_table}_alias"
+                    if 'process_before_display' in current_record:
+                        
+                        process_before_display = current_record['process_before_display']
 
-                foreign_table_aliases = get_unique_values_from_tsv_column( path.join( input_dir, f"{foreign_table}_in_project.tsv" ), foreign_alias_column_name )
+                    virtual_table = ''
 
-                null_data = dict()
+                    if 'virtual_table' in current_record:
+                        
+                        virtual_table = current_record['virtual_table']
 
-                for next_line in IN:
-                    
-                    record = dict( zip( colnames, next_line.rstrip( '\n' ).split( '\t' ) ) )
+                    print( *[ table_name, column_name, current_record['column_type'], current_record['summary_returns'], current_record['data_returns'], process_before_display, virtual_table ], sep='\t', file=OUT )
 
-                    foreign_alias = record[foreign_alias_column_name]
+    def make_null_TSV( self, input_dir, input_table ):
+        
+        self.make_null_TSVs( input_dir, [ input_table ], jobs=1 )
 
-                    if foreign_alias not in null_data:
-                        null_data[foreign_alias] = dict( zip( columns_to_keep, [ True ] * len( columns_to_keep ) ) )
+    def make_null_TSVs( self, input_dir, input_tables, jobs=DEFAULT_LOAD_JOBS ):
+        
+        """
+        Make `{input_table}_nulls.tsv` for each of `input_tables`, `jobs` tables at a time. Each foreign table's
+        alias universe (from `{foreign_table}_in_project.tsv`) is read just once, no matter how many input tables
+        hang off of it, and shared read-only with the worker processes.
+        """
 
-                    for colname in columns_to_keep:
-                        if record[colname] is not None and record[colname] != '':
-                            null_data[foreign_alias][colname] = False
+        null_TSV_specs = list()
 
-        except Exception as e:
-            sys.exit( e )
+        alias_universes = dict()
 
-        with open( output_tsv, 'w' ) as OUT:
+        for input_table in input_tables:
             
-            if input_table in { 'file_anatomic_site', 'file_tumor_vs_normal' }:
-                
-                # Just list one column of file_alias values whose files have none of the specified tags.
-                print( 'file_alias', file=OUT )
+            input_tsv = path.join( input_dir, f"{input_table}.tsv" )
 
-                for file_alias in foreign_table_aliases:
-                    if file_alias not in null_data:
-                        print( file_alias, file=OUT )
+            output_tsv = path.join( input_dir, f"{input_table}_nulls.tsv" )
 
-            else:
+            with TSV_reader( input_tsv ) as IN:
                 
-                print( *( [ foreign_alias_column_name ] + [ f"{column_to_keep}_null" for column_to_keep in columns_to_keep ] ), sep='\t', file=OUT )
+                ( foreign_table, columns_to_keep ) = _get_null_TSV_columns( input_table, IN.column_names )
 
-                for foreign_alias in foreign_table_aliases:
-                    
-                    if foreign_alias not in null_data:
-                        
-                        # We never saw this `foreign_alias`. It has no records in `input_table`.
-                        print( *( [ foreign_alias ] + ( [ True ] * len( columns_to_keep ) ) ), sep='\t', file=OUT )
+            if foreign_table not in alias_universes:
+                
+                foreign_table_aliases = get_unique_values_from_tsv_column( path.join( input_dir, f"{foreign_table}_in_project.tsv" ), f"{foreign_table}_alias" )
 
-                    else:
-                        
-                        print( *( [ foreign_alias ] + [ null_data[foreign_alias][column_to_keep] for column_to_keep in columns_to_keep ] ), sep='\t', file=OUT )
+                alias_universes[foreign_table] = ( foreign_table_aliases, { foreign_alias: position for position, foreign_alias in enumerate( foreign_table_aliases ) } )
 
-        print( 'done.', file=sys.stderr )
+            null_TSV_specs.append( ( input_tsv, output_tsv, input_table, foreign_table, columns_to_keep ) )
 
-    def transform_dir_to_SQL( self, input_dir ):
-        
-        print( 'Transforming CDA TSVs to SQL...', file=sys.stderr )
+        if jobs == 1 or len( null_TSV_specs ) < 2:
+            
+            for null_TSV_spec in null_TSV_specs:
+                
+                print( f"Making {null_TSV_spec[1]}...", end='', file=sys.stderr )
 
-        preprocess_command_file = path.join( self.sql_output_dir, 'clear_table_data_indices_and_constraints.sql' )
+                _write_null_TSV( *null_TSV_spec, alias_universes=alias_universes )
 
-        table_file_dir = path.join( self.sql_output_dir, 'new_table_data' )
+                print( 'done.', file=sys.stderr )
 
-        postprocess_command_file = path.join( self.sql_output_dir, 'rebuild_indices_and_constraints.sql' )
+            return
 
-        for output_dir in [ table_file_dir ]:
+        with ProcessPoolExecutor( max_workers=min( jobs, len( null_TSV_specs ) ), initializer=_init_null_TSV_worker, initargs=( alias_universes, ) ) as executor:
             
-            if not path.exists( output_dir ):
+            futures = [ executor.submit( _write_null_TSV, *null_TSV_spec ) for null_TSV_spec in null_TSV_specs ]
+
+            for future in futures:
                 
-                makedirs( output_dir )
+                print( f"Making {future.result()}...done.", file=sys.stderr )
+
+    def get_index_and_constraint_commands( self ):
+        
+        """
+        Read self.index_and_constraint_def_file and return lists of SQL statements, in the order they should be run:
+            
+            drops: ( foreign keys, (non-PK) uniqueness constraints, primary keys, (non-PK) indexes ) and then
+            rebuilds: ( (non-PK) indexes, primary keys, (non-PK) uniqueness constraints, foreign keys )
+        """
 
         # Drop all indexes and constraints prior to data refresh, then rebuild
         # after data rows have been inserted. Avoids validation overhead during insertion.
@@ -204,55 +699,76 @@ class CDA_loader:
                         
                         sys.exit( f"Unexpected line encountered in SQL index and constraint definitions file; aborting. Offending statement:\n\n{line}\n" )
 
-        table_drop_commands = list()
+        return ( preprocess_foreign_keys, preprocess_unique_constraints, preprocess_primary_keys, preprocess_indexes, postprocess_indexes, postprocess_primary_keys, postprocess_unique_constraints, postprocess_foreign_keys )
 
-        print( '   ...transcoding CDA TSVs to SQL command sets...', file=sys.stderr )
+    def __clear_table_file_dir( self, table_file_dir ):
+        
+        # Make sure `table_file_dir` exists, and clear out table data files left over from earlier runs:
+        # 998_upload_to_Cloud_SQL_instance.bash imports every .sql.gz file in it.
 
-        for input_file_basename in sorted( listdir( input_dir ) ):
+        if not path.exists( table_file_dir ):
             
-            if re.search( r'\.tsv(\.gz)?$', input_file_basename ) is not None:
+            makedirs( table_file_dir )
+
+        for old_file_basename in listdir( table_file_dir ):
+            
+            if re.search( r'\.sql(\.gz)?$', old_file_basename ) is not None:
                 
-                input_file = path.join( input_dir, input_file_basename )
+                remove( path.join( table_file_dir, old_file_basename ) )
 
-                target_table = re.sub( r'\.tsv(\.gz)?$', '', input_file_basename )
+    def transform_dir_to_SQL( self, input_dir, compression_level=DEFAULT_SQL_COMPRESSION_LEVEL, jobs=DEFAULT_LOAD_JOBS ):
+        
+        """
+        Write one gzipped (at `compression_level`) COPY file per CDA TSV in `input_dir`, `jobs` files at a time,
+        plus the pre- and post-load index management scripts. Table data files left over from earlier runs are
+        removed first.
+        """
+
+        print( 'Transforming CDA TSVs to SQL...', file=sys.stderr )
 
-                # Clear previous table data via TRUNCATE.
+        preprocess_command_file = path.join( self.sql_output_dir, 'clear_table_data_indices_and_constraints.sql' )
 
-                table_drop_commands.append( f"TRUNCATE {target_table};" )
+        table_file_dir = path.join( self.sql_output_dir, 'new_table_data' )
+
+        postprocess_command_file = path.join( self.sql_output_dir, 'rebuild_indices_and_constraints.sql' )
 
-                # Transcode TSV rows into the body of a prepared SQL COPY statement, to populate the postgres table corresponding to the TSV being scanned.
+        self.__clear_table_file_dir( table_file_dir )
 
-                output_file_basename = re.sub( r'\.tsv(\.gz)?$', '.sql.gz', input_file_basename )
+        ( preprocess_foreign_keys, preprocess_unique_constraints, preprocess_primary_keys, preprocess_indexes, postprocess_indexes, postprocess_primary_keys, postprocess_unique_constraints, postprocess_foreign_keys ) = self.get_index_and_constraint_commands()
 
-                output_file = path.join( table_file_dir, output_file_basename )
+        table_drop_commands = list()
 
-                # Transcode the TSV data directly into a COPY block.
+        print( '   ...transcoding CDA TSVs to SQL command sets...', file=sys.stderr )
 
-                print( f"      ...{input_file_basename} -> {output_file_basename}...", file=sys.stderr )
+        # Transcode TSV rows into the body of a prepared SQL COPY statement, to populate the postgres table corresponding to each TSV, `jobs` files at a time.
 
-                IN = open( input_file )
+        with ProcessPoolExecutor( max_workers=jobs ) as executor:
+            
+            transcodings = list()
 
-                if re.search( r'\.tsv\.gz$', input_file ) is not None:
+            for input_file_basename in sorted( listdir( input_dir ) ):
+                
+                if re.search( r'\.tsv(\.gz)?$', input_file_basename ) is not None:
                     
-                    IN.close()
+                    input_file = path.join( input_dir, input_file_basename )
 
-                    IN = gzip.open( input_file, 'rt' )
+                    target_table = re.sub( r'\.tsv(\.gz)?$', '', input_file_basename )
 
-                with gzip.open( output_file, 'wt' ) as OUT:
-                    
-                    colnames = next( IN ).rstrip( '\n' ).split( '\t' )
+                    # Clear previous table data via TRUNCATE.
 
-                    # COPY diagnosis (id, primary_diagnosis, age_at_diagnosis, morphology, stage, grade, method_of_diagnosis) FROM stdin;
+                    table_drop_commands.append( f"TRUNCATE {target_table};" )
 
-                    print( f"COPY {target_table} (" + ', '.join( colnames ) + ') FROM stdin;', end='\n', file=OUT )
+                    output_file_basename = re.sub( r'\.tsv(\.gz)?$', '.sql.gz', input_file_basename )
 
-                    for next_line in IN:
-                        
-                        record = dict( zip( colnames, [ value for value in next_line.rstrip( '\n' ).split( '\t' ) ] ) )
+                    output_file = path.join( table_file_dir, output_file_basename )
+
+                    transcodings.append( ( f"      ...{input_file_basename} -> {output_file_basename}...", executor.submit( _transcode_tsv_to_SQL, input_file, target_table, output_file, compression_level ) ) )
 
-                        print( '\t'.join( [ r'\N' if len( record[colname] ) == 0 else record[colname] for colname in colnames ] ), end='\n', file=OUT )
+            for ( message, future ) in transcodings:
+                
+                future.result()
 
-                    print( r'\.', end='\n\n', file=OUT )
+                print( message, file=sys.stderr )
 
         print( '   ...done transcoding unaliased TSVs to SQL command sets.', file=sys.stderr )
 
@@ -374,4 +890,341 @@ class CDA_loader:
 
         print( '...done transforming CDA TSVs to SQL.', file=sys.stderr )
 
+    def load_dir_to_postgres( self, input_dir, connection_parameters, jobs=DEFAULT_LOAD_JOBS ):
+        
+        """
+        Load every CDA TSV in `input_dir` straight into the PostgreSQL database described by `connection_parameters`
+        (see connect_to_postgres()), replacing each target table's rows: drop indexes and constraints and truncate
+        the target tables, stream the TSVs in via COPY FROM STDIN (`jobs` tables at a time, one connection per
+        table; with jobs=1, one table after another in this process), then rebuild indexes and constraints.
+        Equivalent to running transform_dir_to_SQL() and then importing its output, without writing or uploading
+        any intermediate SQL.
+        """
+
+        print( 'Loading CDA TSVs into PostgreSQL...', file=sys.stderr )
+
+        ( preprocess_foreign_keys, preprocess_unique_constraints, preprocess_primary_keys, preprocess_indexes, postprocess_indexes, postprocess_primary_keys, postprocess_unique_constraints, postprocess_foreign_keys ) = self.get_index_and_constraint_commands()
+
+        input_files = dict()
+
+        for input_file_basename in sorted( listdir( input_dir ) ):
+            
+            if re.search( r'\.tsv(\.gz)?$', input_file_basename ) is not None:
+                
+                input_files[re.sub( r'\.tsv(\.gz)?$', '', input_file_basename )] = path.join( input_dir, input_file_basename )
+
+        table_drop_commands = [ f"TRUNCATE {target_table};" for target_table in input_files ]
+
+        connection = connect_to_postgres( connection_parameters )
+
+        try:
+            
+            print( '   ...dropping indexes and constraints and deleting old table rows...', end='', file=sys.stderr )
+
+            for statement in preprocess_foreign_keys + preprocess_unique_constraints + preprocess_primary_keys + preprocess_indexes + table_drop_commands:
+                
+                connection.run( statement )
+
+            print( 'done.', file=sys.stderr )
+
+            print( '   ...streaming CDA TSVs into tables...', file=sys.stderr )
+
+            # Biggest tables first, so the long loads aren't left until last.
+
+            target_tables = sorted( input_files, key=lambda target_table: path.getsize( input_files[target_table] ), reverse=True )
+
+            if jobs == 1:
+                
+                for target_table in target_tables:
+                    
+                    try:
+                        
+                        print( f"      ...{_copy_tsv_into_table( connection_parameters, input_files[target_table], target_table )} loaded.", file=sys.stderr )
+
+                    except Exception as e:
+                        
+                        sys.exit( f"FATAL: COPY into PostgreSQL failed ({e}); indexes and constraints have not been rebuilt. Aborting." )
+
+            else:
+                
+                with ProcessPoolExecutor( max_workers=jobs ) as executor:
+                    
+                    futures = [ executor.submit( _copy_tsv_into_table, connection_parameters, input_files[target_table], target_table ) for target_table in target_tables ]
+
+                    for future in as_completed( futures ):
+                        
+                        try:
+                            
+                            print( f"      ...{future.result()} loaded.", file=sys.stderr )
+
+                        except Exception as e:
+                            
+                            sys.exit( f"FATAL: COPY into PostgreSQL failed ({e}); indexes and constraints have not been rebuilt. Aborting." )
+
+            print( '   ...done streaming CDA TSVs into tables.', file=sys.stderr )
+
+        finally:
+            
+            connection.close()
+
+        self.rebuild_indexes_and_constraints( connection_parameters, jobs=jobs )
+
+        print( '...done loading CDA TSVs into PostgreSQL.', file=sys.stderr )
+
+    def rebuild_indexes_and_constraints( self, connection_parameters, jobs=DEFAULT_LOAD_JOBS, timing_log=None ):
+        
+        """
+        Run the rebuild statements from self.index_and_constraint_def_file against the database described by
+        `connection_parameters`, up to `jobs` at once (one connection each), as soon as their dependencies allow:
+            
+            * a foreign key waits for every primary key and uniqueness constraint on the table it references
+            * an ALTER TABLE (any key constraint) never runs alongside anything else touching its table(s), so
+              nothing ever queues behind (or deadlocks on) its table locks
+            * CREATE INDEX statements on the same table run side by side (they only need SHARE locks)
+
+        Per-statement timings are written to `timing_log` (by default, in self.sql_output_dir) in completion order.
+        """
+
+        print( '   ...rebuilding indexes and constraints...', file=sys.stderr )
+
+        if timing_log is None:
+            
+            timing_log = path.join( self.sql_output_dir, 'index_and_constraint_rebuild_timings.tsv' )
+
+        postprocess_statements = self.get_index_and_constraint_commands()[4:]
+
+        # One entry per statement, in the order a serial rebuild would run them: ( statement, statement type, tables it touches, whether it needs them to itself ).
+
+        rebuild_steps = list()
+
+        for ( statement_type, statements ) in zip( [ 'index', 'primary key', 'unique', 'foreign key' ], postprocess_statements ):
+            
+            for statement in statements:
+                
+                if statement_type == 'index':
+                    
+                    rebuild_steps.append( ( statement, statement_type, [ re.search( r'\sON\s+(?:ONLY\s+)?([^\s(]+)', statement ).group(1) ], False ) )
+
+                elif statement_type == 'foreign key':
+                    
+                    rebuild_steps.append( ( statement, statement_type, [ re.search( r'^ALTER TABLE ONLY\s+(\S+)', statement ).group(1), re.search( r'\sREFERENCES\s+([^\s(]+)', statement ).group(1) ], True ) )
+
+                else:
+                    
+                    rebuild_steps.append( ( statement, statement_type, [ re.search( r'^ALTER TABLE ONLY\s+(\S+)', statement ).group(1) ], True ) )
+
+        key_steps = dict()
+
+        for step_index, ( statement, statement_type, tables, exclusive ) in enumerate( rebuild_steps ):
+            
+            if statement_type in { 'primary key', 'unique' }:
+                
+                key_steps.setdefault( tables[0], set() ).add( step_index )
+
+        dependencies = [ key_steps.get( tables[1], set() ) if statement_type == 'foreign key' else set() for ( statement, statement_type, tables, exclusive ) in rebuild_steps ]
+
+        pending_steps = list( range( len( rebuild_steps ) ) )
+
+        completed_steps = set()
+
+        # Tables in use by running statements: how many shared (CREATE INDEX) users each has, and which are held exclusively (ALTER TABLE).
+
+        shared_tables = Counter()
+
+        exclusive_tables = set()
+
+        connections = list()
+
+        running_steps = dict()
+
+        try:
+            
+            for i in range( max( 1, min( jobs, len( rebuild_steps ) ) ) ):
+                
+                connections.append( connect_to_postgres( connection_parameters ) )
+
+            idle_connections = list( connections )
+
+            with ThreadPoolExecutor( max_workers=len( connections ) ) as executor, open( timing_log, 'w' ) as TIMINGS:
+                
+                print( *[ 'statement_type', 'target_table', 'seconds', 'statement' ], sep='\t', file=TIMINGS )
+
+                while len( pending_steps ) > 0 or len( running_steps ) > 0:
+                    
+                    # Start everything (up to the number of free connections) that's ready to go, in serial-rebuild order.
+
+                    for step_index in list( pending_steps ):
+                        
+                        if len( idle_connections ) == 0:
+                            
+                            break
+
+                        ( statement, statement_type, tables, exclusive ) = rebuild_steps[step_index]
+
+                        if not dependencies[step_index] <= completed_steps or any( table in exclusive_tables or ( exclusive and shared_tables[table] > 0 ) for table in tables ):
+                            
+                            continue
+
+                        if exclusive:
+                            
+                            exclusive_tables.update( tables )
+
+                        else:
+                            
+                            shared_tables.update( tables )
+
+                        pending_steps.remove( step_index )
+
+                        connection = idle_connections.pop()
+
+                        running_steps[executor.submit( _run_timed_statement, connection, statement )] = ( step_index, connection )
+
+                    if len( running_steps ) == 0:
+                        
+                        sys.exit( f"FATAL: Can't schedule remaining index/constraint rebuild statements (unsatisfiable dependencies); aborting. Remaining statements:\n\n" + '\n'.join( [ rebuild_steps[step_index][0] for step_index in pending_steps ] ) + '\n' )
+
+                    finished_futures, unfinished_futures = wait( running_steps, return_when=FIRST_COMPLETED )
+
+                    for future in finished_futures:
+                        
+                        ( step_index, connection ) = running_steps.pop( future )
+
+                        ( statement, statement_type, tables, exclusive ) = rebuild_steps[step_index]
+
+                        try:
+                            
+                            elapsed_seconds = future.result()
+
+                        except Exception as e:
+                            
+                            sys.exit( f"FATAL: Rebuild statement failed ({e}); aborting. Offending statement:\n\n{statement}\n" )
+
+                        if exclusive:
+                            
+                            exclusive_tables.difference_update( tables )
+
+                        else:
+                            
+                            shared_tables.subtract( tables )
+
+                        completed_steps.add( step_index )
+
+                        idle_connections.append( connection )
+
+                        print( *[ statement_type, tables[0], f"{elapsed_seconds:.3f}", statement ], sep='\t', file=TIMINGS )
+
+                        print( f"      ...{elapsed_seconds:.1f}s: {statement}", file=sys.stderr )
+
+        finally:
+            
+            for connection in connections:
+                
+                connection.close()
+
+        print( '   ...done rebuilding indexes and constraints.', file=sys.stderr )
+
+    def transform_dir_to_delta_SQL( self, input_dir, previous_dir, compression_level=DEFAULT_SQL_COMPRESSION_LEVEL, jobs=DEFAULT_LOAD_JOBS ):
+        
+        """
+        Delta-mode alternative to transform_dir_to_SQL(), for databases already loaded from the CDA TSVs in `previous_dir`
+        (a snapshot of the last directory loaded): write SQL (in the same places, under the same names, so
+        998_upload_to_Cloud_SQL_instance.bash can import it as-is) that brings every table up to date with `input_dir`
+        without reloading it from scratch.
+
+        Tables whose contents haven't changed (same content hash) get no SQL at all. Tables with a unique `id_alias`
+        column and unchanged columns get a keyed row-level diff: removed and changed rows are deleted by id_alias, new and
+        changed rows are COPYed in. Anything else (new tables, changed columns, no usable key) is truncated and reloaded.
+        Each table's changes run in a transaction of their own. Foreign keys are dropped beforehand and rebuilt afterward,
+        so tables can be updated in any order; other indexes and constraints stay in place (and speed up the deletes).
+
+        Remember to snapshot `input_dir` once it's loaded: it's the `previous_dir` for the next delta.
+        """
+
+        print( f"Transforming CDA TSVs to SQL (delta against '{previous_dir}')...", file=sys.stderr )
+
+        preprocess_command_file = path.join( self.sql_output_dir, 'clear_table_data_indices_and_constraints.sql' )
+
+        table_file_dir = path.join( self.sql_output_dir, 'new_table_data' )
+
+        postprocess_command_file = path.join( self.sql_output_dir, 'rebuild_indices_and_constraints.sql' )
+
+        self.__clear_table_file_dir( table_file_dir )
+
+        previous_files = dict()
+
+        for previous_file_basename in listdir( previous_dir ):
+            
+            if re.search( r'\.tsv(\.gz)?$', previous_file_basename ) is not None:
+                
+                previous_files[re.sub( r'\.tsv(\.gz)?$', '', previous_file_basename )] = path.join( previous_dir, previous_file_basename )
+
+        ( preprocess_foreign_keys, preprocess_unique_constraints, preprocess_primary_keys, preprocess_indexes, postprocess_indexes, postprocess_primary_keys, postprocess_unique_constraints, postprocess_foreign_keys ) = self.get_index_and_constraint_commands()
+
+        print( '   ...diffing CDA TSVs against the previous load...', file=sys.stderr )
+
+        with ProcessPoolExecutor( max_workers=jobs ) as executor:
+            
+            deltas = list()
+
+            for input_file_basename in sorted( listdir( input_dir ) ):
+                
+                if re.search( r'\.tsv(\.gz)?$', input_file_basename ) is not None:
+                    
+                    target_table = re.sub( r'\.tsv(\.gz)?$', '', input_file_basename )
+
+                    output_file = path.join( table_file_dir, target_table + '.sql.gz' )
+
+                    deltas.append( ( input_file_basename, executor.submit( _write_table_delta, path.join( input_dir, input_file_basename ), previous_files.get( target_table, None ), target_table, output_file, compression_level ) ) )
+
+            for ( input_file_basename, future ) in deltas:
+                
+                ( delta_type, inserted, updated, deleted ) = future.result()
+
+                if delta_type == 'unchanged':
+                    
+                    print( f"      ...{input_file_basename}: unchanged.", file=sys.stderr )
+
+                elif delta_type == 'reload':
+                    
+                    print( f"      ...{input_file_basename}: full reload.", file=sys.stderr )
+
+                else:
+                    
+                    print( f"      ...{input_file_basename}: {inserted} inserted, {updated} updated, {deleted} deleted.", file=sys.stderr )
+
+        print( '   ...done diffing CDA TSVs.', file=sys.stderr )
+
+        print( '   ...preparing pre- and post-update directives (foreign key drops and rebuilds)...', end='', file=sys.stderr )
+
+        with open( preprocess_command_file, 'w' ) as PRE_CMD:
+            
+            print( '--', file=PRE_CMD )
+
+            print( '-- drop foreign key constraints:', file=PRE_CMD )
+
+            print( '--', file=PRE_CMD )
+
+            for line in preprocess_foreign_keys:
+                
+                print( line, file=PRE_CMD )
+
+            print( end='\n\n', file=PRE_CMD )
+
+        with open( postprocess_command_file, 'w' ) as POST_CMD:
+            
+            print( '--', file=POST_CMD )
+
+            print( '-- rebuild foreign key constraints:', file=POST_CMD )
+
+            print( '--', file=POST_CMD )
+
+            for line in postprocess_foreign_keys:
+                
+                print( line, file=POST_CMD )
+
+            print( end='\n\n', file=POST_CMD )
+
+        print( 'done.', file=sys.stderr )
+
+        print( '...done transforming CDA TSVs to SQL.', file=sys.stderr )
 
@@ -0,0 +1,219 @@
+import hashlib
+import os
+import pickle
+import sys
+
+from os import makedirs, path
+
+# Where built lookup maps are cached between scripts. Override by setting this environment
+# variable; set it to an empty string to turn caching off.
+
+CACHE_DIR_ENV_VAR = 'CDA_LOOKUP_MAP_CACHE_DIR'
+
+DEFAULT_CACHE_DIR = path.join( 'auxiliary_metadata', '__lookup_map_cache' )
+
+# Total size (in bytes) the cache directory may grow to. Once a new entry takes it past this,
+# least-recently-used entries are deleted until it fits again. Override by setting this
+# environment variable.
+
+MAX_CACHE_BYTES_ENV_VAR = 'CDA_LOOKUP_MAP_CACHE_MAX_BYTES'
+
+DEFAULT_MAX_CACHE_BYTES = 4 * 1024 * 1024 * 1024
+
+# Chunk size for hashing source files.
+
+HASH_CHUNK_BYTES = 4 * 1024 * 1024
+
+# Bump this whenever the on-disk format or the semantics of cached maps change.
+
+CACHE_FORMAT_VERSION = 2
+
+def get_cache_dir( ):
+    
+    cache_dir = os.environ.get( CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR )
+
+    return cache_dir if cache_dir != '' else None
+
+def get_max_cache_bytes( ):
+    
+    return int( os.environ.get( MAX_CACHE_BYTES_ENV_VAR, DEFAULT_MAX_CACHE_BYTES ) )
+
+def get_source_signature( file_path ):
+    
+    """
+    Identify the current contents of `file_path` by their SHA-256 hash.
+    """
+
+    file_hash = hashlib.sha256()
+
+    with open( file_path, 'rb' ) as IN:
+        
+        for chunk in iter( lambda: IN.read( HASH_CHUNK_BYTES ), b'' ):
+            
+            file_hash.update( chunk )
+
+    return file_hash.hexdigest()
+
+def get_cache_file( file_path, gzipped, map_specs ):
+    
+    """
+    One cache file per ( source file, gzipped, map specs ) combination. The source file's signature
+    is stored inside the cache file (not in its name), so a changed source overwrites its old entry
+    instead of leaving it behind.
+    """
+
+    cache_dir = get_cache_dir()
+
+    if cache_dir is None:
+        
+        return None
+
+    # Fill in defaults so equivalent specs (e.g. with and without an explicit 'one_to_one') share an entry.
+
+    normalized_specs = list()
+
+    for map_spec in map_specs:
+        
+        where_field = map_spec.get( 'where_field', None )
+
+        normalized_specs.append( (
+            
+            map_spec['from_field'],
+            map_spec['to_field'],
+            where_field,
+            map_spec.get( 'where_value', None ) if where_field is not None else None,
+            map_spec.get( 'cardinality', 'one_to_one' )
+        ) )
+
+    key = repr( ( CACHE_FORMAT_VERSION, path.abspath( file_path ), bool( gzipped ), normalized_specs ) )
+
+    return path.join( cache_dir, f"{hashlib.sha256( key.encode( 'utf-8' ) ).hexdigest()}.pickle" )
+
+def load_cached_maps( file_path, gzipped, map_specs, source_signature ):
+    
+    """
+    Return the list of maps previously cached for these arguments, or None if there's no
+    cache entry or it was made from contents other than those with `source_signature`.
+    """
+
+    cache_file = get_cache_file( file_path, gzipped, map_specs )
+
+    if cache_file is None or not path.exists( cache_file ):
+        
+        return None
+
+    try:
+        
+        with open( cache_file, 'rb' ) as IN:
+            
+            cached_signature = pickle.load( IN )
+
+            if cached_signature != source_signature:
+                
+                return None
+
+            maps = pickle.load( IN )
+
+        # Mark this entry as recently used, for prune_cache().
+
+        os.utime( cache_file )
+
+        return maps
+
+    except ( OSError, EOFError, pickle.UnpicklingError ) as e:
+        
+        print( f"WARNING: Ignoring unreadable lookup-map cache file '{cache_file}': {e}", file=sys.stderr )
+
+        return None
+
+def save_cached_maps( file_path, gzipped, map_specs, maps, source_signature ):
+    
+    """
+    Cache `maps`, built from `file_path` while it had signature `source_signature` (taken
+    before the file was read, so a file that changes mid-read won't be cached as current),
+    then prune the cache back under its size limit.
+    """
+
+    cache_file = get_cache_file( file_path, gzipped, map_specs )
+
+    if cache_file is None or source_signature != get_source_signature( file_path ):
+        
+        return
+
+    try:
+        
+        makedirs( path.dirname( cache_file ), exist_ok=True )
+
+        temp_file = f"{cache_file}.{os.getpid()}.tmp"
+
+        with open( temp_file, 'wb' ) as OUT:
+            
+            pickle.dump( source_signature, OUT, protocol=pickle.HIGHEST_PROTOCOL )
+
+            pickle.dump( maps, OUT, protocol=pickle.HIGHEST_PROTOCOL )
+
+        os.replace( temp_file, cache_file )
+
+    except OSError as e:
+        
+        print( f"WARNING: Could not write lookup-map cache file '{cache_file}': {e}", file=sys.stderr )
+
+        return
+
+    prune_cache( keep_file=cache_file )
+
+def prune_cache( max_bytes=None, keep_file=None ):
+    
+    """
+    Delete least-recently-used cache entries (and any stale temp files) until the cache
+    directory holds at most `max_bytes` (default: get_max_cache_bytes()). `keep_file`, if
+    given, is never deleted.
+    """
+
+    cache_dir = get_cache_dir()
+
+    if cache_dir is None or not path.isdir( cache_dir ):
+        
+        return
+
+    if max_bytes is None:
+        
+        max_bytes = get_max_cache_bytes()
+
+    entries = list()
+
+    for file_name in os.listdir( cache_dir ):
+        
+        file_path = path.join( cache_dir, file_name )
+
+        try:
+            
+            file_stat = os.stat( file_path )
+
+        except OSError:
+            
+            continue
+
+        entries.append( ( file_stat.st_mtime_ns, file_stat.st_size, file_path ) )
+
+    total_bytes = sum( file_size for mtime_ns, file_size, file_path in entries )
+
+    for mtime_ns, file_size, file_path in sorted( entries ):
+        
+        if total_bytes <= max_bytes:
+            
+            break
+
+        if file_path == keep_file:
+            
+            continue
+
+        try:
+            
+            os.remove( file_path )
+
+            total_bytes -= file_size
+
+        except OSError:
+            
+            pass
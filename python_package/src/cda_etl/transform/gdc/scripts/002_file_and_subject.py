@@ -5,7 +5,8 @@ import sys
 
 from os import makedirs, path
 
-from cda_etl.lib import get_cda_project_ancestors, get_current_timestamp, get_universal_value_deletion_patterns, load_tsv_as_dict, map_columns_one_to_one, map_columns_one_to_many
+from cda_etl.columnar_table import Columnar_table
+from cda_etl.lib import get_cda_project_ancestors, get_current_timestamp, get_universal_value_deletion_patterns, map_columns_one_to_one, map_columns_one_to_many
 
 # PARAMETERS
 
@@ -138,7 +139,7 @@ print( f"[{get_current_timestamp()}] Loading file metadata...", end='', file=sys
 
 cda_file_records = dict()
 
-file = load_tsv_as_dict( file_input_tsv )
+file = Columnar_table( file_input_tsv )
 
 for file_id in file:
     
@@ -419,7 +420,7 @@ print( f"[{get_current_timestamp()}] Loading ID provenance for {upstream_data_so
 # does not currently occur, but why assume it never will?), and we want
 # to make sure we cache identifier information for all cases. Thus:
 
-case = load_tsv_as_dict( case_input_tsv )
+case = Columnar_table( case_input_tsv )
 
 # upstream_identifiers[cda_table][entity_id][data_source][source_field].add( value )
 
@@ -473,7 +474,7 @@ print( f"[{get_current_timestamp()}] Loading {upstream_data_source} demographic
 
 case_has_demographic = map_columns_one_to_many( demographic_of_case_input_tsv, 'case_id', 'demographic_id' )
 
-demographic = load_tsv_as_dict( demographic_input_tsv )
+demographic = Columnar_table( demographic_input_tsv )
 
 cda_subject_records = dict()
 
@@ -568,7 +569,7 @@ slide_from_portion = map_columns_one_to_many( slide_from_portion_input_tsv, 'sli
 
 # Load sample metadata.
 
-sample = load_tsv_as_dict( sample_input_tsv )
+sample = Columnar_table( sample_input_tsv )
 
 print( 'done.', file=sys.stderr )
 
@@ -576,7 +577,7 @@ print( f"[{get_current_timestamp()}] Loading file-entity associations and import
 
 # Load associations between files and other entities.
 
-file_associated_with_entity = load_tsv_as_dict( file_associated_with_entity_input_tsv, id_column_count=2 )
+file_associated_with_entity = Columnar_table( file_associated_with_entity_input_tsv, id_column_count=2 )
 
 # (Transitively) traverse file<->sample associations and attach relevant metadata to corresponding CDA file records.
 
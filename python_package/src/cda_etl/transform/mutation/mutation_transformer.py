@@ -1,10 +1,10 @@
 import gzip
 import jsonlines
-import re
 import sys
 
 from os import makedirs, path
 
+from cda_etl.harmonizer import Column_harmonizer, load_harmonization_maps
 from cda_etl.lib import deduplicate_and_sort_unsorted_file_with_header, get_universal_value_deletion_patterns, load_tsv_as_dict, map_columns_one_to_many, map_columns_one_to_one, sort_file_with_header
 
 class mutation_transformer:
@@ -16,7 +16,7 @@ class mutation_transformer:
         source_version = None, # ISB-CGC-assigned version suffix on mutation table names, e.g. source_version == 'hg38_gdc_current' --> TCGA mutations table address inside BQ isb-cgc-bq project space == 'TCGA.masked_somatic_mutation_hg38_gdc_current'
         substitution_log_dir = None
     ):
-
+        
         self.columns_to_keep = columns_to_keep
         self.source_datasets = source_datasets
         self.source_version = source_version
@@ -54,73 +54,21 @@ class mutation_transformer:
 
         harmonization_map_dir = path.join( '.', 'harmonization_maps' )
 
-        harmonization_map_index = path.join( harmonization_map_dir, '000_cda_column_targets.tsv' )
-
         self.delete_everywhere = get_universal_value_deletion_patterns()
 
         # Load harmonization value maps by column.
 
-        self.harmonized_value = dict()
-
-        with open( harmonization_map_index )  as IN:
-            
-            colnames = next( IN ).rstrip( '\n' ).split( '\t' )
-
-            for line in [ next_line.rstrip( '\n' ) for next_line in IN ]:
-                
-                row_dict = dict( zip( colnames, line.split( '\t' ) ) )
-
-                table = row_dict['cda_table']
-
-                if table == 'mutation':
-                    
-                    column = row_dict['cda_column']
-
-                    concept_map_name = row_dict['concept_map_name']
-
-                    map_file = path.join( harmonization_map_dir, f"{concept_map_name}.tsv" )
-
-                    if column not in self.harmonized_value:
-                        
-                        self.harmonized_value[column] = dict()
-
-                    with open( map_file ) as MAP:
-                        
-                        header_line = next( MAP ).rstrip( '\n' )
-
-                        if concept_map_name == 'anatomic_site':
-                            
-                            for ( old_value, uberon_id, uberon_name ) in [ next_term_tuple.rstrip( '\n' ).split( '\t' ) for next_term_tuple in MAP ]:
-                                
-                                if uberon_name != '__CDA_UNASSIGNED__':
-                                    
-                                    self.harmonized_value[column][old_value] = uberon_name
+        self.harmonized_value = load_harmonization_maps( harmonization_map_dir, tables={ 'mutation' } ).get( 'mutation', dict() )
 
-                        elif concept_map_name == 'disease':
-                            
-                            for ( old_value, icd_code, icd_name, do_id, do_name, ncit_codes ) in [ next_term_tuple.rstrip( '\n' ).split( '\t' ) for next_term_tuple in MAP ]:
-                                
-                                if icd_name != '__CDA_UNASSIGNED__':
-                                    
-                                    self.harmonized_value[column][old_value] = icd_name
+        # Compile one harmonizer per output column: harmonized columns get mapped and then QC'd,
+        # everything else just gets QC'd. Each harmonizer also counts the value substitutions it
+        # performs.
 
-                        elif concept_map_name == 'species':
-                            
-                            for ( old_value, ncbi_tax_id, ncbi_tax_sci_name, cda_common_name ) in [ next_term_tuple.rstrip( '\n' ).split( '\t' ) for next_term_tuple in MAP ]:
-                                
-                                if cda_common_name != '__CDA_UNASSIGNED__':
-                                    
-                                    self.harmonized_value[column][old_value] = cda_common_name
+        self.column_harmonizers = dict()
 
-                        else:
-                            
-                            for ( old_value, new_value ) in [ next_term_pair.rstrip( '\n' ).split( '\t' ) for next_term_pair in MAP ]:
-                                
-                                self.harmonized_value[column][old_value] = new_value
-
-        # Count occurrences of all value substitutions.
-
-        self.all_subs_performed = dict()
+        for column in self.columns_to_keep:
+            
+            self.column_harmonizers[column] = Column_harmonizer( value_map=self.harmonized_value.get( column, None ), delete_everywhere=self.delete_everywhere )
 
         # Spit out a logger message every `self.display_increment` lines while transcoding.
 
@@ -263,73 +211,11 @@ class mutation_transformer:
                                             
                                             old_value = ''
 
-                                        new_value = ''
-
-                                        # Harmonize values as directed by the contents of the `harmonization_map_index` file (cf. __init__() definition above).
-
-                                        if column in self.harmonized_value:
-                                            
-                                            if old_value is not None and old_value.strip().lower() in self.harmonized_value[column] and self.harmonized_value[column][old_value.strip().lower()] != 'null':
-                                                
-                                                new_value = self.harmonized_value[column][old_value.strip().lower()]
-
-                                            elif old_value is not None and old_value.strip().lower() not in self.harmonized_value[column]:
-                                                
-                                                # Preserve values we haven't seen or mapped yet.
-
-                                                new_value = old_value
-
-                                            # Check target values for global cleanup: `self.delete_everywhere` takes precedence.
-
-                                            if re.sub( r'\s', r'', new_value.strip().lower() ) in self.delete_everywhere:
-                                                
-                                                new_value = ''
-
-                                            if column not in self.all_subs_performed:
-                                                
-                                                self.all_subs_performed[column] = dict()
-
-                                            if old_value not in self.all_subs_performed[column]:
-                                                
-                                                self.all_subs_performed[column][old_value] = {
-                                                    new_value : 1
-                                                }
+                                        # Harmonize values as directed by the contents of the harmonization map index
+                                        # (cf. __init__() definition above). Values slated for global deletion are
+                                        # deleted from all columns, harmonized or not.
 
-                                            elif new_value not in self.all_subs_performed[column][old_value]:
-                                                
-                                                self.all_subs_performed[column][old_value][new_value] = 1
-
-                                            else:
-                                                
-                                                self.all_subs_performed[column][old_value][new_value] = self.all_subs_performed[column][old_value][new_value] + 1
-
-                                        elif not isinstance( old_value, bool ) and re.sub( r'\s', r'', old_value.strip().lower() ) in self.delete_everywhere:
-                                            
-                                            # This column is not harmonized, but this value is slated for global deletion.
-
-                                            if column not in self.all_subs_performed:
-                                                
-                                                self.all_subs_performed[column] = dict()
-
-                                            if old_value not in self.all_subs_performed[column]:
-                                                
-                                                self.all_subs_performed[column][old_value] = {
-                                                    '' : 1
-                                                }
-
-                                            elif '' not in self.all_subs_performed[column][old_value]:
-                                                
-                                                self.all_subs_performed[column][old_value][''] = 1
-
-                                            else:
-                                                
-                                                self.all_subs_performed[column][old_value][''] = self.all_subs_performed[column][old_value][''] + 1
-
-                                        else:
-                                            
-                                            # Column not harmonized; value not slated for deletion. Preserve value as is.
-
-                                            new_value = old_value
+                                        new_value = self.column_harmonizers[column].harmonize_value( old_value )
 
                                         result_row.append( new_value )
                                         unharmonized_result_row.append( old_value )
@@ -445,19 +331,25 @@ class mutation_transformer:
 
         print( 'Dumping substitution logs...', end='', file=sys.stderr )
 
-        for column in sorted( self.all_subs_performed ):
+        for column in sorted( self.column_harmonizers ):
             
+            substitutions = self.column_harmonizers[column].substitutions()
+
+            if len( substitutions ) == 0:
+                
+                continue
+
             log_file = path.join( self.substitution_log_dir, f"mutation.{column}.substitution_log.tsv" )
 
             with open( log_file, 'w' ) as OUT:
                 
                 print( *[ 'raw_value', 'harmonized_value', 'number_of_substitutions' ], sep='\t', file=OUT )
 
-                for old_value in sorted( self.all_subs_performed[column] ):
+                for old_value in sorted( substitutions ):
                     
-                    for new_value in sorted( self.all_subs_performed[column][old_value] ):
+                    for new_value in sorted( substitutions[old_value] ):
                         
-                        print( *[ old_value, new_value, self.all_subs_performed[column][old_value][new_value] ], sep='\t', file=OUT )
+                        print( *[ old_value, new_value, substitutions[old_value][new_value] ], sep='\t', file=OUT )
 
         print( 'done.', end='\n\n', file=sys.stderr )
 
@@ -0,0 +1,239 @@
+import gzip
+import io
+import os
+import sys
+
+from operator import itemgetter
+
+# Size (in bytes) of the read buffer we put under every TSV we open. Most of our
+# tables are read start to finish, so big sequential reads are much cheaper than
+# the 8K default.
+
+DEFAULT_BUFFER_SIZE = 4 * 1024 * 1024
+
+def open_tsv( file_path, gzipped=False, buffer_size=DEFAULT_BUFFER_SIZE ):
+    
+    """
+    Open a TSV for reading as text, with a large read buffer. Files are decompressed on the fly
+    if `gzipped` is True or `file_path` ends in '.gz'.
+    """
+
+    if gzipped or file_path.endswith( '.gz' ):
+        
+        return io.TextIOWrapper( io.BufferedReader( gzip.GzipFile( file_path, 'rb' ), buffer_size=buffer_size ) )
+
+    return open( file_path, buffering=buffer_size )
+
+def get_byte_range_shards( file_path, shard_count ):
+    
+    """
+    Cut the data rows of an uncompressed, headed TSV into (at most) `shard_count` contiguous
+    pieces of roughly equal size. Returns a list of ( start, end ) byte offsets, each starting
+    at the beginning of a line; together they cover every data row exactly once.
+    """
+
+    file_size = os.path.getsize( file_path )
+
+    with open( file_path, 'rb' ) as IN:
+        
+        IN.readline()
+
+        data_start = IN.tell()
+
+        boundaries = [ data_start ]
+
+        for shard_index in range( 1, shard_count ):
+            
+            nominal_boundary = data_start + ( file_size - data_start ) * shard_index // shard_count
+
+            # Move each boundary forward to the start of the next line.
+
+            if nominal_boundary <= boundaries[-1]:
+                
+                continue
+
+            IN.seek( nominal_boundary - 1 )
+
+            IN.readline()
+
+            boundary = IN.tell()
+
+            if boundary > boundaries[-1] and boundary < file_size:
+                
+                boundaries.append( boundary )
+
+    boundaries.append( max( file_size, data_start ) )
+
+    return [ ( boundaries[index], boundaries[index + 1] ) for index in range( len( boundaries ) - 1 ) ]
+
+class _Byte_range_stream( io.RawIOBase ):
+    
+    """
+    Read-only view of bytes [ start, end ) of an open binary file.
+    """
+
+    def __init__( self, raw_file, start, end ):
+        
+        self.raw_file = raw_file
+
+        self.raw_file.seek( start )
+
+        self.bytes_left = end - start
+
+    def readable( self ):
+        
+        return True
+
+    def readinto( self, buffer ):
+        
+        if self.bytes_left <= 0:
+            
+            return 0
+
+        view = memoryview( buffer )[:self.bytes_left]
+
+        bytes_read = self.raw_file.readinto( view )
+
+        self.bytes_left -= bytes_read
+
+        return bytes_read
+
+    def close( self ):
+        
+        self.raw_file.close()
+
+        super().close()
+
+class TSV_reader:
+    
+    """
+    Streaming reader for headed TSVs (.tsv or .tsv.gz).
+
+    The header is read when the reader is created and exposed as `column_names`. rows()
+    resolves whatever column names it's given to field positions once, up front, and then
+    yields each data row as a plain tuple of just those values, in the requested order --
+    no per-row dicts.
+
+        with TSV_reader( 'subject.tsv' ) as reader:
+            
+            for subject_id, species in reader.rows( [ 'id', 'species' ] ):
+                ...
+
+    As with dict( zip( column_names, values ) ), a column name that appears more than once
+    in the header refers to its last occurrence.
+
+    Given a `byte_range` (one of the ( start, end ) pairs returned by get_byte_range_shards()),
+    the reader still reads the header from the top of the (uncompressed) file, but only yields
+    the rows within that range.
+    """
+
+    def __init__( self, file_path, gzipped=False, buffer_size=DEFAULT_BUFFER_SIZE, byte_range=None ):
+        
+        self.file_path = file_path
+
+        self.IN = open_tsv( file_path, gzipped=gzipped, buffer_size=buffer_size )
+
+        self.column_names = next( self.IN ).rstrip( '\n' ).split( '\t' )
+
+        if byte_range is not None:
+            
+            if gzipped or file_path.endswith( '.gz' ):
+                
+                sys.exit( f"FATAL: Can't read a byte range from gzipped TSV '{file_path}'; aborting.\n" )
+
+            self.IN.close()
+
+            ( start, end ) = byte_range
+
+            self.IN = io.TextIOWrapper( io.BufferedReader( _Byte_range_stream( open( file_path, 'rb', buffering=0 ), start, end ), buffer_size=buffer_size ) )
+
+        self.column_indices = { column_name: index for index, column_name in enumerate( self.column_names ) }
+
+    def __enter__( self ):
+        
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ):
+        
+        self.close()
+
+    def close( self ):
+        
+        self.IN.close()
+
+    def has_columns( self, *column_names ):
+        
+        return all( column_name in self.column_indices for column_name in column_names )
+
+    def column_index( self, column_name ):
+        
+        if column_name not in self.column_indices:
+            
+            sys.exit( f"FATAL: TSV '{self.file_path}' has no column named '{column_name}'; aborting.\n" )
+
+        return self.column_indices[column_name]
+
+    def rows( self, columns=None ):
+        
+        """
+        Yield the remaining data rows as tuples of the values in `columns` (a list of column
+        names). If `columns` is None, yield every field of every row, as a list.
+        """
+
+        if columns is None:
+            
+            for line in self.IN:
+                
+                yield line.rstrip( '\n' ).split( '\t' )
+
+            return
+
+        indices = [ self.column_index( column_name ) for column_name in columns ]
+
+        # Only split as far as the rightmost field we actually need.
+
+        max_split = max( indices, default=-1 ) + 1
+
+        if len( indices ) == 0:
+            
+            for line in self.IN:
+                
+                yield tuple()
+
+        elif len( indices ) == 1:
+            
+            index = indices[0]
+
+            for line in self.IN:
+                
+                yield ( line.rstrip( '\n' ).split( '\t', max_split )[index], )
+
+        else:
+            
+            get_values = itemgetter( *indices )
+
+            for line in self.IN:
+                
+                yield get_values( line.rstrip( '\n' ).split( '\t', max_split ) )
+
+    def lines( self ):
+        
+        """
+        Yield the remaining data lines as-is (newlines included).
+        """
+
+        yield from self.IN
+
+    def column_values( self, column_name ):
+        
+        """
+        Yield the value of one column from each remaining data row.
+        """
+
+        index = self.column_index( column_name )
+
+        max_split = index + 1
+
+        for line in self.IN:
+            
+            yield line.rstrip( '\n' ).split( '\t', max_split )[index]
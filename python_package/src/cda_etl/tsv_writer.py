@@ -0,0 +1,58 @@
+import gzip
+import io
+
+# Size (in bytes) of the write buffer we put under every TSV we open. Rows are
+# small and many, so batching them into big sequential writes is much cheaper
+# than the 8K default (or one print() per row).
+
+DEFAULT_BUFFER_SIZE = 4 * 1024 * 1024
+
+class TSV_writer:
+    
+    """
+    Buffered writer for headed TSVs (.tsv or .tsv.gz).
+
+    Each row is written exactly as print( *values, sep='\\t', file=OUT ) would have written
+    it (str() of every value, tab-separated, newline-terminated), but into a large write
+    buffer, so lots of small rows cost a handful of system calls instead of one each.
+
+        with TSV_writer( 'case.tsv', [ 'case_id', 'cohort_id' ] ) as writer:
+            
+            writer.write_row( [ case_id, cohort_id ] )
+    """
+
+    def __init__( self, file_path, column_names=None, gzipped=False, buffer_size=DEFAULT_BUFFER_SIZE ):
+        
+        self.file_path = file_path
+
+        if gzipped or file_path.endswith( '.gz' ):
+            
+            self.OUT = io.TextIOWrapper( io.BufferedWriter( gzip.GzipFile( file_path, 'wb' ), buffer_size=buffer_size ) )
+
+        else:
+            
+            self.OUT = open( file_path, 'w', buffering=buffer_size )
+
+        if column_names is not None:
+            
+            self.write_row( column_names )
+
+    def __enter__( self ):
+        
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ):
+        
+        self.close()
+
+    def close( self ):
+        
+        self.OUT.close()
+
+    def write_row( self, values ):
+        
+        self.OUT.write( '\t'.join( map( str, values ) ) + '\n' )
+
+    def write_rows( self, rows ):
+        
+        self.OUT.writelines( '\t'.join( map( str, values ) ) + '\n' for values in rows )
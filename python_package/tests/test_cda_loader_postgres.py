@@ -0,0 +1,122 @@
+import gzip
+
+import pytest
+
+from cda_etl.load import cda_loader
+from cda_etl.load.cda_loader import CDA_loader
+
+INDEXES_AND_CONSTRAINTS = '''CREATE INDEX subject_species_idx ON public.subject USING btree (species)
+ALTER TABLE ONLY public.subject ADD CONSTRAINT subject_pkey PRIMARY KEY (integer_id_alias)
+ALTER TABLE ONLY public.file_describes_subject ADD CONSTRAINT file_describes_subject_subject_fkey FOREIGN KEY (subject_alias) REFERENCES public.subject(integer_id_alias)
+'''
+
+class Fake_connection:
+    
+    """
+    Stand-in for a pg8000.native.Connection: records every statement it's asked to run,
+    and the data of every COPY ... FROM STDIN, on the class so tests can inspect them.
+    """
+
+    statements = list()
+
+    copied_data = dict()
+
+    fail_copy_into = None
+
+    def __init__( self, **connection_parameters ):
+        
+        self.connection_parameters = connection_parameters
+
+        self.closed = False
+
+    def run( self, statement, stream=None ):
+        
+        Fake_connection.statements.append( statement )
+
+        if stream is not None:
+            
+            target_table = statement.split()[1]
+
+            if target_table == Fake_connection.fail_copy_into:
+                
+                raise RuntimeError( f"simulated COPY failure for {target_table}" )
+
+            Fake_connection.copied_data[target_table] = stream.read()
+
+    def close( self ):
+        
+        self.closed = True
+
+@pytest.fixture
+def load_dir( tmp_path, monkeypatch ):
+    
+    Fake_connection.statements = list()
+
+    Fake_connection.copied_data = dict()
+
+    Fake_connection.fail_copy_into = None
+
+    monkeypatch.setattr( cda_loader, 'connect_to_postgres', lambda connection_parameters: Fake_connection( **connection_parameters ) )
+
+    # CDA_loader reads its index/constraint definitions from, and writes its logs under, the working directory.
+
+    monkeypatch.chdir( tmp_path )
+
+    ( tmp_path / 'indexes_and_constraints.txt' ).write_text( INDEXES_AND_CONSTRAINTS )
+
+    tsv_dir = tmp_path / 'tsvs'
+
+    tsv_dir.mkdir()
+
+    ( tsv_dir / 'subject.tsv' ).write_text( 'id\tinteger_id_alias\tspecies\nsubject_1\t1\thuman\nsubject_2\t2\t\n' )
+
+    with gzip.open( tsv_dir / 'file_describes_subject.tsv.gz', 'wt' ) as OUT:
+        
+        OUT.write( 'file_alias\tsubject_alias\n10\t1\n11\t\n' )
+
+    ( tsv_dir / 'README.txt' ).write_text( 'not a table\n' )
+
+    return tsv_dir
+
+def test_load_dir_to_postgres_replaces_table_data_and_rebuilds_indexes( load_dir ):
+    
+    CDA_loader().load_dir_to_postgres( str( load_dir ), { 'database': 'cda' }, jobs=1 )
+
+    statements = Fake_connection.statements
+
+    # Drops (FKs first), then truncates, then COPYs, then rebuilds (index, PK, FK).
+
+    assert statements[0:3] == [
+
+        'ALTER TABLE ONLY public.file_describes_subject DROP CONSTRAINT file_describes_subject_subject_fkey;',
+        'ALTER TABLE ONLY public.subject DROP CONSTRAINT subject_pkey;',
+        'DROP INDEX subject_species_idx;'
+    ]
+
+    assert sorted( statements[3:5] ) == [ 'TRUNCATE file_describes_subject;', 'TRUNCATE subject;' ]
+
+    assert sorted( statements[5:7] ) == [
+
+        'COPY file_describes_subject (file_alias, subject_alias) FROM STDIN',
+        'COPY subject (id, integer_id_alias, species) FROM STDIN'
+    ]
+
+    assert statements[7:] == [ f"{line};" for line in INDEXES_AND_CONSTRAINTS.rstrip( '\n' ).split( '\n' ) ]
+
+    # Header lines are skipped and empty fields become NULLs.
+
+    assert Fake_connection.copied_data == {
+
+        'subject': b'subject_1\t1\thuman\nsubject_2\t2\t\\N\n',
+        'file_describes_subject': b'10\t1\n11\t\\N\n'
+    }
+
+def test_load_dir_to_postgres_stops_before_rebuilding_if_a_COPY_fails( load_dir ):
+    
+    Fake_connection.fail_copy_into = 'subject'
+
+    with pytest.raises( SystemExit, match='COPY into PostgreSQL failed' ):
+        
+        CDA_loader().load_dir_to_postgres( str( load_dir ), { 'database': 'cda' }, jobs=1 )
+
+    assert not any( statement.startswith( 'CREATE' ) or 'ADD CONSTRAINT' in statement for statement in Fake_connection.statements )